@@ -0,0 +1,127 @@
+"""
+    Farm contract arithmetic on decoded storage.
+
+    Functions repeat the integer operations of src/LeveragedFarmLendingSmartContract.py and
+    src/BTCLeveragedFarmLendingSmartContract.py, so projected indexes and debts are exactly
+    the values the contracts compute in the same block.
+"""
+
+from .quote import ceildiv
+
+
+FIXED_POINT_PRECISION = 12
+FIXED_POINT_FACTOR = 10 ** FIXED_POINT_PRECISION
+MUTEZ_FIXED_POINT_FACTOR = 10 ** (FIXED_POINT_PRECISION - 6)
+INITIAL_INDEX_VALUE = FIXED_POINT_FACTOR
+PARAMETERS_KEY = 0
+
+
+def get_parameters(storage):
+    """
+        Liquidation, flashloan and commission parameters, the only entry of the `parameters` big_map.
+    """
+    return storage['parameters'][PARAMETERS_KEY]
+
+
+def get_gross_credit_rate(storage):
+    adjusted_utilization = 0
+    if storage['totalSupply'] > 0:
+        adjusted_utilization = (
+            storage['total_gross_credit'] * storage['gross_credit_index'] * FIXED_POINT_FACTOR
+            // (storage['totalSupply'] * storage['deposit_index'])
+        )
+
+    rate_params = storage['rate_params']
+    rate_1 = rate_params['rate_1']
+    rate_diff = rate_params['rate_diff']
+    threshold_percent_1 = rate_params['threshold_percent_1'] * 10 ** (FIXED_POINT_PRECISION - 2)
+    threshold_percent_2 = rate_params['threshold_percent_2'] * 10 ** (FIXED_POINT_PRECISION - 2)
+
+    if adjusted_utilization < threshold_percent_1:
+        return rate_1 * adjusted_utilization // threshold_percent_1
+    if adjusted_utilization < threshold_percent_2:
+        return rate_1
+    if adjusted_utilization < FIXED_POINT_FACTOR:
+        return rate_1 + rate_diff * (adjusted_utilization - threshold_percent_2) // (FIXED_POINT_FACTOR - threshold_percent_2)
+    return rate_1 + rate_diff
+
+
+def project_indexes(storage, now):
+    """
+        Indexes after update_rates_lambda at `now`.
+        @returns dict with gross_credit_index, net_credit_index and deposit_index
+    """
+    if storage['index_update_dttm'] == now:
+        return {
+            'gross_credit_index': storage['gross_credit_index'],
+            'net_credit_index': storage['net_credit_index'],
+            'deposit_index': storage['deposit_index'],
+        }
+    dttm_delta = now - storage['index_update_dttm']
+    assert dttm_delta >= 0, 'now should not be earlier than index_update_dttm'
+
+    utilization = 0
+    if storage['totalSupply'] > 0:
+        utilization = (
+            storage['total_net_credit'] * storage['net_credit_index'] * FIXED_POINT_FACTOR
+            // (storage['totalSupply'] * storage['deposit_index'])
+        )
+
+    gross_credit_rate = get_gross_credit_rate(storage)
+    net_credit_rate = gross_credit_rate * 9 // 10 if storage['is_working'] else 0
+    deposit_rate = net_credit_rate * utilization // FIXED_POINT_FACTOR
+    return {
+        'gross_credit_index': ceildiv(
+            storage['gross_credit_index'] * (FIXED_POINT_FACTOR + gross_credit_rate * dttm_delta), FIXED_POINT_FACTOR),
+        'net_credit_index': ceildiv(
+            storage['net_credit_index'] * (FIXED_POINT_FACTOR + net_credit_rate * dttm_delta), FIXED_POINT_FACTOR),
+        'deposit_index': storage['deposit_index'] * (FIXED_POINT_FACTOR + deposit_rate * dttm_delta) // FIXED_POINT_FACTOR,
+    }
+
+
+def is_lb_price_refreshed(storage, now):
+    """
+        update_rates calls calculateLbPrice at `now`, it's throttled by lb_price_update_interval.
+    """
+    return (
+        storage['index_update_dttm'] != now
+        and storage['lb_price_update_dttm'] + storage['settings']['lb_price_update_interval'] <= now
+    )
+
+
+def project_lb_price(storage, tzbtc_pool, lqt_total, now):
+    """
+        lb_price after calculateLbPrice at `now` with the pool values from the callbacks.
+    """
+    if storage['lb_price_update_dttm'] == now or lqt_total == 0:
+        return storage['lb_price']
+    lb_price = storage['lb_price']
+    price_change = storage['settings']['lb_price_change_rate'] * (now - storage['lb_price_update_dttm'])
+    calculated_lb_price = tzbtc_pool * FIXED_POINT_FACTOR // lqt_total
+    if calculated_lb_price > lb_price:
+        return min(calculated_lb_price, lb_price * (FIXED_POINT_FACTOR + price_change) // FIXED_POINT_FACTOR)
+    return max(calculated_lb_price, lb_price * max(1, FIXED_POINT_FACTOR - price_change) // FIXED_POINT_FACTOR)
+
+
+def get_debt(gross_credit, gross_credit_index, is_btc=False):
+    """
+        Debt of the liquidity book entry, in mutez for the xtz farm and in tzBTC shares for the BTC farm.
+    """
+    debt = ceildiv(gross_credit * gross_credit_index, INITIAL_INDEX_VALUE)
+    return ceildiv(debt, FIXED_POINT_FACTOR if is_btc else MUTEZ_FIXED_POINT_FACTOR)
+
+
+def get_lb_shares_value(lb_shares, lb_price, tzbtc_price):
+    # multiplied by 10^8 as in liquidateLBFinalize
+    return lb_shares * 2 * lb_price * tzbtc_price // FIXED_POINT_FACTOR
+
+
+def get_debt_value(debt, tzbtc_price, xtz_price, is_btc=False):
+    # multiplied by 10^8 as in liquidateLBFinalize
+    if is_btc:
+        return tzbtc_price * debt
+    return xtz_price * debt * 100
+
+
+def is_liquidation_allowed(lb_shares_value, debt_value, liquidation_percent):
+    return lb_shares_value * 100 < debt_value * liquidation_percent
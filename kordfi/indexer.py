@@ -0,0 +1,303 @@
+"""
+    Indexer of the farm contract calls into a SQLite database.
+
+    Blocks are read from the node RPC since the farm origination. Applied transactions to the farms
+    (investLB, redeemLB, liquidate*, flashloan, depositLending, redeemLending, transfer, approve) are
+    decoded with the farm parameter type, `ledger` and `liquidity_book` diffs with the big_map types.
+    Rows of `batch_size` blocks are inserted with executemany in one transaction together with the block
+    hashes, the last stored block is the checkpoint an interrupted run resumes from. When the predecessor
+    of the next block differs from the stored hash, stored blocks are rolled back until the chains meet.
+
+    Usage:
+        python -m kordfi.indexer https://mainnet.api.tez.ie farms.db KT1...:<level> KT1...:<level>:btc [--watch]
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+from collections import namedtuple
+
+from pytezos import ContractInterface, pytezos
+
+from .keeper import Farm, parse_farm
+from .scanner import get_big_map_type, iter_lazy_storage_diffs, parse_timestamp
+
+
+DEFAULT_BATCH_SIZE = 100
+INDEXED_BIG_MAPS = ('ledger', 'liquidity_book')
+INDEXED_ENTRYPOINTS = frozenset([
+    'investLB', 'redeemLB', 'flashloan', 'depositLending', 'redeemLending', 'transfer', 'approve',
+])
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS farms (
+    address TEXT PRIMARY KEY,
+    start_level INTEGER NOT NULL,
+    is_btc INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    level INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    level INTEGER NOT NULL,
+    operation_hash TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    entrypoint TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    source TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    parameters TEXT NOT NULL,
+    internal INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_level ON calls (level);
+CREATE INDEX IF NOT EXISTS calls_contract_entrypoint ON calls (contract, entrypoint, level);
+CREATE INDEX IF NOT EXISTS calls_sender ON calls (sender, level);
+CREATE TABLE IF NOT EXISTS big_map_updates (
+    id INTEGER PRIMARY KEY,
+    level INTEGER NOT NULL,
+    operation_hash TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    big_map TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS big_map_updates_level ON big_map_updates (level);
+CREATE INDEX IF NOT EXISTS big_map_updates_key ON big_map_updates (contract, big_map, key, level);
+'''
+
+BigMap = namedtuple('BigMap', ['contract', 'name', 'key_type', 'value_type'])
+
+
+def to_json(value):
+    # unit and other michelson values without a JSON form are kept as their repr
+    return json.dumps(value, default=str, sort_keys=True)
+
+
+def is_indexed_entrypoint(entrypoint):
+    return entrypoint in INDEXED_ENTRYPOINTS or entrypoint.startswith('liquidate')
+
+
+def iter_transactions(operation):
+    """
+        Yields applied transactions of the operation contents and their internal operations,
+        with True for internal ones. `source` of an internal transaction is the calling contract.
+    """
+    for content in operation.get('contents', []):
+        if content.get('kind') != 'transaction':
+            continue
+        metadata = content.get('metadata', {})
+        if metadata.get('operation_result', {}).get('status') != 'applied':
+            continue
+        yield content, False
+        for internal in metadata.get('internal_operation_results', []):
+            if internal.get('kind') == 'transaction' and internal.get('result', {}).get('status') == 'applied':
+                yield internal, True
+
+
+class IndexStore:
+    """
+        SQLite tables of the indexed blocks, farm calls and big_map updates.
+    """
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def get_farms(self):
+        rows = self.connection.execute('SELECT address, start_level, is_btc FROM farms')
+        return {address: Farm(address, start_level, bool(is_btc)) for address, start_level, is_btc in rows}
+
+    def add_farms(self, farms):
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO farms (address, start_level, is_btc) VALUES (?, ?, ?)',
+                [(farm.address, farm.start_level, int(farm.is_btc)) for farm in farms],
+            )
+
+    def get_head(self):
+        """
+            @returns (level, hash) of the last stored block, None for an empty database
+        """
+        return self.connection.execute('SELECT level, hash FROM blocks ORDER BY level DESC LIMIT 1').fetchone()
+
+    def get_hash(self, level):
+        row = self.connection.execute('SELECT hash FROM blocks WHERE level = ?', (level,)).fetchone()
+        return row[0] if row else None
+
+    def write(self, blocks, calls, updates):
+        """
+            Inserts rows of processed blocks in one transaction, the blocks are the checkpoint.
+        """
+        with self.connection:
+            self.connection.executemany('INSERT INTO blocks (level, hash, timestamp) VALUES (?, ?, ?)', blocks)
+            self.connection.executemany(
+                'INSERT INTO calls (level, operation_hash, contract, entrypoint, sender, source, amount, parameters, internal) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                calls,
+            )
+            self.connection.executemany(
+                'INSERT INTO big_map_updates (level, operation_hash, contract, big_map, key, value) VALUES (?, ?, ?, ?, ?, ?)',
+                updates,
+            )
+
+    def rollback(self, level):
+        """
+            Removes rows of the blocks since `level`.
+        """
+        with self.connection:
+            for table in ('blocks', 'calls', 'big_map_updates'):
+                self.connection.execute(f'DELETE FROM {table} WHERE level >= ?', (level,))
+
+
+class RpcBlocks:
+    """
+        Blocks and contract scripts read from the node RPC.
+    """
+    def __init__(self, client):
+        self.client = client
+
+    def head(self):
+        return self.client.shell.head.header()['level']
+
+    def header(self, level):
+        return self.client.shell.blocks[level].header()
+
+    def operations(self, level):
+        return self.client.shell.blocks[level].operations.managers()
+
+    def script(self, address):
+        return self.client.shell.contracts[address].script()
+
+
+class FarmIndexer:
+    """
+        Writes calls and big_map updates of the farms into the store.
+        @params:
+            blocks - RpcBlocks or another source with head, header, operations and script
+            store - IndexStore, indexing resumes after its last block
+            farms - Farm tuples, farms can't be added to a store past their origination
+    """
+    def __init__(self, blocks, store, farms, batch_size=DEFAULT_BATCH_SIZE):
+        self.blocks = blocks
+        self.store = store
+        self.batch_size = batch_size
+        self.farms = {farm.address: farm for farm in farms}
+
+        head = store.get_head()
+        self.level, self.hash = head if head else (min(farm.start_level for farm in farms) - 1, None)
+        stored_farms = store.get_farms()
+        new_farms = [farm for address, farm in self.farms.items() if address not in stored_farms]
+        for farm in new_farms:
+            if farm.start_level <= self.level:
+                raise ValueError(f'farm {farm.address} is originated before the indexed level {self.level}')
+        store.add_farms(new_farms)
+
+        self.contracts = {}
+        self.big_maps = {}
+        for address in self.farms:
+            script = blocks.script(address)
+            contract = ContractInterface.from_micheline(script['code'])
+            storage = contract.storage.decode(script['storage'])
+            self.contracts[address] = contract
+            for name in INDEXED_BIG_MAPS:
+                key_type, value_type = get_big_map_type(contract, name).args
+                self.big_maps[storage[name]] = BigMap(address, name, key_type, value_type)
+
+    def decode_call(self, level, operation_hash, transaction, source, internal):
+        parameters = transaction.get('parameters', {'entrypoint': 'default', 'value': {'prim': 'Unit'}})
+        entrypoint = parameters['entrypoint']
+        if not is_indexed_entrypoint(entrypoint):
+            return None
+        contract = self.contracts[transaction['destination']]
+        value = getattr(contract, entrypoint).decode(parameters['value'])[entrypoint]
+        return (
+            level, operation_hash, transaction['destination'], entrypoint, transaction['source'], source,
+            int(transaction['amount']), to_json(value), int(internal),
+        )
+
+    def decode_updates(self, level, operation_hash, diff):
+        big_map = self.big_maps.get(int(diff['id']))
+        if big_map is None:
+            return
+        for update in diff['diff'].get('updates', []):
+            key = big_map.key_type.from_micheline_value(update['key']).to_python_object()
+            value = update.get('value')
+            if value is not None:
+                value = to_json(big_map.value_type.from_micheline_value(value).to_python_object())
+            yield level, operation_hash, big_map.contract, big_map.name, key, value
+
+    def process_block(self, level, calls, updates):
+        for operation in self.blocks.operations(level):
+            operation_hash = operation['hash']
+            source = operation['contents'][0]['source']
+            for transaction, internal in iter_transactions(operation):
+                if transaction.get('destination') in self.farms:
+                    call = self.decode_call(level, operation_hash, transaction, source, internal)
+                    if call is not None:
+                        calls.append(call)
+            for diff in iter_lazy_storage_diffs(operation):
+                updates.extend(self.decode_updates(level, operation_hash, diff))
+
+    def sync(self, level=None):
+        """
+            Processes blocks after the checkpoint up to `level`, the head by default.
+            @returns number of processed blocks, blocks processed again after a reorg are counted
+        """
+        head = level or self.blocks.head()
+        processed = 0
+        blocks, calls, updates = [], [], []
+        while self.level < head:
+            header = self.blocks.header(self.level + 1)
+            if self.hash is not None and header['predecessor'] != self.hash:
+                # reorg, the stored block isn't in the node chain
+                self.store.write(blocks, calls, updates)
+                blocks, calls, updates = [], [], []
+                self.store.rollback(self.level)
+                self.level -= 1
+                self.hash = self.store.get_hash(self.level)
+                continue
+
+            self.process_block(header['level'], calls, updates)
+            blocks.append((header['level'], header['hash'], parse_timestamp(header['timestamp'])))
+            self.level, self.hash = header['level'], header['hash']
+            processed += 1
+            if len(blocks) >= self.batch_size:
+                self.store.write(blocks, calls, updates)
+                blocks, calls, updates = [], [], []
+        self.store.write(blocks, calls, updates)
+        return processed
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Index farm calls and big_map updates into SQLite.')
+    parser.add_argument('rpc', help='Tezos node RPC url')
+    parser.add_argument('database', help='SQLite database file, indexing resumes from its last block')
+    parser.add_argument('farms', nargs='+', help='farm contracts as address:origination_level[:btc]')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='blocks inserted in one transaction')
+    parser.add_argument('--watch', action='store_true', help='index every new block')
+    args = parser.parse_args(args)
+
+    blocks = RpcBlocks(pytezos.using(shell=args.rpc))
+    store = IndexStore(args.database)
+    try:
+        indexer = FarmIndexer(blocks, store, [parse_farm(farm) for farm in args.farms], batch_size=args.batch_size)
+        while True:
+            processed = indexer.sync()
+            print(json.dumps({'level': indexer.level, 'processed': processed}))
+            if not args.watch:
+                break
+            while blocks.head() <= indexer.level:
+                time.sleep(1)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
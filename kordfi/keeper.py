@@ -0,0 +1,404 @@
+"""
+    Keeper for the farm contracts.
+
+    On every new block the keeper scans farms, plans updateIndexes and liquidation calls and
+    sends all of them in one operation group, so the manager operation overhead (signature,
+    counter, reveal check) is paid once per block. calculateLbPrice is accepted only from the
+    farm itself, it's refreshed by updateIndexes and liquidateLB through update_rates. When the
+    farm throttles refreshes with lb_price_update_interval, the keeper sends updateIndexes
+    ahead of the liquidations once the pool price deviates from lb_price. Onchain liquidations of
+    several farms go in one liquidateOnchainLBBatch when every member passes the farm's
+    onchain_liquidation_percent check with the quoted sale, otherwise one failing farm would revert it.
+
+    As the farm administrator the keeper also sells tzBTC dust accumulated by the XTZ farm,
+    minXtzBought is the tokenToXtz quote of the DEX pool less the dust slippage.
+
+    Gas and storage limits are cached per (contract, entrypoint) from the last simulation.
+    When every call of the group is cached, the group is injected with the cached limits and
+    prevalidated by the node, otherwise (or when prevalidation fails) every call is simulated
+    separately, failing calls are dropped and the cache is refreshed.
+
+    Usage:
+        python -m kordfi.keeper https://rpc.tzkt.io/mainnet edsk... KT1...:2500000 KT1...:2500000:btc [--watch]
+"""
+
+import argparse
+import json
+import time
+from collections import namedtuple
+
+from pytezos import pytezos
+from pytezos.operation.fees import calculate_fee
+from pytezos.rpc.errors import RpcError
+
+from .farm import FIXED_POINT_FACTOR, get_parameters, is_lb_price_refreshed
+from .quote import ceildiv, token_to_xtz, xtz_to_token
+from .scanner import LiquidationScanner, get_dex_pool, get_lb_dex_pool, rank_positions
+
+
+DEFAULT_INDEX_TTL = 24 * 60 * 60
+DEFAULT_GAS_RESERVE = 1000
+DEFAULT_BURN_RESERVE = 100
+DEFAULT_DUST_SLIPPAGE = 1
+
+Action = namedtuple('Action', ['address', 'entrypoint', 'argument', 'amount'])
+Farm = namedtuple('Farm', ['address', 'start_level', 'is_btc'])
+
+
+def get_liquidation_payment(debt, liquidation_price_percent):
+    """
+        Payment which repays the whole debt: liquidateLB repays payment * 100 / liquidation_price_percent.
+    """
+    return ceildiv(debt * liquidation_price_percent, 100)
+
+
+def get_dust_min_xtz_bought(tzBTC_dust, dex_pool, slippage):
+    """
+        @params:
+            dex_pool - (tokenPool, xtzPool) of the farm dex_contract_address
+            slippage - percent of the quote
+        @returns minXtzBought of sellTzBTCDust
+    """
+    xtz_bought, _, _ = token_to_xtz(*dex_pool, tzBTC_dust)
+    return int(xtz_bought * (100 - slippage) // 100)
+
+
+def get_onchain_sale_proceeds(lb_shares, lb_pool, dex_pool, is_btc=False):
+    """
+        Quote of the onchain liquidation sale: removeLiquidity of `lb_shares` from liquidity baking and
+        the sale of the withdrawn tzBTC (XTZ farm) or xtz (BTC farm) on the farm DEX.
+        @params:
+            lb_pool - (tokenPool, xtzPool, lqtTotal) of liquidity baking
+            dex_pool - (tokenPool, xtzPool) of dex_contract_address, None when it is liquidity baking
+        @returns mutez (XTZ farm) or tzBTC shares (BTC farm)
+    """
+    tokenPool, xtzPool, lqtTotal = lb_pool
+    xtz_withdrawn = lb_shares * xtzPool // lqtTotal
+    tokens_withdrawn = lb_shares * tokenPool // lqtTotal
+    if dex_pool is None:
+        dex_pool = (tokenPool - tokens_withdrawn, xtzPool - xtz_withdrawn)
+    if is_btc:
+        return tokens_withdrawn + xtz_to_token(*dex_pool, xtz_withdrawn)[0]
+    return xtz_withdrawn + token_to_xtz(*dex_pool, tokens_withdrawn)[0]
+
+
+def filter_onchain_batch(positions, lb_pool, dex_pool, onchain_liquidation_percent, is_btc=False):
+    """
+        liquidateOnchainLBBatchFinalize reverts the whole batch when a farm's share of the sale fails
+        the onchain_liquidation_percent check, positions are checked with the quoted sale of the batch
+        and the failing ones are dropped until the rest passes. A smaller batch sells with less slippage.
+        @params:
+            lb_pool, dex_pool - see get_onchain_sale_proceeds
+        @returns positions of the batch
+    """
+    batch = list(positions)
+    while batch:
+        lb_shares = sum(position.lb_shares for position in batch)
+        proceeds = get_onchain_sale_proceeds(lb_shares, lb_pool, dex_pool, is_btc)
+        passed = [
+            position for position in batch
+            if proceeds * position.lb_shares // lb_shares * 100 < position.debt * onchain_liquidation_percent
+        ]
+        if len(passed) == len(batch):
+            break
+        batch = passed
+    return batch
+
+
+def is_index_stale(storage, now, index_ttl):
+    return now - storage['index_update_dttm'] >= index_ttl
+
+
+def is_lb_price_deviated(market, lb_price_deviation):
+    """
+        @params:
+            lb_price_deviation - percent of lb_price, None to rely on update_rates refreshes
+        @returns True when the pool price is off lb_price and the next call won't refresh it
+    """
+    storage = market.storage
+    if lb_price_deviation is None or market.lqt_total == 0 or is_lb_price_refreshed(storage, market.now):
+        return False
+    pool_lb_price = market.tzbtc_pool * FIXED_POINT_FACTOR // market.lqt_total
+    return abs(pool_lb_price - storage['lb_price']) * 100 > storage['lb_price'] * lb_price_deviation
+
+
+def plan_farm_actions(address, market, positions, keeper_address, index_ttl=DEFAULT_INDEX_TTL, max_payment=None,
+                      onchain=False, is_btc=False, lb_price_deviation=None, dex_pool=None,
+                      dust_slippage=DEFAULT_DUST_SLIPPAGE, lb_pool=None):
+    """
+        @params:
+            address - farm contract address
+            market - scanner Market for the next block
+            positions - ranked scanner positions
+            keeper_address - keeper account, the farm administrator for onchain liquidations
+            index_ttl - seconds after the last index update to call updateIndexes
+            max_payment - liquidation budget for the farm, mutez or tzBTC shares, unlimited by default
+            onchain - use liquidateOnchainLB (liquidateOnchainLBBatch for several farms) when the keeper
+                is administrator and it's available
+            lb_price_deviation - see is_lb_price_deviated
+            dex_pool, dust_slippage - see get_dust_min_xtz_bought, the dust isn't sold without dex_pool
+            lb_pool - (tokenPool, xtzPool, lqtTotal) of liquidity baking, the batch members are checked
+                with filter_onchain_batch. Without the pool quotes farms are liquidated by separate calls.
+        @returns list of Action, the first liquidation updates indexes, so updateIndexes
+            is planned only without liquidations or to refresh a deviated lb_price before them
+    """
+    storage = market.storage
+    onchain = onchain and storage['administrator'] == keeper_address and get_parameters(storage)['onchain_liquidation_available']
+    budget = max_payment
+
+    actions = []
+    onchain_positions = []
+    for position in positions:
+        if not position.is_liquidatable or position.address == keeper_address:
+            continue
+        if onchain:
+            onchain_positions.append(position)
+            continue
+
+        payment = get_liquidation_payment(position.debt, get_parameters(storage)['liquidation_price_percent'])
+        if budget is not None:
+            payment = min(payment, budget)
+            budget -= payment
+        if payment == 0:
+            break
+        if is_btc:
+            actions.append(Action(address, 'liquidateLB', {'address': position.address, 'payment_shares': payment}, 0))
+        else:
+            actions.append(Action(address, 'liquidateLB', position.address, payment))
+
+    # several farms are liquidated with one LB and tzBTC sale
+    settings = storage.get('settings', {})
+    dex_is_lb = settings.get('dex_contract_address') == settings.get('liquidity_baking_address')
+    sale_pool = None if dex_is_lb else dex_pool
+    if len(onchain_positions) > 1 and lb_pool is not None and (dex_is_lb or dex_pool is not None):
+        onchain_positions = filter_onchain_batch(
+            onchain_positions, lb_pool, sale_pool, get_parameters(storage)['onchain_liquidation_percent'], is_btc,
+        )
+        if len(onchain_positions) > 1:
+            actions.append(Action(address, 'liquidateOnchainLBBatch', [position.address for position in onchain_positions], 0))
+            onchain_positions = []
+    # a failing call is dropped by the simulation alone
+    for position in onchain_positions:
+        actions.append(Action(address, 'liquidateOnchainLB', position.address, 0))
+
+    if is_lb_price_deviated(market, lb_price_deviation):
+        actions.insert(0, Action(address, 'updateIndexes', None, 0))
+    elif not actions and is_index_stale(storage, market.now, index_ttl):
+        actions.append(Action(address, 'updateIndexes', None, 0))
+
+    # tzBTC residuals kept by the XTZ farm are sold by the administrator once they exceed a call residual
+    tzBTC_dust = storage.get('tzBTC_dust', 0)
+    if (storage['administrator'] == keeper_address and dex_pool is not None
+            and tzBTC_dust > storage.get('settings', {}).get('tzBTC_dust_threshold', 0)):
+        actions.append(Action(address, 'sellTzBTCDust', get_dust_min_xtz_bought(tzBTC_dust, dex_pool, dust_slippage), 0))
+    return actions
+
+
+def get_content_key(content):
+    return content['destination'], content.get('parameters', {}).get('entrypoint', 'default')
+
+
+class EstimateCache:
+    """
+        Gas and storage limits by (destination, entrypoint), reserves are included.
+    """
+    def __init__(self):
+        self.limits = {}
+
+    def get(self, content):
+        return self.limits.get(get_content_key(content))
+
+    def update(self, contents):
+        for content in contents:
+            if content['kind'] == 'transaction':
+                self.limits[get_content_key(content)] = int(content['gas_limit']), int(content['storage_limit'])
+
+    def apply(self, opg):
+        """
+            Fills counters and cached limits of the bulk operation group.
+            @returns filled OperationGroup or None when some call isn't cached
+        """
+        limits = [self.get(content) for content in opg.contents]
+        if any(limit is None for limit in limits):
+            return None
+
+        opg = opg.fill()
+        thresholds = opg.context.get_fee_thresholds()
+        extra_size = (32 + 64) // len(opg.contents) + 1
+        for content, (gas_limit, storage_limit) in zip(opg.contents, limits):
+            content.update(
+                gas_limit=str(gas_limit),
+                storage_limit=str(storage_limit),
+                fee=str(calculate_fee(content, gas_limit, extra_size, thresholds=thresholds)),
+            )
+        return opg
+
+
+class Keeper:
+    """
+        Sends one operation group per block for all farms.
+        @params:
+            client - pytezos client with the keeper key
+            farms - list of Farm
+            index_ttl, max_payment, onchain, lb_price_deviation, dust_slippage - see plan_farm_actions,
+                max_payment is per farm
+    """
+    def __init__(self, client, farms, index_ttl=DEFAULT_INDEX_TTL, max_payment=None, onchain=False,
+                 lb_price_deviation=None, dust_slippage=DEFAULT_DUST_SLIPPAGE, gas_reserve=DEFAULT_GAS_RESERVE,
+                 burn_reserve=DEFAULT_BURN_RESERVE):
+        self.client = client
+        self.farms = farms
+        self.index_ttl = index_ttl
+        self.max_payment = max_payment
+        self.onchain = onchain
+        self.lb_price_deviation = lb_price_deviation
+        self.dust_slippage = dust_slippage
+        self.gas_reserve = gas_reserve
+        self.burn_reserve = burn_reserve
+        self.estimates = EstimateCache()
+        self.markets = {}
+        self.scanners = {
+            farm.address: LiquidationScanner(client, farm.address, farm.start_level, is_btc=farm.is_btc)
+            for farm in farms
+        }
+
+    def plan(self):
+        actions = []
+        for farm in self.farms:
+            scanner = self.scanners[farm.address]
+            scanner.sync()
+            market = self.markets[farm.address] = scanner.get_market()
+            positions = rank_positions(scanner.liquidity_book.entries, market, farm.is_btc)
+            settings = market.storage['settings']
+            # onchain liquidation batches are checked with the pool quotes
+            lb_pool = None
+            if self.onchain and sum(position.is_liquidatable for position in positions) > 1:
+                lb_pool = get_lb_dex_pool(self.client, settings['liquidity_baking_address'])
+            dex_pool = None
+            if market.storage.get('tzBTC_dust', 0) > 0 or (
+                    lb_pool is not None and settings['dex_contract_address'] != settings['liquidity_baking_address']):
+                dex_pool = get_dex_pool(self.client, settings['dex_contract_address'])
+            actions.extend(plan_farm_actions(
+                farm.address,
+                market,
+                positions,
+                self.client.key.public_key_hash(),
+                index_ttl=self.index_ttl,
+                max_payment=self.max_payment,
+                onchain=self.onchain,
+                is_btc=farm.is_btc,
+                lb_price_deviation=self.lb_price_deviation,
+                dex_pool=dex_pool,
+                dust_slippage=self.dust_slippage,
+                lb_pool=lb_pool,
+            ))
+        return actions
+
+    def make_calls(self, action):
+        """
+            Contract calls of the action, BTC liquidation is wrapped by tzBTC approvals.
+        """
+        farm = self.client.contract(action.address)
+        entrypoint = getattr(farm, action.entrypoint)
+        call = entrypoint() if action.argument is None else entrypoint(action.argument)
+        if action.amount:
+            call = call.with_amount(action.amount)
+        if action.entrypoint != 'liquidateLB' or not self.scanners[action.address].is_btc:
+            return [call]
+
+        tzbtc_token = self.client.contract(self.markets[action.address].storage['settings']['fa_tzBTC_address'])
+        payment = action.argument['payment_shares']
+        return [
+            tzbtc_token.approve(spender=action.address, value=payment),
+            call,
+            tzbtc_token.approve(spender=action.address, value=0),
+        ]
+
+    def simulate(self, calls_by_action):
+        """
+            Simulates every action separately, drops failing ones and refreshes the cache.
+            @returns autofilled OperationGroup of the applied actions or None
+        """
+        applied = []
+        for calls in calls_by_action:
+            try:
+                opg = self.client.bulk(*calls).autofill(gas_reserve=self.gas_reserve, burn_reserve=self.burn_reserve)
+            except RpcError:
+                continue
+            self.estimates.update(opg.contents)
+            applied.extend(calls)
+        if not applied:
+            return None
+        return self.client.bulk(*applied).autofill(gas_reserve=self.gas_reserve, burn_reserve=self.burn_reserve)
+
+    def send(self, actions, min_confirmations=0):
+        """
+            @returns injected operation group result or None when nothing is sent
+        """
+        if not actions:
+            return None
+        calls_by_action = [self.make_calls(action) for action in actions]
+        opg = self.estimates.apply(self.client.bulk(*[call for calls in calls_by_action for call in calls]))
+        if opg is not None:
+            try:
+                return opg.sign().inject(min_confirmations=min_confirmations)
+            except RpcError:
+                # limits are outdated or some call fails, e.g. the position is already liquidated
+                pass
+
+        opg = self.simulate(calls_by_action)
+        if opg is None:
+            return None
+        return opg.sign().inject(min_confirmations=min_confirmations)
+
+    def run_once(self, min_confirmations=0):
+        actions = self.plan()
+        return actions, self.send(actions, min_confirmations=min_confirmations)
+
+
+def parse_farm(value):
+    address, start_level, *flags = value.split(':')
+    return Farm(address, int(start_level), 'btc' in flags)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Update indexes and liquidate farm positions.')
+    parser.add_argument('rpc', help='Tezos node RPC url')
+    parser.add_argument('key', help='keeper secret key')
+    parser.add_argument('farms', nargs='+', help='farm contracts as address:origination_level[:btc]')
+    parser.add_argument('--index-ttl', type=int, default=DEFAULT_INDEX_TTL, help='seconds between index updates')
+    parser.add_argument('--max-payment', type=int, help='liquidation budget per farm and block')
+    parser.add_argument('--onchain', action='store_true', help='use onchain liquidation as the farm administrator')
+    parser.add_argument('--lb-price-deviation', type=float,
+                        help='percent of pool price deviation from lb_price to refresh it with updateIndexes')
+    parser.add_argument('--dust-slippage', type=float, default=DEFAULT_DUST_SLIPPAGE,
+                        help='percent of the DEX quote the tzBTC dust sale may lose')
+    parser.add_argument('--watch', action='store_true', help='run on every new block')
+    args = parser.parse_args(args)
+
+    client = pytezos.using(shell=args.rpc, key=args.key)
+    keeper = Keeper(
+        client,
+        [parse_farm(farm) for farm in args.farms],
+        index_ttl=args.index_ttl,
+        max_payment=args.max_payment,
+        onchain=args.onchain,
+        lb_price_deviation=args.lb_price_deviation,
+        dust_slippage=args.dust_slippage,
+    )
+    while True:
+        level = client.shell.head.header()['level']
+        actions, result = keeper.run_once()
+        print(json.dumps({
+            'level': level,
+            'actions': [action._asdict() for action in actions],
+            'hash': result['hash'] if result else None,
+        }))
+        if not args.watch:
+            break
+        while client.shell.head.header()['level'] <= level:
+            time.sleep(1)
+
+
+if __name__ == '__main__':
+    main()
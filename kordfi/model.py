@@ -0,0 +1,718 @@
+"""
+    Reference model of the farm contracts state transitions.
+
+    FarmModel and BTCFarmModel change decoded storage (the dict accepted by pytezos `run_code`,
+    big_maps as dicts) in place with the integer operations of the contracts, so storage
+    after a model call is the storage after the entry point. External effects are inputs:
+    `now`, the contract balance, callback values and oracle prices.
+
+    Entry points which call a self entry point return its parameters, e.g.:
+
+        model = FarmModel(storage)
+        params = model.redeem_lb(address, lqt_burned, balance, now, tzbtc_pool, lqt_total)
+        # DEX sells LB and tzBTC, the contract balance changes
+        payout = model.redeem_lb_finalize(**params, balance=new_balance)
+
+    A failed `sp.verify` raises ContractError with the contract message, failed division
+    by zero raises ZeroDivisionError.
+"""
+
+from .farm import (
+    FIXED_POINT_FACTOR, INITIAL_INDEX_VALUE, MUTEZ_FIXED_POINT_FACTOR, get_parameters, project_indexes, project_lb_price,
+)
+from .quote import ceildiv
+
+
+class ContractError(Exception):
+    """
+        Contract call failure, args[0] is the FAILWITH message or None.
+    """
+
+
+def as_nat(value, message=None):
+    if value < 0:
+        raise ContractError(message)
+    return value
+
+
+def verify(condition, message):
+    if not condition:
+        raise ContractError(message)
+
+
+def address_order(address):
+    """
+        Sort key of the Michelson address comparison: implicit accounts go before contracts.
+    """
+    return address.startswith('KT'), address
+
+
+class FarmModel:
+    """
+        LeveragedFarmLendingSmartContract, amounts are in mutez.
+        @params:
+            storage - decoded storage, changed in place
+    """
+    is_btc = False
+    amount_factor = MUTEZ_FIXED_POINT_FACTOR
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    # @@ Rates
+
+    def update_rates_lambda(self, now):
+        as_nat(now - self.storage['index_update_dttm'])
+        self.storage.update(project_indexes(self.storage, now))
+
+    def calculate_lb_price(self, now):
+        storage = self.storage
+        as_nat(now - storage['lb_price_update_dttm'])
+        local_params = storage['local_params']
+        storage['lb_price'] = project_lb_price(storage, local_params['tzbtc_pool'], local_params['lqt_total'], now)
+        storage['index_update_dttm'] = now
+        storage['lb_price_update_dttm'] = now
+
+    def update_lb_price(self, now, tzbtc_pool, lqt_total):
+        self.storage['local_params']['tzbtc_pool'] = tzbtc_pool
+        self.storage['local_params']['lqt_total'] = lqt_total
+        self.calculate_lb_price(now)
+
+    def update_rates(self, now, tzbtc_pool, lqt_total):
+        """
+            update_rates with the values of updateTzbtcPool and updateLqtTotal callbacks,
+            calculateLbPrice is applied before the entry point changes, it doesn't depend on them.
+        """
+        storage = self.storage
+        if storage['index_update_dttm'] != now:
+            self.update_rates_lambda(now)
+            if storage['lb_price_update_dttm'] + storage['settings']['lb_price_update_interval'] <= now:
+                self.update_lb_price(now, tzbtc_pool, lqt_total)
+            else:
+                storage['index_update_dttm'] = now
+
+    def update_indexes(self, now, tzbtc_pool, lqt_total):
+        if self.storage['index_update_dttm'] != now:
+            self.update_rates_lambda(now)
+        if self.storage['lb_price_update_dttm'] != now:
+            self.update_lb_price(now, tzbtc_pool, lqt_total)
+
+    def router_update_lb_price(self, sender, now, tzbtc_pool, lqt_total):
+        """
+            updateLbPrice with the pool values forwarded by the router, the price is calculated once per block.
+        """
+        storage = self.storage
+        verify(sender == storage['settings'].get('router_address'), 'Forbidden.')
+        if storage['lb_price_update_dttm'] != now:
+            if storage['index_update_dttm'] != now:
+                self.update_rates_lambda(now)
+            self.update_lb_price(now, tzbtc_pool, lqt_total)
+
+    def check_total_supply_net_credit_inequation(self):
+        storage = self.storage
+        verify(
+            storage['totalSupply'] * storage['deposit_index'] >= storage['total_net_credit'] * storage['net_credit_index'],
+            'total deposit and net credit inequation error',
+        )
+
+    # @@ Lending part
+
+    def add_address_if_necessary(self, address):
+        if address not in self.storage['ledger']:
+            self.storage['ledger'][address] = {'balance': 0, 'approvals': {}}
+
+    def deposit_lending(self, sender, amount, now, tzbtc_pool, lqt_total):
+        storage = self.storage
+        self.update_rates(now, tzbtc_pool, lqt_total)
+
+        self.add_address_if_necessary(sender)
+        deposit_amount = amount * self.amount_factor * INITIAL_INDEX_VALUE // storage['deposit_index']
+        storage['ledger'][sender]['balance'] += deposit_amount
+        storage['totalSupply'] += deposit_amount
+
+    def redeem_lending(self, sender, amount, balance, now, tzbtc_pool, lqt_total):
+        storage = self.storage
+        verify(sender in storage['ledger'], 'Unknown Address.')
+        verify(balance >= amount, 'Not enough balance')
+
+        self.update_rates(now, tzbtc_pool, lqt_total)
+
+        redeem_deposit = ceildiv(amount * self.amount_factor * INITIAL_INDEX_VALUE, storage['deposit_index'])
+        storage['ledger'][sender]['balance'] = as_nat(storage['ledger'][sender]['balance'] - redeem_deposit, 'too much amount')
+        storage['totalSupply'] = as_nat(storage['totalSupply'] - redeem_deposit, 'wrong total deposit value')
+
+        self.check_total_supply_net_credit_inequation()
+
+    # @@ Farm part
+
+    def get_liquidity_entry(self, address):
+        liquidity_book = self.storage['liquidity_book']
+        if address not in liquidity_book:
+            liquidity_book[address] = {'lb_shares': 0, 'net_credit': 0, 'gross_credit': 0}
+        return liquidity_book[address]
+
+    def add_credit(self, address, amount):
+        """
+            Adds net and gross credit of the borrowed amount.
+        """
+        storage = self.storage
+        entry = self.get_liquidity_entry(address)
+        a = amount * self.amount_factor * INITIAL_INDEX_VALUE
+
+        additional_net_credit = ceildiv(a, storage['net_credit_index'])
+        entry['net_credit'] += additional_net_credit
+        storage['total_net_credit'] += additional_net_credit
+
+        additional_gross_credit = ceildiv(a, storage['gross_credit_index'])
+        entry['gross_credit'] += additional_gross_credit
+        storage['total_gross_credit'] += additional_gross_credit
+        return entry
+
+    def get_debt(self, gross_credit, lb_shares=1, total_lb_shares=1):
+        return ceildiv(
+            ceildiv(gross_credit * self.storage['gross_credit_index'] * lb_shares, INITIAL_INDEX_VALUE * total_lb_shares),
+            self.amount_factor,
+        )
+
+    def reset_liquidity_entry(self, address):
+        storage = self.storage
+        entry = storage['liquidity_book'][address]
+        debt = self.get_debt(entry['gross_credit'])
+
+        storage['total_net_credit'] = as_nat(storage['total_net_credit'] - entry['net_credit'])
+        storage['total_gross_credit'] = as_nat(storage['total_gross_credit'] - entry['gross_credit'])
+
+        entry['lb_shares'] = 0
+        entry['net_credit'] = 0
+        entry['gross_credit'] = 0
+        return debt
+
+    def partial_reset_liquidity_entry(self, address, lqt_burned):
+        storage = self.storage
+        entry = storage['liquidity_book'][address]
+        total_lb_shares = entry['lb_shares']
+        debt = self.get_debt(entry['gross_credit'], lqt_burned, total_lb_shares)
+
+        liquidated_gross_credit = entry['gross_credit'] * lqt_burned // total_lb_shares
+        storage['total_gross_credit'] = as_nat(storage['total_gross_credit'] - liquidated_gross_credit)
+        entry['gross_credit'] = as_nat(entry['gross_credit'] - liquidated_gross_credit, 'wrong liquidated gross credit')
+
+        liquidated_net_credit = entry['net_credit'] * lqt_burned // total_lb_shares
+        storage['total_net_credit'] = as_nat(storage['total_net_credit'] - liquidated_net_credit)
+        entry['net_credit'] = as_nat(entry['net_credit'] - liquidated_net_credit, 'wrong liquidated net credit')
+
+        entry['lb_shares'] = as_nat(total_lb_shares - lqt_burned, 'wrong liquidated shares')
+        return debt
+
+    def sell_lb(self, shares):
+        self.storage['lb_shares'] = as_nat(self.storage['lb_shares'] - shares)
+
+    def liquidate_entry(self, address, liquidated_debt, tzbtc_price, xtz_price):
+        """
+            Common part of liquidateLBFinalize: checks the liquidation and reduces the entry.
+            @returns liquidated debt and LB shares
+        """
+        storage = self.storage
+        entry = storage['liquidity_book'][address]
+        lb_shares = entry['lb_shares']
+        # *_value variables multiplied by 10^8
+        lb_shares_value = lb_shares * 2 * storage['lb_price'] * tzbtc_price // FIXED_POINT_FACTOR
+        debt = self.get_debt(entry['gross_credit'])
+        if self.is_btc:
+            debt_value = tzbtc_price * debt
+            liquidated_debt = min(liquidated_debt, debt)
+        else:
+            debt_value = xtz_price * debt * 100
+        verify(lb_shares_value * 100 < debt_value * get_parameters(storage)['liquidation_percent'], 'liquidation is not allowed')
+
+        liquidated_gross_credit = min(
+            liquidated_debt * self.amount_factor * INITIAL_INDEX_VALUE // storage['gross_credit_index'],
+            entry['gross_credit'],
+        )
+        liquidated_net_credit = entry['net_credit'] * liquidated_gross_credit // entry['gross_credit']
+        liquidated_lb_shares = lb_shares * liquidated_gross_credit // entry['gross_credit']
+
+        storage['total_net_credit'] = as_nat(storage['total_net_credit'] - liquidated_net_credit)
+        storage['total_gross_credit'] = as_nat(storage['total_gross_credit'] - liquidated_gross_credit)
+        entry['gross_credit'] = as_nat(entry['gross_credit'] - liquidated_gross_credit, 'wrong liquidated gross credit')
+        entry['net_credit'] = as_nat(entry['net_credit'] - liquidated_net_credit, 'wrong liquidated net credit')
+        entry['lb_shares'] = as_nat(lb_shares - liquidated_lb_shares, 'wrong liquidated shares')
+        return liquidated_debt, liquidated_lb_shares
+
+    def check_loaned(self, address):
+        liquidity_book = self.storage['liquidity_book']
+        verify(address in liquidity_book, 'Unknown Address.')
+        verify(liquidity_book[address]['net_credit'] > 0, 'not loaned')
+
+    def add_onchain_liquidation_supply(self, delta, debt):
+        """
+            Distributes onchain liquidation result between the administrator and depositors.
+            @returns administrator commission
+        """
+        storage = self.storage
+        extra_supply = delta * self.amount_factor - debt * self.amount_factor
+        if extra_supply > 0:
+            admin_comm = extra_supply * get_parameters(storage)['onchain_liquidation_comm'] // 100 // self.amount_factor
+            storage['deposit_index'] += (
+                as_nat(extra_supply - admin_comm * self.amount_factor) * FIXED_POINT_FACTOR // storage['totalSupply']
+            )
+            return admin_comm
+        storage['deposit_index'] = as_nat(
+            storage['deposit_index'] - ceildiv(-extra_supply * FIXED_POINT_FACTOR, storage['totalSupply'])
+        )
+        return 0
+
+    def sell_lb_batch(self, addresses):
+        """
+            Common part of liquidateOnchainLBBatch: checks the farms and sells their LB shares together.
+            @returns sold LB shares
+        """
+        lb_shares = 0
+        for address in addresses:
+            self.check_loaned(address)
+            lb_shares += self.storage['liquidity_book'][address]['lb_shares']
+        self.sell_lb(lb_shares)
+        return lb_shares
+
+    def add_onchain_liquidation_batch_supply(self, addresses, lb_shares, delta):
+        """
+            Splits the batch sale result between the farms in proportion to their LB shares,
+            the last farm in the set order gets the rest.
+            @returns administrator commission
+        """
+        storage = self.storage
+        parameters = get_parameters(storage)
+        admin_comm = profit = loss = 0
+        for address in sorted(set(addresses), key=address_order):
+            entry_lb_shares = storage['liquidity_book'][address]['lb_shares']
+            entry_delta = delta * entry_lb_shares // lb_shares if lb_shares > 0 else 0
+            delta -= entry_delta
+            lb_shares = as_nat(lb_shares - entry_lb_shares)
+
+            debt = self.reset_liquidity_entry(address)
+            verify(entry_delta * 100 < debt * parameters['onchain_liquidation_percent'], 'liquidation is not allowed')
+            extra_supply = entry_delta * self.amount_factor - debt * self.amount_factor
+            if extra_supply > 0:
+                entry_admin_comm = extra_supply * parameters['onchain_liquidation_comm'] // 100 // self.amount_factor
+                admin_comm += entry_admin_comm
+                profit += extra_supply - entry_admin_comm * self.amount_factor
+            else:
+                loss -= extra_supply
+        # the sale result left when the LB shares ran out before the last farm
+        profit += delta * self.amount_factor
+
+        storage['deposit_index'] = as_nat(
+            storage['deposit_index'] + profit * FIXED_POINT_FACTOR // storage['totalSupply']
+            - ceildiv(loss * FIXED_POINT_FACTOR, storage['totalSupply'])
+        )
+        return admin_comm
+
+    def get_tzbtc_dust_value(self, xtz_amount, lqt_amount):
+        """
+            Value of tzBTC_dust_delta at the LB pool rate of a call, which added or removed
+            `lqt_amount` LB shares for `xtz_amount`, resets tzBTC_dust_delta.
+        """
+        local_params = self.storage['local_params']
+        value = 0
+        if local_params['tzBTC_dust_delta'] != 0 and lqt_amount > 0 and local_params['tzbtc_pool'] > 0:
+            # Michelson EDIV rounds toward minus infinity for a positive divisor, the same as //
+            value = local_params['tzBTC_dust_delta'] * xtz_amount * local_params['lqt_total'] // (lqt_amount * local_params['tzbtc_pool'])
+            if value > 0:
+                value = value * 999 * 999 // 1_000_000
+        local_params['tzBTC_dust_delta'] = 0
+        return value
+
+    def add_tzbtc_dust_credit(self, balance_delta, lqt_amount):
+        return as_nat(balance_delta + self.get_tzbtc_dust_value(balance_delta, lqt_amount), 'negative balance delta error')
+
+    def sell_tzbtc(self, tzBTC_shares=0):
+        """
+            sellTzBTC callback, `tzBTC_shares` is the tzBTC balance of the contract.
+            @returns sold tzBTC shares, a residual up to tzBTC_dust_threshold is kept as tzBTC_dust
+                and its value is credited to the farmer by the finalize of the call
+        """
+        storage = self.storage
+        local_params = storage['local_params']
+        verify(local_params['fa_tzBTC_callback_status'], 'Bad status.')
+        local_params['fa_tzBTC_callback_status'] = False
+
+        dust = min(storage['tzBTC_dust'], tzBTC_shares)
+        used_dust = storage['tzBTC_dust'] - dust
+        residual = tzBTC_shares - dust
+        kept_residual = 0 if residual > storage['settings']['tzBTC_dust_threshold'] else residual
+
+        local_params['tzBTC_dust_delta'] = kept_residual - used_dust
+        storage['tzBTC_dust'] = dust + kept_residual
+        return residual - kept_residual
+
+    def sell_tzbtc_dust(self, sender):
+        """
+            @returns sold tzBTC shares, the xtz stays on the contract balance
+        """
+        storage = self.storage
+        verify(storage['administrator'] == sender, 'Forbidden.')
+        verify(storage['tzBTC_dust'] > 0, 'no tzBTC dust')
+        tzBTC_shares = storage['tzBTC_dust']
+        storage['tzBTC_dust'] = 0
+        return tzBTC_shares
+
+    def invest_lb(self, sender, amount2tzBTC, amount2Lqt, amount, balance, now, tzbtc_pool, lqt_total):
+        """
+            @params:
+                amount - sent xtz
+                balance - contract balance with the sent amount
+            @returns upfront commission, investLBFinalize reads its parameters from local_params
+        """
+        storage = self.storage
+        self.update_rates(now, tzbtc_pool, lqt_total)
+
+        settings = storage['settings']
+        upfront_commission = (
+            as_nat(amount2Lqt + amount2tzBTC - amount) * settings['upfront_commission']
+            // as_nat(100000 - settings['upfront_commission'])
+        )
+        verify(
+            (amount2Lqt + amount2tzBTC) * 10 <= as_nat(amount - upfront_commission) * settings['max_leverage'],
+            'leverage error',
+        )
+
+        local_params = storage['local_params']
+        local_params['fa_tzBTC_callback_status'] = True
+        local_params['fa_lb_callback_status'] = True
+        local_params['invest_address'] = sender
+        local_params['invest_initial_balance'] = as_nat(balance - amount)
+        local_params['invest_amount2Lqt'] = amount2Lqt
+        return upfront_commission
+
+    def invest_lb_finalize(self, lb_shares, balance):
+        """
+            @params:
+                lb_shares - LB shares balance of the contract
+                balance - contract balance after the DEX calls
+            @returns xtz sent to the farmer, the value of the kept tzBTC residual above the spent xtz
+        """
+        storage = self.storage
+        local_params = storage['local_params']
+        verify(local_params['fa_lb_callback_status'], 'Bad status.')
+        local_params['fa_lb_callback_status'] = False
+
+        lb_delta = as_nat(lb_shares - storage['lb_shares'], 'negative lb delta error')
+        balance_delta = as_nat(local_params['invest_initial_balance'] - balance, 'negative balance delta error')
+        spent = balance_delta - self.get_tzbtc_dust_value(local_params['invest_amount2Lqt'], lb_delta)
+        entry = self.add_credit(local_params['invest_address'], max(spent, 0))
+
+        entry['lb_shares'] += lb_delta
+        storage['lb_shares'] = lb_shares
+
+        self.check_total_supply_net_credit_inequation()
+        return max(-spent, 0)
+
+    def redeem_lb(self, sender, lqt_burned, balance, now, tzbtc_pool, lqt_total):
+        """
+            @returns redeemLBFinalize parameters, `balance` is the contract balance before the DEX calls
+        """
+        self.update_rates(now, tzbtc_pool, lqt_total)
+        self.sell_lb(lqt_burned)
+        self.storage['local_params']['fa_tzBTC_callback_status'] = True
+        return {'address': sender, 'lqt_burned': lqt_burned, 'initial_balance': balance}
+
+    def redeem_lb_finalize(self, address, lqt_burned, initial_balance, balance):
+        """
+            @returns xtz sent to the farmer
+        """
+        balance_delta = self.add_tzbtc_dust_credit(as_nat(balance - initial_balance, 'negative balance delta error'), lqt_burned)
+        debt = self.partial_reset_liquidity_entry(address, lqt_burned)
+        return as_nat(balance_delta - debt)
+
+    def liquidate_lb(self, sender, address, amount, now, tzbtc_pool, lqt_total):
+        """
+            @returns liquidateLBFinalize parameters
+        """
+        self.update_rates(now, tzbtc_pool, lqt_total)
+        self.check_loaned(address)
+        return {'address': address, 'sender': sender, 'sent_amount': amount}
+
+    def liquidate_lb_finalize(self, address, sender, sent_amount, tzbtc_price, xtz_price):
+        """
+            @params:
+                tzbtc_price, xtz_price - oracle get_price views
+            @returns administrator commission and LB shares sent to the liquidator
+        """
+        storage = self.storage
+        parameters = get_parameters(storage)
+        liquidated_debt_amount = sent_amount * 100 // parameters['liquidation_price_percent']
+        _, liquidated_lb_shares = self.liquidate_entry(address, liquidated_debt_amount, tzbtc_price, xtz_price)
+
+        extra_supply = as_nat(sent_amount - liquidated_debt_amount, 'negative balance delta error')
+        admin_comm = extra_supply * parameters['liquidation_comm'] // 100
+        storage['deposit_index'] += (
+            as_nat(extra_supply - admin_comm, 'admin commission error') * MUTEZ_FIXED_POINT_FACTOR * FIXED_POINT_FACTOR
+            // storage['totalSupply']
+        )
+        storage['lb_shares'] = as_nat(storage['lb_shares'] - liquidated_lb_shares)
+        return admin_comm, liquidated_lb_shares
+
+    def check_onchain_liquidation(self, sender):
+        storage = self.storage
+        verify(storage['administrator'] == sender, 'Forbidden.')
+        verify(get_parameters(storage)['onchain_liquidation_available'], 'Onchain liquidation disabled.')
+
+    def liquidate_onchain_lb(self, sender, address, balance, now, tzbtc_pool, lqt_total):
+        """
+            @returns liquidateOnchainLBFinalize parameters, `balance` is the contract balance before the DEX calls
+        """
+        self.check_onchain_liquidation(sender)
+        self.update_rates(now, tzbtc_pool, lqt_total)
+        self.check_loaned(address)
+
+        self.sell_lb(self.storage['liquidity_book'][address]['lb_shares'])
+        self.storage['local_params']['fa_tzBTC_callback_status'] = True
+        return {'address': address, 'initial_balance': balance}
+
+    def liquidate_onchain_lb_finalize(self, address, initial_balance, balance):
+        """
+            @returns administrator commission
+        """
+        delta = self.add_tzbtc_dust_credit(
+            as_nat(balance - initial_balance, 'negative balance delta error'),
+            self.storage['liquidity_book'][address]['lb_shares'],
+        )
+        debt_amount = self.reset_liquidity_entry(address)
+        verify(delta * 100 < debt_amount * get_parameters(self.storage)['onchain_liquidation_percent'], 'liquidation is not allowed')
+        return self.add_onchain_liquidation_supply(delta, debt_amount)
+
+    def liquidate_onchain_lb_batch(self, sender, addresses, balance, now, tzbtc_pool, lqt_total):
+        """
+            @returns liquidateOnchainLBBatchFinalize parameters, `balance` is the contract balance before the DEX calls
+        """
+        self.check_onchain_liquidation(sender)
+        addresses = sorted(set(addresses), key=address_order)
+        verify(addresses, 'empty batch')
+        self.update_rates(now, tzbtc_pool, lqt_total)
+
+        lb_shares = self.sell_lb_batch(addresses)
+        self.storage['local_params']['fa_tzBTC_callback_status'] = True
+        return {'addresses': addresses, 'lb_shares': lb_shares, 'initial_balance': balance}
+
+    def liquidate_onchain_lb_batch_finalize(self, addresses, lb_shares, initial_balance, balance):
+        """
+            @returns administrator commission
+        """
+        delta = self.add_tzbtc_dust_credit(as_nat(balance - initial_balance, 'negative balance delta error'), lb_shares)
+        return self.add_onchain_liquidation_batch_supply(addresses, lb_shares, delta)
+
+    # @@ Flashloan part
+
+    def add_flashloan_deposit_commission(self, requested):
+        storage = self.storage
+        if storage['totalSupply'] > 0:
+            storage['deposit_index'] += (
+                get_parameters(storage)['flashloan_deposit_commission'] * requested * self.amount_factor * FIXED_POINT_FACTOR
+                // storage['totalSupply'] // 100_000
+            )
+
+    def flashloan(self, requested_xtz, now, tzbtc_pool, lqt_total):
+        storage = self.storage
+        parameters = get_parameters(storage)
+        verify(parameters['flashloan_available'], 'flashloan is not available')
+        verify(requested_xtz > 0, 'zero requested amount')
+
+        self.update_rates(now, tzbtc_pool, lqt_total)
+
+        storage['flashloan_amount'] += ceildiv(
+            requested_xtz * (100_000 + parameters['flashloan_admin_commission'] + parameters['flashloan_deposit_commission']),
+            100_000,
+        )
+        self.add_flashloan_deposit_commission(requested_xtz)
+
+    def flashloan_return(self, amount):
+        self.storage['flashloan_amount'] = max(self.storage['flashloan_amount'] - amount, 0)
+
+    def flashloan_finalize(self):
+        verify(self.storage['flashloan_amount'] == 0, 'loan error')
+
+
+class BTCFarmModel(FarmModel):
+    """
+        BTCLeveragedFarmLendingSmartContract, amounts are in tzBTC shares.
+    """
+    is_btc = True
+    amount_factor = FIXED_POINT_FACTOR
+
+    def deposit_lending(self, sender, shares, now, tzbtc_pool, lqt_total):
+        super().deposit_lending(sender, shares, now, tzbtc_pool, lqt_total)
+        self.storage['tzBTC_shares'] += shares
+
+    def redeem_lending(self, sender, shares, now, tzbtc_pool, lqt_total):
+        storage = self.storage
+        verify(sender in storage['ledger'], 'Unknown Address.')
+
+        self.update_rates(now, tzbtc_pool, lqt_total)
+
+        redeem_shares = ceildiv(shares * FIXED_POINT_FACTOR * INITIAL_INDEX_VALUE, storage['deposit_index'])
+        storage['ledger'][sender]['balance'] = as_nat(storage['ledger'][sender]['balance'] - redeem_shares, 'too much amount')
+        storage['totalSupply'] = as_nat(storage['totalSupply'] - redeem_shares, 'wrong total deposit value')
+        storage['tzBTC_shares'] = as_nat(storage['tzBTC_shares'] - shares)
+
+        self.check_total_supply_net_credit_inequation()
+
+    def update_tzbtc_callback(self, tzBTC_shares):
+        local_params = self.storage['local_params']
+        verify(local_params['fa_tzBTC_callback_status'], 'Bad status.')
+        local_params['fa_tzBTC_callback_status'] = False
+        self.storage['tzBTC_shares'] = tzBTC_shares
+
+    def update_lb_callback(self, lb_shares):
+        local_params = self.storage['local_params']
+        verify(local_params['fa_lb_callback_status'], 'Bad status.')
+        local_params['fa_lb_callback_status'] = False
+        self.storage['lb_shares'] = lb_shares
+
+    def invest_lb(self, sender, amount2tzBTC, amount2Lqt, tzBTC2xtz, amount, now, tzbtc_pool, lqt_total):
+        """
+            @params:
+                amount - sent xtz
+            @returns upfront commission and investLBFinalize parameters, the contract calls
+                update_lb_callback and update_tzbtc_callback before investLBFinalize
+        """
+        storage = self.storage
+        self.update_rates(now, tzbtc_pool, lqt_total)
+
+        upfront_commission = 0
+        commission = storage['settings']['upfront_commission']
+        borrow = amount2Lqt * 2 - amount
+        if borrow >= 0:
+            upfront_commission = borrow * commission // as_nat(100000 - commission)
+        verify(amount <= amount2tzBTC + amount2Lqt + upfront_commission, 'sent amount error')
+
+        storage['local_params']['fa_lb_callback_status'] = True
+        storage['local_params']['fa_tzBTC_callback_status'] = True
+        return upfront_commission, {
+            'address': sender,
+            'initial_lb_shares': storage['lb_shares'],
+            'initial_tzBTC_shares': storage['tzBTC_shares'],
+            'tzBTC2xtz': tzBTC2xtz,
+        }
+
+    def invest_lb_finalize(self, address, initial_lb_shares, initial_tzBTC_shares, tzBTC2xtz):
+        storage = self.storage
+        tzbtc_delta = as_nat(initial_tzBTC_shares - storage['tzBTC_shares'], 'negative tzBTC delta error')
+        lb_delta = as_nat(storage['lb_shares'] - initial_lb_shares, 'negative lb delta error')
+
+        # 2 * (max_leverage - 1) * tzBTC2xtz <= (max_leverage - 2) * tzTBC_delta
+        max_leverage = storage['settings']['max_leverage']
+        verify(
+            2 * as_nat(max_leverage - 10) * tzBTC2xtz <= as_nat(max_leverage - 20) * tzbtc_delta,
+            'leverage error',
+        )
+
+        entry = self.add_credit(address, tzbtc_delta)
+        entry['lb_shares'] += lb_delta
+
+        self.check_total_supply_net_credit_inequation()
+
+    def redeem_lb(self, sender, lqt_burned, now, tzbtc_pool, lqt_total):
+        """
+            @returns redeemLBFinalize parameters, the contract calls update_tzbtc_callback before it
+        """
+        self.update_rates(now, tzbtc_pool, lqt_total)
+        self.sell_lb(lqt_burned)
+        self.storage['local_params']['fa_tzBTC_callback_status'] = True
+        return {'address': sender, 'lqt_burned': lqt_burned, 'initial_tzBTC_shares': self.storage['tzBTC_shares']}
+
+    def redeem_lb_finalize(self, address, lqt_burned, initial_tzBTC_shares):
+        """
+            @returns tzBTC shares sold for the farmer
+        """
+        storage = self.storage
+        debt_shares = self.partial_reset_liquidity_entry(address, lqt_burned)
+        tzbtc_delta = as_nat(storage['tzBTC_shares'] - initial_tzBTC_shares, 'negative tzBTC delta error')
+        extra_tzbtc = as_nat(tzbtc_delta - debt_shares, 'not enough collateral')
+        if extra_tzbtc > 0:
+            storage['tzBTC_shares'] = as_nat(storage['tzBTC_shares'] - extra_tzbtc)
+        return extra_tzbtc
+
+    def liquidate_lb(self, sender, address, payment_shares, now, tzbtc_pool, lqt_total):
+        self.update_rates(now, tzbtc_pool, lqt_total)
+        self.check_loaned(address)
+        return {'address': address, 'sender': sender, 'payment_shares': payment_shares}
+
+    def liquidate_lb_finalize(self, address, sender, payment_shares, tzbtc_price, xtz_price):
+        storage = self.storage
+        parameters = get_parameters(storage)
+        liquidated_debt_shares, liquidated_lb_shares = self.liquidate_entry(
+            address, payment_shares * 100 // parameters['liquidation_price_percent'], tzbtc_price, xtz_price)
+
+        extra_supply = as_nat(payment_shares - liquidated_debt_shares, 'wrong liquidation_price_percent')
+        admin_comm = extra_supply * parameters['liquidation_comm'] // 100
+        storage['deposit_index'] += (
+            as_nat(extra_supply - admin_comm, 'admin commission error') * FIXED_POINT_FACTOR * FIXED_POINT_FACTOR
+            // storage['totalSupply']
+        )
+        storage['lb_shares'] = as_nat(storage['lb_shares'] - liquidated_lb_shares)
+        storage['tzBTC_shares'] = as_nat(storage['tzBTC_shares'] + payment_shares - admin_comm)
+        return admin_comm, liquidated_lb_shares
+
+    def liquidate_onchain_lb(self, sender, address, now, tzbtc_pool, lqt_total):
+        """
+            @returns liquidateOnchainLBFinalize parameters, the contract calls update_tzbtc_callback before it
+        """
+        self.check_onchain_liquidation(sender)
+        self.update_rates(now, tzbtc_pool, lqt_total)
+        self.check_loaned(address)
+
+        self.sell_lb(self.storage['liquidity_book'][address]['lb_shares'])
+        self.storage['local_params']['fa_tzBTC_callback_status'] = True
+        return {'address': address, 'initial_tzBTC_shares': self.storage['tzBTC_shares']}
+
+    def liquidate_onchain_lb_finalize(self, address, initial_tzBTC_shares):
+        storage = self.storage
+        delta = as_nat(storage['tzBTC_shares'] - initial_tzBTC_shares, 'negative tzBTC shares delta error')
+        debt_shares = self.reset_liquidity_entry(address)
+        verify(100 * delta < get_parameters(storage)['onchain_liquidation_percent'] * debt_shares, 'liquidation is not allowed')
+
+        admin_comm = self.add_onchain_liquidation_supply(delta, debt_shares)
+        storage['tzBTC_shares'] = as_nat(storage['tzBTC_shares'] - admin_comm)
+        return admin_comm
+
+    def liquidate_onchain_lb_batch(self, sender, addresses, now, tzbtc_pool, lqt_total):
+        """
+            @returns liquidateOnchainLBBatchFinalize parameters, the contract calls update_tzbtc_callback before it
+        """
+        self.check_onchain_liquidation(sender)
+        addresses = sorted(set(addresses), key=address_order)
+        verify(addresses, 'empty batch')
+        self.update_rates(now, tzbtc_pool, lqt_total)
+
+        lb_shares = self.sell_lb_batch(addresses)
+        self.storage['local_params']['fa_tzBTC_callback_status'] = True
+        return {'addresses': addresses, 'lb_shares': lb_shares, 'initial_tzBTC_shares': self.storage['tzBTC_shares']}
+
+    def liquidate_onchain_lb_batch_finalize(self, addresses, lb_shares, initial_tzBTC_shares):
+        storage = self.storage
+        delta = as_nat(storage['tzBTC_shares'] - initial_tzBTC_shares, 'negative tzBTC shares delta error')
+        admin_comm = self.add_onchain_liquidation_batch_supply(addresses, lb_shares, delta)
+        storage['tzBTC_shares'] = as_nat(storage['tzBTC_shares'] - admin_comm)
+        return admin_comm
+
+    def flashloan(self, requested_shares, now, tzbtc_pool, lqt_total):
+        storage = self.storage
+        parameters = get_parameters(storage)
+        verify(parameters['flashloan_available'], 'flashloan is not available')
+        verify(requested_shares > 0, 'zero requested shares')
+
+        self.update_rates(now, tzbtc_pool, lqt_total)
+
+        extra_shares = ceildiv(
+            requested_shares * (parameters['flashloan_admin_commission'] + parameters['flashloan_deposit_commission']),
+            100_000,
+        )
+        storage['flashloan_shares'] += requested_shares + extra_shares
+        storage['tzBTC_shares'] += extra_shares
+        self.add_flashloan_deposit_commission(requested_shares)
+
+    def flashloan_return(self, shares):
+        self.storage['flashloan_shares'] = max(self.storage['flashloan_shares'] - shares, 0)
+
+    def flashloan_finalize(self):
+        verify(self.storage['flashloan_shares'] == 0, 'loan error')
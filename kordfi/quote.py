@@ -0,0 +1,317 @@
+"""
+    Invest quotes for the farm contracts.
+
+    Liquidity baking DEX rounding is reproduced with integer arithmetic. The xtz/tzBTC split
+    is estimated from the CPMM equations and corrected to the exact DEX result, so quotes are
+    the same as the reference search in tests/xtz_invest_params.py and tests/tzbtc_invest_params.py.
+
+    The leveraged tzBTC client quote is deliberately left on the reference bisection. Its leverage
+    condition mixes float division with get_required_tokens rounding and isn't monotone in the
+    invest amount, so only the same bisection path gives the reference result. A search started
+    from the fee-free estimate 100 * xtz_invest / (100 + commission * (leverage - 1)) is off by
+    a few mutez in about one of ten quotes. The bisection takes about log2(xtz_invest) leverage
+    evaluations of a few DEX steps each.
+"""
+
+from math import ceil, isqrt, sqrt
+
+
+def ceildiv(numerator, denominator):
+    return -(-numerator // denominator)
+
+
+def xtz_to_token(tokenPool, xtzPool, amount):
+    """
+        LB DEX xtzToToken.
+        @returns (tokens bought, new tokenPool, new xtzPool)
+    """
+    amount_net_burn = amount * 999 // 1000
+    tokens = amount_net_burn * 999 * tokenPool // (xtzPool * 1000 + amount_net_burn * 999)
+    return tokens, tokenPool - tokens, xtzPool + amount_net_burn
+
+
+def token_to_xtz(tokenPool, xtzPool, tokensSold):
+    """
+        LB DEX tokenToXtz.
+        @returns (xtz bought net burn, new tokenPool, new xtzPool)
+    """
+    xtz_bought = tokensSold * 999 * xtzPool // (tokenPool * 1000 + tokensSold * 999)
+    return xtz_bought * 999 // 1000, tokenPool + tokensSold, xtzPool - xtz_bought
+
+
+def add_liquidity(tokenPool, xtzPool, lqtTotal, amount):
+    """
+        LB DEX addLiquidity.
+        @returns (tokens deposited, lqt minted)
+    """
+    return ceildiv(amount * tokenPool, xtzPool), amount * lqtTotal // xtzPool
+
+
+def get_required_tokens(tokenPool, xtzPool, xtz):
+    """
+        Minimal tzBTC amount converted by tokenToXtz to `xtz`, tokenPool if there is no such amount.
+    """
+    if xtz <= 0:
+        return 0
+    # xtz_bought * 999 // 1000 >= xtz
+    xtz_bought = ceildiv(1000 * xtz, 999)
+    if xtz_bought >= xtzPool:
+        return tokenPool
+    # tokens * 999 * xtzPool // (tokenPool * 1000 + tokens * 999) >= xtz_bought
+    return min(ceildiv(1000 * xtz_bought * tokenPool, 999 * (xtzPool - xtz_bought)), tokenPool)
+
+
+def _min_swap_for_tokens(tokenPool, xtzPool, tokens):
+    """Minimal xtzToToken amount which buys `tokens`, None if the pool doesn't have them."""
+    if tokens <= 0:
+        return 0
+    if tokens >= tokenPool:
+        return None
+    amount_net_burn = ceildiv(1000 * tokens * xtzPool, 999 * (tokenPool - tokens))
+    return ceildiv(1000 * amount_net_burn, 999)
+
+
+def _min_swap_for_deposit(tokenPool, xtzPool, invest_amount, tokens):
+    """
+        Minimal xtz2token, which buys `tokens`, such that `invest_amount - xtz2token`
+        deposits no more than `tokens`:
+            (invest_amount - x) * (tokenPool - tokens) <= tokens * (xtzPool + x * 999 // 1000)
+        For x = 1000 * k + j the right side minus the left one is linear in k and j.
+    """
+    rest = invest_amount * (tokenPool - tokens) - tokens * xtzPool
+    if rest <= 0:
+        return 0
+    k, rem = divmod(rest, 999 * tokens + 1000 * (tokenPool - tokens))
+    if rem == 0:
+        return 1000 * k
+    j = ceildiv(rem + tokens, tokenPool)
+    return 1000 * k + j if j < 1000 else 1000 * (k + 1)
+
+
+def get_xtz_to_token_parameter(tokenPool, xtzPool, lqtTotal, invest_amount):
+    """
+    Calculate maximum of tzBTC tokens that can be deposited to liquidity with invest_amount.
+    Return the amount that should be spent to token transfer.
+
+    invest_amount = xtz2token + xtz2lqt
+    xtz_to_contract_result(xtz2token) = add_liquidity_result(xtz2lqt)
+    return min of such xtz2token
+    """
+    def is_enough(xtz2token):
+        tokens, new_tokenPool, new_xtzPool = xtz_to_token(tokenPool, xtzPool, xtz2token)
+        return tokens >= add_liquidity(new_tokenPool, new_xtzPool, lqtTotal, invest_amount - xtz2token)[0]
+
+    # 0.999^3 * x^2 + (0.999^2 + 1) * xtzPool * x - invest_amount * xtzPool = 0
+    linear = (999 ** 2 + 10 ** 6) * 1000 * xtzPool
+    estimate = (isqrt(linear ** 2 + 4 * 999 ** 3 * 10 ** 9 * invest_amount * xtzPool) - linear) // (2 * 999 ** 3)
+    xtz2token = min(max(estimate, 0), invest_amount)
+
+    # bought tokens are constant between _min_swap_for_tokens levels,
+    # the solution at every level is given by _min_swap_for_deposit
+    while xtz2token < invest_amount and not is_enough(xtz2token):
+        tokens = xtz_to_token(tokenPool, xtzPool, xtz2token)[0]
+        next_level = _min_swap_for_tokens(tokenPool, xtzPool, tokens + 1)
+        candidate = max(xtz2token + 1, _min_swap_for_deposit(tokenPool, xtzPool, invest_amount, tokens))
+        if next_level is not None and candidate >= next_level:
+            candidate = next_level
+        xtz2token = min(candidate, invest_amount)
+    while xtz2token > 0 and is_enough(xtz2token - 1):
+        tokens = xtz_to_token(tokenPool, xtzPool, xtz2token - 1)[0]
+        xtz2token = max(
+            _min_swap_for_tokens(tokenPool, xtzPool, tokens),
+            _min_swap_for_deposit(tokenPool, xtzPool, invest_amount, tokens),
+        )
+    return xtz2token
+
+
+def get_invest_params(tokenPool, xtzPool, lqtTotal, invest_amount):
+    """
+    Return minimal invest params which are converted to maximum LB value for invest_amount.
+    """
+    xtz2token = get_xtz_to_token_parameter(tokenPool, xtzPool, lqtTotal, invest_amount)
+    tokens, new_tokenPool, new_xtzPool = xtz_to_token(tokenPool, xtzPool, xtz2token)
+    # minimal xtz2lqt which deposits all bought tokens
+    xtz2lqt = 0
+    if tokens > 0:
+        xtz2lqt = min((tokens - 1) * new_xtzPool // new_tokenPool + 1, invest_amount - xtz2token)
+    lqtMinted = add_liquidity(new_tokenPool, new_xtzPool, lqtTotal, xtz2lqt)[1]
+    return xtz2token, tokens, xtz2lqt, lqtMinted
+
+
+def get_client_invest_params(tokenPool, xtzPool, lqtTotal, xtz_invest, leverage, commission):
+    """
+    Invest parameters for amount with commission xtz_invest and leverage.
+    """
+    user_amount = int(xtz_invest * 100 / (100 + commission * (leverage - 1)))
+    invest_amount = int(user_amount * leverage)
+    xtz2token, tokens, xtz2lqt, lqtMinted = get_invest_params(tokenPool, xtzPool, lqtTotal, invest_amount)
+    if xtz_invest > xtz2token + xtz2lqt:
+        return (xtz2token + xtz2lqt, xtz2token, tokens, xtz2lqt, lqtMinted)
+    return (xtz_invest, xtz2token, tokens, xtz2lqt, lqtMinted)
+
+
+def _binary_search(f, high):
+    # binary search of minimal x such that f(x) = 0
+    # suppose such x exists between 0 and high
+    lo = 0
+    hi = high
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if f(mid) < 0:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _search_from(is_enough, estimate, high):
+    """
+        The same result as _binary_search for monotone `is_enough`, but
+        the interval is found by exponential steps from `estimate`.
+    """
+    x = min(max(int(estimate), 0), high)
+    if is_enough(x):
+        lo, hi, step = x - 1, x, 1
+        while lo >= 0 and is_enough(lo):
+            hi = lo
+            step *= 2
+            lo = x - step
+        lo = max(lo, -1)
+    else:
+        lo, hi, step = x, x + 1, 1
+        while hi < high and not is_enough(hi):
+            lo = hi
+            step *= 2
+            hi = x + step
+        hi = min(hi, high)
+    # is_enough(lo) is False, is_enough(hi) is True or hi is high
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if is_enough(mid):
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+def _estimate_xtz2lqt(tokenPool, xtzPool, xtz, tokens):
+    """
+        Continuous solution of the CPMM equations for tzBTC invest, fees are 0.999 multipliers.
+        The equations are quadratic in converted xtz or converted tzBTC.
+    """
+    fee = 0.999
+    if tokens * xtzPool <= xtz * tokenPool:
+        # xtz is converted to tzBTC
+        a = (tokens + tokenPool) * fee ** 3
+        b = tokens * (fee + fee ** 2) * xtzPool + fee ** 2 * tokenPool * xtzPool + tokenPool * xtzPool
+        c = tokens * xtzPool ** 2 - xtz * tokenPool * xtzPool
+        converted = -2 * c / (b + sqrt(b * b - 4 * a * c))
+        return xtz - converted
+    # tzBTC is converted to xtz
+    a = xtz * fee + fee ** 2 * xtzPool
+    b = xtz * tokenPool * (1 + fee) + (fee ** 2 + 1) * xtzPool * tokenPool
+    c = xtz * tokenPool ** 2 - tokens * xtzPool * tokenPool
+    converted = -2 * c / (b + sqrt(b * b - 4 * a * c))
+    return xtz + fee * fee * converted * xtzPool / (tokenPool + fee * converted)
+
+
+def calculate_converted_xtz(tokenPool, xtzPool, lqtTotal, xtz, tokens):
+    """
+    Amount of xtz that converted to tzBTC (or reverse) and then added to liquidity
+    that consumes all xtz + tokens value.
+    """
+    def is_enough(xtz2lqt):
+        if xtz2lqt >= xtz:
+            tzbtc_to_convert = get_required_tokens(tokenPool, xtzPool, xtz2lqt - xtz)
+            _, new_tokenPool, new_xtzPool = token_to_xtz(tokenPool, xtzPool, tzbtc_to_convert)
+            tzbtc_invested = add_liquidity(new_tokenPool, new_xtzPool, lqtTotal, xtz2lqt)[0]
+            return tzbtc_invested >= tokens - tzbtc_to_convert
+        tzbtc_converted, new_tokenPool, new_xtzPool = xtz_to_token(tokenPool, xtzPool, xtz - xtz2lqt)
+        tzbtc_invested = add_liquidity(new_tokenPool, new_xtzPool, lqtTotal, xtz2lqt)[0]
+        return tzbtc_invested >= tokens + tzbtc_converted
+
+    estimate = _estimate_xtz2lqt(tokenPool, xtzPool, xtz, tokens)
+    return xtz - _search_from(is_enough, estimate, xtzPool)
+
+
+def get_tzbtc_invest_params(tokenPool, xtzPool, lqtTotal, xtz_invest, tzbtc_loan, commission):
+    """
+    Invest parameters for amount without commission xtz_invest and loaned tzBTC tzbtc_loan.
+    """
+    xtz_to_convert = calculate_converted_xtz(tokenPool, xtzPool, lqtTotal, xtz_invest, tzbtc_loan)
+    xtz2lqt = xtz_invest - xtz_to_convert
+    if xtz_to_convert >= 0:
+        minTokens, new_tokenPool, new_xtzPool = xtz_to_token(tokenPool, xtzPool, xtz_to_convert)
+        lqtMinted = add_liquidity(new_tokenPool, new_xtzPool, lqtTotal, xtz2lqt)[1]
+        tzBTC2xtz = 0
+        minXtz = 0
+        # amount = amount2tzBTC + amount2Lqt + upfront_commission
+        # upfront_commission = max((2 * amount2Lqt - amount), 0) * commission / (100 - commission)
+        if xtz2lqt <= xtz_to_convert:
+            upfront_commission = 0
+        else:
+            upfront_commission = (xtz2lqt - xtz_to_convert) * commission // 100
+        amount = xtz2lqt + xtz_to_convert + upfront_commission
+    else:
+        tzBTC2xtz = get_required_tokens(tokenPool, xtzPool, -xtz_to_convert)
+        minXtz, new_tokenPool, new_xtzPool = token_to_xtz(tokenPool, xtzPool, tzBTC2xtz)
+        lqtMinted = add_liquidity(new_tokenPool, new_xtzPool, lqtTotal, xtz2lqt)[1]
+        xtz_to_convert = 0
+        minTokens = 0
+        # amount = invest_xtz + upfront_commission
+        # upfront_commission = (2 * amount2Lqt - amount) * commission / (100 - commission)
+        amount = ceil((2 * xtz2lqt * commission + xtz_invest * (100 - commission)) / 100)
+
+    return amount, xtz_to_convert, minTokens, tzBTC2xtz, minXtz, xtz2lqt, lqtMinted
+
+
+def get_tzbtc_client_invest_params(tokenPool, xtzPool, lqtTotal, xtz_invest, leverage, commission):
+    """
+    Invest parameters for amount with commission xtz_invest and leverage.
+    """
+    if leverage == 1:
+        # if `xtz2lqt * 2 > xtz_invest` we will take commission even with leverage 1
+        real_invest = _search_from(
+            lambda invest: get_tzbtc_invest_params(tokenPool, xtzPool, lqtTotal, invest, 0, commission)[0] >= xtz_invest,
+            xtz_invest,
+            xtz_invest,
+        )
+        return get_tzbtc_invest_params(tokenPool, xtzPool, lqtTotal, real_invest, 0, commission)
+
+    def find_invest(invest):
+        upfront_commission_upper_bound = xtz_invest - invest
+        amount2Lqt_upper_bound = int(((100 - commission) * upfront_commission_upper_bound / commission + xtz_invest) / 2)
+        if amount2Lqt_upper_bound <= invest:
+            # leverage = 2 * amount2Lqt_upper_bound / invest
+            return leverage - 2 * amount2Lqt_upper_bound / invest
+        tzBTC2xtz = get_required_tokens(tokenPool, xtzPool, amount2Lqt_upper_bound - invest)
+        _, new_tokenPool, new_xtzPool = token_to_xtz(tokenPool, xtzPool, tzBTC2xtz)
+        tokens = add_liquidity(new_tokenPool, new_xtzPool, lqtTotal, amount2Lqt_upper_bound)[0]
+        tzBTC_delta = tzBTC2xtz + tokens
+        # leverage = 2 * (tzBTC_delta - tzBTC2xtz) / (tzBTC_delta - 2 * tzBTC2xtz)
+        return leverage - 2 * (tzBTC_delta - tzBTC2xtz) / (tzBTC_delta - 2 * tzBTC2xtz)
+
+    # find maximum invest value, that doesn't exceed leverage
+    # find_invest isn't monotone, the reference bisection path is kept, see the module docstring
+    invest_without_commission = _binary_search(find_invest, xtz_invest)
+
+    upfront_commission = xtz_invest - invest_without_commission
+    xtz2lqt = int(((100 - commission) * upfront_commission / commission + xtz_invest) / 2)
+    xtz_to_convert = invest_without_commission - xtz2lqt
+    if xtz_to_convert >= 0:
+        minTokens, new_tokenPool, new_xtzPool = xtz_to_token(tokenPool, xtzPool, xtz_to_convert)
+        lqtMinted = add_liquidity(new_tokenPool, new_xtzPool, lqtTotal, xtz2lqt)[1]
+        tzBTC2xtz = 0
+        minXtz = 0
+        # upfront_commission = (2 * amount2Lqt - xtz_invest) * commission / (100 - commission)
+        upfront_commission = (xtz2lqt - xtz_to_convert) * commission // 100
+        # adjust "sent amount error"
+        xtz_to_convert = (xtz_invest - upfront_commission - xtz2lqt)
+    else:
+        tzBTC2xtz = get_required_tokens(tokenPool, xtzPool, -xtz_to_convert)
+        minXtz, new_tokenPool, new_xtzPool = token_to_xtz(tokenPool, xtzPool, tzBTC2xtz)
+        lqtMinted = add_liquidity(new_tokenPool, new_xtzPool, lqtTotal, xtz2lqt)[1]
+        xtz_to_convert = 0
+        minTokens = 0
+
+    return xtz_invest, xtz_to_convert, minTokens, tzBTC2xtz, minXtz, xtz2lqt, lqtMinted
@@ -0,0 +1,394 @@
+"""
+    Replay of recorded farm calls.
+
+    The input is JSONL, one line per farm call (operation group) in the order of the chain:
+
+        {"entrypoint": "investLB", "sender": "tz1...", "now": 1660000000, "level": 2600000,
+         "tzbtc_pool": 30000000000, "lqt_total": 270000000, ...}
+
+    Other fields are the entry point parameters and the values observed after the DEX calls,
+    named as kordfi.model parameters (see XTZ_HANDLERS and BTC_HANDLERS). `operations` lists the
+    farm transactions of the group for contract backends, ModelBackend ignores it.
+
+    Every replayed call writes a metrics line with gas, indexes and utilization. Every
+    `checkpoint_interval` calls the storage and the input offset are saved, so a long history
+    is resumed from the last checkpoint instead of the first record.
+
+    Usage:
+        python -m kordfi.replay calls.jsonl storage.json --metrics metrics.jsonl --checkpoint replay.checkpoint [--btc]
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from copy import deepcopy
+
+from .model import BTCFarmModel, ContractError, FarmModel
+
+
+DEFAULT_CHECKPOINT_INTERVAL = 10_000
+
+
+def _pool(record):
+    return record['now'], record['tzbtc_pool'], record['lqt_total']
+
+
+def _prices(record):
+    return {'tzbtc_price': record['tzbtc_price'], 'xtz_price': record['xtz_price']}
+
+
+def from_json(storage):
+    """
+        Restores nat keys of the parameters big_map, JSON object keys are strings.
+    """
+    storage['parameters'] = {int(key): value for key, value in storage['parameters'].items()}
+    return storage
+
+
+def _flashloan(model, record, requested):
+    model.flashloan(requested, *_pool(record))
+    loan_field = 'flashloan_shares' if model.is_btc else 'flashloan_amount'
+    model.flashloan_return(record.get('returned', model.storage[loan_field]))
+    model.flashloan_finalize()
+
+
+def _sell_tzbtc(model, record):
+    # without a recorded tzBTC balance sellTzBTC sees the kept dust only
+    model.sell_tzbtc(record.get('tzBTC_shares', model.storage['tzBTC_dust']))
+
+
+def replay_xtz_invest_lb(model, record):
+    model.invest_lb(
+        record['sender'], record['amount2tzBTC'], record['amount2Lqt'], record['amount'], record['balance'],
+        *_pool(record),
+    )
+    _sell_tzbtc(model, record)
+    model.invest_lb_finalize(record['lb_shares'], record['final_balance'])
+
+
+def replay_xtz_redeem_lb(model, record):
+    params = model.redeem_lb(record['sender'], record['lqt_burned'], record['balance'], *_pool(record))
+    _sell_tzbtc(model, record)
+    model.redeem_lb_finalize(**params, balance=record['final_balance'])
+
+
+def replay_xtz_liquidate_lb(model, record):
+    params = model.liquidate_lb(record['sender'], record['address'], record['amount'], *_pool(record))
+    model.liquidate_lb_finalize(**params, **_prices(record))
+
+
+def replay_xtz_liquidate_onchain_lb(model, record):
+    params = model.liquidate_onchain_lb(record['sender'], record['address'], record['balance'], *_pool(record))
+    _sell_tzbtc(model, record)
+    model.liquidate_onchain_lb_finalize(**params, balance=record['final_balance'])
+
+
+def replay_xtz_liquidate_onchain_lb_batch(model, record):
+    params = model.liquidate_onchain_lb_batch(record['sender'], record['addresses'], record['balance'], *_pool(record))
+    _sell_tzbtc(model, record)
+    model.liquidate_onchain_lb_batch_finalize(**params, balance=record['final_balance'])
+
+
+# fields of the records besides entrypoint, sender, now, tzbtc_pool and lqt_total:
+#   amount - sent or requested mutez, balance / final_balance - contract balance before / after the DEX calls,
+#   lb_shares - LB balance of the contract after investLB, returned - mutez returned to the flashloan,
+#   addresses - farms of liquidateOnchainLBBatch, tzBTC_shares - tzBTC balance of the XTZ farm in sellTzBTC,
+#   tzbtc_price / xtz_price - oracle prices of liquidateLB
+# calls forwarded by the router have the operation source as sender, updateLbPrice has the router
+XTZ_HANDLERS = {
+    'updateIndexes': lambda model, record: model.update_indexes(*_pool(record)),
+    'updateLbPrice': lambda model, record: model.router_update_lb_price(record['sender'], *_pool(record)),
+    'depositLending': lambda model, record: model.deposit_lending(record['sender'], record['amount'], *_pool(record)),
+    'redeemLending': lambda model, record: model.redeem_lending(
+        record['sender'], record['amount'], record['balance'], *_pool(record)),
+    'investLB': replay_xtz_invest_lb,
+    'redeemLB': replay_xtz_redeem_lb,
+    'liquidateLB': replay_xtz_liquidate_lb,
+    'liquidateOnchainLB': replay_xtz_liquidate_onchain_lb,
+    'liquidateOnchainLBBatch': replay_xtz_liquidate_onchain_lb_batch,
+    'flashloan': lambda model, record: _flashloan(model, record, record['amount']),
+}
+
+
+def replay_btc_invest_lb(model, record):
+    _, params = model.invest_lb(
+        record['sender'], record['amount2tzBTC'], record['amount2Lqt'], record['tzBTC2xtz'], record['amount'],
+        *_pool(record),
+    )
+    model.update_lb_callback(record['lb_shares'])
+    model.update_tzbtc_callback(record['tzBTC_shares'])
+    model.invest_lb_finalize(**params)
+
+
+def replay_btc_redeem_lb(model, record):
+    params = model.redeem_lb(record['sender'], record['lqt_burned'], *_pool(record))
+    model.update_tzbtc_callback(record['tzBTC_shares'])
+    model.redeem_lb_finalize(**params)
+
+
+def replay_btc_liquidate_lb(model, record):
+    params = model.liquidate_lb(record['sender'], record['address'], record['payment_shares'], *_pool(record))
+    model.liquidate_lb_finalize(**params, **_prices(record))
+
+
+def replay_btc_liquidate_onchain_lb(model, record):
+    params = model.liquidate_onchain_lb(record['sender'], record['address'], *_pool(record))
+    model.update_tzbtc_callback(record['tzBTC_shares'])
+    model.liquidate_onchain_lb_finalize(**params)
+
+
+def replay_btc_liquidate_onchain_lb_batch(model, record):
+    params = model.liquidate_onchain_lb_batch(record['sender'], record['addresses'], *_pool(record))
+    model.update_tzbtc_callback(record['tzBTC_shares'])
+    model.liquidate_onchain_lb_batch_finalize(**params)
+
+
+# shares - deposited, redeemed or requested tzBTC shares, lb_shares / tzBTC_shares - contract balances
+# from the callbacks after the DEX calls, returned - shares returned to the flashloan,
+# addresses - farms of liquidateOnchainLBBatch
+BTC_HANDLERS = {
+    'updateIndexes': XTZ_HANDLERS['updateIndexes'],
+    'updateLbPrice': XTZ_HANDLERS['updateLbPrice'],
+    'depositLending': lambda model, record: model.deposit_lending(record['sender'], record['shares'], *_pool(record)),
+    'redeemLending': lambda model, record: model.redeem_lending(record['sender'], record['shares'], *_pool(record)),
+    'investLB': replay_btc_invest_lb,
+    'redeemLB': replay_btc_redeem_lb,
+    'liquidateLB': replay_btc_liquidate_lb,
+    'liquidateOnchainLB': replay_btc_liquidate_onchain_lb,
+    'liquidateOnchainLBBatch': replay_btc_liquidate_onchain_lb_batch,
+    'flashloan': lambda model, record: _flashloan(model, record, record['shares']),
+}
+
+
+class ReplayError(Exception):
+    """
+        Failed call of the replayed history.
+    """
+
+
+class ModelBackend:
+    """
+        Replays records with kordfi.model, gas is not measured.
+        A backend has `storage`, `apply(record)` returning consumed gas or None and raising
+        ReplayError when the call fails, and `load(storage)` restoring a checkpoint.
+    """
+    def __init__(self, storage, is_btc=False):
+        self.is_btc = is_btc
+        self.handlers = BTC_HANDLERS if is_btc else XTZ_HANDLERS
+        self.load(storage)
+
+    def load(self, storage):
+        self.model = (BTCFarmModel if self.is_btc else FarmModel)(storage)
+
+    @property
+    def storage(self):
+        return self.model.storage
+
+    def snapshot(self, record):
+        """
+            Copies the storage parts a call can change, the ledger and liquidity_book entries
+            of the sender and the liquidated addresses. Copying the whole storage is linear in its size.
+        """
+        storage = self.storage
+        addresses = {record['sender'], record.get('address'), *record.get('addresses', ())}
+        return (
+            dict(storage),
+            dict(storage['local_params']),
+            {address: deepcopy(storage['ledger'].get(address)) for address in addresses},
+            {address: deepcopy(storage['liquidity_book'].get(address)) for address in addresses},
+        )
+
+    def restore(self, snapshot):
+        values, local_params, ledger, liquidity_book = snapshot
+        storage = self.storage
+        storage.update(values)
+        storage['local_params'] = local_params
+        for big_map, entries in ((storage['ledger'], ledger), (storage['liquidity_book'], liquidity_book)):
+            for address, entry in entries.items():
+                if entry is None:
+                    big_map.pop(address, None)
+                else:
+                    big_map[address] = entry
+
+    def apply(self, record):
+        handler = self.handlers.get(record['entrypoint'])
+        if handler is None:
+            raise ReplayError(f'unknown entrypoint {record["entrypoint"]}')
+        # a failed operation group doesn't change the storage
+        snapshot = self.snapshot(record)
+        try:
+            handler(self.model, record)
+        except (ContractError, ZeroDivisionError) as error:
+            self.restore(snapshot)
+            raise ReplayError(str(error)) from error
+        return None
+
+
+def get_utilization(storage):
+    if storage['totalSupply'] == 0:
+        return 0
+    return (
+        storage['total_net_credit'] * storage['net_credit_index']
+        / (storage['totalSupply'] * storage['deposit_index'])
+    )
+
+
+def get_metrics(record, storage, gas, error):
+    return {
+        'level': record.get('level'),
+        'now': record['now'],
+        'entrypoint': record['entrypoint'],
+        'error': error,
+        'gas': gas,
+        'gross_credit_index': storage['gross_credit_index'],
+        'net_credit_index': storage['net_credit_index'],
+        'deposit_index': storage['deposit_index'],
+        'lb_price': storage['lb_price'],
+        'utilization': get_utilization(storage),
+    }
+
+
+def load_checkpoint(path):
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    from_json(checkpoint['storage'])
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    # the previous checkpoint is kept until the new one is complete
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(f'{path}.tmp', path)
+
+
+class Replay:
+    """
+        Streams records of `input_path` through the backend.
+        @params:
+            metrics_path - JSONL file for the metrics lines, None to skip them
+            checkpoint_path - checkpoint file, the replay resumes from it if it exists
+    """
+    def __init__(self, backend, input_path, metrics_path=None, checkpoint_path=None,
+                 checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        self.backend = backend
+        self.input_path = input_path
+        self.metrics_path = metrics_path
+        self.metrics = None
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.offset = 0
+        self.metrics_offset = 0
+        self.records = 0
+        self.calls = Counter()
+        self.failures = Counter()
+        self.gas = Counter()
+
+        checkpoint = load_checkpoint(checkpoint_path)
+        if checkpoint is not None:
+            self.offset = checkpoint['offset']
+            self.metrics_offset = checkpoint['metrics_offset']
+            self.records = checkpoint['records']
+            self.calls.update(checkpoint['calls'])
+            self.failures.update(checkpoint['failures'])
+            self.gas.update(checkpoint['gas'])
+            backend.load(checkpoint['storage'])
+
+    def checkpoint(self):
+        if self.checkpoint_path is None:
+            return
+        if self.metrics is not None:
+            self.metrics.flush()
+            self.metrics_offset = self.metrics.tell()
+        save_checkpoint(self.checkpoint_path, {
+            'offset': self.offset,
+            'metrics_offset': self.metrics_offset,
+            'records': self.records,
+            'calls': self.calls,
+            'failures': self.failures,
+            'gas': self.gas,
+            'storage': self.backend.storage,
+        })
+
+    def apply(self, record):
+        entrypoint = record['entrypoint']
+        gas, error = None, None
+        try:
+            gas = self.backend.apply(record)
+        except ReplayError as e:
+            error = str(e)
+            self.failures[entrypoint] += 1
+        self.calls[entrypoint] += 1
+        if gas is not None:
+            self.gas[entrypoint] += gas
+        if self.metrics is not None:
+            self.metrics.write(json.dumps(get_metrics(record, self.backend.storage, gas, error)) + '\n')
+
+    def run(self, limit=None):
+        """
+            Replays records after the checkpoint, at most `limit` of them.
+            @returns summary
+        """
+        if self.metrics_path is not None:
+            self.metrics = open(self.metrics_path, 'a')
+            # lines written after the checkpoint are replayed again
+            self.metrics.truncate(self.metrics_offset)
+        try:
+            with open(self.input_path, 'rb') as f:
+                f.seek(self.offset)
+                replayed = 0
+                for line in iter(f.readline, b''):
+                    if limit is not None and replayed >= limit:
+                        break
+                    self.offset += len(line)
+                    if not line.strip():
+                        continue
+                    self.apply(json.loads(line))
+                    self.records += 1
+                    replayed += 1
+                    if self.records % self.checkpoint_interval == 0:
+                        self.checkpoint()
+            self.checkpoint()
+        finally:
+            if self.metrics is not None:
+                self.metrics.close()
+                self.metrics = None
+        return self.summary()
+
+    def summary(self):
+        storage = self.backend.storage
+        return {
+            'records': self.records,
+            'calls': dict(self.calls),
+            'failures': dict(self.failures),
+            'gas': dict(self.gas),
+            'deposit_index': storage['deposit_index'],
+            'utilization': get_utilization(storage),
+        }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Replay recorded farm calls with kordfi.model.')
+    parser.add_argument('input', help='JSONL of the recorded calls')
+    parser.add_argument('storage', help='JSON of the decoded storage before the first call')
+    parser.add_argument('--btc', action='store_true', help='BTC farm contract')
+    parser.add_argument('--metrics', help='JSONL file for the metrics, appended on resume')
+    parser.add_argument('--checkpoint', help='checkpoint file, the replay resumes from it if it exists')
+    parser.add_argument('--checkpoint-interval', type=int, default=DEFAULT_CHECKPOINT_INTERVAL)
+    parser.add_argument('--limit', type=int, help='number of records to replay')
+    args = parser.parse_args(args)
+
+    with open(args.storage) as f:
+        backend = ModelBackend(from_json(json.load(f)), is_btc=args.btc)
+    replay = Replay(backend, args.input, args.metrics, args.checkpoint, args.checkpoint_interval)
+    summary = replay.run(args.limit)
+    json.dump(summary, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+"""
+    Liquidation scanner for the farm contracts.
+
+    liquidity_book is a big_map, RPC can't enumerate its keys, so entries are reconstructed
+    from big_map diffs of every block since the farm origination. Later syncs process only
+    new blocks. Positions are ranked by collateral ratio with indexes and lb_price projected
+    to the next block, as liquidateLB updates them before the liquidation check.
+
+    Usage:
+        python -m kordfi.scanner https://rpc.tzkt.io/mainnet KT1... --start-level 2500000 [--btc] [--watch]
+"""
+
+import argparse
+import json
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from pytezos import ContractInterface, pytezos
+from pytezos.michelson.forge import forge_script_expr
+
+from .farm import (
+    PARAMETERS_KEY, get_debt, get_debt_value, get_lb_shares_value, get_parameters, is_lb_price_refreshed,
+    is_liquidation_allowed, project_indexes, project_lb_price,
+)
+
+
+Position = namedtuple('Position', ['address', 'lb_shares', 'debt', 'collateral_ratio', 'is_liquidatable'])
+Market = namedtuple('Market', ['storage', 'tzbtc_pool', 'lqt_total', 'tzbtc_price', 'xtz_price', 'now'])
+
+
+def get_big_map_type(contract, name):
+    def walk(ty):
+        yield ty
+        for arg in ty.args:
+            if isinstance(arg, type):
+                yield from walk(arg)
+
+    return next(ty for ty in walk(contract.program.storage.args[0]) if ty.field_name == name)
+
+
+def get_big_map_value(client, contract, storage, name, key):
+    """Reads one entry of the decoded storage big_map from the head context."""
+    key_type, value_type = get_big_map_type(contract, name).args
+    key_hash = forge_script_expr(key_type.from_python_object(key).pack(legacy=True))
+    value = client.shell.head.context.big_maps[storage[name]][key_hash]()
+    return value_type.from_micheline_value(value).to_python_object()
+
+
+def run_callback_view(client, address, entrypoint, value):
+    """Result of an FA1.2 callback view, e.g. getBalance, executed by the node at the head."""
+    result = client.shell.head.helpers.scripts.run_view.post({
+        'contract': address,
+        'entrypoint': entrypoint,
+        'input': value,
+        'chain_id': client.shell.chains.main.chain_id(),
+        'unparsing_mode': 'Readable',
+    })
+    return int(result['data']['int'])
+
+
+def get_lb_pool(client, settings):
+    """
+        tzbtc_pool and lqt_total as the farm callbacks read them: tzBTC balance of
+        liquidity_baking_address and total supply of fa_lb_address. dex_contract_address
+        set by setDexContract may be another DEX with other pool values.
+    """
+    tzbtc_pool = run_callback_view(
+        client, settings['fa_tzBTC_address'], 'getBalance', {'string': settings['liquidity_baking_address']},
+    )
+    lqt_total = run_callback_view(client, settings['fa_lb_address'], 'getTotalSupply', {'prim': 'Unit'})
+    return tzbtc_pool, lqt_total
+
+
+def get_dex_pool(client, address):
+    """
+        (tokenPool, xtzPool) of a liquidity baking DEX, e.g. dex_contract_address which sells the farm tzBTC.
+    """
+    storage = client.contract(address).storage()
+    return storage['tokenPool'], storage['xtzPool']
+
+
+def get_lb_dex_pool(client, address):
+    """
+        (tokenPool, xtzPool, lqtTotal) of liquidity baking, removeLiquidity of the onchain liquidation is quoted from them.
+    """
+    storage = client.contract(address).storage()
+    return storage['tokenPool'], storage['xtzPool'], storage['lqtTotal']
+
+
+def iter_lazy_storage_diffs(operation):
+    """Yields big_map diffs of applied operation contents and their internal operations."""
+    for content in operation.get('contents', []):
+        metadata = content.get('metadata', {})
+        results = [metadata.get('operation_result', {})]
+        results.extend(internal.get('result', {}) for internal in metadata.get('internal_operation_results', []))
+        for result in results:
+            if result.get('status') != 'applied':
+                continue
+            for diff in result.get('lazy_storage_diff', []):
+                if diff['kind'] == 'big_map':
+                    yield diff
+
+
+def parse_timestamp(value):
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+
+
+def rank_positions(entries, market, is_btc=False):
+    """
+        @params:
+            entries - liquidity_book entries by address
+            market - Market values for the liquidation block
+        @returns loaned positions sorted by collateral ratio, the least healthy first
+    """
+    storage = market.storage
+    gross_credit_index = project_indexes(storage, market.now)['gross_credit_index']
+    lb_price = storage['lb_price']
+    if is_lb_price_refreshed(storage, market.now):
+        lb_price = project_lb_price(storage, market.tzbtc_pool, market.lqt_total, market.now)
+
+    positions = []
+    for address, entry in entries.items():
+        if entry['net_credit'] == 0:
+            continue
+        debt = get_debt(entry['gross_credit'], gross_credit_index, is_btc)
+        lb_shares_value = get_lb_shares_value(entry['lb_shares'], lb_price, market.tzbtc_price)
+        debt_value = get_debt_value(debt, market.tzbtc_price, market.xtz_price, is_btc)
+        positions.append(Position(
+            address=address,
+            lb_shares=entry['lb_shares'],
+            debt=debt,
+            collateral_ratio=lb_shares_value * 100 / debt_value if debt_value else float('inf'),
+            is_liquidatable=is_liquidation_allowed(lb_shares_value, debt_value, get_parameters(storage)['liquidation_percent']),
+        ))
+    return sorted(positions, key=lambda position: position.collateral_ratio)
+
+
+class LiquidityBook:
+    """
+        liquidity_book entries reconstructed from big_map diffs.
+    """
+    def __init__(self, contract, big_map_id):
+        self.key_type, self.value_type = get_big_map_type(contract, 'liquidity_book').args
+        self.big_map_id = big_map_id
+        self.entries = {}
+
+    def apply_diff(self, diff):
+        if int(diff['id']) != self.big_map_id:
+            return
+        if diff['diff']['action'] == 'remove':
+            self.entries.clear()
+            return
+        for update in diff['diff'].get('updates', []):
+            address = self.key_type.from_micheline_value(update['key']).to_python_object()
+            if update.get('value') is None:
+                self.entries.pop(address, None)
+            else:
+                self.entries[address] = self.value_type.from_micheline_value(update['value']).to_python_object()
+
+
+class LiquidationScanner:
+    """
+        Keeps liquidity_book of one farm contract in memory.
+        @params:
+            client - pytezos client
+            address - farm contract address
+            start_level - farm origination level
+            is_btc - BTC farm contract, debts are in tzBTC shares
+    """
+    def __init__(self, client, address, start_level, is_btc=False):
+        self.client = client
+        self.address = address
+        self.is_btc = is_btc
+        self.level = start_level - 1
+
+        script = client.shell.contracts[address].script()
+        self.contract = ContractInterface.from_micheline(script['code'])
+        self.liquidity_book = LiquidityBook(self.contract, self.contract.storage.decode(script['storage'])['liquidity_book'])
+
+    def process_block(self, level):
+        for operation in self.client.shell.blocks[level].operations.managers():
+            for diff in iter_lazy_storage_diffs(operation):
+                self.liquidity_book.apply_diff(diff)
+        self.level = level
+
+    def sync(self, level=None):
+        """
+            Processes blocks after the last processed one.
+            @returns number of processed blocks
+        """
+        head = self.client.shell.blocks[level or 'head'].header()['level']
+        start = self.level
+        while self.level < head:
+            self.process_block(self.level + 1)
+        return head - start if head > start else 0
+
+    def get_market(self):
+        """
+            Fetches values used by the liquidation check in the next block, see get_lb_pool.
+        """
+        script = self.client.shell.contracts[self.address].script()
+        storage = self.contract.storage.decode(script['storage'])
+        storage['parameters'] = {
+            PARAMETERS_KEY: get_big_map_value(self.client, self.contract, storage, 'parameters', PARAMETERS_KEY),
+        }
+        tzbtc_pool, lqt_total = get_lb_pool(self.client, storage['settings'])
+        oracle = self.client.contract(storage['settings']['oracle_address'])
+        header = self.client.shell.head.header()
+        block_delay = int(self.client.shell.head.context.constants()['minimal_block_delay'])
+        return Market(
+            storage=storage,
+            tzbtc_pool=tzbtc_pool,
+            lqt_total=lqt_total,
+            tzbtc_price=oracle.get_price('BTC').onchain_view(),
+            xtz_price=oracle.get_price('XTZ').onchain_view(),
+            now=parse_timestamp(header['timestamp']) + block_delay,
+        )
+
+    def scan(self):
+        self.sync()
+        return rank_positions(self.liquidity_book.entries, self.get_market(), self.is_btc)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Rank farm positions by collateral ratio.')
+    parser.add_argument('rpc', help='Tezos node RPC url')
+    parser.add_argument('address', help='farm contract address')
+    parser.add_argument('--start-level', type=int, required=True, help='farm origination level')
+    parser.add_argument('--btc', action='store_true', help='BTC farm contract')
+    parser.add_argument('--watch', action='store_true', help='rescan on every new block')
+    parser.add_argument('--limit', type=int, default=20, help='number of printed positions')
+    args = parser.parse_args(args)
+
+    client = pytezos.using(shell=args.rpc)
+    scanner = LiquidationScanner(client, args.address, args.start_level, is_btc=args.btc)
+    while True:
+        positions = scanner.scan()
+        print(json.dumps({
+            'level': scanner.level,
+            'positions': [position._asdict() for position in positions[:args.limit]],
+        }))
+        if not args.watch:
+            break
+        while client.shell.head.header()['level'] <= scanner.level:
+            time.sleep(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+"""
+    Monte Carlo risk simulator for the farm parameters.
+
+    Every path draws correlated log-normal XTZ and BTC prices, the LB pool follows the market
+    price by arbitrage, and the farm storage goes through kordfi.model: indexes are updated
+    every step, liquidatable positions are liquidated with liquidateLB when the LB shares cover
+    the payment, otherwise with liquidateOnchainLB. Paths run in parallel processes.
+
+    Usage:
+        python -m kordfi.simulation --paths 1000 --params '{"rate_params": {"rate_1": 3022}, "parameters": {"liquidation_percent": 120}}'
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from math import isqrt
+
+from deepmerge import always_merger
+
+from .farm import (
+    FIXED_POINT_FACTOR, INITIAL_INDEX_VALUE, PARAMETERS_KEY, get_debt, get_debt_value, get_lb_shares_value, get_parameters,
+    is_liquidation_allowed,
+)
+from .model import BTCFarmModel, FarmModel
+from .quote import ceildiv, token_to_xtz, xtz_to_token
+
+
+YEAR = 365 * 24 * 3600
+ADMINISTRATOR = 'administrator'
+DEPOSITOR = 'depositor'
+LIQUIDATOR = 'liquidator'
+
+# mainnet-like pool and DummyOracle prices
+DEFAULT_POOL = (27_944_134_536, 4_398_189_886_967, 271_360_616)
+DEFAULT_PRICES = (21_520_000_000, 1_530_000)
+
+Scenario = namedtuple('Scenario', ['steps', 'step_seconds', 'xtz_volatility', 'btc_volatility', 'correlation', 'subsidy'])
+Scenario.__new__.__defaults__ = (365, 24 * 3600, 0.9, 0.7, 0.6, 0)
+
+SimulationConfig = namedtuple('SimulationConfig', ['storage', 'is_btc', 'pool', 'prices', 'deposits', 'positions', 'scenario'])
+PathResult = namedtuple('PathResult', [
+    'bad_debt', 'liquidations', 'onchain_liquidations', 'deposit_apy', 'mean_utilization', 'max_utilization',
+])
+SimulationReport = namedtuple('SimulationReport', [
+    'paths', 'bad_debt_probability', 'expected_bad_debt', 'liquidations', 'onchain_liquidations',
+    'deposit_apy', 'deposit_apy_p5', 'deposit_apy_p95', 'mean_utilization', 'max_utilization',
+])
+
+
+def get_initial_storage(is_btc=False, **params):
+    """
+        Farm storage fields read by kordfi.model with the contract defaults, `params` override them.
+        `parameters` override the single entry of the parameters big_map.
+    """
+    storage = {
+        'administrator': ADMINISTRATOR,
+        'index_update_dttm': 0,
+        'gross_credit_index': INITIAL_INDEX_VALUE,
+        'deposit_index': INITIAL_INDEX_VALUE,
+        'net_credit_index': INITIAL_INDEX_VALUE,
+        'rate_params': {
+            'rate_1': 3022,
+            'rate_diff': 12857 - 3022,
+            'threshold_percent_1': 80,
+            'threshold_percent_2': 90,
+        },
+        'is_working': True,
+        'lb_price': 1_000_000_000_000,
+        'lb_price_update_dttm': 0,
+        'settings': {
+            'lb_price_change_rate': 5_787_000,
+            'lb_price_update_interval': 0,
+            'upfront_commission': 1_000,
+            'max_leverage': 40,
+        },
+        'parameters': {
+            PARAMETERS_KEY: {
+                'onchain_liquidation_available': True,
+                'onchain_liquidation_percent': 120,
+                'onchain_liquidation_comm': 50,
+                'liquidation_percent': 120,
+                'liquidation_price_percent': 110,
+                'liquidation_comm': 50,
+            },
+        },
+        'total_gross_credit': 0,
+        'total_net_credit': 0,
+        'totalSupply': 0,
+        'ledger': {},
+        'liquidity_book': {},
+        'lb_shares': 0,
+        'local_params': {
+            'fa_tzBTC_callback_status': False,
+            'fa_lb_callback_status': False,
+            'tzbtc_pool': 0,
+            'lqt_total': 0,
+        },
+    }
+    if is_btc:
+        storage['tzBTC_shares'] = 0
+    else:
+        storage['tzBTC_dust'] = 0
+        storage['settings']['tzBTC_dust_threshold'] = 0
+        storage['local_params']['tzBTC_dust_delta'] = 0
+    if 'parameters' in params:
+        params = {**params, 'parameters': {PARAMETERS_KEY: params['parameters']}}
+    return always_merger.merge(storage, params)
+
+
+def random_positions(count, max_collateral, max_leverage, seed=0):
+    """
+        @params:
+            max_leverage - storage max_leverage, leverage multiplied by 10
+        @returns list of (collateral, leverage) in the debt currency
+    """
+    rnd = random.Random(seed)
+    return [
+        (rnd.randint(max_collateral // 100, max_collateral), rnd.uniform(1.5, max_leverage / 10))
+        for _ in range(count)
+    ]
+
+
+def arbitrage(tokenPool, xtzPool, tzbtc_price, xtz_price):
+    """
+        Pool with the constant product moved to the oracle price, xtzPool / tokenPool = tzbtc_price / (100 * xtz_price).
+    """
+    product = tokenPool * xtzPool
+    tokenPool = isqrt(product * 100 * xtz_price // tzbtc_price)
+    return tokenPool, product // tokenPool
+
+
+def get_lb_shares_sale(lb_shares, pool, is_btc):
+    """
+        Sells LB shares and the tzBTC (xtz for the BTC farm) part.
+        @returns value in the debt currency and the new pool
+    """
+    tokenPool, xtzPool, lqtTotal = pool
+    xtz = lb_shares * xtzPool // lqtTotal
+    tokens = lb_shares * tokenPool // lqtTotal
+    tokenPool, xtzPool, lqtTotal = tokenPool - tokens, xtzPool - xtz, lqtTotal - lb_shares
+    if is_btc:
+        bought, tokenPool, xtzPool = xtz_to_token(tokenPool, xtzPool, xtz)
+        return tokens + bought, (tokenPool, xtzPool, lqtTotal)
+    bought, tokenPool, xtzPool = token_to_xtz(tokenPool, xtzPool, tokens)
+    return xtz + bought, (tokenPool, xtzPool, lqtTotal)
+
+
+class PathSimulation:
+    """
+        One price path of the farm.
+    """
+    def __init__(self, config, seed):
+        self.config = config
+        self.is_btc = config.is_btc
+        self.rnd = random.Random(seed)
+        self.model = (BTCFarmModel if self.is_btc else FarmModel)(deepcopy(config.storage))
+        self.storage = self.model.storage
+        self.pool = config.pool
+        self.tzbtc_price, self.xtz_price = config.prices
+        self.now = self.storage['index_update_dttm']
+        self.bad_debt = 0
+        self.liquidations = 0
+        self.onchain_liquidations = 0
+
+    def open_positions(self):
+        tokenPool, xtzPool, lqtTotal = self.pool
+        tokenPool, xtzPool = arbitrage(tokenPool, xtzPool, self.tzbtc_price, self.xtz_price)
+        self.model.deposit_lending(DEPOSITOR, self.config.deposits, self.now, tokenPool, lqtTotal)
+        for index, (collateral, leverage) in enumerate(self.config.positions):
+            # invest amount is added to the pool in halves, DEX fees are not counted
+            invest = int(collateral * leverage)
+            xtz = invest * self.tzbtc_price // (100 * self.xtz_price) if self.is_btc else invest
+            xtz //= 2
+            lb_shares = xtz * lqtTotal // xtzPool
+            tokenPool, xtzPool, lqtTotal = tokenPool + ceildiv(xtz * tokenPool, xtzPool), xtzPool + xtz, lqtTotal + lb_shares
+
+            entry = self.model.add_credit(f'position-{index}', invest - collateral)
+            entry['lb_shares'] += lb_shares
+            self.storage['lb_shares'] += lb_shares
+        self.pool = tokenPool, xtzPool, lqtTotal
+        self.storage['lb_price'] = tokenPool * FIXED_POINT_FACTOR // lqtTotal
+        self.model.check_total_supply_net_credit_inequation()
+
+    def move_prices(self):
+        scenario = self.config.scenario
+        dt = scenario.step_seconds / YEAR
+        btc_shock = self.rnd.gauss(0, 1)
+        xtz_shock = scenario.correlation * btc_shock + math.sqrt(1 - scenario.correlation ** 2) * self.rnd.gauss(0, 1)
+        self.tzbtc_price = max(1, int(self.tzbtc_price * math.exp(
+            scenario.btc_volatility * math.sqrt(dt) * btc_shock - scenario.btc_volatility ** 2 * dt / 2)))
+        self.xtz_price = max(1, int(self.xtz_price * math.exp(
+            scenario.xtz_volatility * math.sqrt(dt) * xtz_shock - scenario.xtz_volatility ** 2 * dt / 2)))
+
+        tokenPool, xtzPool, lqtTotal = self.pool
+        tokenPool, xtzPool = arbitrage(tokenPool, xtzPool, self.tzbtc_price, self.xtz_price)
+        self.pool = tokenPool, xtzPool + scenario.subsidy, lqtTotal
+
+    def liquidate(self, address, entry):
+        storage = self.storage
+        parameters = get_parameters(storage)
+        debt = get_debt(entry['gross_credit'], storage['gross_credit_index'], self.is_btc)
+        lb_shares_value = get_lb_shares_value(entry['lb_shares'], storage['lb_price'], self.tzbtc_price)
+        debt_value = get_debt_value(debt, self.tzbtc_price, self.xtz_price, self.is_btc)
+        if not is_liquidation_allowed(lb_shares_value, debt_value, parameters['liquidation_percent']):
+            return
+
+        tokenPool, _, lqtTotal = self.pool
+        value, pool = get_lb_shares_sale(entry['lb_shares'], self.pool, self.is_btc)
+        payment = ceildiv(debt * parameters['liquidation_price_percent'], 100)
+        if value >= payment:
+            # the liquidator keeps the LB shares, the pool doesn't change
+            params = self.model.liquidate_lb(LIQUIDATOR, address, payment, self.now, tokenPool, lqtTotal)
+            self.model.liquidate_lb_finalize(**params, tzbtc_price=self.tzbtc_price, xtz_price=self.xtz_price)
+            self.liquidations += 1
+            return
+        if not parameters['onchain_liquidation_available'] or value * 100 >= debt * parameters['onchain_liquidation_percent']:
+            return
+
+        if self.is_btc:
+            params = self.model.liquidate_onchain_lb(ADMINISTRATOR, address, self.now, tokenPool, lqtTotal)
+            self.model.update_tzbtc_callback(params['initial_tzBTC_shares'] + value)
+            self.model.liquidate_onchain_lb_finalize(**params)
+        else:
+            params = self.model.liquidate_onchain_lb(ADMINISTRATOR, address, 0, self.now, tokenPool, lqtTotal)
+            self.model.sell_tzbtc()
+            self.model.liquidate_onchain_lb_finalize(**params, balance=value)
+        self.pool = pool
+        self.bad_debt += max(0, debt - value)
+        self.onchain_liquidations += 1
+
+    def get_utilization(self):
+        storage = self.storage
+        if storage['totalSupply'] == 0:
+            return 0
+        return (
+            storage['total_net_credit'] * storage['net_credit_index']
+            / (storage['totalSupply'] * storage['deposit_index'])
+        )
+
+    def run(self):
+        scenario = self.config.scenario
+        self.open_positions()
+        initial_deposit_index = self.storage['deposit_index']
+        utilizations = []
+        for _ in range(scenario.steps):
+            self.now += scenario.step_seconds
+            self.move_prices()
+            self.model.update_indexes(self.now, self.pool[0], self.pool[2])
+            for address, entry in list(self.storage['liquidity_book'].items()):
+                if entry['net_credit'] > 0:
+                    self.liquidate(address, entry)
+            utilizations.append(self.get_utilization())
+
+        # positions which can't repay the debt at the end of the path
+        for entry in self.storage['liquidity_book'].values():
+            if entry['gross_credit'] > 0:
+                debt = get_debt(entry['gross_credit'], self.storage['gross_credit_index'], self.is_btc)
+                value, _ = get_lb_shares_sale(entry['lb_shares'], self.pool, self.is_btc)
+                self.bad_debt += max(0, debt - value)
+
+        years = scenario.steps * scenario.step_seconds / YEAR
+        return PathResult(
+            bad_debt=self.bad_debt,
+            liquidations=self.liquidations,
+            onchain_liquidations=self.onchain_liquidations,
+            deposit_apy=(self.storage['deposit_index'] / initial_deposit_index) ** (1 / years) - 1,
+            mean_utilization=sum(utilizations) / len(utilizations) if utilizations else 0,
+            max_utilization=max(utilizations, default=0),
+        )
+
+
+def simulate_path(config, seed):
+    return PathSimulation(config, seed).run()
+
+
+def _simulate_paths(args):
+    config, seeds = args
+    return [simulate_path(config, seed) for seed in seeds]
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * percent // 100)]
+
+
+def run_simulation(config, paths, seed=0, workers=None):
+    """
+        @params:
+            config - SimulationConfig
+            paths - number of price paths
+            workers - number of processes, all cores by default, 1 runs in the current process
+        @returns SimulationReport
+    """
+    seeds = list(range(seed, seed + paths))
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = _simulate_paths((config, seeds))
+    else:
+        # contiguous chunks keep the results in the seed order
+        size = -(-paths // workers)
+        chunks = [(config, seeds[index:index + size]) for index in range(0, paths, size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = [result for chunk in executor.map(_simulate_paths, chunks) for result in chunk]
+
+    deposit_apys = [result.deposit_apy for result in results]
+    return SimulationReport(
+        paths=paths,
+        bad_debt_probability=sum(result.bad_debt > 0 for result in results) / paths,
+        expected_bad_debt=sum(result.bad_debt for result in results) / paths,
+        liquidations=sum(result.liquidations for result in results) / paths,
+        onchain_liquidations=sum(result.onchain_liquidations for result in results) / paths,
+        deposit_apy=sum(deposit_apys) / paths,
+        deposit_apy_p5=percentile(deposit_apys, 5),
+        deposit_apy_p95=percentile(deposit_apys, 95),
+        mean_utilization=sum(result.mean_utilization for result in results) / paths,
+        max_utilization=max(result.max_utilization for result in results),
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Simulate farm risk for rate and leverage parameters.')
+    parser.add_argument('--btc', action='store_true', help='BTC farm contract, amounts are in tzBTC shares')
+    parser.add_argument('--params', type=json.loads, default={}, help='storage parameters as JSON, e.g. rate_params')
+    parser.add_argument('--paths', type=int, default=1000)
+    parser.add_argument('--steps', type=int, default=365)
+    parser.add_argument('--step-seconds', type=int, default=24 * 3600)
+    parser.add_argument('--xtz-volatility', type=float, default=0.9, help='annual XTZ volatility')
+    parser.add_argument('--btc-volatility', type=float, default=0.7, help='annual BTC volatility')
+    parser.add_argument('--correlation', type=float, default=0.6)
+    parser.add_argument('--positions', type=int, default=100, help='number of synthetic positions')
+    parser.add_argument('--max-collateral', type=int, default=10 ** 9, help='position collateral in mutez or tzBTC shares')
+    parser.add_argument('--deposits', type=int, help='deposited amount, 3x of the borrowed amount by default')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(args)
+
+    storage = get_initial_storage(args.btc, **args.params)
+    positions = random_positions(args.positions, args.max_collateral, storage['settings']['max_leverage'], args.seed)
+    deposits = args.deposits or 3 * sum(int(collateral * leverage) - collateral for collateral, leverage in positions)
+    config = SimulationConfig(
+        storage=storage,
+        is_btc=args.btc,
+        pool=DEFAULT_POOL,
+        prices=DEFAULT_PRICES,
+        deposits=deposits,
+        positions=positions,
+        scenario=Scenario(args.steps, args.step_seconds, args.xtz_volatility, args.btc_volatility, args.correlation),
+    )
+    report = run_simulation(config, args.paths, seed=args.seed, workers=args.workers)
+    print(json.dumps(report._asdict(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+    Initial storage builder for the farm contracts.
+
+    Contracts are compiled once with the default addresses, the compiled storage is
+    used as a template where addresses and parameters are replaced before origination.
+
+    Usage:
+        python -m kordfi.storage .out --administrator tz1... --liquidity-baking KT1... \\
+            --tzbtc KT1... --lb-token KT1... --oracle KT1... > .out/storage.json
+"""
+
+import argparse
+import json
+import time
+from functools import lru_cache
+from os.path import join
+
+from deepmerge import always_merger
+from pytezos import ContractInterface
+from pytezos.michelson.parse import michelson_to_micheline
+
+from .farm import PARAMETERS_KEY
+
+
+CONTRACT_TZ = 'contract/step_000_cont_0_contract.tz'
+STORAGE_TZ = 'contract/step_000_cont_0_storage.tz'
+
+
+def get_unknown_fields(template, params, prefix=''):
+    """
+        Lists `params` fields missing in the `template` storage, nested records are checked too.
+    """
+    unknown_fields = []
+    for name, value in params.items():
+        if name not in template:
+            unknown_fields.append(prefix + name)
+        elif isinstance(value, dict) and isinstance(template[name], dict) and template[name]:
+            # big maps are empty in the compiled storage and accept any keys
+            unknown_fields.extend(get_unknown_fields(template[name], value, f'{prefix}{name}.'))
+    return unknown_fields
+
+
+@lru_cache(maxsize=None)
+def load_template(out_dir):
+    """
+        Loads compiled contract and its initial storage.
+        @params:
+            out_dir - SmartPy compilation output directory
+        @returns (ContractInterface, micheline storage)
+    """
+    contract = ContractInterface.from_file(join(out_dir, CONTRACT_TZ))
+    with open(join(out_dir, STORAGE_TZ)) as f:
+        storage_value = michelson_to_micheline(f.read().strip())
+    return contract, storage_value
+
+
+def build_storage(
+    out_dir,
+    administrator,
+    liquidity_baking_address,
+    fa_tzBTC_address,
+    fa_lb_address,
+    oracle_address,
+    dex_contract_address=None,
+    now=None,
+    params=None,
+):
+    """
+        Builds initial storage of the compiled farm contract.
+        @params:
+            out_dir - SmartPy compilation output directory
+            administrator, ..., oracle_address - the same as contract constructor arguments
+            dex_contract_address - defaults to liquidity_baking_address
+            now - index_update_dttm and lb_price_update_dttm value, defaults to current time
+            params - storage fields to override, merged into the compiled storage,
+                `parameters` override the single entry of the parameters big_map
+        @returns storage as python object
+    """
+    contract, storage_value = load_template(out_dir)
+    storage = contract.storage.decode(storage_value)
+
+    params = params or {}
+    if 'parameters' in params:
+        params = {**params, 'parameters': {PARAMETERS_KEY: params['parameters']}}
+    unknown_fields = get_unknown_fields(storage, params)
+    if unknown_fields:
+        raise ValueError(f'Unknown storage fields: {", ".join(sorted(unknown_fields))}')
+
+    # sp.now is evaluated at compilation time
+    now = int(now) if now is not None else int(time.time())
+    storage.update({
+        'administrator': administrator,
+        'index_update_dttm': now,
+        'lb_price_update_dttm': now,
+    })
+    storage['settings'].update({
+        'liquidity_baking_address': liquidity_baking_address,
+        'dex_contract_address': dex_contract_address or liquidity_baking_address,
+        'fa_tzBTC_address': fa_tzBTC_address,
+        'fa_lb_address': fa_lb_address,
+        'oracle_address': oracle_address,
+    })
+    if 'invest_address' in storage['local_params']:
+        storage['local_params']['invest_address'] = administrator
+    return always_merger.merge(storage, params)
+
+
+def encode_storage(out_dir, storage):
+    """
+        Converts python storage object to micheline expression accepted by origination.
+    """
+    contract, _ = load_template(out_dir)
+    return contract.storage.encode(storage)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Build initial storage of the compiled farm contract.')
+    parser.add_argument('out_dir', help='SmartPy compilation output directory')
+    parser.add_argument('--administrator', required=True)
+    parser.add_argument('--liquidity-baking', required=True)
+    parser.add_argument('--tzbtc', required=True)
+    parser.add_argument('--lb-token', required=True)
+    parser.add_argument('--oracle', required=True)
+    parser.add_argument('--dex', help='defaults to --liquidity-baking')
+    parser.add_argument('--now', type=int, help='index_update_dttm, defaults to current time')
+    parser.add_argument('--params', type=json.loads, help='JSON object with storage fields to override')
+    args = parser.parse_args(args)
+
+    storage = build_storage(
+        args.out_dir,
+        administrator=args.administrator,
+        liquidity_baking_address=args.liquidity_baking,
+        fa_tzBTC_address=args.tzbtc,
+        fa_lb_address=args.lb_token,
+        oracle_address=args.oracle,
+        dex_contract_address=args.dex,
+        now=args.now,
+        params=args.params,
+    )
+    print(json.dumps(encode_storage(args.out_dir, storage)))
+
+
+if __name__ == '__main__':
+    main()
@@ -14,29 +14,33 @@ LQT="KT1AafHA1C1vk959wvHWBispY9Y2f3fxBUUo"
 ORACLE="KT1P8Ep9y8EsDSD9YkvakWnDvF2orDcpYXSq"
 
 # Deploy xtz contract
-ADMIN_ADDRESS=${ADMIN} \
-LIQUIDITY_BAKING_ADDRESS=${DEX} \
-FA_TZBTC_ADDRESS=${TZBTC_TOKEN} \
-FA_LB_TOKEN_ADDRESS=${LQT} \
-ORACLE_ADDRESS=${ORACLE} \
-    ~/smartpy-cli/SmartPy.sh compile src/LeveragedFarmLendingSmartContract.py .out --protocol ithaca
+~/smartpy-cli/SmartPy.sh compile src/LeveragedFarmLendingSmartContract.py .out_xtz --protocol ithaca
+python -m kordfi.storage .out_xtz \
+    --administrator ${ADMIN} \
+    --liquidity-baking ${DEX} \
+    --tzbtc ${TZBTC_TOKEN} \
+    --lb-token ${LQT} \
+    --oracle ${ORACLE} \
+    > .out_xtz/storage.json
 
 ~/smartpy-cli/SmartPy.sh originate-contract \
-    --code .out/contract/step_000_cont_0_contract.json \
-    --storage .out/contract/step_000_cont_0_storage.json \
+    --code .out_xtz/contract/step_000_cont_0_contract.json \
+    --storage .out_xtz/storage.json \
     --rpc $RPC_NODE \
     --private-key $SECRET_KEY
 
 # Deploy btc contract
-ADMIN_ADDRESS=${ADMIN} \
-LIQUIDITY_BAKING_ADDRESS=${DEX} \
-FA_TZBTC_ADDRESS=${TZBTC_TOKEN} \
-FA_LB_TOKEN_ADDRESS=${LQT} \
-ORACLE_ADDRESS=${ORACLE} \
-    ~/smartpy-cli/SmartPy.sh compile src/BTCLeveragedFarmLendingSmartContract.py .out --protocol ithaca
+~/smartpy-cli/SmartPy.sh compile src/BTCLeveragedFarmLendingSmartContract.py .out_btc --protocol ithaca
+python -m kordfi.storage .out_btc \
+    --administrator ${ADMIN} \
+    --liquidity-baking ${DEX} \
+    --tzbtc ${TZBTC_TOKEN} \
+    --lb-token ${LQT} \
+    --oracle ${ORACLE} \
+    > .out_btc/storage.json
 
 ~/smartpy-cli/SmartPy.sh originate-contract \
-    --code .out/contract/step_000_cont_0_contract.json \
-    --storage .out/contract/step_000_cont_0_storage.json \
+    --code .out_btc/contract/step_000_cont_0_contract.json \
+    --storage .out_btc/storage.json \
     --rpc $RPC_NODE \
     --private-key $SECRET_KEY
@@ -72,29 +72,33 @@ ORACLE=$(tezos-client list known contracts | grep '^oracle:' | cut -d' ' -f2)
 echo ORACLE=$ORACLE
 
 # Deploy xtz contract
-ADMIN_ADDRESS=${MANAGER} \
-LIQUIDITY_BAKING_ADDRESS=${DEXTER} \
-FA_TZBTC_ADDRESS=${TOKEN} \
-FA_LB_TOKEN_ADDRESS=${LQT} \
-ORACLE_ADDRESS=${ORACLE} \
-    ~/smartpy-cli/SmartPy.sh compile src/LeveragedFarmLendingSmartContract.py .out --protocol ithaca
+~/smartpy-cli/SmartPy.sh compile src/LeveragedFarmLendingSmartContract.py .out_xtz --protocol ithaca
+python -m kordfi.storage .out_xtz \
+    --administrator ${MANAGER} \
+    --liquidity-baking ${DEXTER} \
+    --tzbtc ${TOKEN} \
+    --lb-token ${LQT} \
+    --oracle ${ORACLE} \
+    > .out_xtz/storage.json
 
 ~/smartpy-cli/SmartPy.sh originate-contract \
-    --code .out/contract/step_000_cont_0_contract.json \
-    --storage .out/contract/step_000_cont_0_storage.json \
+    --code .out_xtz/contract/step_000_cont_0_contract.json \
+    --storage .out_xtz/storage.json \
     --rpc https://jakartanet.smartpy.io \
     --private-key <key>
 
 # Deploy btc contract
-ADMIN_ADDRESS=${MANAGER} \
-LIQUIDITY_BAKING_ADDRESS=${DEXTER} \
-FA_TZBTC_ADDRESS=${TOKEN} \
-FA_LB_TOKEN_ADDRESS=${LQT} \
-ORACLE_ADDRESS=${ORACLE} \
-    ~/smartpy-cli/SmartPy.sh compile src/BTCLeveragedFarmLendingSmartContract.py .out --protocol ithaca
+~/smartpy-cli/SmartPy.sh compile src/BTCLeveragedFarmLendingSmartContract.py .out_btc --protocol ithaca
+python -m kordfi.storage .out_btc \
+    --administrator ${MANAGER} \
+    --liquidity-baking ${DEXTER} \
+    --tzbtc ${TOKEN} \
+    --lb-token ${LQT} \
+    --oracle ${ORACLE} \
+    > .out_btc/storage.json
 
 ~/smartpy-cli/SmartPy.sh originate-contract \
-    --code .out/contract/step_000_cont_0_contract.json \
-    --storage .out/contract/step_000_cont_0_storage.json \
+    --code .out_btc/contract/step_000_cont_0_contract.json \
+    --storage .out_btc/storage.json \
     --rpc https://jakartanet.smartpy.io \
     --private-key <key>
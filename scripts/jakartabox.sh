@@ -1,24 +1,53 @@
 #!/usr/bin/env bash
 set -e
 
+# Usage:
+#   jakartabox.sh [start]       - start a new sandbox
+#   jakartabox.sh save <tag>    - save the sandbox node data as docker image
+#   jakartabox.sh restore <tag> - restart the sandbox from saved node data
+
 image=oxheadalpha/flextesa:latest
 script=jakartabox
+snapshot_image=kordfi-sandbox
 
 # macos users: https://gitlab.com/tezos/flextesa/blob/master/README.md#macosx-users
 export PATH="/usr/local/opt/coreutils/libexec/gnubin:/usr/local/opt/util-linux/bin:$PATH"
 
-docker run --rm --name test_sandbox --detach -p 20000:20000 \
-       -e block_time=2 \
-       "$image" "$script" start
+run_sandbox() {
+  docker run --rm --name test_sandbox --detach -p 20000:20000 \
+         -e block_time=2 \
+         "$1" "$script" start "${@:2}"
+
+  echo "Waiting testbox to start"
+  until docker exec test_sandbox tezos-client get timestamp >/dev/null 2>&1
+  do
+    sleep 2
+  done
+  echo "Testbox started"
+}
 
-echo "Waiting testbox to start"
-until docker exec test_sandbox tezos-client get timestamp >/dev/null 2>&1
-do
-  sleep 2
-done
-echo "Testbox started"
+case "${1:-start}" in
+  start)
+    run_sandbox "$image"
 
-docker exec test_sandbox tezos-client import secret key clare unencrypted:edsk2jkrThhmvGxhyhvDvCKLcbKeGMsTdop1Ko6QSzA2Tw2Cxx7rPi >/dev/null
-docker exec test_sandbox tezos-client transfer 1000000 from bob to clare --burn-cap 2 >/dev/null
-docker exec test_sandbox tezos-client reveal key for clare >/dev/null
-echo "Clare address created"
+    docker exec test_sandbox tezos-client import secret key clare unencrypted:edsk2jkrThhmvGxhyhvDvCKLcbKeGMsTdop1Ko6QSzA2Tw2Cxx7rPi >/dev/null
+    docker exec test_sandbox tezos-client transfer 1000000 from bob to clare --burn-cap 2 >/dev/null
+    docker exec test_sandbox tezos-client reveal key for clare >/dev/null
+    echo "Clare address created"
+    ;;
+  save)
+    # container is paused while its file system with node data is committed
+    docker commit test_sandbox "$snapshot_image:$2" >/dev/null
+    echo "Snapshot $2 saved"
+    ;;
+  restore)
+    docker rm --force test_sandbox >/dev/null 2>&1 || true
+    # keep node data from the snapshot instead of bootstrapping a new chain
+    run_sandbox "$snapshot_image:$2" --keep-root
+    echo "Snapshot $2 restored"
+    ;;
+  *)
+    echo "Unknown command $1" >&2
+    exit 1
+    ;;
+esac
@@ -0,0 +1,270 @@
+import smartpy as sp
+import os
+
+LIQUIDITY_BAKING_ADDRESS = os.environ.get('LIQUIDITY_BAKING_ADDRESS', 'tz1VGzxpbAcP1CL5z8f8CZNGALFtMFCcakrX')
+FA_TZBTC_ADDRESS = os.environ.get('FA_TZBTC_ADDRESS', 'tz1VGzxpbAcP1CL5z8f8CZNGALFtMFCcakrX')
+FA_LB_TOKEN_ADDRESS = os.environ.get('FA_LB_TOKEN_ADDRESS', 'tz1VGzxpbAcP1CL5z8f8CZNGALFtMFCcakrX')
+XTZ_FARM_ADDRESS = os.environ.get('XTZ_FARM_ADDRESS', 'tz1VGzxpbAcP1CL5z8f8CZNGALFtMFCcakrX')
+BTC_FARM_ADDRESS = os.environ.get('BTC_FARM_ADDRESS', 'tz1VGzxpbAcP1CL5z8f8CZNGALFtMFCcakrX')
+
+
+# parameters of the farm entry points, see src/LeveragedFarmLendingSmartContract.py
+LB_POOL = sp.TRecord(
+    tzbtc_pool = sp.TNat,
+    lqt_total = sp.TNat,
+).layout(("tzbtc_pool", "lqt_total"))
+
+XTZ_INVEST_LB_PARAMS = sp.TRecord(
+    amount2tzBTC = sp.TMutez,
+    mintzBTCTokensBought = sp.TNat,
+    amount2Lqt = sp.TMutez,
+    minLqtMinted = sp.TNat,
+    tzBTCShares = sp.TNat,
+).layout(("amount2tzBTC", ("mintzBTCTokensBought", ("amount2Lqt", ("minLqtMinted", "tzBTCShares")))))
+
+XTZ_REDEEM_LB_PARAMS = sp.TRecord(
+    lqtBurned = sp.TNat,
+    minTokensWithdrawn = sp.TNat,
+).layout(("lqtBurned", "minTokensWithdrawn"))
+
+XTZ_POSITION = sp.TRecord(
+    lb_shares = sp.TNat,
+    debt = sp.TMutez,
+    lb_shares_value = sp.TNat,
+    debt_value = sp.TNat,
+    liquidation_allowed = sp.TBool,
+)
+
+# and of src/BTCLeveragedFarmLendingSmartContract.py
+BTC_INVEST_LB_PARAMS = sp.TRecord(
+    amount2tzBTC = sp.TMutez,
+    mintzBTCTokensBought = sp.TNat,
+    tzBTC2xtz = sp.TNat,
+    minXtzBought = sp.TMutez,
+    amount2Lqt = sp.TMutez,
+    minLqtMinted = sp.TNat,
+).layout(("amount2tzBTC", ("mintzBTCTokensBought", ("tzBTC2xtz", ("minXtzBought", ("amount2Lqt", "minLqtMinted"))))))
+
+BTC_REDEEM_LB_PARAMS = sp.TRecord(
+    lqtBurned = sp.TNat,
+    minTokensWithdrawn = sp.TNat,
+    xtz_to_token_amount = sp.TMutez,
+).layout(("lqtBurned", ("minTokensWithdrawn", "xtz_to_token_amount")))
+
+BTC_POSITION = sp.TRecord(
+    lb_shares = sp.TNat,
+    debt = sp.TNat,
+    lb_shares_value = sp.TNat,
+    debt_value = sp.TNat,
+    liquidation_allowed = sp.TBool,
+)
+
+# farm calls of route, investLB amount is sent with the call
+XTZ_CALL = sp.TVariant(
+    depositLending = sp.TMutez,
+    redeemLending = sp.TMutez,
+    investLB = sp.TRecord(amount = sp.TMutez, params = XTZ_INVEST_LB_PARAMS).layout(("amount", "params")),
+    redeemLB = XTZ_REDEEM_LB_PARAMS,
+).layout(("depositLending", ("redeemLending", ("investLB", "redeemLB"))))
+
+BTC_CALL = sp.TVariant(
+    depositLending = sp.TNat,
+    redeemLending = sp.TNat,
+    investLB = sp.TRecord(amount = sp.TMutez, params = BTC_INVEST_LB_PARAMS).layout(("amount", "params")),
+    redeemLB = BTC_REDEEM_LB_PARAMS,
+).layout(("depositLending", ("redeemLending", ("investLB", "redeemLB"))))
+
+
+class FarmRouterSmartContract(sp.Contract):
+    """
+    Forwards deposit, invest and redeem calls of an implicit account to the XTZ and BTC farms in one operation.
+    LB pool values are requested once and forwarded to the farms with updateLbPrice,
+    so the routed calls don't refresh the LB price themselves.
+    Farms accept the routed calls when their `router_address` is set to this contract,
+    the operation source is the farmer of the routed calls.
+    """
+    def __init__(self, xtz_farm_address, btc_farm_address, liquidity_baking_address, fa_tzBTC_address, fa_lb_address):
+        self.init(
+            xtz_farm_address = xtz_farm_address,
+            btc_farm_address = btc_farm_address,
+            liquidity_baking_address = liquidity_baking_address,
+            fa_tzBTC_address = fa_tzBTC_address,
+            fa_lb_address = fa_lb_address,
+
+            local_params = sp.record(
+                tzbtc_pool = sp.nat(0),
+                lqt_total = sp.nat(0),
+            ),
+        )
+
+    def updateTzbtcPool(self):
+        handle = sp.contract(
+            sp.TRecord(
+                owner = sp.TAddress,
+                callback = sp.TContract(sp.TNat),
+            ).layout(('owner', 'callback')),
+            self.data.fa_tzBTC_address,
+            entry_point = "getBalance",
+        ).open_some('cant call getBalance for tzBTC')
+
+        params = sp.record(
+            owner = self.data.liquidity_baking_address,
+            callback = sp.self_entry_point(entry_point = 'updateTzbtcPoolCallback'),
+        )
+
+        sp.transfer(params, sp.mutez(0), handle)
+
+    @sp.entry_point
+    def updateTzbtcPoolCallback(self, tzbtc_pool):
+        sp.set_type(tzbtc_pool, sp.TNat)
+        sp.verify(self.data.fa_tzBTC_address == sp.sender, 'Forbidden.')
+        self.data.local_params.tzbtc_pool = tzbtc_pool
+
+    def updateLqtTotal(self):
+        handle = sp.contract(
+            sp.TRecord(
+                request = sp.TUnit,
+                callback = sp.TContract(sp.TNat),
+            ).layout(('request', 'callback')),
+            self.data.fa_lb_address,
+            entry_point = "getTotalSupply",
+        ).open_some('cant call getTotalSupply of lb token')
+
+        params = sp.record(
+            request = sp.unit,
+            callback = sp.self_entry_point(entry_point = 'updateLqtTotalCallback'),
+        )
+
+        sp.transfer(params, sp.mutez(0), handle)
+
+    @sp.entry_point
+    def updateLqtTotalCallback(self, lqt_total):
+        sp.set_type(lqt_total, sp.TNat)
+        sp.verify(self.data.fa_lb_address == sp.sender, 'Forbidden.')
+        self.data.local_params.lqt_total = lqt_total
+
+    def update_lb_price(self, xtz, btc):
+        # update external parameters, call forwardLbPrice
+        self.updateLqtTotal()
+        self.updateTzbtcPool()
+        sp.transfer(
+            arg = sp.record(xtz = xtz, btc = btc),
+            amount = sp.mutez(0),
+            destination = sp.self_entry_point(entry_point = "forwardLbPrice"),
+        )
+
+    @sp.entry_point
+    def forwardLbPrice(self, params):
+        """
+        @params fields:
+            xtz, btc - farms which get the LB pool values
+        """
+        sp.set_type(params, sp.TRecord(xtz = sp.TBool, btc = sp.TBool).layout(("xtz", "btc")))
+        sp.verify(sp.self_address == sp.sender, 'Forbidden.')
+
+        pool = sp.local('pool', sp.record(
+            tzbtc_pool = self.data.local_params.tzbtc_pool,
+            lqt_total = self.data.local_params.lqt_total,
+        ), LB_POOL)
+        with sp.if_(params.xtz):
+            self.call_farm(self.data.xtz_farm_address, 'updateLbPrice', pool.value, sp.mutez(0))
+        with sp.if_(params.btc):
+            self.call_farm(self.data.btc_farm_address, 'updateLbPrice', pool.value, sp.mutez(0))
+
+    def call_farm(self, address, entry_point, arg, amount):
+        handle = sp.contract(
+            sp.type_of(arg),
+            address,
+            entry_point = entry_point,
+        ).open_some(f'cant call {entry_point} of farm')
+        sp.transfer(arg, amount, handle)
+
+    @sp.entry_point
+    def updateIndexes(self):
+        # one LB price refresh for both farms instead of their updateIndexes
+        self.update_lb_price(sp.bool(True), sp.bool(True))
+
+    @sp.entry_point
+    def route(self, params):
+        """
+        Calls the farms in the list order after the LB price is forwarded to them.
+        @params fields:
+            xtz - calls of the XTZ farm
+            btc - calls of the BTC farm
+        The amount equals the sum of depositLending and investLB amounts.
+        """
+        sp.set_type(params, sp.TRecord(xtz = sp.TList(XTZ_CALL), btc = sp.TList(BTC_CALL)).layout(("xtz", "btc")))
+        # farms take the operation source as the farmer of the routed calls
+        sp.verify(sp.sender == sp.source, 'Forbidden.')
+
+        has_xtz_calls = sp.local('has_xtz_calls', sp.len(params.xtz) > 0)
+        has_btc_calls = sp.local('has_btc_calls', sp.len(params.btc) > 0)
+        sp.verify(has_xtz_calls.value | has_btc_calls.value, 'empty route')
+
+        amount = sp.local('amount', sp.mutez(0))
+        with sp.for_('call', params.xtz) as call:
+            with call.match('depositLending') as value:
+                amount.value += value
+            with call.match('investLB') as value:
+                amount.value += value.amount
+        with sp.for_('call', params.btc) as call:
+            with call.match('investLB') as value:
+                amount.value += value.amount
+        sp.verify(amount.value == sp.amount, 'wrong amount')
+
+        self.update_lb_price(has_xtz_calls.value, has_btc_calls.value)
+
+        xtz_farm_address = self.data.xtz_farm_address
+        with sp.for_('call', params.xtz) as call:
+            with call.match_cases() as arg:
+                with arg.match('depositLending') as value:
+                    self.call_farm(xtz_farm_address, 'depositLending', sp.unit, value)
+                with arg.match('redeemLending') as value:
+                    self.call_farm(xtz_farm_address, 'redeemLending', value, sp.mutez(0))
+                with arg.match('investLB') as value:
+                    self.call_farm(xtz_farm_address, 'investLB', value.params, value.amount)
+                with arg.match('redeemLB') as value:
+                    self.call_farm(xtz_farm_address, 'redeemLB', value, sp.mutez(0))
+
+        btc_farm_address = self.data.btc_farm_address
+        with sp.for_('call', params.btc) as call:
+            with call.match_cases() as arg:
+                with arg.match('depositLending') as value:
+                    self.call_farm(btc_farm_address, 'depositLending', value, sp.mutez(0))
+                with arg.match('redeemLending') as value:
+                    self.call_farm(btc_farm_address, 'redeemLending', value, sp.mutez(0))
+                with arg.match('investLB') as value:
+                    self.call_farm(btc_farm_address, 'investLB', value.params, value.amount)
+                with arg.match('redeemLB') as value:
+                    self.call_farm(btc_farm_address, 'redeemLB', value, sp.mutez(0))
+
+    @sp.onchain_view()
+    def getPositions(self, address):
+        """
+        Farmer positions and deposits in both farms at now.
+        @returns record fields:
+            xtz, btc - getPosition of the farms
+            xtz_redeemable, btc_redeemable - getMaxRedeemable of the farms
+            lb_shares_value, debt_value - sums of the farm positions, multiplied by 10^8
+        """
+        sp.set_type(address, sp.TAddress)
+
+        xtz = sp.local('xtz', sp.view("getPosition", self.data.xtz_farm_address, address, t=XTZ_POSITION).open_some('invalid view'))
+        btc = sp.local('btc', sp.view("getPosition", self.data.btc_farm_address, address, t=BTC_POSITION).open_some('invalid view'))
+        sp.result(sp.record(
+            xtz = xtz.value,
+            btc = btc.value,
+            xtz_redeemable = sp.view("getMaxRedeemable", self.data.xtz_farm_address, address, t=sp.TMutez).open_some('invalid view'),
+            btc_redeemable = sp.view("getMaxRedeemable", self.data.btc_farm_address, address, t=sp.TNat).open_some('invalid view'),
+            lb_shares_value = xtz.value.lb_shares_value + btc.value.lb_shares_value,
+            debt_value = xtz.value.debt_value + btc.value.debt_value,
+        ))
+
+
+sp.add_compilation_target('contract', FarmRouterSmartContract(
+    sp.address(XTZ_FARM_ADDRESS),
+    sp.address(BTC_FARM_ADDRESS),
+    sp.address(LIQUIDITY_BAKING_ADDRESS),
+    sp.address(FA_TZBTC_ADDRESS),
+    sp.address(FA_LB_TOKEN_ADDRESS),
+))
@@ -21,6 +21,7 @@ DEFAULT_TRESHOLD_PERCENT_1 = 80
 DEFAULT_TRESHOLD_PERCENT_2 = 90
 
 INFINITY_NAT = sp.nat(int(10**18))
+PARAMETERS_KEY = sp.nat(0)
 
 
 def call_self_entry(entry_point):
@@ -63,11 +64,45 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
         super().__init__(
             config,
             administrator = administrator,
-            liquidity_baking_address = liquidity_baking_address,
-            dex_contract_address = liquidity_baking_address,
-            fa_tzBTC_address = fa_tzBTC_address,
-            fa_lb_address = fa_lb_address,
-            oracle_address = oracle_address,
+
+            # rarely changed configuration, kept out of the hot accounting fields
+            settings = sp.record(
+                liquidity_baking_address = liquidity_baking_address,
+                dex_contract_address = liquidity_baking_address,
+                fa_tzBTC_address = fa_tzBTC_address,
+                fa_lb_address = fa_lb_address,
+                oracle_address = oracle_address,
+
+                lb_price_change_rate = sp.nat(5_787_000),  # ~ 50% per day
+                lb_price_update_interval = sp.nat(0),  # calculateLbPrice in every block
+                persistent_approval = sp.bool(False),  # approve and reset allowances around every DEX call
+                dex_contract_approved = sp.bool(False),  # standing tzBTC allowance of dex_contract_address, see approveDexContract
+                router_address = sp.set_type_expr(sp.none, sp.TOption(sp.TAddress)),  # no router forwards farm calls
+                tzBTC_dust_threshold = sp.nat(0),  # tzBTC residual is sold after every call
+                # read by every investLB, kept out of the parameters big_map
+                upfront_commission = sp.nat(1_000),  # 1%
+                max_leverage = sp.nat(40),  # max leverage 4
+            ),
+
+            # liquidation and flashloan parameters are read by a few entry points only,
+            # a single-key big_map is loaded on access instead of with the storage of every call
+            parameters = sp.big_map(
+                {
+                    PARAMETERS_KEY: sp.record(
+                        onchain_liquidation_available = True,
+                        onchain_liquidation_percent = sp.nat(120),  # 120%
+                        onchain_liquidation_comm = sp.nat(50),  # 50%
+                        liquidation_percent = sp.nat(120),
+                        liquidation_price_percent = sp.nat(110),
+                        liquidation_comm = sp.nat(50),
+
+                        flashloan_available = sp.bool(False),
+                        flashloan_admin_commission = sp.nat(100),  # 0.1%
+                        flashloan_deposit_commission = sp.nat(50),  # 0.05%
+                    ),
+                },
+                tkey = sp.TNat,
+            ),
 
             index_update_dttm = sp.now,
             gross_credit_index = INITIAL_INDEX_VALUE,
@@ -79,24 +114,15 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 threshold_percent_1 = sp.nat(DEFAULT_TRESHOLD_PERCENT_1),
                 threshold_percent_2 = sp.nat(DEFAULT_TRESHOLD_PERCENT_2),
             ),
-            upfront_commission = sp.nat(1_000),  # 1%
             is_working = True,
             lb_price = sp.nat(1_000_000_000_000),
-            lb_price_change_rate = sp.nat(5_787_000),  # ~ 50% per day
-
-            onchain_liquidation_available = True,
-            onchain_liquidation_percent = sp.nat(120),  # 120%
-            onchain_liquidation_comm = sp.nat(50),  # 50%
-            liquidation_percent = sp.nat(120),
-            liquidation_price_percent = sp.nat(110),
-            liquidation_comm = sp.nat(50),
-
-            max_leverage = sp.nat(40),  # max leverage 4
+            lb_price_update_dttm = sp.now,
 
             total_gross_credit = sp.nat(0),
             total_net_credit = sp.nat(0),
 
             lb_shares = sp.nat(0),
+            tzBTC_dust = sp.nat(0),  # tzBTC residuals kept by sellTzBTC, sold with sellTzBTCDust
             index_delta = sp.nat(0),
 
             liquidity_book = sp.big_map(tkey=sp.TAddress, tvalue = sp.TRecord(
@@ -110,11 +136,12 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 fa_lb_callback_status = sp.bool(False),
                 tzbtc_pool = sp.nat(0),
                 lqt_total = sp.nat(0),
+                invest_address = administrator,
+                invest_initial_balance = sp.mutez(0),
+                invest_amount2Lqt = sp.mutez(0),
+                tzBTC_dust_delta = sp.int(0),  # tzBTC kept by sellTzBTC less the used dust, settled by the finalize
             ),
 
-            flashloan_available = sp.bool(False),
-            flashloan_admin_commission = sp.nat(100),  # 0.1%
-            flashloan_deposit_commission = sp.nat(50),  # 0.05%
             flashloan_amount = sp.mutez(0),
         )
         self.set_token_metadata(token_metadata)
@@ -123,7 +150,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
     @sp.entry_point
     def default(self):
-        with sp.if_((sp.sender != self.data.liquidity_baking_address) & (sp.sender != self.data.dex_contract_address) & (self.data.totalSupply > sp.nat(0))):
+        with sp.if_((sp.sender != self.data.settings.liquidity_baking_address) & (sp.sender != self.data.settings.dex_contract_address) & (self.data.totalSupply > sp.nat(0))):
             self.update_rates()
             self.data.deposit_index += convert_mutez_to_nat(sp.amount) * FIXED_POINT_FACTOR / self.data.totalSupply
 
@@ -136,7 +163,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 maxTokensDeposited = sp.TNat,
                 deadline = sp.TTimestamp,
             ).layout(('owner', ('minLqtMinted', ('maxTokensDeposited', 'deadline')))),
-            self.data.liquidity_baking_address,
+            self.data.settings.liquidity_baking_address,
             entry_point = 'addLiquidity'
         ).open_some('cant call addLiquidity')
 
@@ -158,7 +185,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 minTokensWithdrawn = sp.TNat,
                 deadline = sp.TTimestamp,
             ).layout(('to', ('lqtBurned', ('minXtzWithdrawn', ('minTokensWithdrawn', 'deadline'))))),
-            self.data.liquidity_baking_address,
+            self.data.settings.liquidity_baking_address,
             entry_point = 'removeLiquidity'
         ).open_some('cant call removeLiquidity')
 
@@ -180,7 +207,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 minXtzBought = sp.TMutez,
                 deadline = sp.TTimestamp,
             ).layout(('to', ('tokensSold', ('minXtzBought', 'deadline')))),
-            self.data.dex_contract_address,
+            self.data.settings.dex_contract_address,
             entry_point = 'tokenToXtz'
         ).open_some('cant call tokenToXtz')
 
@@ -200,7 +227,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 minTokensBought = sp.TNat,
                 deadline = sp.TTimestamp,
             ).layout(('to', ('minTokensBought', 'deadline'))),
-            self.data.dex_contract_address,
+            self.data.settings.dex_contract_address,
             entry_point = 'xtzToToken'
         ).open_some('cant call xtzToToken')
 
@@ -218,7 +245,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 spender = sp.TAddress,
                 value = sp.TNat,
             ).layout(('spender', 'value')),
-            self.data.fa_lb_address,
+            self.data.settings.fa_lb_address,
             entry_point = 'approve'
         ).open_some('cant call approve for LB shares')
 
@@ -235,7 +262,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 spender = sp.TAddress,
                 value = sp.TNat,
             ).layout(('spender', 'value')),
-            self.data.fa_tzBTC_address,
+            self.data.settings.fa_tzBTC_address,
             entry_point = 'approve'
         ).open_some('cant call approve for tzBTC shares')
 
@@ -246,6 +273,27 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
         sp.transfer(params, sp.mutez(0), handle)
 
+    def approve_dex_lb_shares(self, spender, value):
+        """
+            LB shares allowance for removeLiquidity of sell_LB, liquidity baking keeps
+            a standing one in persistent approval mode.
+        """
+        with sp.if_(~self.data.settings.persistent_approval):
+            self.approve_lb_shares(spender, value)
+
+    def approve_dex_tzBTC_shares(self, spender, value):
+        """
+            tzBTC allowance for addLiquidity of investLB and tokenToXtz of the residual and dust sales.
+            In persistent approval mode liquidity baking keeps a standing allowance,
+            dex_contract_address only after approveDexContract.
+        """
+        settings = self.data.settings
+        with sp.if_(
+            ~settings.persistent_approval
+            | ((spender != settings.liquidity_baking_address) & ~settings.dex_contract_approved)
+        ):
+            self.approve_tzBTC_shares(spender, value)
+
     def transfer_tzBTC_shares(self, address_from, address_to, value):
         handle = sp.contract(
             sp.TRecord(**{
@@ -253,7 +301,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 'to': sp.TAddress,
                 'value': sp.TNat,
             }).layout(('from', ('to', 'value'))),
-            self.data.fa_tzBTC_address,
+            self.data.settings.fa_tzBTC_address,
             entry_point = 'transfer'
         ).open_some('cant call transfer for tzBTC shares')
 
@@ -272,7 +320,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 'to': sp.TAddress,
                 'value': sp.TNat,
             }).layout(('from', ('to', 'value'))),
-            self.data.fa_lb_address,
+            self.data.settings.fa_lb_address,
             entry_point = 'transfer'
         ).open_some('cant call transfer for LB shares')
 
@@ -295,48 +343,44 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
     @sp.entry_point
     def disableOnchainLiquidation(self):
         sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
-        self.data.onchain_liquidation_available = False
+        self.data.parameters[PARAMETERS_KEY].onchain_liquidation_available = False
 
     @sp.entry_point
     def setUpfrontCommission(self, value):
         sp.set_type(value, sp.TNat)
         sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
         sp.verify(value <= 2_000, 'upfront commission max value error')
-        self.data.upfront_commission = value
+        self.data.settings.upfront_commission = value
 
     @sp.entry_point
     def setLbPriceChangeRate(self, value):
         sp.set_type(value, sp.TNat)
         sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
         sp.verify(value <= 277_777_777, 'price change rate max value error') # 50% per hour
-        self.data.lb_price_change_rate = value
-
-    def update_lb_shares(self):
-        self.data.local_params.fa_lb_callback_status = sp.bool(True)
-
-        handle = sp.contract(
-            sp.TRecord(
-                owner = sp.TAddress,
-                callback = sp.TContract(sp.TNat),
-            ).layout(('owner', 'callback')), 
-            self.data.fa_lb_address, 
-            entry_point = "getBalance",
-        ).open_some('cant call getBalance for LB shares')
-
-        params = sp.record(
-            owner = sp.self_address,
-            callback = sp.self_entry_point(entry_point = 'updateLBCallback'),
-        )
+        self.data.settings.lb_price_change_rate = value
 
-        sp.transfer(params, sp.mutez(0), handle)
+    @sp.entry_point
+    def setLbPriceUpdateInterval(self, value):
+        """
+        Minimum seconds between LB price refreshes of entry points, updateIndexes refreshes it at any time.
+        liquidateLB and the position views use lb_price of the last refresh, the interval bounds its age.
+        """
+        sp.set_type(value, sp.TNat)
+        sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
+        sp.verify(value <= 300, 'lb price update interval max value error')  # 5 minutes
+        self.data.settings.lb_price_update_interval = value
 
     @sp.entry_point
-    def updateLBCallback(self, lb_shares):
-        sp.set_type(lb_shares, sp.TNat)
-        sp.verify(self.data.fa_lb_address == sp.sender, 'Forbidden.')
-        sp.verify(self.data.local_params.fa_lb_callback_status, 'Bad status.')
-        self.data.local_params.fa_lb_callback_status = sp.bool(False)
-        self.data.lb_shares = lb_shares
+    def setTzBTCDustThreshold(self, value):
+        """
+        tzBTC residual of a call up to the threshold is kept instead of selling it, see sellTzBTC.
+        The depositors hold the kept residual until sellTzBTCDust, so the threshold is capped
+        to keep their exposure to the tzBTC price small.
+        """
+        sp.set_type(value, sp.TNat)
+        sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
+        sp.verify(value <= 1_000, 'tzBTC dust threshold max value error')
+        self.data.settings.tzBTC_dust_threshold = value
 
     def updateTzbtcPool(self):
         handle = sp.contract(
@@ -344,12 +388,12 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 owner = sp.TAddress,
                 callback = sp.TContract(sp.TNat),
             ).layout(('owner', 'callback')),
-            self.data.fa_tzBTC_address, 
+            self.data.settings.fa_tzBTC_address, 
             entry_point = "getBalance",
         ).open_some('cant call getBalance for tzBTC')
 
         params = sp.record(
-            owner = self.data.liquidity_baking_address,
+            owner = self.data.settings.liquidity_baking_address,
             callback = sp.self_entry_point(entry_point = 'updateTzbtcPoolCallback'),
         )
 
@@ -358,7 +402,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
     @sp.entry_point
     def updateTzbtcPoolCallback(self, tzbtc_pool):
         sp.set_type(tzbtc_pool, sp.TNat)
-        sp.verify(self.data.fa_tzBTC_address == sp.sender, 'Forbidden.')
+        sp.verify(self.data.settings.fa_tzBTC_address == sp.sender, 'Forbidden.')
         self.data.local_params.tzbtc_pool = tzbtc_pool
 
     def updateLqtTotal(self):
@@ -367,7 +411,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 request = sp.TUnit,
                 callback = sp.TContract(sp.TNat),
             ).layout(('request', 'callback')),
-            self.data.fa_lb_address, 
+            self.data.settings.fa_lb_address, 
             entry_point = "getTotalSupply",
         ).open_some('cant call getTotalSupply of lb token')
 
@@ -381,7 +425,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
     @sp.entry_point
     def updateLqtTotalCallback(self, lqt_total):
         sp.set_type(lqt_total, sp.TNat)
-        sp.verify(self.data.fa_lb_address == sp.sender, 'Forbidden.')
+        sp.verify(self.data.settings.fa_lb_address == sp.sender, 'Forbidden.')
         self.data.local_params.lqt_total = lqt_total
 
     @sp.entry_point
@@ -414,9 +458,74 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
     @sp.entry_point
     def setDexContract(self, address):
+        """
+        DEX contract of the tzBTC sales. The standing allowance of the previous DEX is revoked,
+        the new one sells with per call allowances until approveDexContract.
+        """
         sp.set_type(address, sp.TAddress)
         sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
-        self.data.dex_contract_address = address
+
+        settings = self.data.settings
+        with sp.if_(settings.dex_contract_approved & (address != settings.dex_contract_address)):
+            self.approve_tzBTC_shares(settings.dex_contract_address, sp.nat(0))
+            self.data.settings.dex_contract_approved = False
+
+        self.data.settings.dex_contract_address = address
+
+    @sp.entry_point
+    def setPersistentApproval(self, value):
+        """
+        Persistent approval mode keeps INFINITY_NAT allowances of LB and tzBTC shares to liquidity baking
+        instead of approving them around every DEX call, approveDexContract adds a tzBTC allowance
+        to dex_contract_address.
+        The mode trusts the administrator: dex_contract_address is set by setDexContract and its standing
+        allowance lets it transfer every tzBTC share of the farm, i.e. the residuals within a call
+        and the kept tzBTC dust bought by the depositors.
+        """
+        sp.set_type(value, sp.TBool)
+        sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
+
+        settings = self.data.settings
+        with sp.if_(value != settings.persistent_approval):
+            # FA1.2 changes an allowance from or to zero only, both modes leave zero allowances between calls
+            allowance = sp.local('allowance', sp.nat(0))
+            with sp.if_(value):
+                allowance.value = INFINITY_NAT
+
+            self.approve_lb_shares(settings.liquidity_baking_address, allowance.value)
+            self.approve_tzBTC_shares(settings.liquidity_baking_address, allowance.value)
+            # approveDexContract works in persistent approval mode only, so this disables it
+            with sp.if_(settings.dex_contract_approved):
+                self.approve_tzBTC_shares(settings.dex_contract_address, sp.nat(0))
+                self.data.settings.dex_contract_approved = False
+
+        self.data.settings.persistent_approval = value
+
+    @sp.entry_point
+    def approveDexContract(self):
+        """
+        Grants the standing INFINITY_NAT tzBTC allowance of persistent approval mode to dex_contract_address,
+        in a separate call from setDexContract so the new DEX can be checked before it gets the allowance.
+        """
+        sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
+
+        settings = self.data.settings
+        sp.verify(settings.persistent_approval, 'persistent approval disabled')
+        sp.verify(~settings.dex_contract_approved, 'dex contract approved')
+        sp.verify(settings.dex_contract_address != settings.liquidity_baking_address, 'liquidity baking approved')
+
+        self.approve_tzBTC_shares(settings.dex_contract_address, INFINITY_NAT)
+        self.data.settings.dex_contract_approved = True
+
+    @sp.entry_point
+    def setRouterAddress(self, value):
+        """
+        Router contract which forwards deposit, invest and redeem calls of implicit accounts
+        and the LB price refreshed for all farms, see src/FarmRouterSmartContract.py.
+        """
+        sp.set_type(value, sp.TOption(sp.TAddress))
+        sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
+        self.data.settings.router_address = value
 
     @sp.entry_point
     def setRateParams(self, params):
@@ -512,44 +621,55 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
         sp.verify(liquidation_comm <= sp.nat(100), 'liquidation_comm max value error')
 
-        self.data.max_leverage = max_leverage
-        self.data.onchain_liquidation_percent = onchain_liquidation_percent
-        self.data.onchain_liquidation_comm = onchain_liquidation_comm
-        self.data.liquidation_percent = liquidation_percent
-        self.data.liquidation_price_percent = liquidation_price_percent
-        self.data.liquidation_comm = liquidation_comm
-        self.data.oracle_address = oracle_address
+        self.data.settings.max_leverage = max_leverage
+        parameters = self.get_parameters()
+        parameters.value.onchain_liquidation_percent = onchain_liquidation_percent
+        parameters.value.onchain_liquidation_comm = onchain_liquidation_comm
+        parameters.value.liquidation_percent = liquidation_percent
+        parameters.value.liquidation_price_percent = liquidation_price_percent
+        parameters.value.liquidation_comm = liquidation_comm
+        self.data.parameters[PARAMETERS_KEY] = parameters.value
+        self.data.settings.oracle_address = oracle_address
+
+    def get_sender(self):
+        """
+        Farmer of the call, the router forwards calls of the implicit account which is the operation source.
+        """
+        return sp.local('sender', sp.eif(
+            sp.some(sp.sender) == self.data.settings.router_address,
+            sp.source,
+            sp.sender,
+        )).value
 
-    def get_gross_credit_rate(self):
-        adjusted_utilization = sp.local('adjusted_utilization', sp.nat(0))
-        with sp.if_(self.data.totalSupply > sp.nat(0)):
-            adjusted_utilization.value = (
-                self.data.total_gross_credit * self.data.gross_credit_index * FIXED_POINT_FACTOR 
-                / 
-                (self.data.totalSupply * self.data.deposit_index)
-            )
+    def get_parameters(self):
+        """
+        Loads the liquidation and flashloan parameters from the big_map once per call.
+        """
+        return sp.local('parameters', self.data.parameters[PARAMETERS_KEY])
 
+    def get_gross_credit_rate(self, adjusted_utilization):
         rate = sp.local('rate', sp.nat(0))
 
-        rate_1 = self.data.rate_params.rate_1
-        rate_diff = self.data.rate_params.rate_diff
-        threshold_percent_1 = sp.local('threshold_percent_1', self.data.rate_params.threshold_percent_1 * 10 ** (FIXED_POINT_PRECISION - 2))
-        threshold_percent_2 = sp.local('threshold_percent_2', self.data.rate_params.threshold_percent_2 * 10 ** (FIXED_POINT_PRECISION - 2))
+        rate_params = sp.local('rate_params', self.data.rate_params)
+        rate_1 = rate_params.value.rate_1
+        rate_diff = rate_params.value.rate_diff
+        threshold_percent_1 = sp.local('threshold_percent_1', rate_params.value.threshold_percent_1 * 10 ** (FIXED_POINT_PRECISION - 2))
+        threshold_percent_2 = sp.local('threshold_percent_2', rate_params.value.threshold_percent_2 * 10 ** (FIXED_POINT_PRECISION - 2))
 
-        with sp.if_(adjusted_utilization.value < threshold_percent_1.value):
-            rate.value = rate_1 * adjusted_utilization.value / threshold_percent_1.value
+        with sp.if_(adjusted_utilization < threshold_percent_1.value):
+            rate.value = rate_1 * adjusted_utilization / threshold_percent_1.value
 
         with sp.else_():
-            with sp.if_(adjusted_utilization.value < threshold_percent_2.value):
+            with sp.if_(adjusted_utilization < threshold_percent_2.value):
                 rate.value = rate_1
 
             with sp.else_():
 
-                with sp.if_(adjusted_utilization.value < FIXED_POINT_FACTOR):
+                with sp.if_(adjusted_utilization < FIXED_POINT_FACTOR):
                     rate.value = (
                         rate_1
                         +
-                        rate_diff * sp.as_nat(adjusted_utilization.value - threshold_percent_2.value)
+                        rate_diff * sp.as_nat(adjusted_utilization - threshold_percent_2.value)
                         /
                         sp.as_nat(FIXED_POINT_FACTOR - threshold_percent_2.value)
                     )
@@ -561,30 +681,52 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
     def update_rates(self):
         with sp.if_(self.data.index_update_dttm != sp.now):
             self.update_rates_lambda()
-            self.update_lb_price()
+            # calculateLbPrice clamps the change by the time since the last refresh, skipped refreshes don't loosen it
+            with sp.if_(sp.add_seconds(self.data.lb_price_update_dttm, sp.to_int(self.data.settings.lb_price_update_interval)) <= sp.now):
+                self.update_lb_price()
+            with sp.else_():
+                self.data.index_update_dttm = sp.now
 
     @sp.private_lambda(with_storage='read-write', with_operations=True, wrap_call=True)
     def update_rates_lambda(self):
+        indexes = sp.local('indexes', self.get_projected_indexes())
+        self.data.gross_credit_index = indexes.value.gross_credit_index
+        self.data.net_credit_index = indexes.value.net_credit_index
+        self.data.deposit_index = indexes.value.deposit_index
+
+    def get_projected_indexes(self):
+        """
+        Indexes which update_rates_lambda sets at sp.now.
+        Storage fields are read once, update_rates runs at the top of most entry points.
+        """
         dttm_delta = sp.local('dttm_delta', sp.as_nat(sp.now - self.data.index_update_dttm))
+        total_supply = sp.local('total_supply', self.data.totalSupply)
+        gross_credit_index = sp.local('gross_credit_index', self.data.gross_credit_index)
+        net_credit_index = sp.local('net_credit_index', self.data.net_credit_index)
+        deposit_index = sp.local('deposit_index', self.data.deposit_index)
 
         utilization = sp.local('utilization', sp.nat(0))
-        with sp.if_(self.data.totalSupply > sp.nat(0)):
-            utilization.value = (
-                self.data.total_net_credit * self.data.net_credit_index * FIXED_POINT_FACTOR 
-                / 
-                (self.data.totalSupply * self.data.deposit_index)
+        adjusted_utilization = sp.local('adjusted_utilization', sp.nat(0))
+        with sp.if_(total_supply.value > sp.nat(0)):
+            # the same denominator for the net and gross credit utilization
+            supply_value = sp.local('supply_value', total_supply.value * deposit_index.value)
+            utilization.value = self.data.total_net_credit * net_credit_index.value * FIXED_POINT_FACTOR / supply_value.value
+            adjusted_utilization.value = (
+                self.data.total_gross_credit * gross_credit_index.value * FIXED_POINT_FACTOR / supply_value.value
             )
 
-        gross_credit_rate = self.get_gross_credit_rate()
-        self.data.gross_credit_index = ceildiv(self.data.gross_credit_index * (FIXED_POINT_FACTOR + gross_credit_rate * dttm_delta.value), FIXED_POINT_FACTOR)
+        gross_credit_rate = sp.local('gross_credit_rate', self.get_gross_credit_rate(adjusted_utilization.value))
 
         net_credit_rate = sp.local('net_credit_rate', sp.nat(0))
         with sp.if_(self.data.is_working):
-            net_credit_rate.value = gross_credit_rate * 9 / 10  # 90% commission factor
-        self.data.net_credit_index = ceildiv(self.data.net_credit_index * (FIXED_POINT_FACTOR + net_credit_rate.value * dttm_delta.value), FIXED_POINT_FACTOR)
+            net_credit_rate.value = gross_credit_rate.value * 9 / 10  # 90% commission factor
 
         deposit_rate = sp.local('deposit_rate', net_credit_rate.value * utilization.value / FIXED_POINT_FACTOR)
-        self.data.deposit_index = self.data.deposit_index * (FIXED_POINT_FACTOR + deposit_rate.value * dttm_delta.value) / FIXED_POINT_FACTOR
+        return sp.record(
+            gross_credit_index = ceildiv(gross_credit_index.value * (FIXED_POINT_FACTOR + gross_credit_rate.value * dttm_delta.value), FIXED_POINT_FACTOR),
+            net_credit_index = ceildiv(net_credit_index.value * (FIXED_POINT_FACTOR + net_credit_rate.value * dttm_delta.value), FIXED_POINT_FACTOR),
+            deposit_index = deposit_index.value * (FIXED_POINT_FACTOR + deposit_rate.value * dttm_delta.value) / FIXED_POINT_FACTOR,
+        )
 
     def update_lb_price(self):
         # update external parameters, call calculateLbPrice
@@ -599,7 +741,31 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
     @sp.entry_point
     def calculateLbPrice(self):
         sp.verify(sp.self_address == sp.sender, 'Forbidden.')
+        self.calculate_lb_price()
 
+    @sp.entry_point
+    def updateLbPrice(self, params):
+        """
+        LB pool values requested once by the router for all farms, replace update_lb_price of the routed calls.
+        @params fields:
+            tzbtc_pool - tzBTC balance of liquidity baking
+            lqt_total - LB tokens total supply
+        """
+        sp.set_type(params, sp.TRecord(tzbtc_pool=sp.TNat, lqt_total=sp.TNat).layout(("tzbtc_pool", "lqt_total")))
+        sp.verify(sp.some(sp.sender) == self.data.settings.router_address, 'Forbidden.')
+
+        # calculateLbPrice sets both update dttms, the price is calculated once per block
+        with sp.if_(self.data.lb_price_update_dttm != sp.now):
+            with sp.if_(self.data.index_update_dttm != sp.now):
+                self.update_rates_lambda()
+            self.data.local_params.tzbtc_pool = params.tzbtc_pool
+            self.data.local_params.lqt_total = params.lqt_total
+            self.calculate_lb_price()
+
+    def calculate_lb_price(self):
+        """
+        Clamps the LB price calculated from the pool values in local_params.
+        """
         with sp.if_(self.data.local_params.lqt_total > 0):
             # new_lb_price = clamp(calculated_lb_price, lb_price * (1 - e * dt), lb_price * (1 + e * dt))
             calculated_lb_price = sp.local('calculated_lb_price',
@@ -607,17 +773,18 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
             with sp.if_(calculated_lb_price.value > self.data.lb_price):
                 self.data.lb_price = sp.min(
                     calculated_lb_price.value,
-                    self.data.lb_price * (FIXED_POINT_FACTOR + self.data.lb_price_change_rate * sp.as_nat(sp.now - self.data.index_update_dttm)) / FIXED_POINT_FACTOR,
+                    self.data.lb_price * (FIXED_POINT_FACTOR + self.data.settings.lb_price_change_rate * sp.as_nat(sp.now - self.data.lb_price_update_dttm)) / FIXED_POINT_FACTOR,
                 )
             with sp.else_():
                 self.data.lb_price = sp.max(
                     calculated_lb_price.value,
                     self.data.lb_price * sp.as_nat(
-                        sp.max(1, FIXED_POINT_FACTOR - self.data.lb_price_change_rate * sp.as_nat(sp.now - self.data.index_update_dttm))
+                        sp.max(1, FIXED_POINT_FACTOR - self.data.settings.lb_price_change_rate * sp.as_nat(sp.now - self.data.lb_price_update_dttm))
                     ) / FIXED_POINT_FACTOR,
                 )
 
         self.data.index_update_dttm = sp.now
+        self.data.lb_price_update_dttm = sp.now
 
     @sp.private_lambda(with_storage='read-only', with_operations=False, wrap_call=True)
     def check_totalSupply_net_credit_inequation(self):
@@ -628,16 +795,22 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
     @sp.entry_point
     def updateIndexes(self):
-        self.update_rates()
+        # refreshes LB price regardless of lb_price_update_interval, e.g. when the pool has moved
+        with sp.if_(self.data.index_update_dttm != sp.now):
+            self.update_rates_lambda()
+        with sp.if_(self.data.lb_price_update_dttm != sp.now):
+            self.update_lb_price()
 
     # @@ Lending part
     @sp.entry_point
     def depositLending(self):
+        sender = self.get_sender()
+
         self.update_rates()
 
-        self.addAddressIfNecessary(sp.sender)
+        self.addAddressIfNecessary(sender)
         deposit_amount = sp.local('deposit_amount', convert_mutez_to_nat(sp.amount) * INITIAL_INDEX_VALUE / self.data.deposit_index)
-        self.data.ledger[sp.sender].balance += deposit_amount.value
+        self.data.ledger[sender].balance += deposit_amount.value
         self.data.totalSupply += deposit_amount.value
 
     @sp.entry_point
@@ -645,18 +818,19 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
         sp.set_type(amount, sp.TMutez)
 
         sp.verify(sp.amount == sp.mutez(0), 'Amount is not allowed.')
-        sp.verify(self.data.ledger.contains(sp.sender), 'Unknown Address.')
+        sender = self.get_sender()
+        sp.verify(self.data.ledger.contains(sender), 'Unknown Address.')
         sp.verify(sp.balance >= amount, 'Not enough balance')
 
         self.update_rates()
 
         redeem_deposit = sp.local('redeem_deposit', ceildiv(convert_mutez_to_nat(amount) * INITIAL_INDEX_VALUE, self.data.deposit_index))
-        self.data.ledger[sp.sender].balance = sp.as_nat(
-            self.data.ledger[sp.sender].balance - redeem_deposit.value,
+        self.data.ledger[sender].balance = sp.as_nat(
+            self.data.ledger[sender].balance - redeem_deposit.value,
             message = 'too much amount'
         )
         self.data.totalSupply = sp.as_nat(self.data.totalSupply - redeem_deposit.value, message='wrong total deposit value')
-        sp.send(sp.sender, amount)
+        sp.send(sender, amount)
 
         self.check_totalSupply_net_credit_inequation()
 
@@ -669,7 +843,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 owner = sp.TAddress,
                 callback = sp.TContract(sp.TNat),
             ).layout(('owner', 'callback')),
-            self.data.fa_tzBTC_address,
+            self.data.settings.fa_tzBTC_address,
             entry_point = "getBalance",
         ).open_some('cant call getBalance for tzBTC shares')
 
@@ -680,36 +854,112 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
         sp.transfer(params, sp.mutez(0), handle)
 
+    def get_tzBTC_dust_value(self, xtz_amount, lqt_amount):
+        """
+            Mutez value of local_params.tzBTC_dust_delta at the LB pool rate of the call, which added
+            or removed lqt_amount LB shares for xtz_amount. The kept residual is valued less
+            the tokenToXtz fee and burn, the used dust at the full rate. Resets tzBTC_dust_delta.
+        """
+        value = sp.local('tzBTC_dust_value', sp.int(0))
+        # tzbtc_pool is 0 only until the first LB pool read after the origination
+        with sp.if_((self.data.local_params.tzBTC_dust_delta != sp.int(0)) & (lqt_amount > sp.nat(0)) & (self.data.local_params.tzbtc_pool > sp.nat(0))):
+            # xtzPool / tokenPool = xtz_amount * lqt_total / (lqt_amount * tzbtc_pool)
+            value.value = self.data.local_params.tzBTC_dust_delta * sp.to_int(
+                sp.utils.mutez_to_nat(xtz_amount) * self.data.local_params.lqt_total
+            ) / sp.to_int(lqt_amount * self.data.local_params.tzbtc_pool)
+            with sp.if_(value.value > sp.int(0)):
+                value.value = value.value * 999 * 999 / 1_000_000
+        self.data.local_params.tzBTC_dust_delta = sp.int(0)
+        return value.value
+
+    def add_tzBTC_dust_credit(self, balance_delta, lqt_amount):
+        """
+            Balance delta of a call, which removed lqt_amount LB shares, with the value of the tzBTC residual
+            kept by its sellTzBTC callback. A kept residual isn't sold, so the balance delta is the removed xtz.
+        """
+        delta = sp.local('credited_balance_delta', sp.utils.nat_to_mutez(sp.as_nat(
+            sp.to_int(sp.utils.mutez_to_nat(balance_delta)) + self.get_tzBTC_dust_value(balance_delta, lqt_amount),
+            message='negative balance delta error',
+        )))
+        return delta
+
     @sp.entry_point
     def sellTzBTC(self, tzBTC_shares):
+        """
+        Sells the tzBTC residual of a call. A residual up to tzBTC_dust_threshold is kept as tzBTC_dust:
+        the depositors buy it and the finalize of the call credits its value to the farmer through
+        local_params.tzBTC_dust_delta. The dust used by addLiquidity is charged to the investing farmer.
+        The value is the xtz/tzBTC rate of the call's own addLiquidity or removeLiquidity with the LB
+        tzBTC balance and LB total supply of local_params, which are up to lb_price_update_interval old,
+        less the tokenToXtz fee and burn for the kept residual, no oracle is read.
+        Depositors carry the tzBTC price risk of the dust until sellTzBTCDust, and a farmer can time
+        the call against a moved pool for up to tzBTC_dust_threshold per call.
+        A residual above the threshold is sold in the call with minXtzBought = 0: the xtz pool isn't
+        known on-chain here, so the inline sale is not protected against a sandwich.
+        @params:
+            tzBTC_shares - tzBTC shares balance of the contract
+        """
         sp.set_type(tzBTC_shares, sp.TNat)
-        sp.verify(self.data.fa_tzBTC_address == sp.sender, 'Forbidden.')
+        sp.verify(self.data.settings.fa_tzBTC_address == sp.sender, 'Forbidden.')
         sp.verify(self.data.local_params.fa_tzBTC_callback_status, 'Bad status.')
         self.data.local_params.fa_tzBTC_callback_status = sp.bool(False)
 
-        with sp.if_(tzBTC_shares > sp.nat(0)):
-            self.approve_tzBTC_shares(
-                spender = self.data.dex_contract_address,
-                value = INFINITY_NAT,
+        # the dust kept by the previous calls isn't sold, so the balance delta of the call
+        # includes its own residual only. addLiquidity may have used a part of the dust.
+        dust = sp.local('dust', sp.min(self.data.tzBTC_dust, tzBTC_shares))
+        used_dust = sp.local('used_dust', sp.as_nat(self.data.tzBTC_dust - dust.value))
+        residual = sp.local('residual', sp.as_nat(tzBTC_shares - dust.value))
+        kept_residual = sp.local('kept_residual', sp.nat(0))
+        with sp.if_(residual.value > self.data.settings.tzBTC_dust_threshold):
+            # tokenToXtz spends exactly tokensSold, so the allowance drops back to zero (tests/test_dex_allowance.py)
+            self.approve_dex_tzBTC_shares(
+                spender = self.data.settings.dex_contract_address,
+                value = residual.value,
             )
 
             self.token_to_xtz(
                 to = sp.self_address,
-                tokensSold = tzBTC_shares,
+                tokensSold = residual.value,
                 minXtzBought = sp.mutez(0),
                 deadline = sp.now.add_seconds(1),
             )
 
-            self.approve_tzBTC_shares(
-                spender = self.data.dex_contract_address,
-                value = sp.nat(0),
-            )
+        with sp.else_():
+            kept_residual.value = residual.value
+
+        self.data.tzBTC_dust = dust.value + kept_residual.value
+        self.data.local_params.tzBTC_dust_delta = sp.to_int(kept_residual.value) - sp.to_int(used_dust.value)
+
+    @sp.entry_point
+    def sellTzBTCDust(self, minXtzBought):
+        """
+        Sells the kept tzBTC dust in one swap. The depositors paid for the dust when sellTzBTC kept it,
+        so the xtz stays on the balance, the difference to the paid value changes the admin commission.
+        @params:
+            minXtzBought - minimum xtz to buy
+        """
+        sp.set_type(minXtzBought, sp.TMutez)
+        sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
+        sp.verify(self.data.tzBTC_dust > sp.nat(0), 'no tzBTC dust')
+
+        self.approve_dex_tzBTC_shares(
+            spender = self.data.settings.dex_contract_address,
+            value = self.data.tzBTC_dust,
+        )
+
+        self.token_to_xtz(
+            to = sp.self_address,
+            tokensSold = self.data.tzBTC_dust,
+            minXtzBought = minXtzBought,
+            deadline = sp.now.add_seconds(1),
+        )
+        self.data.tzBTC_dust = sp.nat(0)
 
     def sell_LB(self, shares, minTokensWithdrawn):
         self.data.lb_shares = sp.as_nat(self.data.lb_shares - shares)
 
-        self.approve_lb_shares(
-            spender = self.data.liquidity_baking_address,
+        self.approve_dex_lb_shares(
+            spender = self.data.settings.liquidity_baking_address,
             value = shares,
         )
 
@@ -721,8 +971,8 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
             deadline = sp.now.add_seconds(1),
         )
 
-        self.approve_lb_shares(
-            spender = self.data.liquidity_baking_address,
+        self.approve_dex_lb_shares(
+            spender = self.data.settings.liquidity_baking_address,
             value = sp.nat(0),
         )
 
@@ -793,6 +1043,8 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
         minLqtMinted = params.minLqtMinted
         tzBTCShares = params.tzBTCShares
 
+        sender = self.get_sender()
+
         self.update_rates()
 
         # upfront_commission
@@ -800,8 +1052,8 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
             'upfront_commission',
             sp.split_tokens(
                 amount2Lqt + amount2tzBTC - sp.amount, 
-                self.data.upfront_commission, 
-                sp.as_nat(100000 - self.data.upfront_commission),
+                self.data.settings.upfront_commission, 
+                sp.as_nat(100000 - self.data.settings.upfront_commission),
             )
         )
         with sp.if_(upfront_commission.value > sp.mutez(0)):
@@ -810,13 +1062,13 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
         # amount2Lqt + amount2tzBTC <= max_leverage * (sent_amount - upfront_commission)
         # we doesnt count value tzBTCShares in collateral
         sp.verify(
-            sp.mul(amount2Lqt + amount2tzBTC, sp.nat(10)) <= sp.mul(sp.amount - upfront_commission.value, self.data.max_leverage),
+            sp.mul(amount2Lqt + amount2tzBTC, sp.nat(10)) <= sp.mul(sp.amount - upfront_commission.value, self.data.settings.max_leverage),
             'leverage error'
         )
 
         with sp.if_(tzBTCShares > sp.nat(0)):
             self.transfer_tzBTC_shares(
-                address_from = sp.sender,
+                address_from = sender,
                 address_to = sp.self_address, 
                 value = tzBTCShares,
             )
@@ -829,8 +1081,8 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 deadline = sp.now.add_seconds(1),
             )
 
-        self.approve_tzBTC_shares(
-            spender = self.data.liquidity_baking_address,
+        self.approve_dex_tzBTC_shares(
+            spender = self.data.settings.liquidity_baking_address,
             value = INFINITY_NAT,
         )
 
@@ -842,43 +1094,57 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
             deadline = sp.now.add_seconds(1),
         )
 
-        self.approve_tzBTC_shares(
-            spender = self.data.liquidity_baking_address,
+        self.approve_dex_tzBTC_shares(
+            spender = self.data.settings.liquidity_baking_address,
             value = sp.nat(0),
         )
 
-        self.update_lb_shares()
         self.call_sellTzBTC()
-
-        # call investLBFinalize
-        sp.transfer(
-            arg = sp.record(
-                address = sp.sender,
-                initial_balance = sp.sub_mutez(sp.balance, sp.amount).open_some(),
-                initial_lb_shares = self.data.lb_shares,
-            ), 
-            amount = sp.mutez(0), 
-            destination = sp.self_entry_point(entry_point = "investLBFinalize"),
+        self.call_investLBFinalize(
+            address = sender,
+            initial_balance = sp.sub_mutez(sp.balance, sp.amount).open_some(),
+            amount2Lqt = amount2Lqt,
         )
 
-    @sp.entry_point
-    def investLBFinalize(self, params):
+    def call_investLBFinalize(self, address, initial_balance, amount2Lqt):
         """
-        @params fields:
-            address - farmer address
-            initial_balance - initial balance amount, before calling investLB entry
-            initial_lb_shares - initial value if lb_shares, before calling investLB entry
+            Requests LB shares balance with investLBFinalize as a callback,
+            so it is called after tzBTC residual is sold.
         """
-        sp.set_type(params,
-            sp.TRecord(address=sp.TAddress, initial_balance=sp.TMutez, initial_lb_shares=sp.TNat).
-            layout(("address", ("initial_balance", "initial_lb_shares")))
+        self.data.local_params.fa_lb_callback_status = sp.bool(True)
+        self.data.local_params.invest_address = address
+        self.data.local_params.invest_initial_balance = initial_balance
+        self.data.local_params.invest_amount2Lqt = amount2Lqt
+
+        handle = sp.contract(
+            sp.TRecord(
+                owner = sp.TAddress,
+                callback = sp.TContract(sp.TNat),
+            ).layout(('owner', 'callback')), 
+            self.data.settings.fa_lb_address, 
+            entry_point = "getBalance",
+        ).open_some('cant call getBalance for LB shares')
+
+        params = sp.record(
+            owner = sp.self_address,
+            callback = sp.self_entry_point(entry_point = 'investLBFinalize'),
         )
 
-        address = params.address
-        initial_balance = params.initial_balance
-        initial_lb_shares = params.initial_lb_shares
+        sp.transfer(params, sp.mutez(0), handle)
 
-        sp.verify(sp.self_address == sp.sender, 'Forbidden.')
+    @sp.entry_point
+    def investLBFinalize(self, lb_shares):
+        """
+        @params:
+            lb_shares - LB shares balance of the contract, after calling investLB entry
+        """
+        sp.set_type(lb_shares, sp.TNat)
+        sp.verify(self.data.settings.fa_lb_address == sp.sender, 'Forbidden.')
+        sp.verify(self.data.local_params.fa_lb_callback_status, 'Bad status.')
+        self.data.local_params.fa_lb_callback_status = sp.bool(False)
+
+        address = self.data.local_params.invest_address
+        initial_balance = self.data.local_params.invest_initial_balance
 
         with sp.if_(~self.data.liquidity_book.contains(address)):
             self.data.liquidity_book[address] = sp.record(
@@ -887,8 +1153,18 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
                 gross_credit = sp.nat(0),
             )
 
+        lb_delta = sp.local('lb_delta', sp.as_nat(lb_shares - self.data.lb_shares, message='negative lb delta error'))
+
         balance_delta = sp.sub_mutez(initial_balance, sp.balance).open_some('negative balance delta error')
-        a = sp.local('a', convert_mutez_to_nat(balance_delta) * INITIAL_INDEX_VALUE)
+        # the kept tzBTC residual is credited against the spent xtz, its excess is sent to the farmer
+        spent = sp.local('spent', sp.to_int(sp.utils.mutez_to_nat(balance_delta)) - self.get_tzBTC_dust_value(
+            self.data.local_params.invest_amount2Lqt,
+            lb_delta.value,
+        ))
+        with sp.if_(spent.value < sp.int(0)):
+            sp.send(address, sp.utils.nat_to_mutez(abs(spent.value)))
+            spent.value = sp.int(0)
+        a = sp.local('a', sp.as_nat(spent.value) * MUTEZ_FIXED_POINT_FACTOR * INITIAL_INDEX_VALUE)
 
         additional_net_credit = sp.local('additional_net_credit', ceildiv(a.value, self.data.net_credit_index))
         self.data.liquidity_book[address].net_credit += additional_net_credit.value
@@ -898,8 +1174,8 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
         self.data.liquidity_book[address].gross_credit += additional_gross_credit.value
         self.data.total_gross_credit += additional_gross_credit.value
 
-        lb_delta = sp.local('lb_delta', sp.as_nat(self.data.lb_shares - initial_lb_shares, message='negative lb delta error'))
         self.data.liquidity_book[address].lb_shares += lb_delta.value
+        self.data.lb_shares = lb_shares
 
         self.check_totalSupply_net_credit_inequation()
 
@@ -920,6 +1196,8 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
         sp.verify(sp.amount == sp.mutez(0), 'Amount is not allowed.')
 
+        sender = self.get_sender()
+
         self.update_rates()
 
         self.sell_LB(
@@ -932,7 +1210,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
         # call redeemLBFinalize
         sp.transfer(
             arg = sp.record(
-                address = sp.sender,
+                address = sender,
                 lqtBurned = lqtBurned,
                 initial_balance = sp.balance,
             ), 
@@ -959,7 +1237,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
         sp.verify(sp.self_address == sp.sender, 'Forbidden.')
 
-        balance_delta = sp.local('balance_delta', sp.sub_mutez(sp.balance, initial_balance).open_some('negative balance delta error'))
+        balance_delta = self.add_tzBTC_dust_credit(sp.sub_mutez(sp.balance, initial_balance).open_some('negative balance delta error'), lqtBurned)
 
         debt_amount = self.partial_reset_liquidity_entry(address, lqtBurned)
 
@@ -1001,8 +1279,8 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
         address = params.address
 
         # xtzPool / tokenPool = tzbtc_price / (100 * xtz_price)
-        tzbtc_price = sp.view("get_price", self.data.oracle_address, 'BTC', t=sp.TNat).open_some('invalid view')
-        xtz_price = sp.view("get_price", self.data.oracle_address, 'XTZ', t=sp.TNat).open_some('invalid view')
+        tzbtc_price = sp.view("get_price", self.data.settings.oracle_address, 'BTC', t=sp.TNat).open_some('invalid view')
+        xtz_price = sp.view("get_price", self.data.settings.oracle_address, 'XTZ', t=sp.TNat).open_some('invalid view')
 
         # verify liquidation percent and liquidation price
         lb_shares = sp.local('lb_shares', self.data.liquidity_book[params.address].lb_shares)
@@ -1013,10 +1291,11 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
             ceil_convert_nat_to_mutez(ceildiv(self.data.liquidity_book[params.address].gross_credit * self.data.gross_credit_index, INITIAL_INDEX_VALUE)))
         debt_value = xtz_price * sp.utils.mutez_to_nat(debt_amount.value) * 100 # / 10^8
         sent_amount_value = sp.utils.mutez_to_nat(params.sent_amount) * xtz_price * 100 # / 10^8
-        sp.verify(lb_shares_value * 100 < debt_value * self.data.liquidation_percent, 'liquidation is not allowed')
+        parameters = self.get_parameters()
+        sp.verify(lb_shares_value * 100 < debt_value * parameters.value.liquidation_percent, 'liquidation is not allowed')
 
         # liquidation
-        liquidated_debt_amount = sp.split_tokens(params.sent_amount, 100, self.data.liquidation_price_percent)
+        liquidated_debt_amount = sp.split_tokens(params.sent_amount, 100, parameters.value.liquidation_price_percent)
         liquidated_gross_credit = sp.local('liquidated_gross_credit', sp.min(
             convert_mutez_to_nat(liquidated_debt_amount) * INITIAL_INDEX_VALUE / self.data.gross_credit_index,
             self.data.liquidity_book[address].gross_credit,
@@ -1041,7 +1320,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
         # send values
         extra_supply = sp.local('extra_supply', sp.sub_mutez(params.sent_amount, liquidated_debt_amount).open_some('negative balance delta error'))
-        admin_comm = sp.local('admin_comm', sp.split_tokens(extra_supply.value, self.data.liquidation_comm, 100))
+        admin_comm = sp.local('admin_comm', sp.split_tokens(extra_supply.value, parameters.value.liquidation_comm, 100))
         with sp.if_(admin_comm.value > sp.mutez(0)):
             sp.send(self.data.administrator, admin_comm.value)
         self.data.deposit_index += convert_mutez_to_nat(
@@ -1055,7 +1334,7 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
         sp.set_type(address, sp.TAddress)
 
         sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
-        sp.verify(self.data.onchain_liquidation_available, 'Onchain liquidation disabled.')
+        sp.verify(self.data.parameters[PARAMETERS_KEY].onchain_liquidation_available, 'Onchain liquidation disabled.')
 
         self.update_rates()
 
@@ -1096,14 +1375,19 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
         sp.verify(sp.self_address == sp.sender, 'Forbidden.')
 
-        delta = sp.local('delta', sp.sub_mutez(sp.balance, initial_balance).open_some('negative balance delta error'))
+        # the farm LB shares are sold by liquidateOnchainLB, its entry is reset here
+        delta = self.add_tzBTC_dust_credit(
+            sp.sub_mutez(sp.balance, initial_balance).open_some('negative balance delta error'),
+            self.data.liquidity_book[address].lb_shares,
+        )
         debt_amount = self.reset_liquidity_entry(address)
 
-        sp.verify(sp.mul(delta.value, sp.nat(100)) < sp.mul(debt_amount.value, self.data.onchain_liquidation_percent), 'liquidation is not allowed')
+        parameters = self.get_parameters()
+        sp.verify(sp.mul(delta.value, sp.nat(100)) < sp.mul(debt_amount.value, parameters.value.onchain_liquidation_percent), 'liquidation is not allowed')
  
         extra_supply = sp.local('extra_supply', convert_mutez_to_nat(delta.value) - convert_mutez_to_nat(debt_amount.value))
         with sp.if_(extra_supply.value > sp.int(0)):
-            admin_comm = sp.local('admin_comm', convert_nat_to_mutez(sp.as_nat(extra_supply.value) * self.data.onchain_liquidation_comm / 100))
+            admin_comm = sp.local('admin_comm', convert_nat_to_mutez(sp.as_nat(extra_supply.value) * parameters.value.onchain_liquidation_comm / 100))
             with sp.if_(admin_comm.value > sp.mutez(0)):
                 sp.send(self.data.administrator, admin_comm.value)
             self.data.deposit_index += sp.as_nat(sp.as_nat(extra_supply.value) - convert_mutez_to_nat(admin_comm.value)) * FIXED_POINT_FACTOR / self.data.totalSupply
@@ -1114,6 +1398,99 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
             self.data.deposit_index = sp.as_nat(self.data.deposit_index - ceildiv(sp.as_nat(-extra_supply.value) * FIXED_POINT_FACTOR, self.data.totalSupply))
             # the same above
 
+    @sp.entry_point
+    def liquidateOnchainLBBatch(self, addresses):
+        """
+        Onchain liquidation of several farms with one LB shares sale and one tzBTC sale.
+        @params:
+            addresses - farmer addresses
+        """
+        sp.set_type(addresses, sp.TSet(sp.TAddress))
+
+        sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
+        sp.verify(self.data.parameters[PARAMETERS_KEY].onchain_liquidation_available, 'Onchain liquidation disabled.')
+        sp.verify(sp.len(addresses) > sp.nat(0), 'empty batch')
+
+        self.update_rates()
+
+        lb_shares = sp.local('lb_shares', sp.nat(0))
+        with sp.for_('address', addresses.elements()) as address:
+            sp.verify(self.data.liquidity_book.contains(address), 'Unknown Address.')
+            sp.verify(self.data.liquidity_book[address].net_credit > sp.nat(0), 'not loaned')
+            lb_shares.value += self.data.liquidity_book[address].lb_shares
+
+        self.sell_LB(
+            shares = lb_shares.value,
+            minTokensWithdrawn = sp.nat(0),
+        )
+
+        self.call_sellTzBTC()
+
+        # call liquidateOnchainLBBatchFinalize
+        sp.transfer(
+            arg = sp.record(
+                addresses = addresses,
+                lb_shares = lb_shares.value,
+                initial_balance = sp.balance,
+            ),
+            amount = sp.mutez(0),
+            destination = sp.self_entry_point(entry_point = "liquidateOnchainLBBatchFinalize"),
+        )
+
+    @sp.entry_point
+    def liquidateOnchainLBBatchFinalize(self, params):
+        """
+        Splits the sale result between the farms in proportion to their LB shares.
+        @params fields:
+            addresses - farmer addresses
+            lb_shares - sold LB shares of all farms
+            initial_balance - initial balance amount, after calling liquidateOnchainLBBatch entry
+        """
+        sp.set_type(params,
+            sp.TRecord(addresses=sp.TSet(sp.TAddress), lb_shares=sp.TNat, initial_balance=sp.TMutez).
+            layout(("addresses", ("lb_shares", "initial_balance")))
+        )
+
+        sp.verify(sp.self_address == sp.sender, 'Forbidden.')
+
+        parameters = self.get_parameters()
+        # the sale result and LB shares not split yet, the last farm gets the rest
+        delta = self.add_tzBTC_dust_credit(sp.sub_mutez(sp.balance, params.initial_balance).open_some('negative balance delta error'), params.lb_shares)
+        lb_shares = sp.local('lb_shares', params.lb_shares)
+        admin_comm = sp.local('admin_comm', sp.mutez(0))
+        profit = sp.local('profit', sp.nat(0))
+        loss = sp.local('loss', sp.nat(0))
+
+        with sp.for_('address', params.addresses.elements()) as address:
+            entry_lb_shares = sp.local('entry_lb_shares', self.data.liquidity_book[address].lb_shares)
+            entry_delta = sp.local('entry_delta', sp.mutez(0))
+            with sp.if_(lb_shares.value > sp.nat(0)):
+                entry_delta.value = sp.split_tokens(delta.value, entry_lb_shares.value, lb_shares.value)
+            delta.value = sp.sub_mutez(delta.value, entry_delta.value).open_some()
+            lb_shares.value = sp.as_nat(lb_shares.value - entry_lb_shares.value)
+
+            debt_amount = self.reset_liquidity_entry(address)
+            sp.verify(sp.mul(entry_delta.value, sp.nat(100)) < sp.mul(debt_amount.value, parameters.value.onchain_liquidation_percent), 'liquidation is not allowed')
+
+            extra_supply = sp.local('extra_supply', convert_mutez_to_nat(entry_delta.value) - convert_mutez_to_nat(debt_amount.value))
+            with sp.if_(extra_supply.value > sp.int(0)):
+                entry_admin_comm = sp.local('entry_admin_comm', convert_nat_to_mutez(sp.as_nat(extra_supply.value) * parameters.value.onchain_liquidation_comm / 100))
+                admin_comm.value += entry_admin_comm.value
+                profit.value += sp.as_nat(sp.as_nat(extra_supply.value) - convert_mutez_to_nat(entry_admin_comm.value))
+            with sp.else_():
+                loss.value += sp.as_nat(-extra_supply.value)
+
+        # the sale result left when the LB shares ran out before the last farm, e.g. all of them were 0
+        profit.value += convert_mutez_to_nat(delta.value)
+
+        with sp.if_(admin_comm.value > sp.mutez(0)):
+            sp.send(self.data.administrator, admin_comm.value)
+        # totalSupply > 0 because the liquidated farms have 0 < total_net_credit <= totalSupply
+        self.data.deposit_index = sp.as_nat(
+            self.data.deposit_index + profit.value * FIXED_POINT_FACTOR / self.data.totalSupply
+            - ceildiv(loss.value * FIXED_POINT_FACTOR, self.data.totalSupply)
+        )
+
     # @@ Flashloan part
     @sp.entry_point
     def setFlashloanParams(self, params):
@@ -1130,9 +1507,11 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
         
         sp.verify(self.data.administrator == sp.sender, 'Forbidden.')
 
-        self.data.flashloan_admin_commission = params.flashloan_admin_commission
-        self.data.flashloan_deposit_commission = params.flashloan_deposit_commission
-        self.data.flashloan_available = params.flashloan_available
+        parameters = self.get_parameters()
+        parameters.value.flashloan_admin_commission = params.flashloan_admin_commission
+        parameters.value.flashloan_deposit_commission = params.flashloan_deposit_commission
+        parameters.value.flashloan_available = params.flashloan_available
+        self.data.parameters[PARAMETERS_KEY] = parameters.value
 
     @sp.entry_point
     def flashloan(self, params):
@@ -1148,18 +1527,19 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
 
         requested_xtz = params.requested_xtz
 
-        sp.verify(self.data.flashloan_available, 'flashloan is not available')
+        parameters = self.get_parameters()
+        sp.verify(parameters.value.flashloan_available, 'flashloan is not available')
         sp.verify(requested_xtz > sp.mutez(0), 'zero requested amount')
 
         self.update_rates()
 
         self.data.flashloan_amount += sp.utils.nat_to_mutez(
-            ceildiv(sp.utils.mutez_to_nat(requested_xtz) * (sp.nat(100_000) + self.data.flashloan_admin_commission + self.data.flashloan_deposit_commission), sp.nat(100_000))
+            ceildiv(sp.utils.mutez_to_nat(requested_xtz) * (sp.nat(100_000) + parameters.value.flashloan_admin_commission + parameters.value.flashloan_deposit_commission), sp.nat(100_000))
         )
 
         with sp.if_(self.data.totalSupply > sp.nat(0)):
             self.data.deposit_index += (
-                self.data.flashloan_deposit_commission * convert_mutez_to_nat(requested_xtz) * FIXED_POINT_FACTOR / self.data.totalSupply / sp.nat(100_000)
+                parameters.value.flashloan_deposit_commission * convert_mutez_to_nat(requested_xtz) * FIXED_POINT_FACTOR / self.data.totalSupply / sp.nat(100_000)
             )
 
         sp.transfer(sp.unit, requested_xtz, params.callback)
@@ -1177,6 +1557,70 @@ class LeveragedFarmLendingSmartContract(FA12.FA12_administrator,
     def flashloanFinalize(self):
         sp.verify(self.data.flashloan_amount == sp.mutez(0), 'loan error')
 
+    # @@ Views
+    @sp.onchain_view()
+    def getIndexes(self):
+        """
+        Gross credit, net credit and deposit indexes projected to now.
+        """
+        sp.result(self.get_projected_indexes())
+
+    @sp.onchain_view()
+    def getPosition(self, address):
+        """
+        Farmer position at now, the last calculated lb_price is used.
+        @returns record fields:
+            lb_shares - farmer LB shares
+            debt - mutez repaid by redeemLB of all shares
+            lb_shares_value, debt_value - values compared by liquidateLB, multiplied by 10^8
+            liquidation_allowed - liquidateLB check result
+        """
+        sp.set_type(address, sp.TAddress)
+
+        indexes = sp.local('indexes', self.get_projected_indexes())
+        entry = sp.local('entry', self.data.liquidity_book.get(
+            address,
+            sp.record(net_credit = sp.nat(0), gross_credit = sp.nat(0), lb_shares = sp.nat(0)),
+        ))
+
+        tzbtc_price = sp.view("get_price", self.data.settings.oracle_address, 'BTC', t=sp.TNat).open_some('invalid view')
+        xtz_price = sp.view("get_price", self.data.settings.oracle_address, 'XTZ', t=sp.TNat).open_some('invalid view')
+
+        lb_shares_value = sp.local('lb_shares_value', entry.value.lb_shares * 2 * self.data.lb_price * tzbtc_price / FIXED_POINT_FACTOR) # / 10^8
+        debt = sp.local('debt',
+            ceil_convert_nat_to_mutez(ceildiv(entry.value.gross_credit * indexes.value.gross_credit_index, INITIAL_INDEX_VALUE)))
+        debt_value = sp.local('debt_value', xtz_price * sp.utils.mutez_to_nat(debt.value) * 100) # / 10^8
+        sp.result(sp.record(
+            lb_shares = entry.value.lb_shares,
+            debt = debt.value,
+            lb_shares_value = lb_shares_value.value,
+            debt_value = debt_value.value,
+            liquidation_allowed = (entry.value.net_credit > sp.nat(0)) & (lb_shares_value.value * 100 < debt_value.value * self.data.parameters[PARAMETERS_KEY].liquidation_percent),
+        ))
+
+    @sp.onchain_view()
+    def getMaxRedeemable(self, address):
+        """
+        Maximum amount redeemLending accepts from the depositor at now.
+        Deposit is limited by the depositor balance and by the total supply left for the net credit.
+        """
+        sp.set_type(address, sp.TAddress)
+
+        indexes = sp.local('indexes', self.get_projected_indexes())
+        redeemable = sp.local('redeemable', sp.nat(0))
+        with sp.if_(self.data.ledger.contains(address)):
+            # check_totalSupply_net_credit_inequation after redeem
+            free_deposit = sp.local('free_deposit', sp.as_nat(sp.max(0,
+                self.data.totalSupply - ceildiv(self.data.total_net_credit * indexes.value.net_credit_index, indexes.value.deposit_index)
+            )))
+            deposit = sp.local('deposit', sp.min(self.data.ledger[address].balance, free_deposit.value))
+            # redeemLending: ceildiv(convert_mutez_to_nat(amount) * INITIAL_INDEX_VALUE, deposit_index) <= deposit
+            redeemable.value = sp.min(
+                deposit.value * indexes.value.deposit_index / (MUTEZ_FIXED_POINT_FACTOR * FIXED_POINT_FACTOR),
+                sp.utils.mutez_to_nat(sp.balance),
+            )
+        sp.result(sp.utils.nat_to_mutez(redeemable.value))
+
 
 sp.add_compilation_target('contract', LeveragedFarmLendingSmartContract(
     sp.address(ADMIN_ADDRESS),
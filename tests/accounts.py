@@ -0,0 +1,79 @@
+"""
+    Sandbox accounts for parallel test execution.
+
+    Without pytest-xdist tests sign with sandbox alice/bob/clare keys. Every xdist worker
+    gets its own accounts derived from the worker id, they are funded from the sandbox
+    bootstrap account once per worker, so workers don't share operation counters and
+    originate their own demo contracts.
+"""
+
+import fcntl
+import hashlib
+import os
+import tempfile
+from os.path import join
+
+import requests
+from pytezos import pytezos
+from pytezos.crypto.key import Key
+from pytezos.rpc import RpcNode, ShellQuery
+
+
+SANDBOX_URL = 'http://localhost:20000'
+XDIST_WORKER = os.environ.get('PYTEST_XDIST_WORKER')
+
+# flextesa bootstrap account, used only to fund worker accounts
+FUNDER_KEY = 'edsk3QoqBuvdamxouPhin7swCvkQNgq4jP5KZPbwWNnwdZpSpJiEbq'
+WORKER_ACCOUNT_BALANCE = 1_000_000 * 10 ** 6  # mutez
+FUNDER_LOCK_FILE = join(tempfile.gettempdir(), 'kordfi-sandbox-funder.lock')
+
+
+def get_account_key(name, sandbox_key):
+    """
+        Returns encoded secret key of the test account.
+        @params:
+            name - account name, e.g. alice
+            sandbox_key - key used when tests are not distributed
+    """
+    if XDIST_WORKER is None:
+        return sandbox_key
+    seed = hashlib.sha256(f'{name}:{XDIST_WORKER}'.encode()).digest()
+    return Key.from_secret_exponent(seed).secret_key()
+
+
+def is_sandbox_available():
+    try:
+        return requests.get(f'{SANDBOX_URL}/chains/main/blocks/head/header', timeout=1).ok
+    except requests.RequestException:
+        return False
+
+
+def fund_accounts(keys):
+    """
+        Transfers WORKER_ACCOUNT_BALANCE to accounts with lower balance and reveals them.
+        Funder operations are serialized between workers by a file lock.
+    """
+    shell = ShellQuery(RpcNode(SANDBOX_URL))
+    funder = pytezos.using(shell=shell, key=Key.from_encoded_key(FUNDER_KEY))
+    addresses = [Key.from_encoded_key(key).public_key_hash() for key in keys]
+    transfers = [
+        funder.transaction(destination=address, amount=WORKER_ACCOUNT_BALANCE)
+        for address in addresses
+        if int(shell.contracts[address]()['balance']) < WORKER_ACCOUNT_BALANCE
+    ]
+    if transfers:
+        with open(FUNDER_LOCK_FILE, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                funder.bulk(*transfers).send(gas_reserve=10000, min_confirmations=1)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # accounts have separate counters, wait for all reveals at once
+    reveals = [
+        pytezos.using(shell=shell, key=Key.from_encoded_key(key)).reveal().send()
+        for key, address in zip(keys, addresses)
+        if shell.contracts[address].manager_key() is None
+    ]
+    if reveals:
+        shell.wait_operations([opg.opg_hash for opg in reveals], ttl=60, min_confirmations=1)
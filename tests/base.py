@@ -1,14 +1,14 @@
-import subprocess
+import inspect
 from os.path import dirname, join
 from unittest import TestCase
-import copy
 
+import kordfi.storage
 from pytezos import pytezos
-from pytezos import ContractInterface
 from pytezos.context.impl import ExecutionContext
 from pytezos.rpc import RpcNode, ShellQuery
 from pytezos.crypto.key import Key
-from pytezos.michelson.parse import michelson_to_micheline
+from .compiler import compile_contract, CONTRACT_TZ
+from .fixture_graph import FixtureGraph
 from .constants import ALICE_KEY, ALICE_ADDRESS, BOB_ADDRESS, BOB_KEY, CLARE_KEY
 
 LQT_PROVIDER = ALICE_ADDRESS
@@ -36,11 +36,10 @@ DEX_STORAGE = {
     'tokenAddress': None,
     'lqtAddress': None,
 }
+ORACLE_STORAGE = {'XTZ': 1_530_000, 'BTC': 45_500_000_000}
 ORACLE_SOURCE_FILE = join(dirname(__file__), './DummyOracle.py')
-ORACLE_OUT_DIR = join(dirname(__file__), '../.out_oracle')
-ORACLE_COMPILE_COMMAND = '''\
-    ~/smartpy-cli/SmartPy.sh compile {source_file} {out_dir} --protocol ithaca
-'''
+DEX_FILE = join(dirname(__file__), '../demo_lb/dexter.liquidity_baking.mligo.tz')
+TOKEN_FILE = join(dirname(__file__), '../demo_lb/lqt_fa12.mligo.tz')
 
 
 alice_client = pytezos.using(
@@ -57,12 +56,57 @@ clare_client = pytezos.using(
 )
 
 
+def get_fixture_graph():
+    return FixtureGraph(alice_client, ExecutionContext(
+        shell=ShellQuery(RpcNode('http://localhost:20000')),
+        key=Key.from_encoded_key(ALICE_KEY),
+    ))
+
+
+def get_dex_storage(contracts):
+    return {
+        **DEX_STORAGE,
+        'lqtAddress': contracts['lqt_token'].context.address,
+        'tokenAddress': contracts['tzbtc_token'].context.address,
+    }
+
+
+def add_demo_lb_contracts(graph, dex_names=('dex_contract',)):
+    """
+        Adds tzBTC and LB tokens, oracle and DEX contracts to the fixture graph.
+        tzBTC pool is transferred to every DEX, LB token admin is set to the first one.
+    """
+    oracle_out_dir = compile_contract(ORACLE_SOURCE_FILE)
+    graph.originate('tzbtc_token', TOKEN_FILE, TZBTC_STORAGE)
+    graph.originate('lqt_token', TOKEN_FILE, LQT_STORAGE)
+    graph.originate('oracle', join(oracle_out_dir, CONTRACT_TZ), ORACLE_STORAGE)
+    for name in dex_names:
+        graph.originate(name, DEX_FILE, get_dex_storage, balance=10 ** 9, depends=['tzbtc_token', 'lqt_token'])
+        graph.call(
+            lambda contracts, name=name: contracts['tzbtc_token'].transfer(**{
+                'from': LQT_PROVIDER,
+                'to': contracts[name].context.address,
+                'value': INITIAL_TOKEN_POOL_IN_DEX,
+            }),
+            depends=['tzbtc_token', name],
+        )
+    graph.call(
+        lambda contracts: contracts['lqt_token'].setAdmin(contracts[dex_names[0]].context.address),
+        depends=['lqt_token', dex_names[0]],
+    )
+    return graph
+
+
 class DemoLBBaseTestCase(TestCase):
     """
     Деплоит контракты из demo_lb
     """
     @classmethod
-    def setUpClass(cls):
+    def setUpClass(cls, fixture_graph=None):
+        """
+            Subclasses add their contracts to `fixture_graph`, it's originated here together
+            with demo_lb contracts, see FixtureGraph.
+        """
         cls.maxDiff = None
 
         context = ExecutionContext(
@@ -73,64 +117,16 @@ class DemoLBBaseTestCase(TestCase):
         cls.bob_client = bob_client
         cls.clare_client = clare_client
         cls.context = context
-        
-        # compile oracle mock contract
-        p = subprocess.run(ORACLE_COMPILE_COMMAND.format(
-            source_file=ORACLE_SOURCE_FILE,
-            out_dir=ORACLE_OUT_DIR,
-        ), shell=True)
-        assert p.returncode == 0, 'Oracle compilation should be successfull.'
 
-        # originate tzBTC and LB contracts
-        cls.tzbtc_token = ContractInterface.from_file(
-            join(dirname(__file__), '../demo_lb/lqt_fa12.mligo.tz'),
-            context,
-        )
-        cls.lqt_token = ContractInterface.from_file(
-            join(dirname(__file__), '../demo_lb/lqt_fa12.mligo.tz'),
-            context,
-        )
-        cls.oracle = ContractInterface.from_file(
-            join(ORACLE_OUT_DIR, 'contract/step_000_cont_0_contract.tz'),
-            context,
+        graph = fixture_graph or get_fixture_graph()
+        # fixture sources are a part of the snapshot key, see sandbox.py
+        sources = [inspect.getsourcefile(klass) for klass in cls.__mro__ if klass.__module__.startswith(__package__)]
+        cls.contracts = add_demo_lb_contracts(graph).build(
+            snapshot=(f'{cls.__module__}.{cls.__qualname__}', [*sources, kordfi.storage.__file__]),
         )
-        result = cls.alice_client.bulk(
-            cls.tzbtc_token.originate(initial_storage=TZBTC_STORAGE),
-            cls.lqt_token.originate(initial_storage=LQT_STORAGE),
-            cls.oracle.originate(initial_storage={"XTZ": 1_530_000, "BTC": 45_500_000_000})
-        ).send(gas_reserve=10000, min_confirmations=1)  
-
-        # originated tzBTC token
-        originated_address = result.opg_result['contents'][0]['metadata']['operation_result']['originated_contracts'][0]
-        cls.tzbtc_token.context.address = originated_address
-        # originated LB token
-        originated_address = result.opg_result['contents'][1]['metadata']['operation_result']['originated_contracts'][0]
-        cls.lqt_token.context.address = originated_address
-        # originated oracle
-        originated_address = result.opg_result['contents'][2]['metadata']['operation_result']['originated_contracts'][0]
-        cls.oracle.context.address = originated_address
-
-        # originate DEX contract
-        cls.dex_path = join(dirname(__file__), '../demo_lb/dexter.liquidity_baking.mligo.tz')
-        cls.dex_contract = ContractInterface.from_file(cls.dex_path, context)
-        dex_storage = copy.deepcopy(DEX_STORAGE)
-        dex_storage['lqtAddress'] = cls.lqt_token.context.address
-        dex_storage['tokenAddress'] = cls.tzbtc_token.context.address
-        cls.initial_dex_storage = dex_storage
-        result = cls.dex_contract.originate(
-          initial_storage=dex_storage,
-          balance=10 ** 9,
-        ).send(gas_reserve=10000, min_confirmations=1)
-        originated_address = result.opg_result['contents'][0]['metadata']['operation_result']['originated_contracts'][0]
-        cls.dex_contract.context.address = originated_address
-
-        # set LQT admin to DEX contract and transfer tzBTC amount to DEX
-        transfer_params = {
-            'from': LQT_PROVIDER,
-            'to': cls.dex_contract.context.address,
-            'value': INITIAL_TOKEN_POOL_IN_DEX,
-        }
-        cls.alice_client.bulk(
-            cls.lqt_token.setAdmin(cls.dex_contract.context.address),
-            cls.tzbtc_token.transfer(**transfer_params),
-        ).send(gas_reserve=10000, min_confirmations=1)
+        cls.tzbtc_token = cls.contracts['tzbtc_token']
+        cls.lqt_token = cls.contracts['lqt_token']
+        cls.oracle = cls.contracts['oracle']
+        cls.dex_contract = cls.contracts['dex_contract']
+        cls.dex_path = DEX_FILE
+        cls.initial_dex_storage = get_dex_storage(cls.contracts)
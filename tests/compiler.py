@@ -0,0 +1,91 @@
+"""
+    Content-addressed cache of SmartPy builds.
+
+    Compiled outputs are stored in `.cache/smartpy/<key>`, where the key is a hash of
+    the contract sources, SmartPy version, protocol and the address environment values.
+    Builds are written to a temporary directory and renamed, so parallel workers
+    reuse the same artifacts without seeing partial outputs.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from functools import lru_cache
+from os.path import dirname, exists, expanduser, join
+
+from kordfi.storage import CONTRACT_TZ, STORAGE_TZ
+
+
+SMARTPY_CLI = os.environ.get('SMARTPY_CLI', '~/smartpy-cli/SmartPy.sh')
+CACHE_DIR = os.environ.get('SMARTPY_CACHE_DIR', join(dirname(__file__), '../.cache/smartpy'))
+ROOT_DIR = join(dirname(__file__), '..')
+DEFAULT_PROTOCOL = 'ithaca'
+
+FA12_SOURCE_FILE = join(dirname(__file__), '../src/FA1.2.py')
+COMPILE_ENV_KEYS = (
+    'ADMIN_ADDRESS',
+    'LIQUIDITY_BAKING_ADDRESS',
+    'FA_TZBTC_ADDRESS',
+    'FA_LB_TOKEN_ADDRESS',
+    'ORACLE_ADDRESS',
+    'XTZ_FARM_ADDRESS',
+    'BTC_FARM_ADDRESS',
+)
+
+
+@lru_cache(maxsize=None)
+def get_smartpy_version():
+    p = subprocess.run(f'{SMARTPY_CLI} --version', shell=True, capture_output=True, text=True)
+    assert p.returncode == 0, 'SmartPy CLI should be available.'
+    return p.stdout.strip()
+
+
+def get_cache_key(source_file, dependencies, protocol, env):
+    key = hashlib.sha256()
+    for path in (source_file, *dependencies):
+        with open(path, 'rb') as f:
+            key.update(hashlib.sha256(f.read()).digest())
+    key.update(get_smartpy_version().encode())
+    key.update(protocol.encode())
+    for name in COMPILE_ENV_KEYS:
+        key.update(f'{name}={env.get(name, "")};'.encode())
+    return key.hexdigest()
+
+
+def compile_contract(source_file, env=None, dependencies=(), protocol=DEFAULT_PROTOCOL):
+    """
+        Compiles SmartPy contract or reuses cached build.
+        @params:
+            source_file - SmartPy contract file
+            env - ADMIN_ADDRESS, LIQUIDITY_BAKING_ADDRESS, ... values passed to the compilation
+            dependencies - files imported by the contract, e.g. FA1.2.py
+        @returns output directory, see CONTRACT_TZ and STORAGE_TZ
+    """
+    env = {name: value for name, value in (env or {}).items() if value is not None}
+    out_dir = join(CACHE_DIR, get_cache_key(source_file, dependencies, protocol, env))
+    if exists(out_dir):
+        return out_dir
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    build_dir = tempfile.mkdtemp(dir=CACHE_DIR, prefix='.build_')
+    try:
+        # contracts import FA1.2.py relative to the working directory
+        p = subprocess.run(
+            f'{expanduser(SMARTPY_CLI)} compile {source_file} {build_dir} --protocol {protocol}',
+            shell=True,
+            cwd=ROOT_DIR,
+            env={**os.environ, **env},
+        )
+        assert p.returncode == 0, 'Contract compilation should be successfull.'
+        try:
+            os.rename(build_dir, out_dir)
+        except OSError:
+            # the same build was already stored by another worker
+            if not exists(out_dir):
+                raise
+    finally:
+        if exists(build_dir):
+            shutil.rmtree(build_dir)
+    return out_dir
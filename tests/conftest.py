@@ -0,0 +1,12 @@
+import pytest
+
+from .accounts import XDIST_WORKER, fund_accounts, is_sandbox_available
+from .constants import ALICE_KEY, BOB_KEY, CLARE_KEY
+from .unit.interpreter import use_interpreter
+
+
+@pytest.fixture(scope='session', autouse=True)
+def worker_accounts():
+    """Fund accounts of the pytest-xdist worker, tests without sandbox don't need them."""
+    if XDIST_WORKER is not None and not use_interpreter() and is_sandbox_available():
+        fund_accounts([ALICE_KEY, BOB_KEY, CLARE_KEY])
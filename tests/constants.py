@@ -1,11 +1,15 @@
 from decimal import Decimal
 
-ALICE_ADDRESS = 'tz1VSUr8wwNhLAzempoch5d6hLRiTh8Cjcjb'
-ALICE_KEY = 'edsk3QoqBuvdamxouPhin7swCvkQNgq4jP5KZPbwWNnwdZpSpJiEbq'
-BOB_ADDRESS = 'tz1aSkwEot3L2kmUvcoxzjMomb9mvBNuzFK6'
-BOB_KEY = 'edsk3RFfvaFaxbHx8BMtEW1rKQcPtDML3LXjNqMNLCzC3wLC1bWbAt'
-CLARE_ADDRESS = 'tz1XjyxZjXMzPkL3Z27AfYitFd7hHnt8iKJA'
-CLARE_KEY = 'edsk2jkrThhmvGxhyhvDvCKLcbKeGMsTdop1Ko6QSzA2Tw2Cxx7rPi'
+from pytezos.crypto.key import Key
+from .accounts import get_account_key
+
+# sandbox accounts, every pytest-xdist worker uses its own accounts, see accounts.py
+ALICE_KEY = get_account_key('alice', 'edsk3QoqBuvdamxouPhin7swCvkQNgq4jP5KZPbwWNnwdZpSpJiEbq')
+ALICE_ADDRESS = Key.from_encoded_key(ALICE_KEY).public_key_hash()
+BOB_KEY = get_account_key('bob', 'edsk3RFfvaFaxbHx8BMtEW1rKQcPtDML3LXjNqMNLCzC3wLC1bWbAt')
+BOB_ADDRESS = Key.from_encoded_key(BOB_KEY).public_key_hash()
+CLARE_KEY = get_account_key('clare', 'edsk2jkrThhmvGxhyhvDvCKLcbKeGMsTdop1Ko6QSzA2Tw2Cxx7rPi')
+CLARE_ADDRESS = Key.from_encoded_key(CLARE_KEY).public_key_hash()
 CONTRACT_ADDRESS = 'KT1AnfXNe8i5w8USFoLAeG13PPtxP9pSK4Y4'
 
-TEST_GAS_DELTA = Decimal('0.1')
\ No newline at end of file
+TEST_GAS_DELTA = Decimal('0.1')
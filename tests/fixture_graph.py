@@ -0,0 +1,101 @@
+"""
+    Origination of the test contracts with the minimal number of confirmed operation groups.
+
+    Contract address depends on the hash of the operation group, so a contract which storage
+    refers to another contract can't be originated in the same group. Contracts are split into
+    levels by their dependencies: every level is originated in one group together with the
+    calls which depend only on the previous levels, e.g. tokens and oracle, then DEX contracts,
+    then the farm contract with the DEX setup calls.
+"""
+
+from functools import lru_cache
+
+from pytezos import ContractInterface
+from pytezos.michelson.parse import michelson_to_micheline
+
+from .sandbox import get_snapshot_key, restore_snapshot, save_snapshot, use_snapshots
+
+
+@lru_cache(maxsize=None)
+def load_script(path):
+    # parsed once per session, every test class originates its own copy
+    with open(path) as f:
+        return michelson_to_micheline(f.read())
+
+
+class FixtureGraph:
+    """
+        Collects originations and calls, `build` sends them level by level.
+        Storage and call factories receive the dict of already originated contracts.
+    """
+    def __init__(self, client, context):
+        self.client = client
+        self.context = context
+        self.originations = {}
+        self.calls = []
+        self.contracts = {}
+
+    def originate(self, name, path, storage=None, balance=0, depends=()):
+        self.originations[name] = (path, storage, balance, tuple(depends))
+        return self
+
+    def call(self, make_call, depends):
+        self.calls.append((make_call, tuple(depends)))
+        return self
+
+    def level(self, name):
+        _, _, _, depends = self.originations[name]
+        return max((self.level(dependency) + 1 for dependency in depends), default=0)
+
+    def call_level(self, depends):
+        return max((self.level(dependency) + 1 for dependency in depends), default=0)
+
+    def build(self, snapshot=None):
+        """
+            Originates contracts and sends calls.
+            @params:
+                snapshot - (name, source files) to reuse sandbox snapshot, see sandbox.py
+            @returns dict of ContractInterface by name, with originated addresses in context
+        """
+        if not snapshot or not use_snapshots():
+            self.originate_all()
+            return self.contracts
+
+        snapshot_name, files = snapshot
+        paths = [path for path, _, _, _ in self.originations.values()]
+        key = get_snapshot_key(snapshot_name, [*files, *paths])
+        manifest = restore_snapshot(key)
+        if manifest is None:
+            self.originate_all()
+            save_snapshot(key, {name: contract.context.address for name, contract in self.contracts.items()})
+            return self.contracts
+
+        for name, (path, _, _, _) in self.originations.items():
+            self.contracts[name] = ContractInterface.from_micheline(load_script(path), self.context)
+            self.contracts[name].context.address = manifest[name]
+        return self.contracts
+
+    def originate_all(self):
+        levels = {}
+        for name in self.originations:
+            levels.setdefault(self.level(name), ([], []))[0].append(name)
+        for make_call, depends in self.calls:
+            levels.setdefault(self.call_level(depends), ([], []))[1].append(make_call)
+
+        for level in sorted(levels):
+            names, make_calls = levels[level]
+            operations = []
+            for name in names:
+                path, storage, balance, _ = self.originations[name]
+                contract = ContractInterface.from_micheline(load_script(path), self.context)
+                if callable(storage):
+                    storage = storage(self.contracts)
+                operations.append(contract.originate(initial_storage=storage, balance=balance))
+                self.contracts[name] = contract
+            operations.extend(make_call(self.contracts) for make_call in make_calls)
+
+            result = self.client.bulk(*operations).send(gas_reserve=10000, min_confirmations=1)
+            for index, name in enumerate(names):
+                metadata = result.opg_result['contents'][index]['metadata']
+                self.contracts[name].context.address = metadata['operation_result']['originated_contracts'][0]
+
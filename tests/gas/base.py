@@ -0,0 +1,212 @@
+from contextlib import contextmanager
+from copy import deepcopy
+import fcntl
+import hashlib
+import json
+import os
+from os.path import dirname, join
+
+
+from pytezos.crypto.encoding import base58_encode
+from pytezos.michelson.forge import forge_micheline
+from pytezos.michelson.sections.storage import StorageSection
+from pytezos.rpc.errors import RpcError
+
+
+from ..base import get_fixture_graph
+from ..unit.base import LendingContractBaseTestCase, trace_code_patched
+from ..unit.contracts import get_btc_compiled_filepath, get_xtz_compiled_filepath
+
+
+# Gas benchmarks run every entry point through the trace_code RPC and collect
+# consumed gas, storage diff bytes and the storage burn implied by them.
+# The benchmarked storage is originated first, so big_map reads and writes
+# go to the lazy storage of a real contract.
+#
+# baseline.json keeps the measured calls and the hash of the compiled code they were
+# measured with. Benchmarks of a contract without a measured baseline section are skipped,
+# once it is committed a missing call or a changed contract fails them, commit the
+# refreshed baseline together with the contract change.
+#
+# GAS_REPORT_PATH - where the json report is written (default: gas_report.json)
+# UPDATE_GAS_BASELINE - set to 1 to rewrite baseline.json with measured values
+# GAS_TOLERANCE - allowed relative gas growth over the baseline (default: 0.02)
+
+
+BASELINE_PATH = join(dirname(__file__), 'baseline.json')
+REPORT_PATH = os.environ.get('GAS_REPORT_PATH', 'gas_report.json')
+UPDATE_BASELINE = os.environ.get('UPDATE_GAS_BASELINE') == '1'
+GAS_TOLERANCE = float(os.environ.get('GAS_TOLERANCE', '0.02'))
+
+# number of additional ledger and liquidity_book records
+STORAGE_SIZES = (0, 10, 100)
+COST_PER_BYTE = 250  # mutez
+# storage paid for a big_map entry besides its key and value
+BIG_MAP_ENTRY_BYTES = 65
+CODE_HASHES = 'code_hashes'
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def dump_json(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4, sort_keys=True)
+        f.write('\n')
+
+
+@contextmanager
+def file_lock(path):
+    """Serialize report updates between pytest-xdist workers."""
+    with open(f'{path}.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def filler_address(index):
+    return base58_encode((index + 1).to_bytes(20, 'big'), b'tz1').decode()
+
+
+def get_code_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def fill_storage(storage, size):
+    """Add `size` unrelated records to the ledger and liquidity_book big maps."""
+    storage = deepcopy(storage)
+    for index in range(size):
+        address = filler_address(index)
+        storage['ledger'][address] = {'balance': 1_000_000, 'approvals': {}}
+        storage['liquidity_book'][address] = {
+            'net_credit': 1_000,
+            'gross_credit': 1_000,
+            'lb_shares': 1_000,
+        }
+    return storage
+
+
+class GasBenchmarkTestCase(LendingContractBaseTestCase):
+    """
+        Base class of gas benchmarks, `section` separates results of the contracts in the report.
+    """
+    section = None
+
+    @classmethod
+    def setUpClass(cls, btc_version = False):
+        super().setUpClass(btc_version=btc_version)
+        cls.results = {}
+        cls.code_path = get_btc_compiled_filepath() if btc_version else get_xtz_compiled_filepath()
+        cls.code_hash = get_code_hash(cls.code_path)
+        baseline = load_json(BASELINE_PATH)
+        cls.baseline = baseline.get(cls.section, {})
+        cls.baseline_code_hash = baseline.get(CODE_HASHES, {}).get(cls.section)
+
+    @classmethod
+    def tearDownClass(cls):
+        with file_lock(REPORT_PATH):
+            report = load_json(REPORT_PATH)
+            report[cls.section] = cls.results
+            dump_json(REPORT_PATH, report)
+
+        if UPDATE_BASELINE:
+            with file_lock(BASELINE_PATH):
+                baseline = load_json(BASELINE_PATH)
+                baseline.setdefault(CODE_HASHES, {})[cls.section] = cls.code_hash
+                baseline.setdefault(cls.section, {}).update(cls.results)
+                dump_json(BASELINE_PATH, baseline)
+        super().tearDownClass()
+
+    def originate_storages(self, storages):
+        """
+            Originates the farm with every storage in one level.
+            @returns the originated storages, big_maps are replaced with their ids
+        """
+        graph = get_fixture_graph()
+        for index, storage in enumerate(storages):
+            graph.originate(f'farm_{index}', self.code_path, storage)
+        contracts = graph.build()
+        shell = self.lending_contract.context.shell
+        return [
+            self.lending_contract.storage.decode(shell.contracts[contracts[f'farm_{index}'].context.address].storage())
+            for index in range(len(storages))
+        ]
+
+    def get_big_map_entry(self, big_map_id, key_hash):
+        if int(big_map_id) < 0:
+            # temporary big_map allocated by the call
+            return None
+        try:
+            return self.lending_contract.context.shell.head.context.big_maps[big_map_id][key_hash]()
+        except RpcError:
+            return None
+
+    def get_storage_diff(self, storage, response):
+        """
+            Storage diff bytes of the call: the change of the storage value and of the
+            big_map entries, each entry is paid for its key, value and BIG_MAP_ENTRY_BYTES.
+        """
+        storage_ty = StorageSection.match(self.lending_contract.context.storage_expr)
+        initial_storage = storage_ty.from_python_object(storage).to_micheline_value(lazy_diff=None)
+        diff = len(forge_micheline(response['storage'])) - len(forge_micheline(initial_storage))
+
+        def entry_size(key, value):
+            return 0 if value is None else BIG_MAP_ENTRY_BYTES + len(forge_micheline(key)) + len(forge_micheline(value))
+
+        for big_map_diff in response.get('lazy_storage_diff', []):
+            if big_map_diff['kind'] != 'big_map':
+                continue
+            # run_code may work on copies of the originated big_maps
+            source = big_map_diff['diff'].get('source', big_map_diff['id'])
+            for update in big_map_diff['diff'].get('updates', []):
+                previous = self.get_big_map_entry(source, update['key_hash'])
+                diff += entry_size(update['key'], update.get('value')) - entry_size(update['key'], previous)
+        return diff
+
+    def measure(self, name, call, storage, **kwargs):
+        """
+            Runs `call` with every storage size and compares the results with the baseline.
+            Keyword arguments are passed to trace_code_patched.
+        """
+        if not UPDATE_BASELINE:
+            if self.baseline_code_hash is None:
+                self.skipTest(f'{self.section}: no measured baseline, run tests/gas with UPDATE_GAS_BASELINE=1 and commit baseline.json')
+            self.assertEqual(
+                self.code_hash, self.baseline_code_hash,
+                f'{self.section}: contract changed, measure it with UPDATE_GAS_BASELINE=1 and commit baseline.json',
+            )
+
+        storages = self.originate_storages([fill_storage(storage, size) for size in STORAGE_SIZES])
+        for size, initial_storage in zip(STORAGE_SIZES, storages):
+            key = f'{name}[{size}]'
+            with self.subTest(key):
+                result, response = trace_code_patched(call, storage=deepcopy(initial_storage), **kwargs)
+
+                storage_diff = self.get_storage_diff(initial_storage, response)
+                measured = {
+                    'gas': response['consumed_gas'],
+                    'storage_diff_bytes': storage_diff,
+                    'burn_mutez': max(storage_diff, 0) * COST_PER_BYTE,
+                    'operations': len(result.operations),
+                }
+                self.results[key] = measured
+                if UPDATE_BASELINE:
+                    continue
+
+                expected = self.baseline.get(key)
+                self.assertIsNotNone(expected, f'{key}: not in baseline.json, measure it with UPDATE_GAS_BASELINE=1')
+                self.assertLessEqual(
+                    measured['gas'], expected['gas'] * (1 + GAS_TOLERANCE),
+                    f'{key}: gas regression',
+                )
+                self.assertLessEqual(
+                    measured['storage_diff_bytes'], expected['storage_diff_bytes'],
+                    f'{key}: storage diff regression',
+                )
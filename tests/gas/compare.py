@@ -0,0 +1,53 @@
+"""
+    Compares two gas reports written by tests/gas, e.g. before and after a storage layout change.
+
+    python -m tests.gas.compare before.json [after.json]
+    python -m tests.gas.compare HEAD~1:tests/gas/baseline.json tests/gas/baseline.json
+
+    `after` defaults to gas_report.json, rows are printed per contract and entry point call.
+    Paths as <revision>:<path> are read from git, e.g. the baselines committed before and after a change.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from .base import CODE_HASHES, REPORT_PATH, load_json
+
+
+def load_report(path):
+    if os.path.exists(path) or ':' not in path:
+        return load_json(path)
+    return json.loads(subprocess.run(['git', 'show', path], capture_output=True, check=True, text=True).stdout)
+
+
+def compare(before, after):
+    """
+        Yields (section, key, gas before, gas after) of the calls measured in both reports.
+    """
+    for section in sorted(set(before) & set(after) - {CODE_HASHES}):
+        for key in sorted(set(before[section]) & set(after[section])):
+            yield section, key, before[section][key]['gas'], after[section][key]['gas']
+
+
+def main(before_path, after_path=REPORT_PATH):
+    rows = list(compare(load_report(before_path), load_report(after_path)))
+    if not rows:
+        print('no common measurements')
+        return
+
+    width = max(len(f'{section} {key}') for section, key, _, _ in rows)
+    print(f'{"call":<{width}} {"before":>10} {"after":>10} {"saved":>10} {"%":>7}')
+    for section, key, gas_before, gas_after in rows:
+        saved = gas_before - gas_after
+        print(f'{section + " " + key:<{width}} {gas_before:>10} {gas_after:>10} {saved:>10} {saved * 100 / gas_before:>6.2f}%')
+
+    total_before = sum(row[2] for row in rows)
+    total_after = sum(row[3] for row in rows)
+    print(f'{"total":<{width}} {total_before:>10} {total_after:>10} {total_before - total_after:>10} '
+          f'{(total_before - total_after) * 100 / total_before:>6.2f}%')
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,200 @@
+from copy import deepcopy
+
+
+from .base import GasBenchmarkTestCase
+from ..unit.constants import ALICE_ADDRESS, BOB_ADDRESS, DEFAULT_STORAGE
+
+
+class XTZGasBenchmark(GasBenchmarkTestCase):
+    section = 'xtz'
+
+    def get_storage(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        storage['settings']['dex_contract_address'] = self.another_dex_contract.context.address
+        storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        storage['settings']['fa_lb_address'] = self.lqt_token.context.address
+        storage['settings']['oracle_address'] = self.oracle.context.address
+        return storage
+
+    def get_farmer_storage(self):
+        storage = self.get_storage()
+        storage['lb_shares'] = 400
+        storage['liquidity_book'] = {
+            BOB_ADDRESS: {
+                'net_credit': 100,
+                'gross_credit': 200,
+                'lb_shares': 300,
+            }
+        }
+        return storage
+
+    def test_invest_lb(self):
+        storage = self.get_storage()
+        storage['lb_shares'] = 9
+        self.measure(
+            'investLB',
+            # amount2tzBTC, mintzBTCTokensBought, amount2Lqt, minLqtMinted, tzBTCShares
+            self.lending_contract.investLB(10, 25, 30, 40, 0),
+            storage,
+            amount = 15,
+            balance = 300,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
+
+    def test_invest_lb_finalize(self):
+        storage = self.get_storage()
+        storage['totalSupply'] = 10_000_000_000_000
+        storage['gross_credit_index'] = 5_000_000_000_000
+        storage['net_credit_index'] = 4_000_000_000_000
+        storage['deposit_index'] = 2_000_000_000_000
+        storage['local_params']['fa_lb_callback_status'] = True
+        storage['local_params']['invest_address'] = BOB_ADDRESS
+        storage['local_params']['invest_initial_balance'] = 4 * 10 ** 6
+        self.measure(
+            'investLBFinalize',
+            self.lending_contract.investLBFinalize(300),
+            storage,
+            balance = 10 ** 6,
+            sender = self.lqt_token.context.address,
+        )
+
+    def test_redeem_lb(self):
+        self.measure(
+            'redeemLB',
+            self.lending_contract.redeemLB(250, 777),
+            self.get_farmer_storage(),
+            balance = 500,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
+
+    def test_persistent_approval(self):
+        # compare with investLB and redeemLB, the approve and reset pairs are skipped
+        storage = self.get_storage()
+        storage['lb_shares'] = 9
+        storage['settings']['persistent_approval'] = True
+        storage['settings']['dex_contract_approved'] = True
+        self.measure(
+            'investLBPersistentApproval',
+            self.lending_contract.investLB(10, 25, 30, 40, 0),
+            storage,
+            amount = 15,
+            balance = 300,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
+
+        storage = self.get_farmer_storage()
+        storage['settings']['persistent_approval'] = True
+        storage['settings']['dex_contract_approved'] = True
+        self.measure(
+            'redeemLBPersistentApproval',
+            self.lending_contract.redeemLB(250, 777),
+            storage,
+            balance = 500,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
+
+    def test_throttled_lb_price(self):
+        # compare with investLB and redeemLB, lb_price refreshed 7 seconds ago is kept for the interval
+        storage = self.get_storage()
+        storage['lb_shares'] = 9
+        storage['settings']['lb_price_update_interval'] = 300
+        storage['lb_price_update_dttm'] = 100
+        self.measure(
+            'investLBThrottledLbPrice',
+            self.lending_contract.investLB(10, 25, 30, 40, 0),
+            storage,
+            amount = 15,
+            balance = 300,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
+
+        storage = self.get_farmer_storage()
+        storage['settings']['lb_price_update_interval'] = 300
+        storage['lb_price_update_dttm'] = 100
+        self.measure(
+            'redeemLBThrottledLbPrice',
+            self.lending_contract.redeemLB(250, 777),
+            storage,
+            balance = 500,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
+
+    def test_liquidate_lb(self):
+        self.measure(
+            'liquidateLB',
+            self.lending_contract.liquidateLB(BOB_ADDRESS),
+            self.get_farmer_storage(),
+            amount = 100,
+            balance = 500,
+            sender = ALICE_ADDRESS,
+            now = 107,
+        )
+
+    def test_liquidate_onchain_lb(self):
+        storage = self.get_farmer_storage()
+        storage['local_params']['fa_tzBTC_callback_status'] = False
+        self.measure(
+            'liquidateOnchainLB',
+            self.lending_contract.liquidateOnchainLB(BOB_ADDRESS),
+            storage,
+            balance = 500,
+            sender = ALICE_ADDRESS,
+            now = 107,
+        )
+
+    def test_flashloan(self):
+        storage = self.get_storage()
+        storage['parameters'][0]['flashloan_available'] = True
+        storage['index_update_dttm'] = 107
+        self.measure(
+            'flashloan',
+            self.lending_contract.flashloan(f'{self.oracle.context.address}%default', 111),
+            storage,
+            balance = 222,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
+
+    def test_deposit_lending(self):
+        storage = self.get_storage()
+        storage['deposit_index'] = 2_000_000_000_000
+        storage['totalSupply'] = 1_000_000_000_000
+        self.measure(
+            'depositLending',
+            self.lending_contract.depositLending(),
+            storage,
+            amount = 9_123_456,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
+
+    def test_redeem_lending(self):
+        storage = self.get_storage()
+        storage['deposit_index'] = 2_000_000_000_000
+        storage['ledger'] = {BOB_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}}
+        storage['totalSupply'] = 5_561_728_000_000
+        self.measure(
+            'redeemLending',
+            self.lending_contract.redeemLending(9_000_000),
+            storage,
+            balance = 10_000_000,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
+
+    def test_update_indexes(self):
+        self.measure(
+            'updateIndexes',
+            self.lending_contract.updateIndexes(),
+            self.get_storage(),
+            balance = 10_000_000,
+            sender = BOB_ADDRESS,
+            now = 107,
+        )
@@ -1,8 +1,8 @@
-from pytezos import ContractInterface
 from pytezos.crypto.key import Key
 
 
 from ..base import MainContractBaseTestCase
+from ...base import DEX_FILE, get_dex_storage, get_fixture_graph
 from ...constants import ALICE_ADDRESS, ALICE_KEY, BOB_ADDRESS, BOB_KEY, CLARE_ADDRESS, CLARE_KEY
 
 
@@ -26,33 +26,40 @@ class AnotherDexContractTest(MainContractBaseTestCase):
             'gross_credit_index': 10**21,
 
             # no upfront commission
-            'upfront_commission': 0,
-
-            'onchain_liquidation_percent': 1_000,  # 1_000%
+            'settings': {'upfront_commission': 0},
+            'parameters': {
+                0: {
+                    'onchain_liquidation_percent': 1_000,  # 1_000%
+                },
+            },
         }
-        super().setUpClass(initial_storage, btc_version=True)
-
-        # originate another dex contract
-        cls.another_dex_contract = ContractInterface.from_file(cls.dex_path, cls.context)
-        result = cls.another_dex_contract.originate(
-          initial_storage=cls.initial_dex_storage,
-          balance=10 ** 9,
-        ).send(gas_reserve=10000, min_confirmations=1)
-        originated_address = result.opg_result['contents'][0]['metadata']['operation_result']['originated_contracts'][0]
-        cls.another_dex_contract.context.address = originated_address
-
-        cls.alice_client.bulk(
-            cls.tzbtc_token.transfer(**{
+        # originate another dex contract together with the main one
+        graph = get_fixture_graph()
+        graph.originate(
+            'another_dex_contract',
+            DEX_FILE,
+            get_dex_storage,
+            balance=10 ** 9,
+            depends=['tzbtc_token', 'lqt_token'],
+        )
+        graph.call(
+            lambda contracts: contracts['tzbtc_token'].transfer(**{
                 'from': ALICE_ADDRESS,
-                'to': cls.another_dex_contract.context.address,
+                'to': contracts['another_dex_contract'].context.address,
                 'value': 1_000,
             }),
-            cls.tzbtc_token.transfer(**{
+            depends=['tzbtc_token', 'another_dex_contract'],
+        )
+        graph.call(
+            lambda contracts: contracts['tzbtc_token'].transfer(**{
                 'from': ALICE_ADDRESS,
-                'to': cls.main_contract.context.address,
+                'to': contracts['main_contract'].context.address,
                 'value': 10_000,
             }),
-        ).send(gas_reserve=10000, min_confirmations=1)
+            depends=['tzbtc_token', 'main_contract'],
+        )
+        super().setUpClass(initial_storage, btc_version=True, fixture_graph=graph)
+        cls.another_dex_contract = cls.contracts['another_dex_contract']
 
     def test_basic(self):
         main_address = self.main_contract.context.address
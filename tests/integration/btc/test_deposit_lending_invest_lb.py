@@ -14,7 +14,7 @@ class BasicTest(MainContractBaseTestCase):
             'gross_credit_index': 10**21,
 
             # no upfront commission
-            'upfront_commission': 0,
+            'settings': {'upfront_commission': 0},
         }
         super().setUpClass(initial_storage, btc_version=True)
 
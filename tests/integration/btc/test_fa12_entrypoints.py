@@ -1,4 +1,3 @@
-import subprocess
 from decimal import Decimal
 from datetime import timedelta, datetime
 from os.path import dirname, join
@@ -11,42 +10,26 @@ from pytezos.crypto.key import Key
 from pytezos.rpc.errors import MichelsonError
 
 from ..base import MainContractBaseTestCase
+from ...base import get_fixture_graph
+from ...compiler import compile_contract, CONTRACT_TZ
 from ...constants import ALICE_KEY, ALICE_ADDRESS, BOB_KEY, BOB_ADDRESS, CLARE_ADDRESS, CLARE_KEY, TEST_GAS_DELTA
 
 VIEWER_SOURCE_FILE = join(dirname(__file__), '../../DummyViewer.py')
-VIEWER_OUT_DIR = join(dirname(__file__), '../../../.out_viewer')
-VIEWER_COMPILE_COMMAND = '''\
-    ~/smartpy-cli/SmartPy.sh compile {source_file} {out_dir} --protocol ithaca
-'''.format(
-    source_file = VIEWER_SOURCE_FILE,
-    out_dir = VIEWER_OUT_DIR,
-)
 
 class FA12Test(MainContractBaseTestCase):
     @classmethod
     def setUpClass(cls):
-        # originate viewer contract
-        p = subprocess.run(VIEWER_COMPILE_COMMAND, shell=True)
-        assert p.returncode == 0, 'Viewer contract compilation should be successfull.'
-        context = ExecutionContext(
-            shell=ShellQuery(RpcNode('http://localhost:20000')),
-            key=Key.from_encoded_key(ALICE_KEY),
-        )
-        cls.viewer = ContractInterface.from_file(
-            join(VIEWER_OUT_DIR, 'contract/step_000_cont_0_contract.tz'),
-            context,
-        )
-        result = cls.viewer.originate(
-            initial_storage=None).send(gas_reserve=10000, min_confirmations=1)
-        originated_address = result.opg_result['contents'][0]['metadata']['operation_result']['originated_contracts'][0]
-        cls.viewer.context.address = originated_address
+        # viewer contract is originated together with demo_lb contracts
+        out_dir = compile_contract(VIEWER_SOURCE_FILE)
+        graph = get_fixture_graph().originate('viewer', join(out_dir, CONTRACT_TZ))
 
         # main contract
         initial_storage = {}
         initial_storage['deposit_index'] = 1_500_000_000_000
         initial_storage['net_credit_index'] = 1_700_000_000_000
         initial_storage['gross_credit_index'] = 1_800_000_000_000
-        super().setUpClass(initial_storage, btc_version=True)
+        super().setUpClass(initial_storage, btc_version=True, fixture_graph=graph)
+        cls.viewer = cls.contracts['viewer']
 
     def test_common_operations(self):
         # Bob deposits and gets tokens
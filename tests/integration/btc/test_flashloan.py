@@ -1,4 +1,3 @@
-import subprocess
 from os.path import dirname, join
 
 
@@ -11,17 +10,12 @@ from pytezos.rpc.errors import MichelsonError
 
 
 from ..base import MainContractBaseTestCase
+from ...base import get_fixture_graph
+from ...compiler import compile_contract, CONTRACT_TZ
 from ...constants import ALICE_ADDRESS, ALICE_KEY, BOB_ADDRESS, BOB_KEY
 
 
 FLASHLOANER_SOURCE_FILE = join(dirname(__file__), '../../DummyFlashloaner.py')
-FLASHLOANER_OUT_DIR = join(dirname(__file__), '../../../.out_flashloaner')
-FLASHLOANER_COMPILE_COMMAND = '''\
-    ~/smartpy-cli/SmartPy.sh compile {source_file} {out_dir} --protocol ithaca
-'''.format(
-    source_file = FLASHLOANER_SOURCE_FILE,
-    out_dir = FLASHLOANER_OUT_DIR,
-)
 
 class FlashLoanTest(MainContractBaseTestCase):
 
@@ -38,34 +32,23 @@ class FlashLoanTest(MainContractBaseTestCase):
 
             'deposit_index': 1_700_000_000_000,
         }
-        super().setUpClass(initial_storage, btc_version=True)
-
-        # originating flashloaner
-        p = subprocess.run(FLASHLOANER_COMPILE_COMMAND, shell=True)
-        assert p.returncode == 0, 'Contract compilation should be successfull.'
-
-        context = ExecutionContext(
-            shell=ShellQuery(RpcNode('http://localhost:20000')),
-            key=Key.from_encoded_key(ALICE_KEY),
-        )
-
-        cls.flash_loaner = ContractInterface.from_file(
-            join(FLASHLOANER_OUT_DIR, 'contract/step_000_cont_0_contract.tz'),
-            context,
-        )
-
-        result = cls.flash_loaner.originate(
-            initial_storage={
-                'kord_contract': cls.main_contract.context.address,
-                'fa_tzBTC_address': cls.tzbtc_token.context.address,
+        # flashloaner is originated together with the main contract
+        out_dir = compile_contract(FLASHLOANER_SOURCE_FILE)
+        graph = get_fixture_graph().originate(
+            'flash_loaner',
+            join(out_dir, CONTRACT_TZ),
+            lambda contracts: {
+                'kord_contract': contracts['main_contract'].context.address,
+                'fa_tzBTC_address': contracts['tzbtc_token'].context.address,
                 'return_amount': 0,
                 'balance': 0,
                 'return_shares': 0,
                 'tzBTC_shares': 0,
-            }).send(gas_reserve=10000, min_confirmations=1)
-
-        originated_address = result.opg_result['contents'][0]['metadata']['operation_result']['originated_contracts'][0]
-        cls.flash_loaner.context.address = originated_address
+            },
+            depends=['main_contract', 'tzbtc_token'],
+        )
+        super().setUpClass(initial_storage, btc_version=True, fixture_graph=graph)
+        cls.flash_loaner = cls.contracts['flash_loaner']
 
         cls.bob_client.bulk(
             cls.tzbtc_token.approve(value=10**7, spender=cls.main_contract.address),
@@ -92,9 +75,9 @@ class FlashLoanTest(MainContractBaseTestCase):
         self.main_contract.context.key = Key.from_encoded_key(ALICE_KEY)
         self.main_contract.setFlashloanParams(123, 456, True).send(gas_reserve=10000, min_confirmations=1)
 
-        self.assertEqual(self.main_contract.storage['flashloan_admin_commission'](), 123)
-        self.assertEqual(self.main_contract.storage['flashloan_deposit_commission'](), 456)
-        self.assertTrue(self.main_contract.storage['flashloan_available']())
+        self.assertEqual(self.main_contract.storage['parameters'][0]['flashloan_admin_commission'](), 123)
+        self.assertEqual(self.main_contract.storage['parameters'][0]['flashloan_deposit_commission'](), 456)
+        self.assertTrue(self.main_contract.storage['parameters'][0]['flashloan_available']())
 
         with self.assertRaises(MichelsonError) as context:
             self.flash_loaner.context.key = Key.from_encoded_key(BOB_KEY)
@@ -19,6 +19,7 @@ class InvesLBTest(MainContractBaseTestCase):
 
         initial_storage = {
             'index_update_dttm': cls.initial_now,
+            'lb_price_update_dttm': cls.initial_now,
 
             'lb_shares': 130_000,
             'tzBTC_shares': 1_480,
@@ -54,7 +55,7 @@ class InvesLBTest(MainContractBaseTestCase):
                 },
             },
 
-            'upfront_commission': 1_500,  # 1.5%
+            'settings': {'upfront_commission': 1_500},  # 1.5%
         }
 
         super().setUpClass(initial_storage, btc_version=True)
@@ -133,7 +134,7 @@ class InvestLBFailAbusedLeverageTest(MainContractBaseTestCase):
             'total_net_credit': 1_400_000_000_000_000,
             'totalSupply': 2_000_000_000_000_000,
 
-            'upfront_commission': 1_500,  # 1.5%
+            'settings': {'upfront_commission': 1_500},  # 1.5%
         }
 
         super().setUpClass(initial_storage, btc_version=True)
@@ -23,7 +23,7 @@ class InvestLeverageTest(MainContractBaseTestCase):
 
             'is_working': True,
             # no upfront commission
-            'upfront_commission': 0,
+            'settings': {'upfront_commission': 0},
         }
         super().setUpClass(initial_storage, btc_version=True)
 
@@ -181,7 +181,7 @@ class InvestLeverageWithDisabledStatusTest(MainContractBaseTestCase):
 
             'is_working': False,
             # no upfront commission
-            'upfront_commission': 0,
+            'settings': {'upfront_commission': 0},
         }
         super().setUpClass(initial_storage, btc_version=True)
 
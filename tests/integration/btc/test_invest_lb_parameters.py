@@ -25,7 +25,7 @@ class InvestLeverageGreater2Test(MainContractBaseTestCase):
             'deposit_index': 10**12,
             'net_credit_index': 10**15,
             'gross_credit_index': 10**18,
-            'upfront_commission': 2_000,
+            'settings': {'upfront_commission': 2_000},
         }
         super().setUpClass(initial_storage, btc_version=True)
 
@@ -83,7 +83,7 @@ class ClientInvestParamsLeverageGreater2Test(MainContractBaseTestCase):
             'deposit_index': 10**12,
             'net_credit_index': 10**15,
             'gross_credit_index': 10**18,
-            'upfront_commission': 2_000,
+            'settings': {'upfront_commission': 2_000},
         }
         super().setUpClass(initial_storage, btc_version=True)
 
@@ -141,7 +141,7 @@ class InvestLeverageLess2Test(MainContractBaseTestCase):
             'deposit_index': 10**12,
             'net_credit_index': 10**15,
             'gross_credit_index': 10**18,
-            'upfront_commission': 2_000,
+            'settings': {'upfront_commission': 2_000},
         }
         super().setUpClass(initial_storage, btc_version=True)
 
@@ -199,7 +199,7 @@ class ClientInvestParamsLeverageLess2Test(MainContractBaseTestCase):
             'deposit_index': 10**12,
             'net_credit_index': 10**15,
             'gross_credit_index': 10**18,
-            'upfront_commission': 2_000,
+            'settings': {'upfront_commission': 2_000},
         }
         super().setUpClass(initial_storage, btc_version=True)
 
@@ -257,7 +257,7 @@ class ClientInvestParamsLeverageOneTest(MainContractBaseTestCase):
             'deposit_index': 10**12,
             'net_credit_index': 10**15,
             'gross_credit_index': 10**18,
-            'upfront_commission': 2_000,
+            'settings': {'upfront_commission': 2_000},
         }
         super().setUpClass(initial_storage, btc_version=True)
 
@@ -314,7 +314,7 @@ class ClientInvestParamsLeverageAlmostOneTest(MainContractBaseTestCase):
             'deposit_index': 10**12,
             'net_credit_index': 10**15,
             'gross_credit_index': 10**18,
-            'upfront_commission': 2_000,
+            'settings': {'upfront_commission': 2_000},
         }
         super().setUpClass(initial_storage, btc_version=True)
 
@@ -39,7 +39,7 @@ class InvestWithUpfrontTest(MainContractBaseTestCase):
         self.main_contract.setUpfrontCommission(500).send(gas_reserve=10000, min_confirmations=1)
         admin_balance = self.alice_client.balance()
 
-        self.assertEqual(self.main_contract.storage['upfront_commission'](), 500)
+        self.assertEqual(self.main_contract.storage['settings']['upfront_commission'](), 500)
 
         # Bob invests LB
         self.main_contract.context.key = Key.from_encoded_key(BOB_KEY)
@@ -62,7 +62,7 @@ class InvestWithUpfrontTest(MainContractBaseTestCase):
         self.main_contract.setUpfrontCommission(1_500).send(gas_reserve=10000, min_confirmations=1)
         admin_balance = self.alice_client.balance()
 
-        self.assertEqual(self.main_contract.storage['upfront_commission'](), 1_500)
+        self.assertEqual(self.main_contract.storage['settings']['upfront_commission'](), 1_500)
 
         # Bob invests LB
         self.main_contract.context.key = Key.from_encoded_key(BOB_KEY)
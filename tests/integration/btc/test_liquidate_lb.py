@@ -49,7 +49,7 @@ class LiquidateLBTest(MainContractBaseTestCase):
                 },
             },
 
-            'upfront_commission': 1_500,  # 1.5%
+            'settings': {'upfront_commission': 1_500},  # 1.5%
 
             # set rate params to 0 so all indexes will be permanently equal to their initial values
             'rate_params': {
@@ -166,7 +166,7 @@ class PartiallyLiquidateLBTest(MainContractBaseTestCase):
                 },
             },
 
-            'upfront_commission': 1_500,  # 1.5%
+            'settings': {'upfront_commission': 1_500},  # 1.5%
 
             # set rate params to 0 so all indexes will be permanently equal to their initial values
             'rate_params': {
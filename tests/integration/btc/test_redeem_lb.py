@@ -47,7 +47,7 @@ class RedeemLBTest(MainContractBaseTestCase):
                 },
             },
 
-            'upfront_commission': 1_500,  # 1.5%
+            'settings': {'upfront_commission': 1_500},  # 1.5%
 
             # set rate params to 0 so all indexes will be permanently equal to their initial values
             'rate_params': {
@@ -154,7 +154,7 @@ class PartialRedeemLBTest(MainContractBaseTestCase):
                 },
             },
 
-            'upfront_commission': 1_500,  # 1.5%
+            'settings': {'upfront_commission': 1_500},  # 1.5%
 
             # set rate params to 0 so all indexes will be permanently equal to their initial values
             'rate_params': {
@@ -21,15 +21,15 @@ class SetUpfronCommissionTest(MainContractBaseTestCase):
         # Normal cases
         self.main_contract.context.key = Key.from_encoded_key(ALICE_KEY)
         self.main_contract.setUpfrontCommission(2_000).send(gas_reserve=10000, min_confirmations=1)
-        self.assertEqual(self.main_contract.storage['upfront_commission'](), 2_000)
+        self.assertEqual(self.main_contract.storage['settings']['upfront_commission'](), 2_000)
 
         self.main_contract.context.key = Key.from_encoded_key(ALICE_KEY)
         self.main_contract.setUpfrontCommission(1_500).send(gas_reserve=10000, min_confirmations=1)
-        self.assertEqual(self.main_contract.storage['upfront_commission'](), 1_500)
+        self.assertEqual(self.main_contract.storage['settings']['upfront_commission'](), 1_500)
 
         self.main_contract.context.key = Key.from_encoded_key(ALICE_KEY)
         self.main_contract.setUpfrontCommission(500).send(gas_reserve=10000, min_confirmations=1)
-        self.assertEqual(self.main_contract.storage['upfront_commission'](), 500)
+        self.assertEqual(self.main_contract.storage['settings']['upfront_commission'](), 500)
 
         # max value error
         with self.assertRaises(MichelsonError) as context:
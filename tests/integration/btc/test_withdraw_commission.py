@@ -16,6 +16,7 @@ class BasicTest(MainContractBaseTestCase):
         cls.initial_now = int(time.time()) - 60 * 60 * 24 * 7  # week ago
         initial_storage = {
             'index_update_dttm': cls.initial_now,
+            'lb_price_update_dttm': cls.initial_now,
 
             'deposit_index': 1_500_000_000_000,
             'net_credit_index': 1_600_000_000_000,
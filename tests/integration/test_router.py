@@ -0,0 +1,105 @@
+from os.path import dirname, join
+
+from pytezos.crypto.key import Key
+from pytezos.rpc.errors import MichelsonError
+
+from kordfi.storage import build_storage
+from ..base import DemoLBBaseTestCase, INITIAL_POOL, INITIAL_TOKEN_POOL_IN_DEX, get_fixture_graph
+from ..compiler import compile_contract, CONTRACT_TZ, FA12_SOURCE_FILE
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, BOB_KEY
+from .base import BTC_SOURCE_FILE, XTZ_SOURCE_FILE
+
+
+ROUTER_SOURCE_FILE = join(dirname(__file__), '../../src/FarmRouterSmartContract.py')
+
+
+class RouterTest(DemoLBBaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        graph = get_fixture_graph()
+        for name, source_file in (('xtz_farm', XTZ_SOURCE_FILE), ('btc_farm', BTC_SOURCE_FILE)):
+            out_dir = compile_contract(source_file, dependencies=[FA12_SOURCE_FILE])
+            graph.originate(
+                name,
+                join(out_dir, CONTRACT_TZ),
+                lambda contracts, out_dir=out_dir: build_storage(
+                    out_dir,
+                    administrator=ALICE_ADDRESS,
+                    liquidity_baking_address=contracts['dex_contract'].context.address,
+                    fa_tzBTC_address=contracts['tzbtc_token'].context.address,
+                    fa_lb_address=contracts['lqt_token'].context.address,
+                    oracle_address=contracts['oracle'].context.address,
+                ),
+                depends=['dex_contract', 'tzbtc_token', 'lqt_token', 'oracle'],
+            )
+
+        graph.originate(
+            'router',
+            join(compile_contract(ROUTER_SOURCE_FILE), CONTRACT_TZ),
+            lambda contracts: {
+                'xtz_farm_address': contracts['xtz_farm'].context.address,
+                'btc_farm_address': contracts['btc_farm'].context.address,
+                'liquidity_baking_address': contracts['dex_contract'].context.address,
+                'fa_tzBTC_address': contracts['tzbtc_token'].context.address,
+                'fa_lb_address': contracts['lqt_token'].context.address,
+                'local_params': {'tzbtc_pool': 0, 'lqt_total': 0},
+            },
+            depends=['xtz_farm', 'btc_farm'],
+        )
+        for name in ('xtz_farm', 'btc_farm'):
+            graph.call(
+                lambda contracts, name=name: contracts[name].setRouterAddress(contracts['router'].context.address),
+                depends=[name, 'router'],
+            )
+
+        super().setUpClass(fixture_graph=graph)
+        cls.xtz_farm = cls.contracts['xtz_farm']
+        cls.btc_farm = cls.contracts['btc_farm']
+        cls.router = cls.contracts['router']
+
+    def test_route_deposits(self):
+        # Bob deposits to both farms in one operation
+        self.tzbtc_token.context.key = Key.from_encoded_key(BOB_KEY)
+        self.tzbtc_token.approve(
+            value = 1_000,
+            spender = self.btc_farm.address,
+        ).send(gas_reserve=10000, min_confirmations=1)
+
+        self.router.context.key = Key.from_encoded_key(BOB_KEY)
+        (self.router
+            .route(xtz=[{'depositLending': 1_000_000}], btc=[{'depositLending': 1_000}])
+            .with_amount(1_000_000)
+            .send(gas_reserve=10000, min_confirmations=1))
+
+        self.assertEqual(self.xtz_farm.storage['ledger'][BOB_ADDRESS]['balance'](), 1_000_000_000_000)
+        self.assertEqual(self.btc_farm.storage['ledger'][BOB_ADDRESS]['balance'](), 1_000_000_000_000_000)
+        self.assertEqual(self.xtz_farm.context.get_balance(), 1_000_000)
+        self.assertEqual(self.btc_farm.storage['tzBTC_shares'](), 1_000)
+        self.assertEqual(self.router.context.get_balance(), 0)
+
+        # the pool values requested by the router are used by both farms
+        self.assertEqual(self.router.storage['local_params']['tzbtc_pool'](), INITIAL_TOKEN_POOL_IN_DEX)
+        self.assertEqual(self.router.storage['local_params']['lqt_total'](), INITIAL_POOL)
+        for farm in (self.xtz_farm, self.btc_farm):
+            self.assertEqual(farm.storage['local_params']['tzbtc_pool'](), INITIAL_TOKEN_POOL_IN_DEX)
+            self.assertEqual(farm.storage['local_params']['lqt_total'](), INITIAL_POOL)
+        self.assertEqual(
+            self.xtz_farm.storage['lb_price_update_dttm'](),
+            self.btc_farm.storage['lb_price_update_dttm'](),
+        )
+
+        # Bob redeems the XTZ deposit
+        (self.router
+            .route(xtz=[{'redeemLending': 1_000_000}], btc=[])
+            .send(gas_reserve=10000, min_confirmations=1))
+        self.assertEqual(self.xtz_farm.storage['ledger'][BOB_ADDRESS]['balance'](), 0)
+        self.assertEqual(self.xtz_farm.context.get_balance(), 0)
+
+    def test_wrong_amount(self):
+        with self.assertRaises(MichelsonError) as context:
+            self.router.context.key = Key.from_encoded_key(BOB_KEY)
+            (self.router
+                .route(xtz=[{'depositLending': 1_000_000}], btc=[])
+                .with_amount(2_000_000)
+                .send(gas_reserve=10000, min_confirmations=1))
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'wrong amount')
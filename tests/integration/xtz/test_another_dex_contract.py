@@ -1,9 +1,11 @@
-from pytezos import ContractInterface
 from pytezos.crypto.key import Key
 
 
+from kordfi.scanner import LiquidationScanner
 from ..base import MainContractBaseTestCase
+from ...base import DEX_FILE, INITIAL_POOL, INITIAL_TOKEN_POOL_IN_DEX, get_dex_storage, get_fixture_graph
 from ...constants import ALICE_ADDRESS, ALICE_KEY, BOB_ADDRESS, BOB_KEY, CLARE_ADDRESS, CLARE_KEY
+from .test_keeper import START_LEVEL
 
 
 class AnotherDexContractTest(MainContractBaseTestCase):
@@ -23,28 +25,32 @@ class AnotherDexContractTest(MainContractBaseTestCase):
             'gross_credit_index': 10**18,
 
             # no upfront commission
-            'upfront_commission': 0,
-
-            'onchain_liquidation_percent': 1_000,  # 1_000%
+            'settings': {'upfront_commission': 0},
+            'parameters': {
+                0: {
+                    'onchain_liquidation_percent': 1_000,  # 1_000%
+                },
+            },
         }
-        super().setUpClass(initial_storage, btc_version=False)
-
-        # originate another dex contract
-        cls.another_dex_contract = ContractInterface.from_file(cls.dex_path, cls.context)
-        result = cls.another_dex_contract.originate(
-          initial_storage=cls.initial_dex_storage,
-          balance=10 ** 9,
-        ).send(gas_reserve=10000, min_confirmations=1)
-        originated_address = result.opg_result['contents'][0]['metadata']['operation_result']['originated_contracts'][0]
-        cls.another_dex_contract.context.address = originated_address
-
-        cls.alice_client.bulk(
-            cls.tzbtc_token.transfer(**{
+        # originate another dex contract together with the main one
+        graph = get_fixture_graph()
+        graph.originate(
+            'another_dex_contract',
+            DEX_FILE,
+            get_dex_storage,
+            balance=10 ** 9,
+            depends=['tzbtc_token', 'lqt_token'],
+        )
+        graph.call(
+            lambda contracts: contracts['tzbtc_token'].transfer(**{
                 'from': ALICE_ADDRESS,
-                'to': cls.another_dex_contract.context.address,
+                'to': contracts['another_dex_contract'].context.address,
                 'value': 1_000,
             }),
-        ).send(gas_reserve=10000, min_confirmations=1)
+            depends=['tzbtc_token', 'another_dex_contract'],
+        )
+        super().setUpClass(initial_storage, btc_version=False, fixture_graph=graph)
+        cls.another_dex_contract = cls.contracts['another_dex_contract']
 
     def test_basic(self):
         main_address = self.main_contract.context.address
@@ -137,3 +143,44 @@ class AnotherDexContractTest(MainContractBaseTestCase):
         self.assertEqual(self.dex_contract.storage['tokenPool'](), 1_002)
         self.assertEqual(self.dex_contract.storage['xtzPool'](), 1_000_001_821)
         self.assertEqual(self.dex_contract.storage['lqtTotal'](), 1_000_000)
+
+
+class AnotherDexScannerTest(MainContractBaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # another DEX has other pool values than liquidity baking
+        graph = get_fixture_graph()
+        graph.originate(
+            'another_dex_contract',
+            DEX_FILE,
+            lambda contracts: {**get_dex_storage(contracts), 'tokenPool': 500, 'lqtTotal': 2 * INITIAL_POOL},
+            balance=10 ** 9,
+            depends=['tzbtc_token', 'lqt_token'],
+        )
+        graph.call(
+            lambda contracts: contracts['tzbtc_token'].transfer(**{
+                'from': ALICE_ADDRESS,
+                'to': contracts['another_dex_contract'].context.address,
+                'value': 500,
+            }),
+            depends=['tzbtc_token', 'another_dex_contract'],
+        )
+        graph.call(
+            lambda contracts: contracts['main_contract'].setDexContract(contracts['another_dex_contract'].context.address),
+            depends=['main_contract', 'another_dex_contract'],
+        )
+        super().setUpClass(fixture_graph=graph)
+        cls.another_dex_contract = cls.contracts['another_dex_contract']
+
+    def test_market(self):
+        self.assertEqual(
+            self.main_contract.storage['settings']['dex_contract_address'](),
+            self.another_dex_contract.context.address,
+        )
+        scanner = LiquidationScanner(self.alice_client, self.main_contract.context.address, START_LEVEL)
+        market = scanner.get_market()
+
+        # the values of liquidity baking read by calculateLbPrice, not of the DEX
+        self.assertEqual(market.tzbtc_pool, INITIAL_TOKEN_POOL_IN_DEX)
+        self.assertEqual(market.lqt_total, INITIAL_POOL)
+        self.assertEqual(self.another_dex_contract.storage['tokenPool'](), 500)
@@ -0,0 +1,31 @@
+from pytezos.crypto.key import Key
+
+from kordfi.indexer import FarmIndexer, IndexStore, RpcBlocks
+from kordfi.keeper import Farm
+from ..base import MainContractBaseTestCase
+from ...constants import BOB_ADDRESS, BOB_KEY
+from .test_keeper import START_LEVEL
+
+
+class IndexerTest(MainContractBaseTestCase):
+    def test_index_deposit(self):
+        self.main_contract.context.key = Key.from_encoded_key(BOB_KEY)
+        (self.main_contract
+            .depositLending()
+            .with_amount(1_000_000)
+            .send(gas_reserve=10000, min_confirmations=1))
+
+        store = IndexStore(':memory:')
+        self.addCleanup(store.close)
+        address = self.main_contract.context.address
+        indexer = FarmIndexer(RpcBlocks(self.bob_client), store, [Farm(address, START_LEVEL, False)])
+        self.assertGreater(indexer.sync(), 0)
+
+        calls = store.connection.execute(
+            'SELECT contract, sender, amount FROM calls WHERE entrypoint = ?', ('depositLending',),
+        ).fetchall()
+        self.assertEqual(calls, [(address, BOB_ADDRESS, 1_000_000)])
+        updates = store.connection.execute(
+            'SELECT big_map, key FROM big_map_updates WHERE value IS NOT NULL',
+        ).fetchall()
+        self.assertIn(('ledger', BOB_ADDRESS), updates)
@@ -27,7 +27,7 @@ class InvestLeverageNoUpfrontCommissionTest(MainContractBaseTestCase):
             'gross_credit_index': 10**18,
 
             # no upfront commission
-            'upfront_commission': 0,
+            'settings': {'upfront_commission': 0},
         }
         super().setUpClass(initial_storage, btc_version=False)
 
@@ -154,6 +154,7 @@ class InvestLBWithIndexesTest(MainContractBaseTestCase):
         cls.initial_now = int(time.time()) - 60 * 60 * 24 * 7  # week ago
         initial_storage = {}
         initial_storage['index_update_dttm'] = cls.initial_now
+        initial_storage['lb_price_update_dttm'] = initial_storage['index_update_dttm']
         initial_storage['deposit_index'] = 1_500_000_000_000
         initial_storage['net_credit_index'] = 1_600_000_000_000
         initial_storage['gross_credit_index'] = 1_900_000_000_000
@@ -185,7 +186,7 @@ class InvestLBWithIndexesTest(MainContractBaseTestCase):
         initial_storage['lb_shares'] = 130_000
         initial_amount = 1_480_000_000
 
-        initial_storage['upfront_commission'] = 0
+        initial_storage['settings'] = {'upfront_commission': 0}
         super().setUpClass(initial_storage, initial_amount)
 
     def test_invest(self):
@@ -247,6 +248,7 @@ class InvestLBWithIndexeAndDisabledFlagsTest(MainContractBaseTestCase):
         cls.initial_now = int(time.time()) - 60 * 60 * 24 * 7  # week ago
         initial_storage = {
             'index_update_dttm': cls.initial_now,
+            'lb_price_update_dttm': cls.initial_now,
             'deposit_index': 1_500_000_000_000,
             'net_credit_index': 1_600_000_000_000,
             'gross_credit_index': 1_900_000_000_000,
@@ -276,7 +278,7 @@ class InvestLBWithIndexeAndDisabledFlagsTest(MainContractBaseTestCase):
                 },
             },
             'lb_shares': 130_000,
-            'upfront_commission': 0,
+            'settings': {'upfront_commission': 0},
             'is_working': False,
         }
         initial_amount = 1_480_000_000
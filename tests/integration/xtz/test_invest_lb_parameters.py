@@ -25,7 +25,7 @@ class InvestLeverageTest(MainContractBaseTestCase):
             'deposit_index': 10**12,
             'net_credit_index': 10**15,
             'gross_credit_index': 10**18,
-            'upfront_commission': 2_000,
+            'settings': {'upfront_commission': 2_000},
         }
         super().setUpClass(initial_storage)
 
@@ -86,7 +86,7 @@ class InvestLeverageOneTest(MainContractBaseTestCase):
             'deposit_index': 10**12,
             'net_credit_index': 10**15,
             'gross_credit_index': 10**18,
-            'upfront_commission': 2_000,
+            'settings': {'upfront_commission': 2_000},
         }
         super().setUpClass(initial_storage)
 
@@ -147,7 +147,7 @@ class InvestLeverageAlmostOneTest(MainContractBaseTestCase):
             'deposit_index': 10**12,
             'net_credit_index': 10**15,
             'gross_credit_index': 10**18,
-            'upfront_commission': 2_000,
+            'settings': {'upfront_commission': 2_000},
         }
         super().setUpClass(initial_storage)
 
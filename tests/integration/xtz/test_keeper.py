@@ -0,0 +1,65 @@
+import time
+from copy import deepcopy
+
+from kordfi.keeper import Action, Farm, Keeper
+from ..base import MainContractBaseTestCase
+from ...constants import ALICE_ADDRESS, CLARE_ADDRESS
+from .test_liquidate_lb import INITIAL_STORAGE
+
+
+# the sandbox chain is short, scanners process it from the first block
+START_LEVEL = 1
+
+
+class KeeperUpdateIndexesTest(MainContractBaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass({'index_update_dttm': int(time.time()) - 3600})
+
+    def test_update_indexes(self):
+        address = self.main_contract.context.address
+        keeper = Keeper(self.bob_client, [Farm(address, START_LEVEL, False)], index_ttl=600)
+
+        actions, result = keeper.run_once(min_confirmations=1)
+        self.assertEqual(actions, [Action(address, 'updateIndexes', None, 0)])
+        self.assertIsNotNone(result)
+        index_update_dttm = self.main_contract.storage['index_update_dttm']()
+        self.assertGreater(index_update_dttm, int(time.time()) - 600)
+
+        # indexes are fresh
+        self.assertEqual(keeper.run_once(min_confirmations=1), ([], None))
+
+        # the next group is sent with the cached limits
+        keeper.index_ttl = 0
+        self.assertIsNotNone(keeper.estimates.get({'destination': address, 'parameters': {'entrypoint': 'updateIndexes'}}))
+        actions, result = keeper.run_once(min_confirmations=1)
+        self.assertEqual(actions, [Action(address, 'updateIndexes', None, 0)])
+        self.assertIsNotNone(result)
+        self.assertGreater(self.main_contract.storage['index_update_dttm'](), index_update_dttm)
+
+
+class KeeperLiquidationTest(MainContractBaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        initial_storage = deepcopy(INITIAL_STORAGE)
+        initial_storage['index_update_dttm'] = int(time.time())
+        initial_storage['lb_price_update_dttm'] = initial_storage['index_update_dttm']
+        initial_storage['lb_price'] = 1_000_000_000
+        super().setUpClass(initial_storage, 1_480_000_000)
+        cls.alice_client.bulk(
+            cls.lqt_token.transfer(**{
+                'from': ALICE_ADDRESS,
+                'to': cls.main_contract.context.address,
+                'value': 410_000,
+            }),
+            cls.oracle.set_price(2_000_000, 100_000_000_000_000),
+        ).send(gas_reserve=10000, min_confirmations=1)
+
+    def test_liquidate(self):
+        address = self.main_contract.context.address
+        keeper = Keeper(self.bob_client, [Farm(address, START_LEVEL, False)])
+
+        actions, result = keeper.run_once(min_confirmations=1)
+        self.assertIn(CLARE_ADDRESS, [action.argument for action in actions if action.entrypoint == 'liquidateLB'])
+        self.assertIsNotNone(result)
+        self.assertEqual(self.main_contract.storage['liquidity_book'][CLARE_ADDRESS]['gross_credit'](), 0)
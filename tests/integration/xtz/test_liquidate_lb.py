@@ -10,6 +10,7 @@ from ...constants import ALICE_ADDRESS, ALICE_KEY, BOB_ADDRESS, BOB_KEY, CLARE_A
 
 INITIAL_STORAGE = {
     'index_update_dttm': int(time.time()),
+    'lb_price_update_dttm': int(time.time()),
     'deposit_index': 1_500_000_000_000,
     'net_credit_index': 1_600_000_000_000,
     'gross_credit_index': 1_900_000_000_000,
@@ -44,7 +45,7 @@ INITIAL_STORAGE = {
         },
     },
     'lb_shares': 410_000,
-    'upfront_commission': 10000,
+    'settings': {'upfront_commission': 10000},
     'is_working': True,
 }
 
@@ -54,6 +55,7 @@ class LiquidateNormalEntryTest(MainContractBaseTestCase):
     def setUpClass(cls):
         initial_storage = deepcopy(INITIAL_STORAGE)
         initial_storage['index_update_dttm'] = int(time.time())
+        initial_storage['lb_price_update_dttm'] = initial_storage['index_update_dttm']
         initial_storage['lb_price'] = 1_000_000_000
         initial_amount = 1_480_000_000
         super().setUpClass(initial_storage, initial_amount)
@@ -101,6 +103,7 @@ class PartialLiquidationTest(MainContractBaseTestCase):
     def setUpClass(cls):
         initial_storage = deepcopy(INITIAL_STORAGE)
         initial_storage['index_update_dttm'] = int(time.time())
+        initial_storage['lb_price_update_dttm'] = initial_storage['index_update_dttm']
         initial_storage['lb_price'] = 1_000_000_000
         initial_storage['rate_params'] = {
             'rate_1': 0,
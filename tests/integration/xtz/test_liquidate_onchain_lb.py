@@ -48,7 +48,7 @@ class LiquidateOnchainLBTest(MainContractBaseTestCase):
                 },
             },
 
-            'upfront_commission': 1_500,  # 1.5%
+            'settings': {'upfront_commission': 1_500},  # 1.5%
 
             # set rate params to 0 so all indexes will be permanently equal to their initial values
             'rate_params': {
@@ -82,7 +82,7 @@ class LiquidateOnchainLBTest(MainContractBaseTestCase):
         # Admin changes commission to 70%
         self.main_contract.context.key = Key.from_encoded_key(ALICE_KEY)
         self.main_contract.setLeverageParams(40, 120, 70, 120, 110, 50, oracle_address).send(gas_reserve=10000, min_confirmations=1)
-        self.assertEqual(self.main_contract.storage['onchain_liquidation_comm'](), 70)
+        self.assertEqual(self.main_contract.storage['parameters'][0]['onchain_liquidation_comm'](), 70)
 
         # Admin liqudates Bob (extra_shares > 0)
         initial_admin_balance = self.alice_client.balance()
@@ -207,7 +207,7 @@ class LiquidateOnchainLBWithDisabledStatusTest(MainContractBaseTestCase):
                 },
             },
 
-            'upfront_commission': 1_500,  # 1.5%
+            'settings': {'upfront_commission': 1_500},  # 1.5%
             'is_working': False,
 
             # set rate params to 0 so all indexes will be permanently equal to their initial values
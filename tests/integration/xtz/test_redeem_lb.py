@@ -31,7 +31,7 @@ class RedeemLBNoUpfrontCommissionTest(MainContractBaseTestCase):
             'total_gross_credit': 23_629_132,
 
             'lb_shares': 27_584,
-            'upfront_commission': 10000,
+            'settings': {'upfront_commission': 10000},
 
             'liquidity_book': {
                 BOB_ADDRESS: {
@@ -109,7 +109,7 @@ class PartialRedeemLBTest(MainContractBaseTestCase):
             'total_gross_credit': 23_629_132,
 
             'lb_shares': 27_584,
-            'upfront_commission': 10000,
+            'settings': {'upfront_commission': 10000},
 
             'liquidity_book': {
                 BOB_ADDRESS: {
@@ -0,0 +1,48 @@
+"""
+    Measures kordfi.model transitions per minute.
+
+    python -m tests.model_benchmark [count]
+"""
+
+import random
+import sys
+import time
+
+from kordfi.model import ContractError, FarmModel
+from .constants import CONTRACT_ADDRESS
+from .test_model import random_storages
+
+
+def main(count):
+    rnd = random.Random(0)
+    # the investor has no position in the random storage
+    storage = next(random_storages(1))
+    model = FarmModel(storage)
+    now = storage['index_update_dttm']
+    balance = 10 ** 12
+
+    transitions = 0
+    failures = 0
+    start = time.perf_counter()
+    for _ in range(count):
+        now += rnd.randint(0, 60)
+        try:
+            # invest, redeem half and deposit, every entry point updates indexes
+            model.invest_lb(CONTRACT_ADDRESS, 0, 20_000_000, 10_000_000, balance, now, 10 ** 9, 10 ** 8)
+            model.sell_tzbtc()
+            model.invest_lb_finalize(storage['lb_shares'] + 1_000, balance - 30_000_000)
+            params = model.redeem_lb(CONTRACT_ADDRESS, 500, balance, now, 10 ** 9, 10 ** 8)
+            model.sell_tzbtc()
+            model.redeem_lb_finalize(**params, balance=balance + 40_000_000)
+            model.deposit_lending(CONTRACT_ADDRESS, 1_000_000, now, 10 ** 9, 10 ** 8)
+        except ContractError:
+            failures += 1
+        transitions += 7
+    elapsed = time.perf_counter() - start
+
+    print(f'{transitions} transitions ({failures} failed sequences) in {elapsed:.3f}s, '
+          f'{transitions * 60 / elapsed:,.0f} per minute')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
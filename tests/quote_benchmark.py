@@ -0,0 +1,41 @@
+"""
+    Compares kordfi.quote with the reference search implementation.
+
+    python -m tests.quote_benchmark [count]
+"""
+
+import sys
+import time
+
+from kordfi import quote
+from . import tzbtc_invest_params, xtz_invest_params
+from .test_quote import random_pools
+
+
+def measure(name, reference, fast, cases):
+    start = time.perf_counter()
+    expected = [reference(*case) for case in cases]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [fast(*case) for case in cases]
+    fast_time = time.perf_counter() - start
+
+    assert results == expected, f'{name} results differ from the reference'
+    print(f'{name}: {len(cases)} quotes, search {reference_time:.3f}s, closed form {fast_time:.3f}s, '
+          f'x{reference_time / fast_time:.1f}')
+
+
+def main(count):
+    pools = list(random_pools(count))
+    measure('xtz', xtz_invest_params.get_invest_params, quote.get_invest_params, pools)
+    measure(
+        'tzBTC',
+        tzbtc_invest_params.get_invest_params,
+        quote.get_tzbtc_invest_params,
+        [(*pool, pool[0] // 100, 5) for pool in pools],
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,111 @@
+"""
+    Replays recorded farm calls with the compiled contract.
+
+    Each record lists the farm transactions of its operation group in `operations`:
+
+        {"entrypoint": "investLB", "now": 1660000000, ..., "operations": [
+            {"entrypoint": "investLB", "value": {...}, "sender": "tz1...", "amount": 1000000, "balance": 5000000},
+            {"entrypoint": "sellTzBTC", "value": 30, "sender": "KT1...", "balance": 4000000},
+            ...
+        ]}
+
+    The contract is run with the sandbox run_code RPC or the in-process interpreter (MICHELSON_BACKEND),
+    `--trace` measures gas with the trace_code RPC.
+
+    python -m tests.replay_contract calls.jsonl storage.json --metrics metrics.jsonl --checkpoint replay.checkpoint [--btc] [--trace]
+"""
+
+import argparse
+import json
+import sys
+
+from pytezos import ContractInterface
+from pytezos.context.impl import ExecutionContext
+from pytezos.crypto.key import Key
+from pytezos.rpc import RpcNode, ShellQuery
+from pytezos.rpc.errors import MichelsonError
+
+from kordfi.replay import DEFAULT_CHECKPOINT_INTERVAL, Replay, ReplayError, from_json
+from .unit.base import run_code_patched, trace_code_patched
+from .unit.constants import ALICE_KEY
+from .unit.contracts import get_btc_compiled_filepath, get_xtz_compiled_filepath
+from .unit.interpreter import use_interpreter
+
+
+class ContractBackend:
+    """
+        kordfi.replay backend running the farm transactions of the records one by one.
+    """
+    def __init__(self, contract, storage, trace=False):
+        self.contract = contract
+        self.storage = storage
+        self.trace = trace
+
+    def load(self, storage):
+        self.storage = storage
+
+    def apply(self, record):
+        storage = self.storage
+        gas = 0
+        for operation in record['operations']:
+            entrypoint = getattr(self.contract, operation['entrypoint'])
+            call = entrypoint() if operation.get('value') is None else entrypoint(operation['value'])
+            kwargs = {
+                'storage': storage,
+                'sender': operation['sender'],
+                'source': operation.get('source', operation['sender']),
+                'amount': operation.get('amount', 0),
+                'balance': operation.get('balance', 0),
+                'now': record['now'],
+            }
+            try:
+                if self.trace:
+                    result, response = trace_code_patched(call, **kwargs)
+                    gas += response['consumed_gas']
+                else:
+                    result = run_code_patched(call, **kwargs)
+            except MichelsonError as error:
+                raise ReplayError(f'{operation["entrypoint"]}: {error}') from error
+            storage = result.storage
+        # a failed operation group doesn't change the storage
+        self.storage = storage
+        return gas if self.trace else None
+
+
+def get_contract(btc_version=False):
+    if use_interpreter():
+        context = ExecutionContext(key=Key.from_encoded_key(ALICE_KEY))
+    else:
+        context = ExecutionContext(
+            shell=ShellQuery(RpcNode('http://localhost:20000')),
+            key=Key.from_encoded_key(ALICE_KEY),
+        )
+    return ContractInterface.from_file(
+        get_btc_compiled_filepath() if btc_version else get_xtz_compiled_filepath(),
+        context,
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Replay recorded farm calls with the compiled contract.')
+    parser.add_argument('input', help='JSONL of the recorded calls with operations')
+    parser.add_argument('storage', help='JSON of the decoded storage before the first call')
+    parser.add_argument('--btc', action='store_true', help='BTC farm contract')
+    parser.add_argument('--trace', action='store_true', help='measure gas with the trace_code RPC')
+    parser.add_argument('--metrics', help='JSONL file for the metrics')
+    parser.add_argument('--checkpoint', help='checkpoint file, the replay resumes from it if it exists')
+    parser.add_argument('--checkpoint-interval', type=int, default=DEFAULT_CHECKPOINT_INTERVAL)
+    parser.add_argument('--limit', type=int, help='number of records to replay')
+    args = parser.parse_args(args)
+    if args.trace and use_interpreter():
+        parser.error('trace_code needs the sandbox RPC backend')
+
+    with open(args.storage) as f:
+        backend = ContractBackend(get_contract(args.btc), from_json(json.load(f)), trace=args.trace)
+    replay = Replay(backend, args.input, args.metrics, args.checkpoint, args.checkpoint_interval)
+    json.dump(replay.run(args.limit), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
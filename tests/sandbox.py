@@ -0,0 +1,70 @@
+"""
+    Snapshots of the sandbox started by scripts/jakartabox.sh.
+
+    With SANDBOX_SNAPSHOTS=1 the fixture graph of a test class is originated once, then the
+    node data is saved as docker image together with a manifest of originated addresses.
+    Next runs restore the snapshot instead of waiting for the origination blocks.
+    Snapshot key includes contract scripts and the test module sources, changed fixtures
+    are originated again. Snapshots restart the whole sandbox, so they are disabled with
+    pytest-xdist workers sharing it.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+from os.path import dirname, exists, join
+
+from .accounts import XDIST_WORKER
+
+
+SANDBOX_SNAPSHOTS = os.environ.get('SANDBOX_SNAPSHOTS') == '1'
+SNAPSHOT_DIR = os.environ.get('SANDBOX_SNAPSHOT_DIR', join(dirname(__file__), '../.cache/sandbox'))
+SANDBOX_SCRIPT = join(dirname(__file__), '../scripts/jakartabox.sh')
+
+# incremented on every restore, contracts originated before it don't exist anymore
+restore_count = 0
+
+
+def use_snapshots():
+    return SANDBOX_SNAPSHOTS and XDIST_WORKER is None
+
+
+def get_snapshot_key(name, files):
+    key = hashlib.sha256(name.encode())
+    for path in sorted(set(files)):
+        with open(path, 'rb') as f:
+            key.update(hashlib.sha256(f.read()).digest())
+    return key.hexdigest()[:32]
+
+
+def get_manifest_path(key):
+    return join(SNAPSHOT_DIR, f'{key}.json')
+
+
+def image_exists(key):
+    p = subprocess.run(['docker', 'image', 'inspect', f'kordfi-sandbox:{key}'], capture_output=True)
+    return p.returncode == 0
+
+
+def restore_snapshot(key):
+    """
+        Restarts sandbox from the snapshot.
+        @returns manifest saved with the snapshot or None if there is no snapshot
+    """
+    global restore_count
+    if not exists(get_manifest_path(key)) or not image_exists(key):
+        return None
+    p = subprocess.run([SANDBOX_SCRIPT, 'restore', key])
+    assert p.returncode == 0, 'Sandbox snapshot should be restored.'
+    restore_count += 1
+    with open(get_manifest_path(key)) as f:
+        return json.load(f)
+
+
+def save_snapshot(key, manifest):
+    p = subprocess.run([SANDBOX_SCRIPT, 'save', key])
+    assert p.returncode == 0, 'Sandbox snapshot should be saved.'
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with open(get_manifest_path(key), 'w') as f:
+        json.dump(manifest, f, indent=4)
@@ -0,0 +1,87 @@
+from copy import deepcopy
+from unittest import TestCase
+
+from pytezos import ContractInterface
+from pytezos.context.abstract import get_originated_address
+from pytezos.context.impl import ExecutionContext
+
+from .base import DEX_FILE, DEX_STORAGE, TOKEN_FILE, TZBTC_STORAGE
+from .unit.interpreter import interpret_code
+
+
+def get_token_storage(result):
+    """Token storage of the call result without the removed big_map entries, which are kept as None."""
+    storage = deepcopy(result.storage)
+    for big_map in ('tokens', 'allowances'):
+        storage[big_map] = {key: value for key, value in storage[big_map].items() if value is not None}
+    return storage
+
+
+class DexAllowanceTestCase(TestCase):
+    """
+        sellTzBTC and sellTzBTCDust of the XTZ farm approve the DEX to spend exactly the sold tzBTC
+        and don't reset the allowance after tokenToXtz. FA1.2 approve fails with UnsafeAllowanceChange
+        for a nonzero allowance, so tokenToXtz must spend all of it.
+    """
+
+    def setUp(self):
+        self.dex_contract = ContractInterface.from_file(DEX_FILE, ExecutionContext())
+        self.tzbtc_token = ContractInterface.from_file(TOKEN_FILE, ExecutionContext())
+        # index 0 is the self address of the interpreted contract, it is the DEX in tokenToXtz
+        self.dex_address = get_originated_address(0)
+        self.token_address = get_originated_address(1)
+        self.farm_address = get_originated_address(2)
+
+        self.token_storage = deepcopy(TZBTC_STORAGE)
+        self.token_storage['tokens'] = {self.farm_address: 1_000, self.dex_address: 1_000}
+        self.dex_storage = deepcopy(DEX_STORAGE)
+        self.dex_storage['tokenAddress'] = self.token_address
+        self.dex_storage['lqtAddress'] = get_originated_address(3)
+
+    def approve(self, storage, value):
+        return get_token_storage(interpret_code(
+            self.tzbtc_token.approve(spender=self.dex_address, value=value),
+            storage=storage,
+            sender=self.farm_address,
+            now=100,
+        ))
+
+    def sell(self, storage, tokens_sold):
+        """
+            Runs tokenToXtz of the farm and the tzBTC transfer it emits.
+            @returns tzBTC storage after the sale
+        """
+        result = interpret_code(
+            self.dex_contract.tokenToXtz(to=self.farm_address, tokensSold=tokens_sold, minXtzBought=0, deadline=200),
+            storage=self.dex_storage,
+            sender=self.farm_address,
+            balance=10 ** 9,
+            now=100,
+        )
+        transfer = result.operations[0]
+        self.assertEqual(transfer['destination'], self.token_address)
+        params = self.tzbtc_token.transfer.decode(transfer['parameters']['value'])['transfer']
+        self.assertEqual(params, {'from': self.farm_address, 'to': self.dex_address, 'value': tokens_sold})
+
+        return get_token_storage(interpret_code(
+            self.tzbtc_token.transfer(**params),
+            storage=storage,
+            sender=self.dex_address,
+            source=self.farm_address,
+            now=100,
+        ))
+
+    def test_token_to_xtz_spends_allowance(self):
+        storage = self.approve(self.token_storage, 150)
+        self.assertEqual(storage['allowances'][(self.farm_address, self.dex_address)], 150)
+
+        storage = self.sell(storage, 150)
+        self.assertNotIn((self.farm_address, self.dex_address), storage['allowances'])
+        self.assertEqual(storage['tokens'][self.farm_address], 850)
+        self.assertEqual(storage['tokens'][self.dex_address], 1_150)
+
+        # the next sale approves without a reset
+        storage = self.approve(storage, 70)
+        storage = self.sell(storage, 70)
+        self.assertNotIn((self.farm_address, self.dex_address), storage['allowances'])
+        self.assertEqual(storage['tokens'][self.farm_address], 780)
@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+from .fixture_graph import FixtureGraph
+
+
+class FixtureGraphTestCase(TestCase):
+    def test_levels(self):
+        graph = FixtureGraph(client=None, context=None)
+        graph.originate('tzbtc_token', 'token.tz')
+        graph.originate('lqt_token', 'token.tz')
+        graph.originate('oracle', 'oracle.tz')
+        graph.originate('dex_contract', 'dex.tz', depends=['tzbtc_token', 'lqt_token'])
+        graph.originate('main_contract', 'farm.tz', depends=['dex_contract', 'oracle'])
+        graph.originate('flash_loaner', 'flashloaner.tz', depends=['main_contract', 'tzbtc_token'])
+
+        self.assertEqual(
+            [graph.level(name) for name in graph.originations],
+            [0, 0, 0, 1, 2, 3],
+        )
+        # DEX setup calls are sent together with the farm contract origination
+        self.assertEqual(graph.call_level(['lqt_token', 'dex_contract']), 2)
+        self.assertEqual(graph.call_level(['tzbtc_token']), 1)
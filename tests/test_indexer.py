@@ -0,0 +1,161 @@
+import json
+from unittest import TestCase
+
+from pytezos.michelson.parse import michelson_to_micheline
+
+from kordfi.indexer import FarmIndexer, IndexStore, is_indexed_entrypoint
+from kordfi.keeper import Farm
+from .constants import ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS
+
+
+FARM_ADDRESS = 'KT1TxqZ8QtKvLu3V3JH7Gx58n7Co8pgtpQU5'
+START_LEVEL = 10
+
+# compiled farm contract subset with ledger and liquidity_book
+CONTRACT = '''
+parameter (or (or (unit %depositLending) (nat %redeemLending))
+              (or (pair %transfer (address %from) (pair (address %to) (nat %value))) (unit %updateIndexes)));
+storage (pair (big_map %ledger address (pair (map %approvals address nat) (nat %balance)))
+              (big_map %liquidity_book address (pair (nat %gross_credit) (pair (nat %lb_shares) (nat %net_credit)))));
+code { CDR; NIL operation; PAIR };
+'''
+
+
+def ledger_update(key, balance=None):
+    result = {'key_hash': 'expr', 'key': {'string': key}}
+    if balance is not None:
+        result['value'] = {'prim': 'Pair', 'args': [[], {'int': str(balance)}]}
+    return result
+
+
+def transaction(source, entrypoint, value, amount=0, status='applied', diffs=(), internal=()):
+    return {
+        'kind': 'transaction',
+        'source': source,
+        'destination': FARM_ADDRESS,
+        'amount': str(amount),
+        'parameters': {'entrypoint': entrypoint, 'value': value},
+        'metadata': {
+            'operation_result': {'status': status, 'lazy_storage_diff': list(diffs)},
+            'internal_operation_results': list(internal),
+        },
+    }
+
+
+class FakeBlocks:
+    """Chain of blocks with operations by level, a branch replaces the blocks since its first level."""
+    def __init__(self):
+        self.chain = {}
+        self.add_branch('main', START_LEVEL - 1, {})
+
+    def add_branch(self, name, start_level, operations, length=1):
+        for level in range(start_level, start_level + length):
+            predecessor = self.chain[level - 1]['header']['hash'] if level - 1 in self.chain else 'genesis'
+            self.chain[level] = {
+                'header': {
+                    'level': level,
+                    'hash': f'{name}{level}',
+                    'predecessor': predecessor,
+                    'timestamp': '2023-01-01T00:00:00Z',
+                },
+                'operations': operations.get(level, []),
+            }
+        for level in [level for level in self.chain if level >= start_level + length]:
+            del self.chain[level]
+
+    def head(self):
+        return max(self.chain)
+
+    def header(self, level):
+        return self.chain[level]['header']
+
+    def operations(self, level):
+        return self.chain[level]['operations']
+
+    def script(self, address):
+        return {
+            'code': michelson_to_micheline(CONTRACT),
+            'storage': {'prim': 'Pair', 'args': [{'int': '7'}, {'int': '8'}]},
+        }
+
+
+class IndexerTestCase(TestCase):
+    def setUp(self):
+        self.blocks = FakeBlocks()
+        self.store = IndexStore(':memory:')
+        self.addCleanup(self.store.close)
+
+    def get_indexer(self, batch_size=2):
+        return FarmIndexer(self.blocks, self.store, [Farm(FARM_ADDRESS, START_LEVEL, False)], batch_size=batch_size)
+
+    def query(self, sql):
+        return self.store.connection.execute(sql).fetchall()
+
+    def test_indexed_entrypoints(self):
+        self.assertTrue(is_indexed_entrypoint('investLB'))
+        self.assertTrue(is_indexed_entrypoint('liquidateLBOnchain'))
+        self.assertFalse(is_indexed_entrypoint('updateIndexes'))
+
+    def test_sync(self):
+        deposit = transaction(
+            ALICE_ADDRESS, 'depositLending', {'prim': 'Unit'}, amount=1_000,
+            diffs=[{'kind': 'big_map', 'id': '7', 'diff': {'action': 'update', 'updates': [ledger_update(ALICE_ADDRESS, 5)]}}],
+        )
+        transfer = transaction(ALICE_ADDRESS, 'transfer', {
+            'prim': 'Pair', 'args': [{'string': ALICE_ADDRESS}, {'prim': 'Pair', 'args': [{'string': BOB_ADDRESS}, {'int': '5'}]}],
+        }, diffs=[{'kind': 'big_map', 'id': '7', 'diff': {'action': 'update', 'updates': [ledger_update(ALICE_ADDRESS)]}}])
+        failed = transaction(BOB_ADDRESS, 'redeemLending', {'int': '1'}, status='backtracked')
+        routed = transaction(CLARE_ADDRESS, 'updateIndexes', {'prim': 'Unit'}, internal=[{
+            'kind': 'transaction',
+            'source': CLARE_ADDRESS,
+            'destination': FARM_ADDRESS,
+            'amount': '0',
+            'parameters': {'entrypoint': 'redeemLending', 'value': {'int': '3'}},
+            'result': {'status': 'applied'},
+        }])
+        self.blocks.add_branch('main', START_LEVEL, {
+            START_LEVEL: [{'hash': 'op1', 'contents': [deposit]}],
+            START_LEVEL + 2: [{'hash': 'op2', 'contents': [transfer]}, {'hash': 'op3', 'contents': [failed]}],
+            START_LEVEL + 3: [{'hash': 'op4', 'contents': [routed]}],
+        }, length=4)
+
+        indexer = self.get_indexer()
+        self.assertEqual(indexer.sync(), 4)
+        self.assertEqual(self.query('SELECT level, operation_hash, entrypoint, sender, amount, parameters, internal FROM calls ORDER BY id'), [
+            (START_LEVEL, 'op1', 'depositLending', ALICE_ADDRESS, 1_000, '"Unit"', 0),
+            (START_LEVEL + 2, 'op2', 'transfer', ALICE_ADDRESS, 0, json.dumps({'from': ALICE_ADDRESS, 'to': BOB_ADDRESS, 'value': 5}, sort_keys=True), 0),
+            (START_LEVEL + 3, 'op4', 'redeemLending', CLARE_ADDRESS, 0, '3', 1),
+        ])
+        self.assertEqual(self.query('SELECT level, big_map, key, value FROM big_map_updates ORDER BY id'), [
+            (START_LEVEL, 'ledger', ALICE_ADDRESS, json.dumps({'approvals': {}, 'balance': 5}, sort_keys=True)),
+            (START_LEVEL + 2, 'ledger', ALICE_ADDRESS, None),
+        ])
+        self.assertEqual(self.store.get_head(), (START_LEVEL + 3, f'main{START_LEVEL + 3}'))
+
+        # a new run resumes from the stored head
+        self.blocks.add_branch('main', START_LEVEL + 4, {}, length=2)
+        self.assertEqual(self.get_indexer().sync(), 2)
+        self.assertEqual(self.query('SELECT count(*) FROM calls'), [(3,)])
+        self.assertEqual(self.query('SELECT count(*) FROM blocks'), [(6,)])
+
+        # farms can't be added after their origination level
+        with self.assertRaises(ValueError):
+            FarmIndexer(self.blocks, self.store, [Farm(FARM_ADDRESS, START_LEVEL, False), Farm(BOB_ADDRESS, START_LEVEL, False)])
+
+    def test_reorg(self):
+        deposit = transaction(ALICE_ADDRESS, 'depositLending', {'prim': 'Unit'}, amount=1_000)
+        self.blocks.add_branch('main', START_LEVEL, {START_LEVEL + 2: [{'hash': 'op1', 'contents': [deposit]}]}, length=3)
+        indexer = self.get_indexer()
+        self.assertEqual(indexer.sync(), 3)
+        self.assertEqual(self.query('SELECT level FROM calls'), [(START_LEVEL + 2,)])
+
+        # blocks since START_LEVEL + 1 are replaced, the deposit is included one block later
+        self.blocks.add_branch('fork', START_LEVEL + 1, {START_LEVEL + 3: [{'hash': 'op1', 'contents': [deposit]}]}, length=3)
+        self.assertEqual(indexer.sync(), 3)
+        self.assertEqual(self.query('SELECT level, hash FROM blocks ORDER BY level'), [
+            (START_LEVEL, f'main{START_LEVEL}'),
+            (START_LEVEL + 1, f'fork{START_LEVEL + 1}'),
+            (START_LEVEL + 2, f'fork{START_LEVEL + 2}'),
+            (START_LEVEL + 3, f'fork{START_LEVEL + 3}'),
+        ])
+        self.assertEqual(self.query('SELECT level FROM calls'), [(START_LEVEL + 3,)])
@@ -0,0 +1,59 @@
+from copy import deepcopy
+from os.path import dirname, join
+from unittest import TestCase
+
+from pytezos import ContractInterface
+from pytezos.context.abstract import get_originated_address
+from pytezos.context.impl import ExecutionContext
+from pytezos.crypto.encoding import base58_decode
+from pytezos.rpc.errors import MichelsonError
+
+from .base import DEX_STORAGE
+from .constants import ALICE_ADDRESS
+from .unit.interpreter import interpret_code
+
+
+class InterpreterBackendTestCase(TestCase):
+    def setUp(self):
+        self.dex_contract = ContractInterface.from_file(
+            join(dirname(__file__), '../demo_lb/dexter.liquidity_baking.mligo.tz'),
+            ExecutionContext(),
+        )
+        self.token_address = get_originated_address(1)
+        self.storage = deepcopy(DEX_STORAGE)
+        self.storage['tokenAddress'] = self.token_address
+        self.storage['lqtAddress'] = get_originated_address(2)
+
+    def test_operations_format(self):
+        result = interpret_code(
+            self.dex_contract.xtzToToken(to=ALICE_ADDRESS, minTokensBought=0, deadline=200),
+            storage=self.storage,
+            amount=10 ** 6,
+            balance=10 ** 9,
+            now=107,
+        )
+        self.assertEqual(result.storage['xtzPool'], 10 ** 9 + 999_000)
+        self.assertEqual(len(result.operations), 2)
+
+        # parameters are optimized like in RPC response
+        operation = result.operations[0]
+        self.assertEqual(operation['destination'], self.token_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'transfer')
+        params = operation['parameters']['value']['args']
+        self.assertTrue(params[0]['bytes'].startswith('01'))
+        self.assertEqual(params[1]['args'][0]['bytes'], '0000' + base58_decode(ALICE_ADDRESS.encode()).hex())
+
+        # unit transfer has no parameters
+        operation = result.operations[1]
+        self.assertEqual(int(operation['amount']), 1_000)
+        self.assertNotIn('parameters', operation)
+
+    def test_rejected_script(self):
+        with self.assertRaises(MichelsonError) as context:
+            interpret_code(
+                self.dex_contract.xtzToToken(to=ALICE_ADDRESS, minTokensBought=0, deadline=100),
+                storage=self.storage,
+                amount=10 ** 6,
+                now=107,
+            )
+        self.assertEqual(context.exception.args[0]['with'], {'int': '3'})
@@ -0,0 +1,195 @@
+from unittest import TestCase
+
+from kordfi.farm import FIXED_POINT_FACTOR
+from kordfi.keeper import (
+    Action, EstimateCache, filter_onchain_batch, get_dust_min_xtz_bought, get_liquidation_payment,
+    get_onchain_sale_proceeds, parse_farm, plan_farm_actions,
+)
+from kordfi.scanner import Market, Position
+from .constants import ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS, CONTRACT_ADDRESS
+
+
+def get_market(now=1_000, parameters=None, **kwargs):
+    storage = {
+        'administrator': ALICE_ADDRESS,
+        'index_update_dttm': 1_000,
+        'parameters': {
+            0: {
+                'liquidation_price_percent': 110,
+                'onchain_liquidation_available': True,
+                'onchain_liquidation_percent': 120,
+                **(parameters or {}),
+            },
+        },
+        **kwargs,
+    }
+    return Market(storage=storage, tzbtc_pool=0, lqt_total=0, tzbtc_price=0, xtz_price=0, now=now)
+
+
+POSITIONS = [
+    Position(address=BOB_ADDRESS, lb_shares=100, debt=1_000, collateral_ratio=90, is_liquidatable=True),
+    Position(address=CLARE_ADDRESS, lb_shares=100, debt=2_000, collateral_ratio=110, is_liquidatable=True),
+    Position(address=ALICE_ADDRESS, lb_shares=100, debt=500, collateral_ratio=300, is_liquidatable=False),
+]
+
+
+def transaction(entrypoint, gas_limit='0', storage_limit='0'):
+    return {
+        'kind': 'transaction',
+        'destination': CONTRACT_ADDRESS,
+        'parameters': {'entrypoint': entrypoint, 'value': {'prim': 'Unit'}},
+        'gas_limit': gas_limit,
+        'storage_limit': storage_limit,
+    }
+
+
+class PlanTestCase(TestCase):
+    def test_liquidation_payment(self):
+        self.assertEqual(get_liquidation_payment(1_000, 110), 1_100)
+        self.assertEqual(get_liquidation_payment(1_001, 110), 1_102)
+
+    def test_update_indexes(self):
+        self.assertEqual(plan_farm_actions(CONTRACT_ADDRESS, get_market(now=1_500), [], BOB_ADDRESS, index_ttl=600), [])
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(now=1_600), [], BOB_ADDRESS, index_ttl=600),
+            [Action(CONTRACT_ADDRESS, 'updateIndexes', None, 0)],
+        )
+
+    def test_liquidations(self):
+        # liquidations update indexes, the keeper position is skipped
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(now=10_000), POSITIONS, CLARE_ADDRESS, index_ttl=600),
+            [Action(CONTRACT_ADDRESS, 'liquidateLB', BOB_ADDRESS, 1_100)],
+        )
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(), POSITIONS, ALICE_ADDRESS, is_btc=True),
+            [
+                Action(CONTRACT_ADDRESS, 'liquidateLB', {'address': BOB_ADDRESS, 'payment_shares': 1_100}, 0),
+                Action(CONTRACT_ADDRESS, 'liquidateLB', {'address': CLARE_ADDRESS, 'payment_shares': 2_200}, 0),
+            ],
+        )
+
+    def test_max_payment(self):
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(), POSITIONS, ALICE_ADDRESS, max_payment=1_500),
+            [
+                Action(CONTRACT_ADDRESS, 'liquidateLB', BOB_ADDRESS, 1_100),
+                Action(CONTRACT_ADDRESS, 'liquidateLB', CLARE_ADDRESS, 400),
+            ],
+        )
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(), POSITIONS, ALICE_ADDRESS, max_payment=1_100),
+            [Action(CONTRACT_ADDRESS, 'liquidateLB', BOB_ADDRESS, 1_100)],
+        )
+
+    def test_onchain_liquidations(self):
+        # the batch sale is quoted from the pools
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(), POSITIONS, ALICE_ADDRESS, onchain=True, lb_pool=(1_000, 5_000, 1_000)),
+            [Action(CONTRACT_ADDRESS, 'liquidateOnchainLBBatch', [BOB_ADDRESS, CLARE_ADDRESS], 0)],
+        )
+        # Bob's share of the sale is 120% of his debt, he would revert the batch
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(), POSITIONS, ALICE_ADDRESS, onchain=True, lb_pool=(1_000, 10_000, 1_000)),
+            [Action(CONTRACT_ADDRESS, 'liquidateOnchainLB', CLARE_ADDRESS, 0)],
+        )
+        # separate calls without the quotes
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(), POSITIONS, ALICE_ADDRESS, onchain=True),
+            [
+                Action(CONTRACT_ADDRESS, 'liquidateOnchainLB', BOB_ADDRESS, 0),
+                Action(CONTRACT_ADDRESS, 'liquidateOnchainLB', CLARE_ADDRESS, 0),
+            ],
+        )
+        market = get_market(settings={'dex_contract_address': CONTRACT_ADDRESS, 'liquidity_baking_address': BOB_ADDRESS})
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, market, POSITIONS, ALICE_ADDRESS, onchain=True, lb_pool=(1_000, 5_000, 1_000)),
+            [
+                Action(CONTRACT_ADDRESS, 'liquidateOnchainLB', BOB_ADDRESS, 0),
+                Action(CONTRACT_ADDRESS, 'liquidateOnchainLB', CLARE_ADDRESS, 0),
+            ],
+        )
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(), POSITIONS[:1], ALICE_ADDRESS, onchain=True),
+            [Action(CONTRACT_ADDRESS, 'liquidateOnchainLB', BOB_ADDRESS, 0)],
+        )
+        # only the administrator can liquidate onchain
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, get_market(), POSITIONS[1:], BOB_ADDRESS, onchain=True),
+            [Action(CONTRACT_ADDRESS, 'liquidateLB', CLARE_ADDRESS, 2_200)],
+        )
+        market = get_market(parameters={'onchain_liquidation_available': False})
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, market, POSITIONS[:1], ALICE_ADDRESS, onchain=True),
+            [Action(CONTRACT_ADDRESS, 'liquidateLB', BOB_ADDRESS, 1_100)],
+        )
+
+    def test_onchain_sale_proceeds(self):
+        # removeLiquidity withdraws 1_000 mutez and 200 tzBTC, the tzBTC is sold to the pool left
+        self.assertEqual(get_onchain_sale_proceeds(200, (1_000, 5_000, 1_000), None), 1_000 + 798)
+        self.assertEqual(get_onchain_sale_proceeds(200, (1_000, 5_000, 1_000), (10 ** 6, 3 * 10 ** 8)), 1_000 + 59_868)
+        # the BTC farm sells the xtz
+        self.assertEqual(get_onchain_sale_proceeds(200, (1_000, 5_000, 1_000), None, is_btc=True), 200 + 159)
+
+        # Bob's share 1_798 isn't under 120% of 1_000, the rest passes
+        self.assertEqual(filter_onchain_batch(POSITIONS[:2], (1_000, 10_000, 1_000), None, 120), POSITIONS[1:2])
+        self.assertEqual(filter_onchain_batch(POSITIONS[:1], (1_000, 10_000, 1_000), None, 120), [])
+
+    def test_tzbtc_dust(self):
+        dex_pool = (10 ** 6, 3 * 10 ** 8)
+        # tokenToXtz buys 44_903 mutez net burn
+        self.assertEqual(get_dust_min_xtz_bought(150, dex_pool, 1), 44_453)
+        self.assertEqual(get_dust_min_xtz_bought(150, dex_pool, 0.5), 44_678)
+
+        market = get_market(tzBTC_dust=150, settings={'tzBTC_dust_threshold': 100})
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, market, [], ALICE_ADDRESS, dex_pool=dex_pool),
+            [Action(CONTRACT_ADDRESS, 'sellTzBTCDust', 44_453, 0)],
+        )
+        # the dust isn't sold without a quote
+        self.assertEqual(plan_farm_actions(CONTRACT_ADDRESS, market, [], ALICE_ADDRESS), [])
+        # only the administrator sells the dust, a single call residual is left
+        self.assertEqual(plan_farm_actions(CONTRACT_ADDRESS, market, [], BOB_ADDRESS, dex_pool=dex_pool), [])
+        market = get_market(tzBTC_dust=100, settings={'tzBTC_dust_threshold': 100})
+        self.assertEqual(plan_farm_actions(CONTRACT_ADDRESS, market, [], ALICE_ADDRESS, dex_pool=dex_pool), [])
+
+    def test_lb_price_deviation(self):
+        market = get_market(
+            lb_price=FIXED_POINT_FACTOR, lb_price_update_dttm=900, settings={'lb_price_update_interval': 300},
+        )._replace(tzbtc_pool=1_060, lqt_total=1_000)
+        update_indexes = Action(CONTRACT_ADDRESS, 'updateIndexes', None, 0)
+        # the pool price is 6% off lb_price, the refresh goes before the liquidations
+        self.assertEqual(
+            plan_farm_actions(CONTRACT_ADDRESS, market, POSITIONS[:1], CLARE_ADDRESS, lb_price_deviation=5),
+            [update_indexes, Action(CONTRACT_ADDRESS, 'liquidateLB', BOB_ADDRESS, 1_100)],
+        )
+        self.assertEqual(plan_farm_actions(CONTRACT_ADDRESS, market, [], CLARE_ADDRESS, lb_price_deviation=10), [])
+        self.assertEqual(plan_farm_actions(CONTRACT_ADDRESS, market, [], CLARE_ADDRESS), [])
+        # liquidateLB refreshes lb_price after the interval
+        market = market._replace(now=1_500)
+        self.assertEqual(plan_farm_actions(CONTRACT_ADDRESS, market, [], CLARE_ADDRESS, lb_price_deviation=5), [])
+
+    def test_parse_farm(self):
+        self.assertEqual(parse_farm(f'{CONTRACT_ADDRESS}:100'), (CONTRACT_ADDRESS, 100, False))
+        self.assertEqual(parse_farm(f'{CONTRACT_ADDRESS}:100:btc'), (CONTRACT_ADDRESS, 100, True))
+
+
+class EstimateCacheTestCase(TestCase):
+    def test_update(self):
+        cache = EstimateCache()
+        self.assertIsNone(cache.get(transaction('updateIndexes')))
+
+        cache.update([transaction('updateIndexes', '5000', '100'), {'kind': 'reveal'}])
+        self.assertEqual(cache.get(transaction('updateIndexes')), (5000, 100))
+        self.assertIsNone(cache.get(transaction('liquidateLB')))
+
+        cache.update([transaction('updateIndexes', '6000', '0')])
+        self.assertEqual(cache.get(transaction('updateIndexes')), (6000, 0))
+
+    def test_apply_without_estimate(self):
+        class Group:
+            contents = [transaction('updateIndexes'), transaction('liquidateLB')]
+
+        cache = EstimateCache()
+        cache.update([transaction('updateIndexes', '5000', '100')])
+        self.assertIsNone(cache.apply(Group()))
@@ -0,0 +1,406 @@
+import random
+from copy import deepcopy
+from unittest import TestCase
+
+from kordfi.model import BTCFarmModel, ContractError, FarmModel
+from .constants import ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS, CONTRACT_ADDRESS
+from .unit.constants import BTC_DEFAULT_STORAGE, DEFAULT_STORAGE, INITIAL_INDEX_VALUE
+
+
+def random_storages(count, seed=0, btc_version=False):
+    """
+        Farm storages with indexes, totals and liquidity book entries in the contract ranges.
+    """
+    rnd = random.Random(seed)
+    for _ in range(count):
+        storage = deepcopy(BTC_DEFAULT_STORAGE if btc_version else DEFAULT_STORAGE)
+        storage['index_update_dttm'] = rnd.randint(0, 10 ** 6)
+        storage['lb_price_update_dttm'] = storage['index_update_dttm']
+        storage['gross_credit_index'] = rnd.randint(INITIAL_INDEX_VALUE, 2 * INITIAL_INDEX_VALUE)
+        storage['net_credit_index'] = rnd.randint(INITIAL_INDEX_VALUE, storage['gross_credit_index'])
+        storage['deposit_index'] = rnd.randint(INITIAL_INDEX_VALUE, storage['net_credit_index'])
+        storage['lb_price'] = rnd.randint(10 ** 9, 10 ** 13)
+        storage['is_working'] = rnd.random() < 0.9
+
+        storage['totalSupply'] = rnd.randint(10 ** 15, 10 ** 20)
+        liquidity_book = {}
+        for address in (ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS):
+            gross_credit = rnd.randint(0, storage['totalSupply'] // 4)
+            liquidity_book[address] = {
+                'gross_credit': gross_credit,
+                'net_credit': gross_credit * storage['gross_credit_index'] // storage['net_credit_index'],
+                'lb_shares': rnd.randint(1, 10 ** 8),
+            }
+        storage['liquidity_book'] = liquidity_book
+        storage['total_gross_credit'] = sum(entry['gross_credit'] for entry in liquidity_book.values())
+        storage['total_net_credit'] = sum(entry['net_credit'] for entry in liquidity_book.values())
+        storage['lb_shares'] = sum(entry['lb_shares'] for entry in liquidity_book.values())
+        storage['ledger'] = {ALICE_ADDRESS: {'balance': storage['totalSupply'], 'approvals': {}}}
+        storage['local_params']['tzbtc_pool'] = rnd.randint(10 ** 3, 10 ** 11)
+        storage['local_params']['lqt_total'] = rnd.randint(10 ** 3, 10 ** 9)
+        if btc_version:
+            storage['tzBTC_shares'] = rnd.randint(10 ** 3, 10 ** 10)
+        yield storage
+
+
+class RatesModelTestCase(TestCase):
+    def test_update_rates(self):
+        # see UpdateIndexesEntryUnitTest.test_rate
+        for percent, gross_credit_delta, net_credit_delta, deposit_delta in [(0, 0, 0, 0), (50, 1888, 1699, 628), (120, 12857, 11571, 10413)]:
+            storage = deepcopy(DEFAULT_STORAGE)
+            storage.update(totalSupply=100, total_net_credit=percent * 3 // 4, total_gross_credit=percent)
+            model = FarmModel(storage)
+            model.update_rates(1, 2_000, 3_000_000)
+            self.assertEqual(storage['gross_credit_index'] - INITIAL_INDEX_VALUE, gross_credit_delta)
+            self.assertEqual(storage['net_credit_index'] - INITIAL_INDEX_VALUE, net_credit_delta)
+            self.assertEqual(storage['deposit_index'] - INITIAL_INDEX_VALUE, deposit_delta)
+            self.assertEqual(storage['index_update_dttm'], 1)
+
+        # indexes are updated once per block
+        model.update_rates(1, 2_000, 3_000_000)
+        self.assertEqual(storage['gross_credit_index'] - INITIAL_INDEX_VALUE, 12857)
+        with self.assertRaises(ContractError):
+            model.update_rates(0, 2_000, 3_000_000)
+
+    def test_calculate_lb_price(self):
+        # see CalculateLbPriceUnitTest.test_max_one_day_change
+        for lb_price, expected in [(1_000_000_000_000, 500_003_200_000), (1_000, 1_499)]:
+            storage = deepcopy(DEFAULT_STORAGE)
+            storage['lb_price'] = lb_price
+            storage['local_params'].update(tzbtc_pool=2_000, lqt_total=3_000_000)
+            FarmModel(storage).calculate_lb_price(86400)
+            self.assertEqual(storage['lb_price'], expected)
+            self.assertEqual(storage['index_update_dttm'], 86400)
+
+    def test_lb_price_update_interval(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['settings']['lb_price_update_interval'] = 300
+        model = FarmModel(storage)
+
+        # skipped refresh in the interval, see SetLbPriceUpdateIntervalEntryUnitTest.test_throttled_refresh
+        model.update_rates(299, 2_000, 3_000_000)
+        self.assertEqual(storage['index_update_dttm'], 299)
+        self.assertEqual(storage['lb_price_update_dttm'], 0)
+        self.assertEqual(storage['lb_price'], 1_000_000_000_000)
+
+        # the clamp counts the time since the last refresh
+        model.update_rates(300, 2_000, 3_000_000)
+        self.assertEqual(storage['lb_price_update_dttm'], 300)
+        self.assertEqual(storage['lb_price'], 1_000_000_000_000 - 5_787_000 * 300)
+
+        # updateIndexes refreshes in the interval, once per block
+        model.update_indexes(330, 2_000, 3_000_000)
+        self.assertEqual(storage['index_update_dttm'], 330)
+        self.assertEqual(storage['lb_price_update_dttm'], 330)
+        lb_price = storage['lb_price']
+        model.update_indexes(330, 2_000, 3_000_000)
+        self.assertEqual(storage['lb_price'], lb_price)
+
+    def test_router_update_lb_price(self):
+        # see UpdateLbPriceEntryUnitTest.test_basic
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['lb_price'] = 1_000_000_000
+        model = FarmModel(storage)
+        with self.assertRaises(ContractError):
+            model.router_update_lb_price(CONTRACT_ADDRESS, 86400, 2_000, 3_000_000)
+
+        storage['settings']['router_address'] = CONTRACT_ADDRESS
+        model.router_update_lb_price(CONTRACT_ADDRESS, 86400, 2_000, 3_000_000)
+        self.assertEqual(storage['lb_price'], 666_666_666)
+        self.assertEqual(storage['index_update_dttm'], 86400)
+        self.assertEqual(storage['lb_price_update_dttm'], 86400)
+
+        # once per block
+        model.router_update_lb_price(CONTRACT_ADDRESS, 86400, 1_000, 3_000_000)
+        self.assertEqual(storage['lb_price'], 666_666_666)
+
+
+class XTZModelTestCase(TestCase):
+    def test_invest_lb_finalize(self):
+        # see InvestLBFinalizeEntryUnitTest.test_basic
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage.update(
+            totalSupply=10_000_000_000_000,
+            gross_credit_index=5_000_000_000_000,
+            net_credit_index=4_000_000_000_000,
+            deposit_index=2_000_000_000_000,
+        )
+        storage['local_params'].update(fa_lb_callback_status=True, invest_address=BOB_ADDRESS, invest_initial_balance=4 * 10 ** 6)
+        model = FarmModel(storage)
+        model.invest_lb_finalize(300, 10 ** 6)
+
+        self.assertFalse(storage['local_params']['fa_lb_callback_status'])
+        self.assertEqual(storage['total_net_credit'], 750_000_000_000)
+        self.assertEqual(storage['total_gross_credit'], 600_000_000_000)
+        self.assertEqual(storage['lb_shares'], 300)
+        self.assertEqual(storage['liquidity_book'], {
+            BOB_ADDRESS: {'net_credit': 750_000_000_000, 'gross_credit': 600_000_000_000, 'lb_shares': 300},
+        })
+        with self.assertRaisesRegex(ContractError, 'Bad status.'):
+            model.invest_lb_finalize(300, 10 ** 6)
+
+    def test_invest_and_redeem(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['totalSupply'] = 10 ** 20
+        storage['settings']['upfront_commission'] = 0
+        model = FarmModel(storage)
+
+        self.assertEqual(model.invest_lb(BOB_ADDRESS, 100_000_000, 200_000_000, 100_000_000, 10 ** 9, 0, 1_000, 10 ** 6), 0)
+        self.assertEqual(storage['local_params']['invest_initial_balance'], 900_000_000)
+        model.sell_tzbtc()
+        # contract borrows 200 xtz for 1_000 LB shares
+        model.invest_lb_finalize(1_000, 700_000_000)
+        self.assertEqual(storage['liquidity_book'][BOB_ADDRESS]['gross_credit'], 200 * 10 ** 12)
+
+        # a year later
+        params = model.redeem_lb(BOB_ADDRESS, 500, 700_000_000, 365 * 24 * 3600, 1_000, 10 ** 6)
+        self.assertEqual(params, {'address': BOB_ADDRESS, 'lqt_burned': 500, 'initial_balance': 700_000_000})
+        self.assertEqual(storage['lb_shares'], 500)
+        model.sell_tzbtc()
+        payout = model.redeem_lb_finalize(**params, balance=900_000_000)
+        self.assertEqual(storage['liquidity_book'][BOB_ADDRESS]['gross_credit'], 100 * 10 ** 12)
+        self.assertEqual(payout, 200_000_000 - (100_000_000 * storage['gross_credit_index'] - 1) // INITIAL_INDEX_VALUE - 1)
+
+        with self.assertRaisesRegex(ContractError, 'leverage error'):
+            model.invest_lb(BOB_ADDRESS, 300_000_000, 200_000_000, 100_000_000, 10 ** 9, 365 * 24 * 3600, 1_000, 10 ** 6)
+
+    def test_liquidate_lb(self):
+        # see LiquidateNormalEntryTest, indexes are not changed in the same block
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage.update(
+            index_update_dttm=100,
+            deposit_index=1_500_000_000_000,
+            net_credit_index=1_600_000_000_000,
+            gross_credit_index=1_900_000_000_000,
+            total_gross_credit=1_220_000_000_000_000,
+            total_net_credit=1_360_000_000_000_000,
+            totalSupply=4_000_000_000_000_000,
+            lb_shares=410_000,
+            lb_price=1_000_000_000,
+            liquidity_book={
+                BOB_ADDRESS: {'net_credit': 1_100_000_000_000_000, 'gross_credit': 1_000_000_000_000_000, 'lb_shares': 100_000},
+                CLARE_ADDRESS: {'net_credit': 230_000_000_000_000, 'gross_credit': 200_000_000_000_000, 'lb_shares': 250_000},
+            },
+        )
+        model = FarmModel(storage)
+        params = model.liquidate_lb(BOB_ADDRESS, CLARE_ADDRESS, 418_000_000, 100, 1_000, 1_000_000)
+        self.assertEqual(model.liquidate_lb_finalize(**params, tzbtc_price=100_000_000_000_000, xtz_price=2_000_000), (19_000_000, 250_000))
+
+        self.assertEqual(storage['liquidity_book'][CLARE_ADDRESS], {'net_credit': 0, 'gross_credit': 0, 'lb_shares': 0})
+        self.assertEqual(storage['lb_shares'], 160_000)
+        self.assertEqual(storage['total_gross_credit'], 1_020_000_000_000_000)
+        self.assertEqual(storage['total_net_credit'], 1_130_000_000_000_000)
+        self.assertEqual(storage['deposit_index'], 1_504_750_000_000)
+
+        with self.assertRaisesRegex(ContractError, 'not loaned'):
+            model.liquidate_lb(BOB_ADDRESS, CLARE_ADDRESS, 418_000_000, 100, 1_000, 1_000_000)
+        with self.assertRaisesRegex(ContractError, 'liquidation is not allowed'):
+            model.liquidate_lb_finalize(BOB_ADDRESS, CLARE_ADDRESS, 10 ** 6, 100_000_000_000_000, 1)
+
+    def test_liquidate_onchain_lb_batch(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage.update(
+            totalSupply=13_700_000_000_000,
+            total_net_credit=20_000_000_000_000,
+            net_credit_index=2_000_000_000_000,
+            total_gross_credit=27_000_000_000_000,
+            gross_credit_index=3_000_000_000_000,
+            lb_shares=100,
+            liquidity_book={
+                BOB_ADDRESS: {'lb_shares': 10, 'net_credit': 4_500_000_000_000, 'gross_credit': 6_000_000_000_000},
+                CLARE_ADDRESS: {'lb_shares': 30, 'net_credit': 15_000_000_000_000, 'gross_credit': 20_000_000_000_000},
+            },
+        )
+        model = FarmModel(storage)
+        with self.assertRaisesRegex(ContractError, 'empty batch'):
+            model.liquidate_onchain_lb_batch(ALICE_ADDRESS, [], 10 ** 6, 0, 1_000, 10 ** 6)
+        params = model.liquidate_onchain_lb_batch(ALICE_ADDRESS, [BOB_ADDRESS, CLARE_ADDRESS, BOB_ADDRESS], 10 ** 6, 0, 1_000, 10 ** 6)
+        self.assertEqual(params, {'addresses': [CLARE_ADDRESS, BOB_ADDRESS], 'lb_shares': 40, 'initial_balance': 10 ** 6})
+        self.assertEqual(storage['lb_shares'], 60)
+
+        # Bob gets 19 tez for 18 tez of debt, Clare gets 57 tez for 60 tez of debt
+        model.sell_tzbtc()
+        self.assertEqual(model.liquidate_onchain_lb_batch_finalize(**params, balance=77 * 10 ** 6), 500_000)
+        self.assertEqual(storage['deposit_index'], 1_000_000_000_000 + 36_496_350_364 - 218_978_102_190)
+        self.assertEqual(storage['total_net_credit'], 500_000_000_000)
+        self.assertEqual(storage['total_gross_credit'], 1_000_000_000_000)
+        self.assertEqual(storage['liquidity_book'][CLARE_ADDRESS], {'lb_shares': 0, 'net_credit': 0, 'gross_credit': 0})
+
+        with self.assertRaisesRegex(ContractError, 'not loaned'):
+            model.liquidate_onchain_lb_batch(ALICE_ADDRESS, [BOB_ADDRESS], 10 ** 6, 0, 1_000, 10 ** 6)
+
+    def test_onchain_liquidation_batch_rest(self):
+        # Bob has no LB shares, the 2 tez of the sale go to the depositors with his 18 tez loss
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage.update(
+            totalSupply=137_000_000_000_000,
+            deposit_index=1_000_000_000_000,
+            total_net_credit=4_500_000_000_000,
+            net_credit_index=2_000_000_000_000,
+            total_gross_credit=6_000_000_000_000,
+            gross_credit_index=3_000_000_000_000,
+            liquidity_book={BOB_ADDRESS: {'lb_shares': 0, 'net_credit': 4_500_000_000_000, 'gross_credit': 6_000_000_000_000}},
+        )
+        model = FarmModel(storage)
+        self.assertEqual(model.add_onchain_liquidation_batch_supply([BOB_ADDRESS], 0, 2 * 10 ** 6), 0)
+        self.assertEqual(storage['deposit_index'], 1_000_000_000_000 + 14_598_540_145 - 131_386_861_314)
+        self.assertEqual(storage['total_net_credit'], 0)
+
+    def test_tzbtc_dust(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage.update(totalSupply=13_700_000_000_000, tzBTC_dust=50)
+        storage['settings']['tzBTC_dust_threshold'] = 100
+        local_params = storage['local_params']
+        # 100 tzBTC shares for an LB share
+        local_params.update(tzbtc_pool=1_000_000, lqt_total=10_000)
+        model = FarmModel(storage)
+
+        # a residual up to the threshold is kept and its value is credited to the farmer
+        local_params['fa_tzBTC_callback_status'] = True
+        self.assertEqual(model.sell_tzbtc(150), 0)
+        self.assertEqual(storage['tzBTC_dust'], 150)
+        self.assertEqual(local_params['tzBTC_dust_delta'], 100)
+        # 10 LB shares are removed for 300_000 mutez, 300 mutez for a tzBTC share, 299.4 less the tokenToXtz fee and burn
+        self.assertEqual(model.add_tzbtc_dust_credit(300_000, 10), 329_940)
+        self.assertEqual(local_params['tzBTC_dust_delta'], 0)
+
+        # a call without LB shares has no pool rate
+        local_params['tzBTC_dust_delta'] = 100
+        self.assertEqual(model.get_tzbtc_dust_value(300_000, 0), 0)
+        self.assertEqual(local_params['tzBTC_dust_delta'], 0)
+
+        # a larger residual is sold without the kept dust
+        local_params['fa_tzBTC_callback_status'] = True
+        self.assertEqual(model.sell_tzbtc(251), 101)
+        self.assertEqual(storage['tzBTC_dust'], 150)
+        self.assertEqual(local_params['tzBTC_dust_delta'], 0)
+
+        # the dust used by addLiquidity is charged to the investing farmer at the full rate
+        local_params['fa_tzBTC_callback_status'] = True
+        self.assertEqual(model.sell_tzbtc(120), 0)
+        self.assertEqual(storage['tzBTC_dust'], 120)
+        self.assertEqual(local_params['tzBTC_dust_delta'], -30)
+        local_params.update(
+            fa_lb_callback_status=True, invest_address=BOB_ADDRESS, invest_initial_balance=10 ** 6, invest_amount2Lqt=300_000,
+        )
+        self.assertEqual(model.invest_lb_finalize(10, 10 ** 6 - 10_000), 0)
+        self.assertEqual(storage['liquidity_book'][BOB_ADDRESS]['gross_credit'], 19_000 * 10 ** 6)
+        self.assertEqual(local_params['tzBTC_dust_delta'], 0)
+
+        # the kept residual above the spent xtz is sent to the farmer
+        local_params['tzBTC_dust_delta'] = 100
+        local_params['fa_lb_callback_status'] = True
+        self.assertEqual(model.invest_lb_finalize(20, 10 ** 6 - 10_000), 19_940)
+        self.assertEqual(storage['liquidity_book'][BOB_ADDRESS]['gross_credit'], 19_000 * 10 ** 6)
+
+        # the depositors paid for the dust, its xtz stays on the balance
+        with self.assertRaisesRegex(ContractError, 'Forbidden.'):
+            model.sell_tzbtc_dust(BOB_ADDRESS)
+        self.assertEqual(model.sell_tzbtc_dust(ALICE_ADDRESS), 120)
+        self.assertEqual(storage['tzBTC_dust'], 0)
+        self.assertEqual(storage['deposit_index'], INITIAL_INDEX_VALUE)
+        with self.assertRaisesRegex(ContractError, 'no tzBTC dust'):
+            model.sell_tzbtc_dust(ALICE_ADDRESS)
+
+    def test_flashloan(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['totalSupply'] = 10 ** 18
+        storage['parameters'][0]['flashloan_available'] = True
+        model = FarmModel(storage)
+        model.flashloan(10 ** 6, 0, 1_000, 10 ** 6)
+        self.assertEqual(storage['flashloan_amount'], 1_001_500)
+        self.assertEqual(storage['deposit_index'], INITIAL_INDEX_VALUE + 500)
+        with self.assertRaisesRegex(ContractError, 'loan error'):
+            model.flashloan_finalize()
+        model.flashloan_return(2 * 10 ** 6)
+        model.flashloan_finalize()
+
+
+class BTCModelTestCase(TestCase):
+    def test_liquidate_onchain_lb_finalize(self):
+        # see BTC LiquidateOnchainLBFinalizeEntryUnitTest.test_basic
+        storage = deepcopy(BTC_DEFAULT_STORAGE)
+        storage.update(
+            totalSupply=1_370_000_000_000_000,
+            total_net_credit=5_000_000_000_000,
+            net_credit_index=2_000_000_000_000,
+            total_gross_credit=7_000_000_000_000,
+            gross_credit_index=300_000_000_000_000,
+            lb_shares=100,
+            tzBTC_shares=2_000,
+            liquidity_book={BOB_ADDRESS: {'lb_shares': 10, 'net_credit': 4_500_000_000_000, 'gross_credit': 6_000_000_000_000}},
+        )
+        model = BTCFarmModel(storage)
+        self.assertEqual(model.liquidate_onchain_lb_finalize(BOB_ADDRESS, 100), 50)
+        self.assertEqual(storage['total_net_credit'], 500_000_000_000)
+        self.assertEqual(storage['total_gross_credit'], 1_000_000_000_000)
+        self.assertEqual(storage['tzBTC_shares'], 1_950)
+        self.assertEqual(storage['liquidity_book'][BOB_ADDRESS], {'lb_shares': 0, 'net_credit': 0, 'gross_credit': 0})
+
+    def test_liquidate_onchain_lb_batch_finalize(self):
+        # a batch of one farm settles as liquidateOnchainLBFinalize
+        storage = deepcopy(BTC_DEFAULT_STORAGE)
+        storage.update(
+            totalSupply=1_370_000_000_000_000,
+            total_net_credit=5_000_000_000_000,
+            net_credit_index=2_000_000_000_000,
+            total_gross_credit=7_000_000_000_000,
+            gross_credit_index=300_000_000_000_000,
+            lb_shares=100,
+            tzBTC_shares=2_000,
+            liquidity_book={BOB_ADDRESS: {'lb_shares': 10, 'net_credit': 4_500_000_000_000, 'gross_credit': 6_000_000_000_000}},
+        )
+        single_storage = deepcopy(storage)
+        model = BTCFarmModel(storage)
+        self.assertEqual(model.liquidate_onchain_lb_batch_finalize([BOB_ADDRESS], 10, 100), 50)
+        BTCFarmModel(single_storage).liquidate_onchain_lb_finalize(BOB_ADDRESS, 100)
+        self.assertEqual(storage, single_storage)
+
+    def test_invest_and_redeem(self):
+        storage = deepcopy(BTC_DEFAULT_STORAGE)
+        storage.update(totalSupply=10 ** 20, tzBTC_shares=10_000)
+        storage['settings']['upfront_commission'] = 0
+        model = BTCFarmModel(storage)
+
+        upfront_commission, params = model.invest_lb(BOB_ADDRESS, 0, 100_000_000, 0, 100_000_000, 0, 1_000, 10 ** 6)
+        self.assertEqual(upfront_commission, 0)
+        # 100 tzBTC shares are borrowed for 1_000 LB shares
+        model.update_lb_callback(1_000)
+        model.update_tzbtc_callback(9_900)
+        model.invest_lb_finalize(**params)
+        self.assertEqual(storage['liquidity_book'][BOB_ADDRESS], {'lb_shares': 1_000, 'net_credit': 100 * 10 ** 12, 'gross_credit': 100 * 10 ** 12})
+
+        params = model.redeem_lb(BOB_ADDRESS, 1_000, 0, 1_000, 10 ** 6)
+        model.update_tzbtc_callback(10_030)
+        self.assertEqual(model.redeem_lb_finalize(**params), 30)
+        self.assertEqual(storage['tzBTC_shares'], 10_000)
+        self.assertEqual(storage['total_gross_credit'], 0)
+
+        params = model.redeem_lb(BOB_ADDRESS, 0, 0, 1_000, 10 ** 6)
+        self.assertEqual(params['initial_tzBTC_shares'], 10_000)
+
+    def test_lending(self):
+        storage = deepcopy(BTC_DEFAULT_STORAGE)
+        model = BTCFarmModel(storage)
+        model.deposit_lending(BOB_ADDRESS, 1_000, 0, 1_000, 10 ** 6)
+        self.assertEqual(storage['ledger'][BOB_ADDRESS]['balance'], 1_000 * 10 ** 12)
+        self.assertEqual(storage['tzBTC_shares'], 1_000)
+        with self.assertRaisesRegex(ContractError, 'too much amount'):
+            model.redeem_lending(BOB_ADDRESS, 1_001, 0, 1_000, 10 ** 6)
+        model.redeem_lending(BOB_ADDRESS, 1_000, 0, 1_000, 10 ** 6)
+        self.assertEqual(storage['totalSupply'], 0)
+        self.assertEqual(storage['tzBTC_shares'], 0)
+
+
+class RandomModelTestCase(TestCase):
+    def test_redeem_keeps_inequation(self):
+        # redeeming any part of the positions keeps the total deposit not less than net credit
+        for btc_version in (False, True):
+            for storage in random_storages(100, btc_version=btc_version):
+                model = (BTCFarmModel if btc_version else FarmModel)(storage)
+                for address, entry in list(storage['liquidity_book'].items()):
+                    model.partial_reset_liquidity_entry(address, entry['lb_shares'] // 2)
+                    model.reset_liquidity_entry(address)
+                self.assertEqual(storage['total_gross_credit'], 0)
+                self.assertEqual(storage['total_net_credit'], 0)
+                model.check_total_supply_net_credit_inequation()
@@ -0,0 +1,87 @@
+import random
+from unittest import TestCase
+
+from kordfi import quote
+from . import tzbtc_invest_params, xtz_invest_params
+from .xtz_invest_params import Contract
+
+
+POOLS = [
+    (1_000, 1_000_000_000, 1_000_000),
+    (27_944_134_536, 4_398_189_886_967, 271_360_616),
+    (30_038_448_280, 4_613_771_061_436, 284_626_110),
+]
+
+
+def random_pools(count, seed=0):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        tokenPool = rnd.randint(100, 10 ** 11)
+        xtzPool = rnd.randint(10 ** 6, 10 ** 13)
+        yield tokenPool, xtzPool, rnd.randint(1, 10 ** 9), rnd.randint(0, xtzPool // 10)
+
+
+class DexTestCase(TestCase):
+    def test_dex_results(self):
+        for tokenPool, xtzPool, lqtTotal, amount in random_pools(200):
+            contract = Contract(tokenPool, xtzPool, lqtTotal)
+            tokens = contract.xtz_to_token_result(amount)
+            self.assertEqual(quote.xtz_to_token(tokenPool, xtzPool, amount), (tokens, contract.tokenPool, contract.xtzPool))
+
+            contract = Contract(tokenPool, xtzPool, lqtTotal)
+            xtz = contract.token_to_xtz_result(amount % tokenPool)
+            self.assertEqual(quote.token_to_xtz(tokenPool, xtzPool, amount % tokenPool), (xtz, contract.tokenPool, contract.xtzPool))
+
+            contract = Contract(tokenPool, xtzPool, lqtTotal)
+            deposited = contract.add_liquidity_result(amount)
+            self.assertEqual(quote.add_liquidity(tokenPool, xtzPool, lqtTotal, amount), (deposited, contract.lqtTotal - lqtTotal))
+
+    def test_required_tokens(self):
+        for tokenPool, xtzPool, lqtTotal, amount in random_pools(200):
+            self.assertEqual(
+                quote.get_required_tokens(tokenPool, xtzPool, amount),
+                tzbtc_invest_params.calculate_required_tzbtc(Contract(tokenPool, xtzPool, lqtTotal), amount),
+            )
+
+
+class XTZQuoteTestCase(TestCase):
+    def test_invest_params(self):
+        self.assertEqual(
+            quote.get_invest_params(1_000, 1_000_000_000, 1_000_000, 500_000_000)[::2],
+            (225_541_275, 272_958_952),
+        )
+        for tokenPool, xtzPool, lqtTotal, amount in random_pools(300):
+            self.assertEqual(
+                quote.get_invest_params(tokenPool, xtzPool, lqtTotal, amount),
+                xtz_invest_params.get_invest_params(tokenPool, xtzPool, lqtTotal, amount),
+            )
+
+    def test_client_invest_params(self):
+        for pool in POOLS:
+            for xtz_invest in (1, 10 ** 6, 123_456_789, 10 ** 10):
+                for leverage in (1, 2, 3):
+                    self.assertEqual(
+                        quote.get_client_invest_params(*pool, xtz_invest, leverage, 5),
+                        xtz_invest_params.get_client_invest_params(*pool, xtz_invest, leverage, 5),
+                    )
+
+
+class TzBTCQuoteTestCase(TestCase):
+    def test_invest_params(self):
+        rnd = random.Random(1)
+        for tokenPool, xtzPool, lqtTotal, amount in random_pools(100):
+            tzbtc_loan = rnd.randint(0, tokenPool // 10)
+            self.assertEqual(
+                quote.get_tzbtc_invest_params(tokenPool, xtzPool, lqtTotal, amount, tzbtc_loan, 5),
+                tzbtc_invest_params.get_invest_params(tokenPool, xtzPool, lqtTotal, amount, tzbtc_loan, 5),
+            )
+
+    def test_client_invest_params(self):
+        # the tiny sandbox pool can't convert tzBTC at leverage > 1
+        for pool in POOLS[1:]:
+            for xtz_invest in (10 ** 6, 123_456_789):
+                for leverage in (1, 2, 3):
+                    self.assertEqual(
+                        quote.get_tzbtc_client_invest_params(*pool, xtz_invest, leverage, 5),
+                        tzbtc_invest_params.get_client_invest_params(*pool, xtz_invest, leverage, 5),
+                    )
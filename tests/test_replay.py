@@ -0,0 +1,93 @@
+import json
+import os
+from copy import deepcopy
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from kordfi.replay import ModelBackend, Replay
+from .constants import ALICE_ADDRESS, BOB_ADDRESS
+from .unit.constants import DEFAULT_STORAGE
+
+
+def get_records(count):
+    records = [{'entrypoint': 'depositLending', 'sender': ALICE_ADDRESS, 'amount': 10 ** 10}]
+    balance = 10 ** 10
+    for index in range(count):
+        records.append({
+            'entrypoint': 'investLB', 'sender': BOB_ADDRESS, 'amount2tzBTC': 0, 'amount2Lqt': 20_000_000,
+            'amount': 10_000_000, 'balance': balance + 10_000_000, 'lb_shares': 1_000 * (index + 1),
+            'final_balance': balance - 10_000_000,
+        })
+        balance -= 10_000_000
+        records.append({'entrypoint': 'updateIndexes', 'sender': ALICE_ADDRESS})
+        # the sender has no deposit
+        records.append({'entrypoint': 'redeemLending', 'sender': BOB_ADDRESS, 'amount': 1, 'balance': balance})
+    for index, record in enumerate(records):
+        record.update(now=index * 60, level=index, tzbtc_pool=10 ** 9, lqt_total=10 ** 8)
+    return records
+
+
+class ReplayTestCase(TestCase):
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.input_path = os.path.join(directory.name, 'calls.jsonl')
+        self.metrics_path = os.path.join(directory.name, 'metrics.jsonl')
+        self.checkpoint_path = os.path.join(directory.name, 'replay.checkpoint')
+        self.records = get_records(10)
+        with open(self.input_path, 'w') as f:
+            for record in self.records:
+                f.write(json.dumps(record) + '\n')
+
+    def read_metrics(self):
+        with open(self.metrics_path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_replay(self):
+        replay = Replay(ModelBackend(deepcopy(DEFAULT_STORAGE)), self.input_path, self.metrics_path)
+        summary = replay.run()
+        self.assertEqual(summary['records'], 31)
+        self.assertEqual(summary['calls'], {'depositLending': 1, 'investLB': 10, 'updateIndexes': 10, 'redeemLending': 10})
+        self.assertEqual(summary['failures'], {'redeemLending': 10})
+
+        self.assertEqual(replay.backend.storage['liquidity_book'][BOB_ADDRESS]['lb_shares'], 10_000)
+        self.assertNotIn(BOB_ADDRESS, replay.backend.storage['ledger'])
+
+        metrics = self.read_metrics()
+        self.assertEqual(len(metrics), 31)
+        self.assertEqual(metrics[1]['entrypoint'], 'investLB')
+        self.assertIsNone(metrics[1]['error'])
+        self.assertEqual(metrics[3]['error'], 'Unknown Address.')
+        self.assertGreater(metrics[-1]['utilization'], 0)
+        self.assertGreater(metrics[-1]['gross_credit_index'], metrics[1]['gross_credit_index'])
+
+    def test_failed_call_keeps_storage(self):
+        backend = ModelBackend(deepcopy(DEFAULT_STORAGE))
+        replay = Replay(backend, self.input_path)
+        replay.run(limit=3)
+        storage = deepcopy(backend.storage)
+        replay.run(limit=1)
+        self.assertEqual(replay.failures, {'redeemLending': 1})
+        self.assertEqual(backend.storage, storage)
+
+    def test_resume(self):
+        replay = Replay(ModelBackend(deepcopy(DEFAULT_STORAGE)), self.input_path, self.metrics_path)
+        expected = replay.run()
+        expected_storage = replay.backend.storage
+        expected_metrics = self.read_metrics()
+        os.remove(self.metrics_path)
+
+        first = Replay(
+            ModelBackend(deepcopy(DEFAULT_STORAGE)), self.input_path, self.metrics_path,
+            self.checkpoint_path, checkpoint_interval=4,
+        )
+        first.run(limit=13)
+        # lines after the last checkpoint are written again on resume
+        with open(self.metrics_path, 'a') as f:
+            f.write('{}\n')
+
+        second = Replay(ModelBackend({}), self.input_path, self.metrics_path, self.checkpoint_path)
+        self.assertEqual(second.records, 13)
+        self.assertEqual(second.run(), expected)
+        self.assertEqual(second.backend.storage, expected_storage)
+        self.assertEqual(self.read_metrics(), expected_metrics)
@@ -0,0 +1,126 @@
+from unittest import TestCase
+
+from pytezos import ContractInterface
+
+from kordfi.farm import FIXED_POINT_FACTOR, get_debt, get_gross_credit_rate, project_indexes, project_lb_price
+from kordfi.scanner import LiquidityBook, Market, iter_lazy_storage_diffs, rank_positions
+from .constants import ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS
+
+
+# compiled farm contract subset with liquidity_book
+CONTRACT = '''
+parameter unit;
+storage (pair (big_map %liquidity_book address (pair (nat %gross_credit) (pair (nat %lb_shares) (nat %net_credit))))
+              (nat %lb_price));
+code { CDR; NIL operation; PAIR };
+'''
+
+
+def get_storage(**kwargs):
+    return {
+        'totalSupply': 1_000 * 10 ** 12,
+        'deposit_index': FIXED_POINT_FACTOR,
+        'total_gross_credit': 850 * 10 ** 12,
+        'gross_credit_index': FIXED_POINT_FACTOR,
+        'total_net_credit': 850 * 10 ** 12,
+        'net_credit_index': FIXED_POINT_FACTOR,
+        'rate_params': {
+            'rate_1': 3022,
+            'rate_diff': 12857 - 3022,
+            'threshold_percent_1': 80,
+            'threshold_percent_2': 90,
+        },
+        'is_working': True,
+        'index_update_dttm': 1_000,
+        'lb_price': FIXED_POINT_FACTOR,
+        'lb_price_update_dttm': 1_000,
+        'settings': {
+            'lb_price_change_rate': 5_787_000,
+            'lb_price_update_interval': 0,
+        },
+        'parameters': {0: {'liquidation_percent': 120}},
+        **kwargs,
+    }
+
+
+def update(key, value=None):
+    result = {'key_hash': 'expr', 'key': {'string': key}}
+    if value is not None:
+        result['value'] = {'prim': 'Pair', 'args': [{'int': str(v)} for v in value]}
+    return result
+
+
+class FarmMathTestCase(TestCase):
+    def test_gross_credit_rate(self):
+        self.assertEqual(get_gross_credit_rate(get_storage(total_gross_credit=0)), 0)
+        self.assertEqual(get_gross_credit_rate(get_storage(total_gross_credit=400 * 10 ** 12)), 1511)
+        self.assertEqual(get_gross_credit_rate(get_storage()), 3022)
+        self.assertEqual(get_gross_credit_rate(get_storage(total_gross_credit=950 * 10 ** 12)), 3022 + 9835 // 2)
+        self.assertEqual(get_gross_credit_rate(get_storage(total_gross_credit=2_000 * 10 ** 12)), 12857)
+
+    def test_project_indexes(self):
+        storage = get_storage()
+        self.assertEqual(project_indexes(storage, 1_000)['gross_credit_index'], FIXED_POINT_FACTOR)
+        self.assertEqual(project_indexes(storage, 1_100), {
+            'gross_credit_index': FIXED_POINT_FACTOR + 302_200,
+            'net_credit_index': FIXED_POINT_FACTOR + 271_900,
+            'deposit_index': FIXED_POINT_FACTOR + 231_100,
+        })
+        self.assertEqual(project_indexes(get_storage(is_working=False), 1_100)['net_credit_index'], FIXED_POINT_FACTOR)
+
+    def test_project_lb_price(self):
+        storage = get_storage()
+        self.assertEqual(project_lb_price(storage, 3 * 10 ** 6, 2 * 10 ** 6, 1_000), FIXED_POINT_FACTOR)
+        self.assertEqual(project_lb_price(storage, 3 * 10 ** 6, 2 * 10 ** 6, 1_100), FIXED_POINT_FACTOR + 578_700_000)
+        self.assertEqual(project_lb_price(storage, 10 ** 6, 2 * 10 ** 6, 1_100), FIXED_POINT_FACTOR - 578_700_000)
+        self.assertEqual(project_lb_price(storage, 10_005, 10_000, 1_100), 1_000_500_000_000)
+
+    def test_debt(self):
+        self.assertEqual(get_debt(10 ** 12, FIXED_POINT_FACTOR), 10 ** 6)
+        self.assertEqual(get_debt(10 ** 12 + 1, FIXED_POINT_FACTOR), 10 ** 6 + 1)
+        self.assertEqual(get_debt(10 ** 12, FIXED_POINT_FACTOR + 1), 10 ** 6 + 1)
+        self.assertEqual(get_debt(10 ** 12, FIXED_POINT_FACTOR, is_btc=True), 1)
+
+
+class LiquidityBookTestCase(TestCase):
+    def setUp(self):
+        self.book = LiquidityBook(ContractInterface.from_michelson(CONTRACT), 7)
+
+    def test_apply_diffs(self):
+        operation = {'contents': [{'metadata': {
+            'operation_result': {'status': 'applied', 'lazy_storage_diff': [
+                {'kind': 'big_map', 'id': '7', 'diff': {'action': 'update', 'updates': [update(ALICE_ADDRESS, (1, 2, 3))]}},
+                {'kind': 'big_map', 'id': '8', 'diff': {'action': 'update', 'updates': [update(BOB_ADDRESS, (1, 2, 3))]}},
+            ]},
+            'internal_operation_results': [
+                {'result': {'status': 'applied', 'lazy_storage_diff': [
+                    {'kind': 'big_map', 'id': '7', 'diff': {'action': 'update', 'updates': [update(CLARE_ADDRESS, (4, 5, 6))]}},
+                ]}},
+                {'result': {'status': 'backtracked', 'lazy_storage_diff': [
+                    {'kind': 'big_map', 'id': '7', 'diff': {'action': 'update', 'updates': [update(BOB_ADDRESS, (4, 5, 6))]}},
+                ]}},
+            ],
+        }}]}
+        for diff in iter_lazy_storage_diffs(operation):
+            self.book.apply_diff(diff)
+        self.assertEqual(self.book.entries, {
+            ALICE_ADDRESS: {'gross_credit': 1, 'lb_shares': 2, 'net_credit': 3},
+            CLARE_ADDRESS: {'gross_credit': 4, 'lb_shares': 5, 'net_credit': 6},
+        })
+
+        self.book.apply_diff({'kind': 'big_map', 'id': '7', 'diff': {'action': 'update', 'updates': [update(ALICE_ADDRESS)]}})
+        self.assertEqual(list(self.book.entries), [CLARE_ADDRESS])
+
+    def test_rank_positions(self):
+        entries = {
+            ALICE_ADDRESS: {'gross_credit': 10 ** 12, 'lb_shares': 100, 'net_credit': 10 ** 12},
+            BOB_ADDRESS: {'gross_credit': 10 ** 12, 'lb_shares': 80, 'net_credit': 10 ** 12},
+            CLARE_ADDRESS: {'gross_credit': 0, 'lb_shares': 100, 'net_credit': 0},
+        }
+        # lb share is 2 * 50 sat, 1 xtz is 10^-4 BTC
+        market = Market(get_storage(), 0, 0, 50 * 10 ** 8, 10 ** 4, 1_000)
+        positions = rank_positions(entries, market)
+        self.assertEqual([position.address for position in positions], [BOB_ADDRESS, ALICE_ADDRESS])
+        self.assertEqual([position.collateral_ratio for position in positions], [80, 100])
+        self.assertEqual([position.is_liquidatable for position in positions], [True, True])
+        self.assertEqual(positions[0].debt, 10 ** 6)
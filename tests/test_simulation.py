@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+from kordfi.farm import FIXED_POINT_FACTOR
+from kordfi.simulation import (
+    DEFAULT_POOL, DEFAULT_PRICES, PathSimulation, Scenario, SimulationConfig,
+    arbitrage, get_initial_storage, get_lb_shares_sale, random_positions, run_simulation,
+)
+
+
+def get_config(is_btc=False, positions=20, scenario=Scenario(steps=30), **params):
+    max_collateral = 10 ** 6 if is_btc else 10 ** 9
+    positions = random_positions(positions, max_collateral, 40)
+    return SimulationConfig(
+        storage=get_initial_storage(is_btc, **params),
+        is_btc=is_btc,
+        pool=DEFAULT_POOL,
+        prices=DEFAULT_PRICES,
+        deposits=3 * max_collateral * len(positions),
+        positions=positions,
+        scenario=scenario,
+    )
+
+
+class SimulationTestCase(TestCase):
+    def test_initial_storage(self):
+        storage = get_initial_storage(rate_params={'rate_1': 1_000}, parameters={'liquidation_percent': 130})
+        self.assertEqual(storage['rate_params']['rate_1'], 1_000)
+        self.assertEqual(storage['rate_params']['threshold_percent_2'], 90)
+        self.assertEqual(storage['parameters'][0]['liquidation_percent'], 130)
+        self.assertNotIn('tzBTC_shares', storage)
+        self.assertEqual(get_initial_storage(is_btc=True)['tzBTC_shares'], 0)
+
+    def test_arbitrage(self):
+        tzbtc_price, xtz_price = DEFAULT_PRICES
+        tokenPool, xtzPool = arbitrage(*DEFAULT_POOL[:2], tzbtc_price, xtz_price)
+        self.assertAlmostEqual(xtzPool / tokenPool, tzbtc_price / (100 * xtz_price), places=6)
+        self.assertLessEqual(tokenPool * xtzPool, DEFAULT_POOL[0] * DEFAULT_POOL[1])
+
+    def test_lb_shares_sale(self):
+        value, pool = get_lb_shares_sale(1_000_000, DEFAULT_POOL, is_btc=False)
+        self.assertEqual(pool[2], DEFAULT_POOL[2] - 1_000_000)
+        self.assertLess(value, 2 * 1_000_000 * DEFAULT_POOL[1] // DEFAULT_POOL[2])
+        btc_value, _ = get_lb_shares_sale(1_000_000, DEFAULT_POOL, is_btc=True)
+        self.assertLess(btc_value, 2 * 1_000_000 * DEFAULT_POOL[0] // DEFAULT_POOL[2])
+
+    def test_open_positions(self):
+        for is_btc in (False, True):
+            simulation = PathSimulation(get_config(is_btc), seed=0)
+            simulation.open_positions()
+            storage = simulation.storage
+            self.assertEqual(len(storage['liquidity_book']), 20)
+            self.assertEqual(storage['lb_shares'], sum(entry['lb_shares'] for entry in storage['liquidity_book'].values()))
+            self.assertEqual(storage['lb_price'], simulation.pool[0] * FIXED_POINT_FACTOR // simulation.pool[2])
+            self.assertGreater(simulation.get_utilization(), 0)
+
+    def test_path_is_deterministic(self):
+        config = get_config()
+        self.assertEqual(PathSimulation(config, seed=3).run(), PathSimulation(config, seed=3).run())
+
+    def test_no_volatility(self):
+        result = PathSimulation(get_config(scenario=Scenario(steps=30, xtz_volatility=0, btc_volatility=0)), seed=0).run()
+        self.assertEqual(result.bad_debt, 0)
+        self.assertEqual(result.liquidations, 0)
+        self.assertGreater(result.deposit_apy, 0)
+
+    def test_stress(self):
+        scenario = Scenario(steps=52, step_seconds=7 * 24 * 3600, xtz_volatility=4, btc_volatility=0.1, correlation=0)
+        for is_btc in (False, True):
+            report = run_simulation(get_config(is_btc, scenario=scenario), paths=8, workers=1)
+            self.assertGreater(report.bad_debt_probability, 0)
+            self.assertGreater(report.onchain_liquidations, 0)
+
+    def test_onchain_liquidation_disabled(self):
+        scenario = Scenario(steps=52, step_seconds=7 * 24 * 3600, xtz_volatility=4, btc_volatility=0.1, correlation=0)
+        config = get_config(scenario=scenario, parameters={'onchain_liquidation_available': False})
+        report = run_simulation(config, paths=8, workers=1)
+        self.assertEqual(report.onchain_liquidations, 0)
+
+    def test_workers(self):
+        config = get_config(positions=5, scenario=Scenario(steps=10))
+        self.assertEqual(run_simulation(config, paths=6, workers=1), run_simulation(config, paths=6, workers=2))
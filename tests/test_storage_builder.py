@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+from os.path import join
+from unittest import TestCase
+
+from kordfi.storage import CONTRACT_TZ, STORAGE_TZ, build_storage, encode_storage, main
+from .constants import ALICE_ADDRESS, BOB_ADDRESS
+
+
+DEFAULT_ADDRESS = 'tz1VGzxpbAcP1CL5z8f8CZNGALFtMFCcakrX'
+DEX_ADDRESS = 'KT1TxqZ8QtKvLu3V3JH7Gx58n7Co8pgtpQU5'
+TZBTC_ADDRESS = 'KT1PWx2mnDueood7fEmfbBDKx1D9BAnnXitn'
+LQT_ADDRESS = 'KT1AafHA1C1vk959wvHWBispY9Y2f3fxBUUo'
+ORACLE_ADDRESS = 'KT1P8Ep9y8EsDSD9YkvakWnDvF2orDcpYXSq'
+
+# compiled farm contract subset with the same address fields
+CONTRACT = '''
+parameter unit;
+storage (pair (pair (address %administrator) (pair (timestamp %index_update_dttm) (timestamp %lb_price_update_dttm)))
+              (pair (pair (pair %local_params (address %invest_address) (nat %lqt_total))
+                          (big_map %parameters nat (pair (nat %liquidation_comm) (nat %liquidation_percent))))
+                    (pair %settings (pair (address %dex_contract_address) (address %fa_lb_address))
+                                    (pair (address %fa_tzBTC_address) (pair (address %liquidity_baking_address) (address %oracle_address))))));
+code { CDR; NIL operation; PAIR };
+'''
+STORAGE = f'''
+(Pair (Pair "{DEFAULT_ADDRESS}" (Pair "1970-01-01T00:00:00Z" "1970-01-01T00:00:00Z"))
+      (Pair (Pair (Pair "{DEFAULT_ADDRESS}" 0) {{ Elt 0 (Pair 50 120) }})
+            (Pair (Pair "{DEFAULT_ADDRESS}" "{DEFAULT_ADDRESS}")
+                  (Pair "{DEFAULT_ADDRESS}" (Pair "{DEFAULT_ADDRESS}" "{ORACLE_ADDRESS}")))))
+'''
+
+
+class StorageBuilderTestCase(TestCase):
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+        os.makedirs(join(self.out_dir, 'contract'))
+        with open(join(self.out_dir, CONTRACT_TZ), 'w') as f:
+            f.write(CONTRACT)
+        with open(join(self.out_dir, STORAGE_TZ), 'w') as f:
+            f.write(STORAGE)
+        self.addresses = {
+            'administrator': ALICE_ADDRESS,
+            'liquidity_baking_address': DEX_ADDRESS,
+            'fa_tzBTC_address': TZBTC_ADDRESS,
+            'fa_lb_address': LQT_ADDRESS,
+            'oracle_address': ORACLE_ADDRESS,
+        }
+
+    def test_build_storage(self):
+        storage = build_storage(self.out_dir, **self.addresses, now=100, params={
+            'parameters': {'liquidation_percent': 130},
+            'local_params': {'lqt_total': 5},
+        })
+        self.assertEqual(storage, {
+            'administrator': ALICE_ADDRESS,
+            'index_update_dttm': 100,
+            'lb_price_update_dttm': 100,
+            'local_params': {'invest_address': ALICE_ADDRESS, 'lqt_total': 5},
+            'parameters': {0: {'liquidation_comm': 50, 'liquidation_percent': 130}},
+            'settings': {
+                'liquidity_baking_address': DEX_ADDRESS,
+                'dex_contract_address': DEX_ADDRESS,
+                'fa_tzBTC_address': TZBTC_ADDRESS,
+                'fa_lb_address': LQT_ADDRESS,
+                'oracle_address': ORACLE_ADDRESS,
+            },
+        })
+
+        storage = build_storage(self.out_dir, **self.addresses, dex_contract_address=BOB_ADDRESS)
+        self.assertEqual(storage['settings']['dex_contract_address'], BOB_ADDRESS)
+        self.assertEqual(storage['settings']['liquidity_baking_address'], DEX_ADDRESS)
+
+    def test_unknown_params(self):
+        with self.assertRaises(ValueError):
+            build_storage(self.out_dir, **self.addresses, params={'liquidation_percent': 130})
+        with self.assertRaises(ValueError):
+            build_storage(self.out_dir, **self.addresses, params={'parameters': {'liquidation_percnt': 130}})
+
+    def test_cli(self):
+        stdout = StringIO()
+        with redirect_stdout(stdout):
+            main([
+                self.out_dir,
+                '--administrator', ALICE_ADDRESS,
+                '--liquidity-baking', DEX_ADDRESS,
+                '--tzbtc', TZBTC_ADDRESS,
+                '--lb-token', LQT_ADDRESS,
+                '--oracle', ORACLE_ADDRESS,
+                '--now', '100',
+                '--params', '{"parameters": {"liquidation_percent": 130}}',
+            ])
+        storage = build_storage(self.out_dir, **self.addresses, now=100, params={'parameters': {'liquidation_percent': 130}})
+        self.assertEqual(json.loads(stdout.getvalue()), encode_storage(self.out_dir, storage))
@@ -1,10 +1,16 @@
+from decimal import Decimal
+from math import ceil
 from os.path import dirname, join
 import subprocess
+from typing import Tuple
 from unittest import TestCase
 
 
 from contextlib import contextmanager
+from copy import deepcopy
+from unittest.mock import patch
 from pytezos import ContractInterface
+from pytezos.contract.call import ContractCall
 from pytezos.context.impl import ExecutionContext
 from pytezos.rpc import RpcNode, ShellQuery
 from pytezos.crypto.key import Key
@@ -13,13 +19,16 @@ from pytezos.crypto.encoding import base58_encode, base58_decode
 from pytezos.contract.result import ContractCallResult
 from pytezos.michelson.sections.storage import StorageSection
 from pytezos.operation.content import format_mutez, format_tez
+from pytezos.rpc.errors import MichelsonError
 
-from .contracts import get_xtz_compiled_filepath, get_btc_compiled_filepath, get_demo_lb_contracts
+from kordfi.model import BTCFarmModel, ContractError, FarmModel
+
+from .interpreter import interpret_code, use_interpreter
+from .contracts import get_xtz_compiled_filepath, get_btc_compiled_filepath, get_demo_lb_contracts, get_router_compiled_filepath
 from .constants import ALICE_KEY, ALICE_ADDRESS
 
 
-# This code was patched for 'now' parameter.
-def run_code_patched(
+def make_run_code_query(
     self,
     storage=None,
     source=None,
@@ -29,29 +38,20 @@ def run_code_patched(
     chain_id=None,
     gas_limit=None,
     now=None,
-) -> ContractCallResult:
-    """Execute using RPC interpreter.
-
-    :param storage: initial storage as Python object, leave None if you want to generate a dummy one
-    :param source: patch SOURCE
-    :param sender: patch SENDER
-    :param amount: patch AMOUNT
-    :param balance: patch BALANCE
-    :param chain_id: patch CHAIN_ID
-    :param gas_limit: restrict max consumed gas
-    :rtype: ContractCallResult
-    """
+) -> dict:
+    """Build the query accepted by run_code and trace_code RPC endpoints."""
     storage_ty = StorageSection.match(self.context.storage_expr)
     if storage is None:
         initial_storage = storage_ty.dummy(self.context).to_micheline_value(lazy_diff=True)
     else:
-        initial_storage = storage_ty.from_python_object(storage).to_micheline_value(lazy_diff=True)
+        # big_map ids are passed as is, e.g. of an originated farm, big_map literals as their items
+        initial_storage = storage_ty.from_python_object(storage).to_micheline_value(lazy_diff=None)
     script = [self.context.parameter_expr, self.context.storage_expr, self.context.code_expr]
 
     def skip_nones(**kwargs) -> dict:
         return {k: v for k, v in kwargs.items() if v is not None}
 
-    query = skip_nones(
+    return skip_nones(
         script=script,
         storage=initial_storage,
         entrypoint=self.parameters['entrypoint'],
@@ -64,10 +64,76 @@ def run_code_patched(
         gas=str(gas_limit) if gas_limit is not None else None,
         now=(str(now) if now is not None else None),
     )
+
+
+# This code was patched for 'now' parameter.
+def run_code_patched(
+    self,
+    storage=None,
+    source=None,
+    sender=None,
+    amount=None,
+    balance=None,
+    chain_id=None,
+    gas_limit=None,
+    now=None,
+) -> ContractCallResult:
+    """Execute using RPC interpreter.
+
+    :param storage: initial storage as Python object, leave None if you want to generate a dummy one
+    :param source: patch SOURCE
+    :param sender: patch SENDER
+    :param amount: patch AMOUNT
+    :param balance: patch BALANCE
+    :param chain_id: patch CHAIN_ID
+    :param gas_limit: restrict max consumed gas
+    :rtype: ContractCallResult
+    """
+    if use_interpreter():
+        return interpret_code(self, storage, source, sender, amount, balance, chain_id, gas_limit, now)
+
+    query = make_run_code_query(self, storage, source, sender, amount, balance, chain_id, gas_limit, now)
     res = self.shell.blocks[self.block_id].helpers.scripts.run_code.post(query)
     return ContractCallResult.from_run_code(res, parameters=self.parameters, context=self.context)
 
 
+def trace_code_patched(
+    self,
+    storage=None,
+    source=None,
+    sender=None,
+    amount=None,
+    balance=None,
+    chain_id=None,
+    gas_limit=None,
+    now=None,
+) -> Tuple[ContractCallResult, dict]:
+    """Execute using RPC tracing interpreter, same parameters as run_code_patched.
+
+    The gas limit defaults to the hard per-operation limit, consumed gas is
+    the difference between it and the gas remaining after the last traced step.
+
+    :rtype: tuple of ContractCallResult and raw RPC response
+    """
+    if gas_limit is None:
+        constants = self.shell.blocks[self.block_id].context.constants()
+        gas_limit = int(constants['hard_gas_limit_per_operation'])
+    query = make_run_code_query(self, storage, source, sender, amount, balance, chain_id, gas_limit, now)
+    res = self.shell.blocks[self.block_id].helpers.scripts.trace_code.post(query)
+    res['consumed_gas'] = ceil(gas_limit - min(Decimal(step['gas']) for step in res['trace']))
+    return ContractCallResult.from_run_code(res, parameters=self.parameters, context=self.context), res
+
+
+def run_view_patched(self, storage=None, balance=None, view_results=None, now=None):
+    """Execute on-chain view in pytezos interpreter with patched NOW.
+
+    :param view_results: patch VIEW calls, keys are "address%view"
+    :returns: decoded view result
+    """
+    with patch.object(ExecutionContext, 'get_now', return_value=now or 0):
+        return self.onchain_view(storage=storage, balance=balance, view_results=view_results)
+
+
 class LendingContractBaseTestCase(TestCase):
     """
         This class allows using demo_lb contracts.
@@ -84,10 +150,17 @@ class LendingContractBaseTestCase(TestCase):
         cls.oracle = contracts['oracle']
 
     def setUp(self):
-        context = ExecutionContext(
-            shell = ShellQuery(RpcNode('http://localhost:20000')),
-            key = Key.from_encoded_key(ALICE_KEY),
-        )
+        if use_interpreter():
+            # contract calls run in-process, including plain `run_code` calls
+            context = ExecutionContext(key = Key.from_encoded_key(ALICE_KEY))
+            run_code = patch.object(ContractCall, 'run_code', interpret_code)
+            run_code.start()
+            self.addCleanup(run_code.stop)
+        else:
+            context = ExecutionContext(
+                shell = ShellQuery(RpcNode('http://localhost:20000')),
+                key = Key.from_encoded_key(ALICE_KEY),
+            )
         self.lending_contract = ContractInterface.from_file(
             get_btc_compiled_filepath() if self.btc_version else get_xtz_compiled_filepath(),
             context,
@@ -100,9 +173,43 @@ class LendingContractBaseTestCase(TestCase):
         else:
             self.assertEqual(hex_encoded_address[2:42], decoded_address)
 
+    def assertModelTransition(self, call, storage, apply_model, **kwargs):
+        """
+            Runs the contract call and the same transition of kordfi.model on a storage copy.
+            Both should fail or give equal storage.
+            @params:
+                apply_model - function of FarmModel or BTCFarmModel
+                kwargs - run_code_patched parameters
+            @returns contract call result and model result, None if the call fails
+        """
+        model_storage = deepcopy(storage)
+        model = (BTCFarmModel if self.btc_version else FarmModel)(model_storage)
+        try:
+            expected = apply_model(model)
+        except (ContractError, ZeroDivisionError):
+            with self.assertRaises(MichelsonError):
+                run_code_patched(call, storage=storage, **kwargs)
+            return None
+
+        result = run_code_patched(call, storage=storage, **kwargs)
+        self.assertEqual(result.storage, model_storage)
+        return result, expected
+
     @contextmanager
     def assertNotRaises(self, exc_type):
         try:
             yield None
         except exc_type:
             raise self.failureException('{} raised'.format(exc_type.__name__))
+
+
+class RouterBaseTestCase(LendingContractBaseTestCase):
+    """
+        Router contract with demo_lb contracts, `lending_contract` is the XTZ farm.
+    """
+    def setUp(self):
+        super().setUp()
+        self.router_contract = ContractInterface.from_file(
+            get_router_compiled_filepath(),
+            self.lending_contract.context,
+        )
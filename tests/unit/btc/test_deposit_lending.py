@@ -2,7 +2,7 @@ from copy import deepcopy
 from pytezos.rpc.errors import MichelsonError
 
 from ..base import LendingContractBaseTestCase, run_code_patched
-from ..constants import ALICE_ADDRESS, BOB_ADDRESS, INFINITY_NAT
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, CONTRACT_ADDRESS, INFINITY_NAT
 from ..constants import BTC_DEFAULT_STORAGE as DEFAULT_STORAGE
 
 
@@ -23,9 +23,9 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         initial_storage = deepcopy(DEFAULT_STORAGE)
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['totalSupply'] = 1_000_000_000_000_000_000
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         
         result = run_code_patched(
             self.lending_contract.depositLending(selected_satoshi_amount),
@@ -88,9 +88,9 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
             BOB_ADDRESS: {'balance': 4_561_728_000_000_000_000, 'approvals': {}},
         }
         initial_storage['totalSupply'] = 5_561_728_000_000_000_000
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
         result = run_code_patched(
             self.lending_contract.depositLending(selected_satoshi_amount),
@@ -106,3 +106,26 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
             BOB_ADDRESS: {'balance': 9_123_456_000_000_000_000, 'approvals': {}},
         })
         self.assertEqual(new_storage['totalSupply'], 10_123_456_000_000_000_000)
+
+    def test_router(self):
+        fa_tzBTC_address = self.tzbtc_token.context.address
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = self.lqt_token.context.address
+        initial_storage['settings']['router_address'] = CONTRACT_ADDRESS
+
+        # the operation source is the depositor of the routed call, tzBTC is transferred from it
+        result = run_code_patched(
+            self.lending_contract.depositLending(1_000),
+            storage = initial_storage,
+            now = 107,
+            sender = CONTRACT_ADDRESS,
+            source = BOB_ADDRESS,
+        )
+        self.assertDictEqual(result.storage['ledger'], {BOB_ADDRESS: {'balance': 1_000_000_000_000_000, 'approvals': {}}})
+
+        operation = result.operations[3]
+        self.assertEqual(operation['destination'], fa_tzBTC_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'transfer')
+        self.assertAddressFromBytesEquals(operation['parameters']['value']['args'][0]['bytes'], BOB_ADDRESS)  # from
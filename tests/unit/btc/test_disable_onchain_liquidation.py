@@ -24,15 +24,15 @@ class SetDelegateEntryUnitTest(LendingContractBaseTestCase):
         )
 
         self.assertEqual(len(result.operations), 0)
-        self.assertFalse(result.storage['onchain_liquidation_available'])
+        self.assertFalse(result.storage['parameters'][0]['onchain_liquidation_available'])
 
-        del result.storage['onchain_liquidation_available']
-        del initial_storage['onchain_liquidation_available']
+        del result.storage['parameters'][0]['onchain_liquidation_available']
+        del initial_storage['parameters'][0]['onchain_liquidation_available']
         self.assertDictEqual(result.storage, initial_storage)
 
         # already disabled
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['onchain_liquidation_available'] = False
+        initial_storage['parameters'][0]['onchain_liquidation_available'] = False
 
         result = self.lending_contract.disableOnchainLiquidation().run_code(
             storage = initial_storage,
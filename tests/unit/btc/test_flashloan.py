@@ -25,8 +25,8 @@ class FlashloanEntryUnitTest(LendingContractBaseTestCase):
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
         initial_storage['administrator'] = ALICE_ADDRESS
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['flashloan_available'] = True
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['parameters'][0]['flashloan_available'] = True
         initial_storage['index_update_dttm'] = 107
 
         result = run_code_patched(
@@ -72,7 +72,7 @@ class FlashloanEntryUnitTest(LendingContractBaseTestCase):
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
         initial_storage['administrator'] = ALICE_ADDRESS
-        initial_storage['flashloan_available'] = False
+        initial_storage['parameters'][0]['flashloan_available'] = False
 
         # admin tries
         with self.assertRaises(MichelsonError) as context:
@@ -86,7 +86,7 @@ class FlashloanEntryUnitTest(LendingContractBaseTestCase):
 
         # with zero amount
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['flashloan_available'] = True
+        initial_storage['parameters'][0]['flashloan_available'] = True
         with self.assertRaises(MichelsonError) as context:
            self.lending_contract.flashloan(entrypoint_adress, 0).run_code(sender=BOB_ADDRESS, storage=initial_storage)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'zero requested shares')
@@ -99,10 +99,10 @@ class FlashloanEntryUnitTest(LendingContractBaseTestCase):
         callback_entrypoint_adress = f'{callback_contract_address}%{callback_entrypoint_name}'
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['flashloan_admin_commission'] = 123
-        initial_storage['flashloan_deposit_commission'] = 456
-        initial_storage['flashloan_available'] = True
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['parameters'][0]['flashloan_admin_commission'] = 123
+        initial_storage['parameters'][0]['flashloan_deposit_commission'] = 456
+        initial_storage['parameters'][0]['flashloan_available'] = True
         initial_storage['index_update_dttm'] = 107
         initial_storage['tzBTC_shares'] = 999
 
@@ -123,8 +123,8 @@ class FlashloanEntryUnitTest(LendingContractBaseTestCase):
 
         # non zero total deposit case
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['flashloan_available'] = True
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['parameters'][0]['flashloan_available'] = True
         initial_storage['totalSupply'] = 1_000_000_000_000
         initial_storage['index_update_dttm'] = 107
 
@@ -138,8 +138,8 @@ class FlashloanEntryUnitTest(LendingContractBaseTestCase):
 
         # another non zero total deposit case
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['flashloan_available'] = True
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['parameters'][0]['flashloan_available'] = True
         initial_storage['totalSupply'] = 2_000_000_000_000
         initial_storage['index_update_dttm'] = 107
 
@@ -18,7 +18,7 @@ class FlashloanReturnEntryUnitTest(LendingContractBaseTestCase):
 
         # case less than flashloan amount
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
         initial_storage['flashloan_shares'] = 100
 
         result = self.lending_contract.flashloanReturn(77).run_code(storage=initial_storage, sender=BOB_ADDRESS)
@@ -39,7 +39,7 @@ class FlashloanReturnEntryUnitTest(LendingContractBaseTestCase):
 
         # case more than flashloan amount
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
         initial_storage['flashloan_shares'] = 100
 
         result = self.lending_contract.flashloanReturn(123).run_code(storage=initial_storage, sender=BOB_ADDRESS)
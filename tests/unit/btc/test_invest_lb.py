@@ -22,14 +22,14 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['dex_contract_address'] = dex_contract_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
         initial_storage['lb_shares'] = 9
         initial_storage['tzBTC_shares'] = 17
-        initial_storage['upfront_commission'] = 0
+        initial_storage['settings']['upfront_commission'] = 0
 
         result = run_code_patched(
             # amount2tzBTC, mintzBTCTokensBought, tzBTC2xtz, minXtzBought, amount2Lqt, minLqtMinted
@@ -153,13 +153,13 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
 
     def test_upfront_commission(self):
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = self.dex_contract.context.address
-        initial_storage['dex_contract_address'] = self.another_dex_contract.context.address
-        initial_storage['fa_tzBTC_address'] = self.tzbtc_token.context.address
-        initial_storage['fa_lb_address'] = self.lqt_token.context.address
+        initial_storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        initial_storage['settings']['dex_contract_address'] = self.another_dex_contract.context.address
+        initial_storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        initial_storage['settings']['fa_lb_address'] = self.lqt_token.context.address
 
         # case 2%
-        initial_storage['upfront_commission'] = 2_000  # 2%
+        initial_storage['settings']['upfront_commission'] = 2_000  # 2%
 
         # amount2tzBTC, mintzBTCTokensBought, tzBTC2xtz, minXtzBought, amount2Lqt, minLqtMinted
         result = self.lending_contract.investLB(0, 0, 0, 0, 15_000, 0).run_code(
@@ -176,7 +176,7 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(operation['destination'], ALICE_ADDRESS)
 
         # case 1%
-        initial_storage['upfront_commission'] = 1_000  # 1%
+        initial_storage['settings']['upfront_commission'] = 1_000  # 1%
 
         # amount2tzBTC, mintzBTCTokensBought, tzBTC2xtz, minXtzBought, amount2Lqt, minLqtMinted
         result = self.lending_contract.investLB(0, 0, 0, 0, 15_000, 0).run_code(
@@ -199,14 +199,14 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['dex_contract_address'] = dex_contract_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
         initial_storage['lb_shares'] = 9
         initial_storage['tzBTC_shares'] = 17
-        initial_storage['upfront_commission'] = 0
+        initial_storage['settings']['upfront_commission'] = 0
 
         result = run_code_patched(
             # amount2tzBTC, mintzBTCTokensBought, tzBTC2xtz, minXtzBought, amount2Lqt, minLqtMinted
@@ -322,14 +322,14 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['dex_contract_address'] = dex_contract_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
         initial_storage['lb_shares'] = 9
         initial_storage['tzBTC_shares'] = 17
-        initial_storage['upfront_commission'] = 0
+        initial_storage['settings']['upfront_commission'] = 0
 
         result = run_code_patched(
             # amount2tzBTC, mintzBTCTokensBought, tzBTC2xtz, minXtzBought, amount2Lqt, minLqtMinted
@@ -397,13 +397,13 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
 
     def test_bad_sent_amount(self):
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = self.dex_contract.context.address
-        initial_storage['dex_contract_address'] = self.another_dex_contract.context.address
-        initial_storage['fa_tzBTC_address'] = self.tzbtc_token.context.address
-        initial_storage['fa_lb_address'] = self.lqt_token.context.address
+        initial_storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        initial_storage['settings']['dex_contract_address'] = self.another_dex_contract.context.address
+        initial_storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        initial_storage['settings']['fa_lb_address'] = self.lqt_token.context.address
 
         # with zero upfront commission
-        initial_storage['upfront_commission'] = 0
+        initial_storage['settings']['upfront_commission'] = 0
 
         with self.assertNotRaises(Exception):
             self.lending_contract.investLB(3 * 10**6, 0, 0, 0, 7 * 10**6, 0).run_code(
@@ -418,7 +418,7 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'sent amount error')
 
         # with non-zero upfront commission
-        initial_storage['upfront_commission'] = 2_000
+        initial_storage['settings']['upfront_commission'] = 2_000
 
         with self.assertNotRaises(Exception):
             self.lending_contract.investLB(3 * 10**6, 0, 0, 0, 7 * 10**6, 0).run_code(
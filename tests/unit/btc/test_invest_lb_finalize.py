@@ -127,9 +127,9 @@ class InvestLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         self_address = self.lending_contract.context.get_self_address()
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = self.dex_contract.context.address
-        initial_storage['fa_tzBTC_address'] = self.tzbtc_token.context.address
-        initial_storage['fa_lb_address'] = self.lqt_token.context.address
+        initial_storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        initial_storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        initial_storage['settings']['fa_lb_address'] = self.lqt_token.context.address
 
         initial_storage['tzBTC_shares'] = 100_000_000
         initial_storage['totalSupply'] = 300_000_000_000_000_000_000
@@ -150,13 +150,13 @@ class InvestLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
 
         # changing max leverage with storage to 5
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = self.dex_contract.context.address
-        initial_storage['fa_tzBTC_address'] = self.tzbtc_token.context.address
-        initial_storage['fa_lb_address'] = self.lqt_token.context.address
+        initial_storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        initial_storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        initial_storage['settings']['fa_lb_address'] = self.lqt_token.context.address
 
         initial_storage['tzBTC_shares'] = 100_000_000
         initial_storage['totalSupply'] = 300_000_000_000_000_000_000
-        initial_storage['max_leverage'] = 50
+        initial_storage['settings']['max_leverage'] = 50
 
         # leverage = 5
         with self.assertNotRaises(Exception):
@@ -21,9 +21,9 @@ class LiquidateOnchainLBEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['lb_shares'] = 400
         initial_storage['tzBTC_shares'] = 250
         initial_storage['liquidity_book'] = {
@@ -156,16 +156,16 @@ class LiquidateOnchainLBEntryUnitTest(LendingContractBaseTestCase):
 
         # disabled
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['onchain_liquidation_available'] = False
+        initial_storage['parameters'][0]['onchain_liquidation_available'] = False
         with self.assertRaises(MichelsonError) as context:
             self.lending_contract.liquidateOnchainLB(BOB_ADDRESS).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'Onchain liquidation disabled.')            
 
         # not loaned fail
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['liquidity_book'] = {
             BOB_ADDRESS: {
                 'net_credit': 0,
@@ -179,9 +179,9 @@ class LiquidateOnchainLBEntryUnitTest(LendingContractBaseTestCase):
 
         # unknown address
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         with self.assertRaises(MichelsonError) as context:
             self.lending_contract.liquidateOnchainLB(BOB_ADDRESS).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'Unknown Address.')
@@ -0,0 +1,155 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import LendingContractBaseTestCase, run_code_patched
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS
+from ..constants import BTC_DEFAULT_STORAGE as DEFAULT_STORAGE
+
+
+class LiquidateOnchainLBBatchEntryUnitTest(LendingContractBaseTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass(btc_version=True)
+
+    def test_basic(self):
+        liquidity_baking_address = self.dex_contract.context.address
+        fa_tzBTC_address = self.tzbtc_token.context.address
+        fa_lb_address = self.lqt_token.context.address
+
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
+        initial_storage['lb_shares'] = 400
+        initial_storage['tzBTC_shares'] = 250
+        initial_storage['liquidity_book'] = {
+            BOB_ADDRESS: {
+                'net_credit': 100,
+                'gross_credit': 200,
+                'lb_shares': 300,
+            },
+            CLARE_ADDRESS: {
+                'net_credit': 10,
+                'gross_credit': 20,
+                'lb_shares': 50,
+            },
+        }
+        initial_storage['local_params']['fa_tzBTC_callback_status'] = False
+
+        result = run_code_patched(
+            # Alice liquidates Bob and Clare
+            self.lending_contract.liquidateOnchainLBBatch([BOB_ADDRESS, CLARE_ADDRESS]),
+            balance = 500,
+            storage = initial_storage,
+            sender = ALICE_ADDRESS,
+            now = 107,
+        )
+        new_storage = deepcopy(result.storage)
+
+        self.assertEqual(new_storage['lb_shares'], 50)
+        self.assertEqual(len(result.operations), 9)
+
+        self.assertTrue(new_storage['local_params']['fa_tzBTC_callback_status'])
+        # positions are settled in the finalize call
+        self.assertEqual(new_storage['liquidity_book'][BOB_ADDRESS]['lb_shares'], 300)
+        self.assertEqual(new_storage['liquidity_book'][CLARE_ADDRESS]['lb_shares'], 50)
+
+        self_address = self.lending_contract.context.get_self_address()
+
+        # approve LB
+        operation = result.operations[3]
+        self.assertEqual(operation['destination'], fa_lb_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'approve')
+        self.assertEqual(int(operation['parameters']['value']['args'][1]['int']), 350)  # value
+
+        # one removeLiquidity for both farms
+        operation = result.operations[4]
+        self.assertEqual(operation['destination'], liquidity_baking_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'removeLiquidity')
+
+        params = operation['parameters']['value']
+        self.assertAddressFromBytesEquals(params[0]['bytes'], self_address)  # to
+        self.assertEqual(int(params[1]['int']), 350)  # lqtBurned
+
+        # sellXtz
+        operation = result.operations[6]
+        self.assertEqual(operation['destination'], self_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'sellXtz')
+
+        # getBalance
+        operation = result.operations[7]
+        self.assertEqual(operation['destination'], fa_tzBTC_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'getBalance')
+
+        # liquidateOnchainLBBatchFinalize
+        operation = result.operations[8]
+        self.assertEqual(operation['kind'], 'transaction')
+        self.assertEqual(int(operation['amount']), 0)
+        self.assertEqual(operation['destination'], self_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'liquidateOnchainLBBatchFinalize')
+
+        params = operation['parameters']['value']['args']
+        self.assertEqual(len(params[0]), 2)  # addresses
+        self.assertEqual(int(params[1]['args'][0]['int']), 350)  # lb_shares
+        self.assertEqual(int(params[1]['args'][1]['int']), 250)  # initial_tzBTC_shares
+
+    def test_fail_cases(self):
+        liquidity_baking_address = self.dex_contract.context.address
+        fa_tzBTC_address = self.tzbtc_token.context.address
+        fa_lb_address = self.lqt_token.context.address
+
+        # not admin
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.liquidateOnchainLBBatch([ALICE_ADDRESS]).run_code(storage=initial_storage, sender=BOB_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
+
+        # disabled
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['parameters'][0]['onchain_liquidation_available'] = False
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.liquidateOnchainLBBatch([BOB_ADDRESS]).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Onchain liquidation disabled.')
+
+        # empty batch
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.liquidateOnchainLBBatch([]).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'empty batch')
+
+        # one of the farms is not loaned
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
+        initial_storage['liquidity_book'] = {
+            BOB_ADDRESS: {
+                'net_credit': 100,
+                'gross_credit': 200,
+                'lb_shares': 300,
+            },
+            CLARE_ADDRESS: {
+                'net_credit': 0,
+                'gross_credit': 200,
+                'lb_shares': 300,
+            },
+        }
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.liquidateOnchainLBBatch([BOB_ADDRESS, CLARE_ADDRESS]).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'not loaned')
+
+        # unknown address
+        initial_storage['liquidity_book'] = {
+            BOB_ADDRESS: {
+                'net_credit': 100,
+                'gross_credit': 200,
+                'lb_shares': 300,
+            },
+        }
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.liquidateOnchainLBBatch([BOB_ADDRESS, CLARE_ADDRESS]).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Unknown Address.')
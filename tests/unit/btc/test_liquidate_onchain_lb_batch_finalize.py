@@ -0,0 +1,104 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import LendingContractBaseTestCase
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS
+from ..constants import BTC_DEFAULT_STORAGE as DEFAULT_STORAGE
+
+
+class LiquidateOnchainLBBatchFinalizeEntryUnitTest(LendingContractBaseTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass(btc_version=True)
+
+    def test_basic(self):
+        self_address = self.lending_contract.context.get_self_address()
+        fa_tzBTC_address = self.tzbtc_token.context.address
+
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+
+        initial_storage['totalSupply'] = 1_370_000_000_000_000
+        initial_storage['deposit_index'] = 1_000_000_000_000
+
+        initial_storage['total_net_credit'] = 20_000_000_000_000
+        initial_storage['net_credit_index'] = 2_000_000_000_000
+
+        initial_storage['total_gross_credit'] = 27_000_000_000_000
+        initial_storage['gross_credit_index'] = 300_000_000_000_000
+
+        initial_storage['lb_shares'] = 100
+        initial_storage['tzBTC_shares'] = 8_000
+
+        initial_storage['liquidity_book'] = {
+            BOB_ADDRESS: {
+                'lb_shares': 10,
+                'net_credit': 4_500_000_000_000,
+                'gross_credit': 6_000_000_000_000,
+            },
+            CLARE_ADDRESS: {
+                'lb_shares': 30,
+                'net_credit': 15_000_000_000_000,
+                'gross_credit': 20_000_000_000_000,
+            },
+        }
+
+        # Bob gets 1_900 shares for 1_800 shares of debt, Clare gets 5_700 shares for 6_000 shares of debt
+        result = self.lending_contract.liquidateOnchainLBBatchFinalize(
+            addresses = [BOB_ADDRESS, CLARE_ADDRESS],
+            lb_shares = 40,
+            initial_tzBTC_shares = 400,
+        ).run_code(
+            storage = initial_storage,
+            sender = self_address,
+        )
+        new_storage = deepcopy(result.storage)
+
+        self.assertEqual(new_storage['total_net_credit'], 500_000_000_000)
+        self.assertEqual(new_storage['total_gross_credit'], 1_000_000_000_000)
+        self.assertEqual(new_storage['tzBTC_shares'], 7_950)
+
+        for address in (BOB_ADDRESS, CLARE_ADDRESS):
+            self.assertEqual(new_storage['liquidity_book'][address]['lb_shares'], 0)
+            self.assertEqual(new_storage['liquidity_book'][address]['net_credit'], 0)
+            self.assertEqual(new_storage['liquidity_book'][address]['gross_credit'], 0)
+
+        # one commission transfer for the batch
+        self.assertEqual(len(result.operations), 1)
+        operation = result.operations[0]
+        self.assertEqual(operation['destination'], fa_tzBTC_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'transfer')
+
+        params = operation['parameters']['value']['args']
+        self.assertAddressFromBytesEquals(params[0]['bytes'], self_address)  # from
+        self.assertAddressFromBytesEquals(params[1]['args'][0]['bytes'], ALICE_ADDRESS)  # to
+        self.assertEqual(int(params[1]['args'][1]['int']), 50)  # value
+
+        self.assertEqual(new_storage['deposit_index'], 817_518_248_174)
+        self.assertEqual(new_storage['totalSupply'], 1_370_000_000_000_000)
+
+    def test_balance_delta_error(self):
+        self_address = self.lending_contract.context.get_self_address()
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['tzBTC_shares'] = 1
+
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.liquidateOnchainLBBatchFinalize(
+                addresses = [BOB_ADDRESS],
+                lb_shares = 10,
+                initial_tzBTC_shares = 2,
+            ).run_code(
+                storage = initial_storage,
+                sender = self_address,
+            )
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'negative tzBTC shares delta error')
+
+    def test_forbidden(self):
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.liquidateOnchainLBBatchFinalize([BOB_ADDRESS], 0, 0).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
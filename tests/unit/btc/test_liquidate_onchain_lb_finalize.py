@@ -20,7 +20,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
 
         initial_storage['totalSupply'] = 1_370_000_000_000_000
         initial_storage['deposit_index'] = 1_000_000_000_000
@@ -86,7 +86,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
 
         initial_storage['totalSupply'] = 1_370_000_000_000_000
         initial_storage['deposit_index'] = 1_000_000_000_000
@@ -109,7 +109,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         }
 
         # admin_liquidation_comm 30 %
-        initial_storage['onchain_liquidation_comm'] = 30
+        initial_storage['parameters'][0]['onchain_liquidation_comm'] = 30
 
         result = self.lending_contract.liquidateOnchainLBFinalize(
             address = BOB_ADDRESS,
@@ -137,7 +137,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(int(params[1]['args'][1]['int']), 30)  # value
 
         # admin_liquidation_comm 70 %
-        initial_storage['onchain_liquidation_comm'] = 70
+        initial_storage['parameters'][0]['onchain_liquidation_comm'] = 70
 
         result = self.lending_contract.liquidateOnchainLBFinalize(
             address = BOB_ADDRESS,
@@ -208,7 +208,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
 
         initial_storage['totalSupply'] = 13_700_000_000_000
         initial_storage['deposit_index'] = 1_000_000_000_000
@@ -232,7 +232,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         }
 
         # 120 %
-        initial_storage['onchain_liquidation_percent'] = 120
+        initial_storage['parameters'][0]['onchain_liquidation_percent'] = 120
         initial_storage['tzBTC_shares'] = 1_299
         # with self.assertNotRaises(Exception):
         self.lending_contract.liquidateOnchainLBFinalize(
@@ -255,7 +255,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'liquidation is not allowed')
 
         # 140 %
-        initial_storage['onchain_liquidation_percent'] = 140
+        initial_storage['parameters'][0]['onchain_liquidation_percent'] = 140
         initial_storage['tzBTC_shares'] = 1_499
         with self.assertNotRaises(Exception):
             self.lending_contract.liquidateOnchainLBFinalize(
@@ -0,0 +1,82 @@
+import random
+
+from ..base import LendingContractBaseTestCase
+from ..constants import BOB_ADDRESS, CLARE_ADDRESS
+from ...test_model import random_storages
+
+
+class ModelUnitTest(LendingContractBaseTestCase):
+    """
+        Differential tests of kordfi.model with the compiled contract.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass(btc_version=True)
+
+    def test_update_indexes(self):
+        rnd = random.Random(1)
+        for storage in random_storages(20, seed=1, btc_version=True):
+            now = storage['index_update_dttm'] + rnd.randint(1, 10 ** 6)
+            # callbacks and calculateLbPrice are called after the entry point
+            self.assertModelTransition(
+                self.lending_contract.updateIndexes(),
+                storage,
+                lambda model: model.update_rates_lambda(now),
+                now=now,
+            )
+
+    def test_invest_lb_finalize(self):
+        self_address = self.lending_contract.context.get_self_address()
+        rnd = random.Random(4)
+        for storage in random_storages(20, seed=4, btc_version=True):
+            params = {
+                'address': BOB_ADDRESS,
+                'initial_lb_shares': max(storage['lb_shares'] - rnd.randint(-10, 10 ** 6), 0),
+                'initial_tzBTC_shares': max(storage['tzBTC_shares'] + rnd.randint(-10, 10 ** 6), 0),
+                'tzBTC2xtz': rnd.randint(0, 10 ** 5),
+            }
+            self.assertModelTransition(
+                self.lending_contract.investLBFinalize(**params),
+                storage,
+                lambda model: model.invest_lb_finalize(**params),
+                sender=self_address,
+            )
+
+    def test_redeem_lb_finalize(self):
+        self_address = self.lending_contract.context.get_self_address()
+        rnd = random.Random(5)
+        for storage in random_storages(20, seed=5, btc_version=True):
+            lqt_burned = rnd.randint(0, storage['liquidity_book'][BOB_ADDRESS]['lb_shares'])
+            initial_tzBTC_shares = max(storage['tzBTC_shares'] - rnd.randint(-10, 10 ** 9), 0)
+            self.assertModelTransition(
+                self.lending_contract.redeemLBFinalize(BOB_ADDRESS, lqt_burned, initial_tzBTC_shares),
+                storage,
+                lambda model: model.redeem_lb_finalize(BOB_ADDRESS, lqt_burned, initial_tzBTC_shares),
+                sender=self_address,
+            )
+
+    def test_liquidate_onchain_lb_finalize(self):
+        self_address = self.lending_contract.context.get_self_address()
+        rnd = random.Random(6)
+        for storage in random_storages(20, seed=6, btc_version=True):
+            initial_tzBTC_shares = max(storage['tzBTC_shares'] - rnd.randint(0, 10 ** 9), 0)
+            self.assertModelTransition(
+                self.lending_contract.liquidateOnchainLBFinalize(BOB_ADDRESS, initial_tzBTC_shares),
+                storage,
+                lambda model: model.liquidate_onchain_lb_finalize(BOB_ADDRESS, initial_tzBTC_shares),
+                sender=self_address,
+            )
+
+    def test_liquidate_onchain_lb_batch_finalize(self):
+        self_address = self.lending_contract.context.get_self_address()
+        rnd = random.Random(7)
+        addresses = [BOB_ADDRESS, CLARE_ADDRESS]
+        for storage in random_storages(20, seed=7, btc_version=True):
+            lb_shares = sum(storage['liquidity_book'][address]['lb_shares'] for address in addresses)
+            initial_tzBTC_shares = max(storage['tzBTC_shares'] - rnd.randint(0, 10 ** 9), 0)
+            self.assertModelTransition(
+                self.lending_contract.liquidateOnchainLBBatchFinalize(addresses, lb_shares, initial_tzBTC_shares),
+                storage,
+                lambda model: model.liquidate_onchain_lb_batch_finalize(addresses, lb_shares, initial_tzBTC_shares),
+                sender=self_address,
+            )
@@ -20,7 +20,7 @@ class SellXtzEntryUnitTest(LendingContractBaseTestCase):
         dex_contract_address = self.another_dex_contract.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
 
         # zero balance case
         result = self.lending_contract.sellXtz().run_code(
@@ -60,7 +60,7 @@ class SellXtzEntryUnitTest(LendingContractBaseTestCase):
         initial_storage = deepcopy(DEFAULT_STORAGE)
 
         initial_storage['administrator'] = ALICE_ADDRESS
-        initial_storage['fa_tzBTC_address'] = CONTRACT_ADDRESS
+        initial_storage['settings']['fa_tzBTC_address'] = CONTRACT_ADDRESS
 
         with self.assertRaises(MichelsonError) as context:
             self.lending_contract.sellXtz().run_code(sender=ALICE_ADDRESS, storage=initial_storage)
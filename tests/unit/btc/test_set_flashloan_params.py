@@ -26,23 +26,23 @@ class SetFlashloanParamsEntryUnitTest(LendingContractBaseTestCase):
 
         self.assertEqual(len(result.operations), 0)
 
-        self.assertTrue(new_storage['flashloan_available'])
-        del initial_storage['flashloan_available']
-        del new_storage['flashloan_available']
+        self.assertTrue(new_storage['parameters'][0]['flashloan_available'])
+        del initial_storage['parameters'][0]['flashloan_available']
+        del new_storage['parameters'][0]['flashloan_available']
 
-        self.assertEqual(new_storage['flashloan_admin_commission'], 123)
-        del initial_storage['flashloan_admin_commission']
-        del new_storage['flashloan_admin_commission']
+        self.assertEqual(new_storage['parameters'][0]['flashloan_admin_commission'], 123)
+        del initial_storage['parameters'][0]['flashloan_admin_commission']
+        del new_storage['parameters'][0]['flashloan_admin_commission']
 
-        self.assertEqual(new_storage['flashloan_deposit_commission'], 456)
-        del initial_storage['flashloan_deposit_commission']
-        del new_storage['flashloan_deposit_commission']
+        self.assertEqual(new_storage['parameters'][0]['flashloan_deposit_commission'], 456)
+        del initial_storage['parameters'][0]['flashloan_deposit_commission']
+        del new_storage['parameters'][0]['flashloan_deposit_commission']
 
         self.assertDictEqual(new_storage, initial_storage)
 
         # case 2: 40, 110, False
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['flashloan_available'] = False
+        initial_storage['parameters'][0]['flashloan_available'] = False
         result = self.lending_contract.setFlashloanParams(111, 333, True).run_code(
             storage = initial_storage,
             sender = ALICE_ADDRESS,
@@ -51,17 +51,17 @@ class SetFlashloanParamsEntryUnitTest(LendingContractBaseTestCase):
 
         self.assertEqual(len(result.operations), 0)
 
-        self.assertTrue(new_storage['flashloan_available'])
-        del initial_storage['flashloan_available']
-        del new_storage['flashloan_available']
+        self.assertTrue(new_storage['parameters'][0]['flashloan_available'])
+        del initial_storage['parameters'][0]['flashloan_available']
+        del new_storage['parameters'][0]['flashloan_available']
 
-        self.assertEqual(new_storage['flashloan_admin_commission'], 111)
-        del initial_storage['flashloan_admin_commission']
-        del new_storage['flashloan_admin_commission']
+        self.assertEqual(new_storage['parameters'][0]['flashloan_admin_commission'], 111)
+        del initial_storage['parameters'][0]['flashloan_admin_commission']
+        del new_storage['parameters'][0]['flashloan_admin_commission']
 
-        self.assertEqual(new_storage['flashloan_deposit_commission'], 333)
-        del initial_storage['flashloan_deposit_commission']
-        del new_storage['flashloan_deposit_commission']
+        self.assertEqual(new_storage['parameters'][0]['flashloan_deposit_commission'], 333)
+        del initial_storage['parameters'][0]['flashloan_deposit_commission']
+        del new_storage['parameters'][0]['flashloan_deposit_commission']
 
         self.assertDictEqual(new_storage, initial_storage)
 
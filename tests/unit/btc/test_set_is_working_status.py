@@ -21,9 +21,9 @@ class setIsWorkingStatusEntryUnitTest(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
         fa_lb_address = self.lqt_token.context.address
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
         # flag false
         initial_storage['is_working'] = False
@@ -24,10 +24,10 @@ class SetLbPriceChangeRateEntryUnitTest(LendingContractBaseTestCase):
         new_storage = deepcopy(result.storage)
 
         self.assertEqual(len(result.operations), 0)
-        self.assertEqual(new_storage['lb_price_change_rate'], 1_000)
+        self.assertEqual(new_storage['settings']['lb_price_change_rate'], 1_000)
 
-        del new_storage['lb_price_change_rate']
-        del initial_storage['lb_price_change_rate']
+        del new_storage['settings']['lb_price_change_rate']
+        del initial_storage['settings']['lb_price_change_rate']
         self.assertDictEqual(new_storage, initial_storage)
 
         # case max value
@@ -40,10 +40,10 @@ class SetLbPriceChangeRateEntryUnitTest(LendingContractBaseTestCase):
         new_storage = deepcopy(result.storage)
 
         self.assertEqual(len(result.operations), 0)
-        self.assertEqual(new_storage['lb_price_change_rate'], 277_777_777)
+        self.assertEqual(new_storage['settings']['lb_price_change_rate'], 277_777_777)
 
-        del new_storage['lb_price_change_rate']
-        del initial_storage['lb_price_change_rate']
+        del new_storage['settings']['lb_price_change_rate']
+        del initial_storage['settings']['lb_price_change_rate']
         self.assertDictEqual(new_storage, initial_storage)
 
     def test_forbidden(self):
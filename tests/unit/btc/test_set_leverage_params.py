@@ -26,21 +26,21 @@ class SetLeverageParamsEntryUnitTest(LendingContractBaseTestCase):
 
         self.assertEqual(len(result.operations), 0)
 
-        self.assertEqual(new_storage['max_leverage'], 50)
-        del initial_storage['max_leverage']
-        del new_storage['max_leverage']
+        self.assertEqual(new_storage['settings']['max_leverage'], 50)
+        del initial_storage['settings']['max_leverage']
+        del new_storage['settings']['max_leverage']
 
-        self.assertEqual(new_storage['onchain_liquidation_percent'], 130)
-        del initial_storage['onchain_liquidation_percent']
-        del new_storage['onchain_liquidation_percent']
+        self.assertEqual(new_storage['parameters'][0]['onchain_liquidation_percent'], 130)
+        del initial_storage['parameters'][0]['onchain_liquidation_percent']
+        del new_storage['parameters'][0]['onchain_liquidation_percent']
 
-        self.assertEqual(new_storage['onchain_liquidation_comm'], 60)
-        del initial_storage['onchain_liquidation_comm']
-        del new_storage['onchain_liquidation_comm']
+        self.assertEqual(new_storage['parameters'][0]['onchain_liquidation_comm'], 60)
+        del initial_storage['parameters'][0]['onchain_liquidation_comm']
+        del new_storage['parameters'][0]['onchain_liquidation_comm']
   
-        self.assertEqual(new_storage['oracle_address'], CONTRACT_ADDRESS)
-        del initial_storage['oracle_address']
-        del new_storage['oracle_address']
+        self.assertEqual(new_storage['settings']['oracle_address'], CONTRACT_ADDRESS)
+        del initial_storage['settings']['oracle_address']
+        del new_storage['settings']['oracle_address']
 
         self.assertDictEqual(new_storage, initial_storage)
 
@@ -54,21 +54,21 @@ class SetLeverageParamsEntryUnitTest(LendingContractBaseTestCase):
 
         self.assertEqual(len(result.operations), 0)
 
-        self.assertEqual(new_storage['max_leverage'], 40)
-        del initial_storage['max_leverage']
-        del new_storage['max_leverage']
+        self.assertEqual(new_storage['settings']['max_leverage'], 40)
+        del initial_storage['settings']['max_leverage']
+        del new_storage['settings']['max_leverage']
 
-        self.assertEqual(new_storage['onchain_liquidation_percent'], 110)
-        del initial_storage['onchain_liquidation_percent']
-        del new_storage['onchain_liquidation_percent']
+        self.assertEqual(new_storage['parameters'][0]['onchain_liquidation_percent'], 110)
+        del initial_storage['parameters'][0]['onchain_liquidation_percent']
+        del new_storage['parameters'][0]['onchain_liquidation_percent']
 
-        self.assertEqual(new_storage['onchain_liquidation_comm'], 30)
-        del initial_storage['onchain_liquidation_comm']
-        del new_storage['onchain_liquidation_comm']
+        self.assertEqual(new_storage['parameters'][0]['onchain_liquidation_comm'], 30)
+        del initial_storage['parameters'][0]['onchain_liquidation_comm']
+        del new_storage['parameters'][0]['onchain_liquidation_comm']
   
-        self.assertEqual(new_storage['oracle_address'], CONTRACT_ADDRESS)
-        del initial_storage['oracle_address']
-        del new_storage['oracle_address']
+        self.assertEqual(new_storage['settings']['oracle_address'], CONTRACT_ADDRESS)
+        del initial_storage['settings']['oracle_address']
+        del new_storage['settings']['oracle_address']
 
         self.assertDictEqual(new_storage, initial_storage)
 
@@ -82,21 +82,21 @@ class SetLeverageParamsEntryUnitTest(LendingContractBaseTestCase):
 
         self.assertEqual(len(result.operations), 0)
 
-        self.assertEqual(new_storage['max_leverage'], 100)
-        del initial_storage['max_leverage']
-        del new_storage['max_leverage']
+        self.assertEqual(new_storage['settings']['max_leverage'], 100)
+        del initial_storage['settings']['max_leverage']
+        del new_storage['settings']['max_leverage']
 
-        self.assertEqual(new_storage['onchain_liquidation_percent'], 200)
-        del initial_storage['onchain_liquidation_percent']
-        del new_storage['onchain_liquidation_percent']
+        self.assertEqual(new_storage['parameters'][0]['onchain_liquidation_percent'], 200)
+        del initial_storage['parameters'][0]['onchain_liquidation_percent']
+        del new_storage['parameters'][0]['onchain_liquidation_percent']
 
-        self.assertEqual(new_storage['onchain_liquidation_comm'], 100)
-        del initial_storage['onchain_liquidation_comm']
-        del new_storage['onchain_liquidation_comm']
+        self.assertEqual(new_storage['parameters'][0]['onchain_liquidation_comm'], 100)
+        del initial_storage['parameters'][0]['onchain_liquidation_comm']
+        del new_storage['parameters'][0]['onchain_liquidation_comm']
 
-        self.assertEqual(new_storage['oracle_address'], CONTRACT_ADDRESS)
-        del initial_storage['oracle_address']
-        del new_storage['oracle_address']
+        self.assertEqual(new_storage['settings']['oracle_address'], CONTRACT_ADDRESS)
+        del initial_storage['settings']['oracle_address']
+        del new_storage['settings']['oracle_address']
 
         self.assertDictEqual(new_storage, initial_storage)
 
@@ -110,21 +110,21 @@ class SetLeverageParamsEntryUnitTest(LendingContractBaseTestCase):
 
         self.assertEqual(len(result.operations), 0)
 
-        self.assertEqual(new_storage['max_leverage'], 20)
-        del initial_storage['max_leverage']
-        del new_storage['max_leverage']
+        self.assertEqual(new_storage['settings']['max_leverage'], 20)
+        del initial_storage['settings']['max_leverage']
+        del new_storage['settings']['max_leverage']
 
-        self.assertEqual(new_storage['onchain_liquidation_percent'], 101)
-        del initial_storage['onchain_liquidation_percent']
-        del new_storage['onchain_liquidation_percent']
+        self.assertEqual(new_storage['parameters'][0]['onchain_liquidation_percent'], 101)
+        del initial_storage['parameters'][0]['onchain_liquidation_percent']
+        del new_storage['parameters'][0]['onchain_liquidation_percent']
 
-        self.assertEqual(new_storage['onchain_liquidation_comm'], 0)
-        del initial_storage['onchain_liquidation_comm']
-        del new_storage['onchain_liquidation_comm']
+        self.assertEqual(new_storage['parameters'][0]['onchain_liquidation_comm'], 0)
+        del initial_storage['parameters'][0]['onchain_liquidation_comm']
+        del new_storage['parameters'][0]['onchain_liquidation_comm']
 
-        self.assertEqual(new_storage['oracle_address'], CONTRACT_ADDRESS)
-        del initial_storage['oracle_address']
-        del new_storage['oracle_address']
+        self.assertEqual(new_storage['settings']['oracle_address'], CONTRACT_ADDRESS)
+        del initial_storage['settings']['oracle_address']
+        del new_storage['settings']['oracle_address']
 
         self.assertDictEqual(new_storage, initial_storage)
 
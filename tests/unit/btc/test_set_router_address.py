@@ -0,0 +1,45 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import LendingContractBaseTestCase
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, CONTRACT_ADDRESS, BTC_DEFAULT_STORAGE as DEFAULT_STORAGE
+
+
+class SetRouterAddressEntryUnitTest(LendingContractBaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass(btc_version=True)
+
+    def test_basic(self):
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+
+        result = self.lending_contract.setRouterAddress(CONTRACT_ADDRESS).run_code(
+            storage = initial_storage,
+            sender = ALICE_ADDRESS,
+        )
+        new_storage = deepcopy(result.storage)
+
+        self.assertEqual(len(result.operations), 0)
+        self.assertEqual(new_storage['settings']['router_address'], CONTRACT_ADDRESS)
+
+        del new_storage['settings']['router_address']
+        del initial_storage['settings']['router_address']
+        self.assertDictEqual(new_storage, initial_storage)
+
+        # the router is unset
+        result = self.lending_contract.setRouterAddress(None).run_code(
+            storage = result.storage,
+            sender = ALICE_ADDRESS,
+        )
+        self.assertIsNone(result.storage['settings']['router_address'])
+
+    def test_forbidden(self):
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.setRouterAddress(CONTRACT_ADDRESS).run_code(
+                storage = deepcopy(DEFAULT_STORAGE),
+                sender = BOB_ADDRESS,
+            )
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
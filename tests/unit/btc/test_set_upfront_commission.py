@@ -25,10 +25,10 @@ class SetUpfrontCommissionEntryUnitTest(LendingContractBaseTestCase):
         new_storage = deepcopy(result.storage)
 
         self.assertEqual(len(result.operations), 0)
-        self.assertEqual(new_storage['upfront_commission'], 1_500)
+        self.assertEqual(new_storage['settings']['upfront_commission'], 1_500)
 
-        del new_storage['upfront_commission']
-        del initial_storage['upfront_commission']
+        del new_storage['settings']['upfront_commission']
+        del initial_storage['settings']['upfront_commission']
         self.assertDictEqual(new_storage, initial_storage)
 
         # case max value
@@ -41,10 +41,10 @@ class SetUpfrontCommissionEntryUnitTest(LendingContractBaseTestCase):
         new_storage = deepcopy(result.storage)
 
         self.assertEqual(len(result.operations), 0)
-        self.assertEqual(new_storage['upfront_commission'], 2_000)
+        self.assertEqual(new_storage['settings']['upfront_commission'], 2_000)
 
-        del new_storage['upfront_commission']
-        del initial_storage['upfront_commission']
+        del new_storage['settings']['upfront_commission']
+        del initial_storage['settings']['upfront_commission']
         self.assertDictEqual(new_storage, initial_storage)
 
     def test_forbidden(self):
@@ -17,7 +17,7 @@ class UpdateLBCallbackEntryUnitTest(LendingContractBaseTestCase):
     def test_basic(self):
         initial_storage = deepcopy(DEFAULT_STORAGE)
         initial_storage['administrator'] = ALICE_ADDRESS
-        initial_storage['fa_lb_address'] = CONTRACT_ADDRESS
+        initial_storage['settings']['fa_lb_address'] = CONTRACT_ADDRESS
         initial_storage['lb_shares'] = 100
         initial_storage['local_params']['fa_lb_callback_status'] = True
 
@@ -38,7 +38,7 @@ class UpdateLBCallbackEntryUnitTest(LendingContractBaseTestCase):
     def test_fail_cases(self):
         initial_storage = deepcopy(DEFAULT_STORAGE)
         initial_storage['administrator'] = ALICE_ADDRESS
-        initial_storage['fa_lb_address'] = CONTRACT_ADDRESS
+        initial_storage['settings']['fa_lb_address'] = CONTRACT_ADDRESS
 
         # true flag status - wrong senders
         initial_storage['local_params']['fa_lb_callback_status'] = True
@@ -23,9 +23,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # case normal
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
         initial_storage['gross_credit_index'] = 1_500_000_000_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000
@@ -63,9 +63,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # another normal case
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
         initial_storage['gross_credit_index'] = 1_500_000_000_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000
@@ -107,9 +107,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # case zero
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['gross_credit_index'] = 1_500_000_000_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000
         initial_storage['deposit_index'] = 1_000_000_000_000
@@ -129,9 +129,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # case negative
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['gross_credit_index'] = 1_500_000_000_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000
         initial_storage['deposit_index'] = 2_000_000_000_000
@@ -151,9 +151,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # case positive but actual shares value zero
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['gross_credit_index'] = 2_000_000_000_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000 - 1
         initial_storage['deposit_index'] = 2_000_000_000_000
@@ -176,9 +176,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
         fa_lb_address = self.lqt_token.context.address
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         with self.assertRaises(MichelsonError) as context:
             self.lending_contract.withdrawCommission().run_code(storage=initial_storage, sender=BOB_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
@@ -188,9 +188,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
         fa_lb_address = self.lqt_token.context.address
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         result = run_code_patched(
             self.lending_contract.withdrawCommission(),
             amount = 0,
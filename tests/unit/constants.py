@@ -46,19 +46,10 @@ DEFAULT_STORAGE = {
     'gross_credit_index': INITIAL_INDEX_VALUE,
     'deposit_index': INITIAL_INDEX_VALUE,
     'net_credit_index': INITIAL_INDEX_VALUE,
-    'upfront_commission': 1_000,
     'is_working': True,
     'index_delta': 0,
     'lb_price': 1_000_000_000_000,
-    'lb_price_change_rate': 5_787_000,
-
-    'onchain_liquidation_available': True,
-    'onchain_liquidation_percent': 120,  # 120%
-    'onchain_liquidation_comm': 50,  # 50%
-    'max_leverage': 40,
-    'liquidation_percent': 120,  # 120%
-    'liquidation_price_percent': 110, # 110%
-    'liquidation_comm': 50,  # 50%
+    'lb_price_update_dttm': 0,
 
     'total_gross_credit': 0,
     'total_net_credit': 0,
@@ -68,25 +59,53 @@ DEFAULT_STORAGE = {
     'ledger': {},
     'administrator': ALICE_ADDRESS,
 
-    'liquidity_baking_address': ALICE_ADDRESS,
-    'dex_contract_address': ALICE_ADDRESS,
-    'fa_tzBTC_address': ALICE_ADDRESS,
-    'fa_lb_address': ALICE_ADDRESS,
-    'oracle_address': ALICE_ADDRESS,
+    'settings': {
+        'liquidity_baking_address': ALICE_ADDRESS,
+        'dex_contract_address': ALICE_ADDRESS,
+        'fa_tzBTC_address': ALICE_ADDRESS,
+        'fa_lb_address': ALICE_ADDRESS,
+        'oracle_address': ALICE_ADDRESS,
+
+        'lb_price_change_rate': 5_787_000,
+        'lb_price_update_interval': 0,
+        'persistent_approval': False,
+        'dex_contract_approved': False,
+        'router_address': None,
+        'tzBTC_dust_threshold': 0,
+
+        'upfront_commission': 1_000,
+        'max_leverage': 40,
+    },
+    'parameters': {
+        0: {
+            'onchain_liquidation_available': True,
+            'onchain_liquidation_percent': 120,  # 120%
+            'onchain_liquidation_comm': 50,  # 50%
+            'liquidation_percent': 120,  # 120%
+            'liquidation_price_percent': 110, # 110%
+            'liquidation_comm': 50,  # 50%
+
+            'flashloan_available': False,
+            'flashloan_admin_commission': 100,
+            'flashloan_deposit_commission': 50,
+        },
+    },
 
     'liquidity_book': {},
 
     'lb_shares': 0,
+    'tzBTC_dust': 0,
     'local_params': {
         'fa_tzBTC_callback_status': False,
         'fa_lb_callback_status': False,
         'tzbtc_pool': 0,
         'lqt_total': 0, 
+        'invest_address': ALICE_ADDRESS,
+        'invest_initial_balance': 0,
+        'invest_amount2Lqt': 0,
+        'tzBTC_dust_delta': 0,
     },
 
-    'flashloan_available': False,
-    'flashloan_admin_commission': 100,
-    'flashloan_deposit_commission': 50,
     'flashloan_amount': 0,
 
     'metadata': {},
@@ -99,3 +118,22 @@ BTC_DEFAULT_STORAGE['tzBTC_shares'] = 0
 
 BTC_DEFAULT_STORAGE['flashloan_shares'] = 0
 del BTC_DEFAULT_STORAGE['flashloan_amount']
+del BTC_DEFAULT_STORAGE['tzBTC_dust']
+del BTC_DEFAULT_STORAGE['settings']['tzBTC_dust_threshold']
+del BTC_DEFAULT_STORAGE['local_params']['invest_address']
+del BTC_DEFAULT_STORAGE['local_params']['invest_initial_balance']
+del BTC_DEFAULT_STORAGE['local_params']['invest_amount2Lqt']
+del BTC_DEFAULT_STORAGE['local_params']['tzBTC_dust_delta']
+
+
+ROUTER_DEFAULT_STORAGE = {
+    'xtz_farm_address': ALICE_ADDRESS,
+    'btc_farm_address': ALICE_ADDRESS,
+    'liquidity_baking_address': ALICE_ADDRESS,
+    'fa_tzBTC_address': ALICE_ADDRESS,
+    'fa_lb_address': ALICE_ADDRESS,
+    'local_params': {
+        'tzbtc_pool': 0,
+        'lqt_total': 0,
+    },
+}
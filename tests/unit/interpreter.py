@@ -0,0 +1,132 @@
+from copy import deepcopy
+import os
+import time
+from unittest.mock import patch
+
+
+from pytezos.context.impl import ExecutionContext
+from pytezos.contract.result import ContractCallResult
+from pytezos.michelson.instructions.control import FailwithInstruction
+from pytezos.michelson.micheline import MichelsonRuntimeError
+from pytezos.michelson.program import MichelsonProgram
+from pytezos.michelson.sections.storage import StorageSection
+from pytezos.michelson.stack import MichelsonStack
+from pytezos.operation.content import format_mutez
+from pytezos.rpc.errors import MichelsonError
+
+
+# 'rpc' - sandbox helpers/scripts/run_code, 'interpreter' - pytezos in-process interpreter
+MICHELSON_BACKEND = os.environ.get('MICHELSON_BACKEND', 'rpc')
+INTERPRETER_BACKEND = 'interpreter'
+
+SCRIPT_REJECTED_ERROR_ID = 'proto.013-PtJakart.michelson_v1.script_rejected'
+RUNTIME_ERROR_ID = 'proto.013-PtJakart.michelson_v1.runtime_error'
+
+
+def use_interpreter():
+    return MICHELSON_BACKEND == INTERPRETER_BACKEND
+
+
+class ScriptRejected(MichelsonRuntimeError):
+    def __init__(self, value):
+        super().__init__('FAILWITH', str(value))
+        self.value = value
+
+
+@classmethod
+def failwith_with_value(cls, stack, stdout, context):
+    # keep failed value as micheline, pytezos interpreter keeps its repr only
+    value = stack.pop1()
+    assert value.is_packable(), f'expected packable type, got {value.prim}'
+    raise ScriptRejected(value.to_micheline_value())
+
+
+def convert_error(error):
+    """Build the same MichelsonError as sandbox RPC raises for rejected script."""
+    cause = error
+    while cause is not None:
+        if isinstance(cause, ScriptRejected):
+            return MichelsonError({
+                'kind': 'temporary',
+                'id': SCRIPT_REJECTED_ERROR_ID,
+                'with': cause.value,
+            })
+        cause = cause.__cause__
+    return MichelsonError({
+        'kind': 'temporary',
+        'id': RUNTIME_ERROR_ID,
+        'msg': error.format_stdout(),
+    })
+
+
+def format_operation(operation):
+    """Format emitted operation like RPC does: optimized parameters, no parameters for unit transfers."""
+    content = deepcopy(operation.content)
+    if content['kind'] != 'transaction':
+        return content
+
+    parameters = content['parameters']
+    if parameters['entrypoint'] == 'default' and parameters['value'] == {'prim': 'Unit'}:
+        del content['parameters']
+    elif operation.ty is not None:
+        value = operation.ty.from_micheline_value(parameters['value'])
+        parameters['value'] = value.to_micheline_value(mode='optimized')
+    return content
+
+
+def interpret_code(
+    self,
+    storage=None,
+    source=None,
+    sender=None,
+    amount=None,
+    balance=None,
+    chain_id=None,
+    gas_limit=None,
+    now=None,
+) -> ContractCallResult:
+    """Execute using pytezos in-process interpreter, drop-in replacement of run_code_patched.
+
+    `gas_limit` is ignored, `now` defaults to current time like sandbox run_code.
+    :rtype: ContractCallResult
+    """
+    storage_ty = StorageSection.match(self.context.storage_expr)
+    if storage is None:
+        initial_storage = storage_ty.dummy(self.context).to_micheline_value(lazy_diff=True)
+    else:
+        initial_storage = storage_ty.from_python_object(storage).to_micheline_value(lazy_diff=True)
+
+    context = ExecutionContext(
+        amount=int(format_mutez(amount or self.amount)),
+        chain_id=chain_id,
+        source=source,
+        sender=sender or source,
+        balance=int(balance or 0),
+        now=int(now) if now is not None else int(time.time()),
+        script={'code': self.context.script['code'], 'storage': initial_storage},
+    )
+    stack = MichelsonStack()
+    stdout = []
+    try:
+        with patch.object(FailwithInstruction, 'execute', failwith_with_value):
+            program = MichelsonProgram.load(context, with_code=True)
+            res = program.instantiate(
+                entrypoint=self.parameters['entrypoint'],
+                parameter=self.parameters['value'],
+                storage=initial_storage,
+            )
+            res.begin(stack, stdout, context)
+            res.execute(stack, stdout, context)
+            _, new_storage, lazy_diff, result = res.end(stack, stdout)
+    except MichelsonRuntimeError as e:
+        raise convert_error(e) from e
+
+    return ContractCallResult.from_run_code(
+        {
+            'operations': [format_operation(operation) for operation in result.items[0]],
+            'storage': new_storage,
+            'lazy_storage_diff': lazy_diff,
+        },
+        parameters=self.parameters,
+        context=self.context,
+    )
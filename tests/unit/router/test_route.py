@@ -0,0 +1,73 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import RouterBaseTestCase, run_code_patched
+from ..constants import BOB_ADDRESS, CONTRACT_ADDRESS, ROUTER_DEFAULT_STORAGE
+
+
+XTZ_INVEST_LB_PARAMS = {
+    'amount2tzBTC': 10,
+    'mintzBTCTokensBought': 25,
+    'amount2Lqt': 30,
+    'minLqtMinted': 40,
+    'tzBTCShares': 0,
+}
+BTC_INVEST_LB_PARAMS = {
+    'amount2tzBTC': 0,
+    'mintzBTCTokensBought': 0,
+    'tzBTC2xtz': 0,
+    'minXtzBought': 0,
+    'amount2Lqt': 40,
+    'minLqtMinted': 45,
+}
+
+
+class RouteEntryUnitTest(RouterBaseTestCase):
+
+    def test_forbidden(self):
+        # farms take the operation source as the farmer, so only implicit accounts call the router
+        with self.assertRaises(MichelsonError) as context:
+            run_code_patched(
+                self.router_contract.route(xtz=[{'redeemLending': 1_000}], btc=[]),
+                storage = deepcopy(ROUTER_DEFAULT_STORAGE),
+                sender = CONTRACT_ADDRESS,
+                source = BOB_ADDRESS,
+            )
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
+
+    def test_empty_route(self):
+        with self.assertRaises(MichelsonError) as context:
+            run_code_patched(
+                self.router_contract.route(xtz=[], btc=[]),
+                storage = deepcopy(ROUTER_DEFAULT_STORAGE),
+                sender = BOB_ADDRESS,
+                source = BOB_ADDRESS,
+            )
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'empty route')
+
+    def test_wrong_amount(self):
+        # the amount is the sum of XTZ deposits and investLB amounts of both farms
+        calls = {
+            'xtz': [
+                {'depositLending': 1_000},
+                {'investLB': {'amount': 20, 'params': XTZ_INVEST_LB_PARAMS}},
+                {'redeemLending': 500},
+            ],
+            'btc': [
+                {'depositLending': 300},
+                {'investLB': {'amount': 30, 'params': BTC_INVEST_LB_PARAMS}},
+            ],
+        }
+        for amount in (0, 1_049, 1_051):
+            with self.assertRaises(MichelsonError) as context:
+                run_code_patched(
+                    self.router_contract.route(**calls),
+                    storage = deepcopy(ROUTER_DEFAULT_STORAGE),
+                    amount = amount,
+                    sender = BOB_ADDRESS,
+                    source = BOB_ADDRESS,
+                )
+            self.assertEqual(str(context.exception.args[0]['with']['string']), 'wrong amount')
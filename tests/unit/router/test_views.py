@@ -0,0 +1,48 @@
+from copy import deepcopy
+
+
+from ..base import RouterBaseTestCase, run_view_patched
+from ..constants import BOB_ADDRESS, CONTRACT_ADDRESS, ROUTER_DEFAULT_STORAGE
+
+
+BTC_FARM_ADDRESS = 'KT1TxqZ8QtKvLu3V3JH7Gx58n7Co8pgtpQU5'
+
+
+class ViewsUnitTest(RouterBaseTestCase):
+    def test_positions(self):
+        storage = deepcopy(ROUTER_DEFAULT_STORAGE)
+        storage['xtz_farm_address'] = CONTRACT_ADDRESS
+        storage['btc_farm_address'] = BTC_FARM_ADDRESS
+
+        xtz_position = {
+            'lb_shares': 9,
+            'debt': 18_000_000,
+            'lb_shares_value': 1_800,
+            'debt_value': 180_000_000_000,
+            'liquidation_allowed': True,
+        }
+        btc_position = {
+            'lb_shares': 3,
+            'debt': 700,
+            'lb_shares_value': 600,
+            'debt_value': 70_000,
+            'liquidation_allowed': False,
+        }
+        positions = run_view_patched(
+            self.router_contract.getPositions(BOB_ADDRESS),
+            storage = storage,
+            view_results = {
+                f'{CONTRACT_ADDRESS}%getPosition': xtz_position,
+                f'{BTC_FARM_ADDRESS}%getPosition': btc_position,
+                f'{CONTRACT_ADDRESS}%getMaxRedeemable': 5_000_000,
+                f'{BTC_FARM_ADDRESS}%getMaxRedeemable': 2_000,
+            },
+        )
+        self.assertEqual(positions, {
+            'xtz': xtz_position,
+            'btc': btc_position,
+            'xtz_redeemable': 5_000_000,
+            'btc_redeemable': 2_000,
+            'lb_shares_value': 2_400,
+            'debt_value': 180_000_070_000,
+        })
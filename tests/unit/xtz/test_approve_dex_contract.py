@@ -0,0 +1,64 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import LendingContractBaseTestCase
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, DEFAULT_STORAGE, INFINITY_NAT
+
+
+class ApproveDexContractEntryUnitTest(LendingContractBaseTestCase):
+
+    def get_storage(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        storage['settings']['dex_contract_address'] = self.another_dex_contract.context.address
+        storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        storage['settings']['persistent_approval'] = True
+        return storage
+
+    def test_basic(self):
+        initial_storage = self.get_storage()
+
+        result = self.lending_contract.approveDexContract().run_code(
+            storage = initial_storage,
+            sender = ALICE_ADDRESS,
+        )
+        new_storage = deepcopy(result.storage)
+        self.assertTrue(new_storage['settings']['dex_contract_approved'])
+
+        self.assertEqual(len(result.operations), 1)
+        operation = result.operations[0]
+        self.assertEqual(operation['destination'], self.tzbtc_token.context.address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'approve')
+        self.assertAddressFromBytesEquals(operation['parameters']['value']['args'][0]['bytes'], self.another_dex_contract.context.address)  # spender
+        self.assertEqual(int(operation['parameters']['value']['args'][1]['int']), INFINITY_NAT)  # value
+
+        del new_storage['settings']['dex_contract_approved']
+        del initial_storage['settings']['dex_contract_approved']
+        self.assertDictEqual(new_storage, initial_storage)
+
+    def test_fail_cases(self):
+        storage = self.get_storage()
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.approveDexContract().run_code(storage=storage, sender=BOB_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
+
+        storage['settings']['dex_contract_approved'] = True
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.approveDexContract().run_code(storage=storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'dex contract approved')
+
+        # liquidity baking has its standing allowance from setPersistentApproval
+        storage = self.get_storage()
+        storage['settings']['dex_contract_address'] = storage['settings']['liquidity_baking_address']
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.approveDexContract().run_code(storage=storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'liquidity baking approved')
+
+        storage = self.get_storage()
+        storage['settings']['persistent_approval'] = False
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.approveDexContract().run_code(storage=storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'persistent approval disabled')
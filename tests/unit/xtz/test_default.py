@@ -41,7 +41,7 @@ class DefaultEntryUnitTest(LendingContractBaseTestCase):
 
         # dex contract call
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = CONTRACT_ADDRESS
+        initial_storage['settings']['liquidity_baking_address'] = CONTRACT_ADDRESS
         initial_storage['totalSupply'] = 10**12
 
         result = run_code_patched(
@@ -64,9 +64,9 @@ class DefaultEntrypointWithUpdateTestCase(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
         fa_lb_address = self.lqt_token.context.address
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['totalSupply'] = 1_234_567_890_666
         initial_storage['deposit_index'] = 1_222_333_444_555
 
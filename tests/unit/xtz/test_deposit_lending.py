@@ -2,7 +2,7 @@ from copy import deepcopy
 
 
 from ..base import LendingContractBaseTestCase, run_code_patched
-from ..constants import ALICE_ADDRESS, BOB_ADDRESS, DEFAULT_STORAGE
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, CONTRACT_ADDRESS, DEFAULT_STORAGE
 
 
 class DepositLendingEntryUnitTest(LendingContractBaseTestCase):
@@ -18,9 +18,9 @@ class DepositLendingEntryUnitTest(LendingContractBaseTestCase):
         initial_storage = deepcopy(DEFAULT_STORAGE)
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['totalSupply'] = 1_000_000_000_000
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         
         result = run_code_patched(
             self.lending_contract.depositLending(),
@@ -71,9 +71,9 @@ class DepositLendingEntryUnitTest(LendingContractBaseTestCase):
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['ledger'] = {BOB_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}}
         initial_storage['totalSupply'] = 5_561_728_000_000
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
         result = run_code_patched(
             self.lending_contract.depositLending(),
@@ -93,9 +93,9 @@ class DepositLendingEntryUnitTest(LendingContractBaseTestCase):
         initial_storage = deepcopy(DEFAULT_STORAGE)
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['totalSupply'] = 1_000_000_000_000
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         
         result = run_code_patched(
             self.lending_contract.depositLending(),
@@ -111,3 +111,32 @@ class DepositLendingEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(new_storage['index_update_dttm'], 0)
         self.assertDictEqual(new_storage['ledger'], {ALICE_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}})
         self.assertEqual(new_storage['totalSupply'], 5_561_728_000_000)
+
+    def test_router(self):
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        initial_storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        initial_storage['settings']['fa_lb_address'] = self.lqt_token.context.address
+
+        # the router deposits for itself until it is set
+        result = run_code_patched(
+            self.lending_contract.depositLending(),
+            amount = 1_000_000,
+            storage = initial_storage,
+            now = 107,
+            sender = CONTRACT_ADDRESS,
+            source = BOB_ADDRESS,
+        )
+        self.assertDictEqual(result.storage['ledger'], {CONTRACT_ADDRESS: {'balance': 1_000_000_000_000, 'approvals': {}}})
+
+        # the operation source is the depositor of the routed call
+        initial_storage['settings']['router_address'] = CONTRACT_ADDRESS
+        result = run_code_patched(
+            self.lending_contract.depositLending(),
+            amount = 1_000_000,
+            storage = initial_storage,
+            now = 107,
+            sender = CONTRACT_ADDRESS,
+            source = BOB_ADDRESS,
+        )
+        self.assertDictEqual(result.storage['ledger'], {BOB_ADDRESS: {'balance': 1_000_000_000_000, 'approvals': {}}})
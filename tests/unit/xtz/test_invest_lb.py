@@ -17,10 +17,10 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['dex_contract_address'] = dex_contract_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['lb_shares'] = 9
 
         result = run_code_patched(
@@ -34,7 +34,7 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         )
         new_storage = deepcopy(result.storage)
 
-        self.assertEqual(len(result.operations), 10)
+        self.assertEqual(len(result.operations), 9)
         self.assertEqual(new_storage['index_update_dttm'], 0)
         self.assertEqual(new_storage['lb_shares'], 9)
 
@@ -85,11 +85,11 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         self.assertAddressFromBytesEquals(operation['parameters']['value']['args'][0]['bytes'], liquidity_baking_address)  # spender
         self.assertEqual(int(operation['parameters']['value']['args'][1]['int']), 0)  # value
 
-        # getBalance LB
+        # getBalance tzBTC
         operation = result.operations[7]
         self.assertEqual(operation['kind'], 'transaction')
         self.assertEqual(int(operation['amount']), 0)
-        self.assertEqual(operation['destination'], fa_lb_address)
+        self.assertEqual(operation['destination'], fa_tzBTC_address)
         self.assertEqual(operation['parameters']['entrypoint'], 'getBalance')
 
         params = operation['parameters']['value']['args']
@@ -97,11 +97,11 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         # check contracts address at least
         self.assertAddressFromBytesEquals(params[1]['bytes'], self_address)  # callback
 
-        # getBalance tzBTC
+        # getBalance LB with investLBFinalize callback
         operation = result.operations[8]
         self.assertEqual(operation['kind'], 'transaction')
         self.assertEqual(int(operation['amount']), 0)
-        self.assertEqual(operation['destination'], fa_tzBTC_address)
+        self.assertEqual(operation['destination'], fa_lb_address)
         self.assertEqual(operation['parameters']['entrypoint'], 'getBalance')
 
         params = operation['parameters']['value']['args']
@@ -109,28 +109,22 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         # check contracts address at least
         self.assertAddressFromBytesEquals(params[1]['bytes'], self_address)  # callback
 
-        # investLBFinalize - self_call
-        operation = result.operations[9]
-        self.assertEqual(operation['kind'], 'transaction')
-        self.assertEqual(int(operation['amount']), 0)
-        self.assertEqual(operation['destination'], self_address)
-        self.assertEqual(operation['parameters']['entrypoint'], 'investLBFinalize')
-
-        params = operation['parameters']['value']['args']
-        self.assertAddressFromBytesEquals(params[0]['bytes'], BOB_ADDRESS)  # address
-        self.assertEqual(int(params[1]['args'][0]['int']), 285)  # initial_balance
-        self.assertEqual(int(params[1]['args'][1]['int']), 9)  # initial_lb_shares
+        self.assertTrue(new_storage['local_params']['fa_tzBTC_callback_status'])
+        self.assertTrue(new_storage['local_params']['fa_lb_callback_status'])
+        self.assertEqual(new_storage['local_params']['invest_address'], BOB_ADDRESS)
+        self.assertEqual(new_storage['local_params']['invest_initial_balance'], 285)
+        self.assertEqual(new_storage['local_params']['invest_amount2Lqt'], 30)
 
     def test_nonzero_upfront_commission_and_tz_btc_shares(self):
         initial_storage = deepcopy(DEFAULT_STORAGE)
         liquidity_baking_address = self.dex_contract.context.address
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
         dex_contract_address = self.another_dex_contract.context.address
-        initial_storage['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
         fa_tzBTC_address = self.tzbtc_token.context.address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
         fa_lb_address = self.lqt_token.context.address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
         result = self.lending_contract.investLB(10 * 10**6, 0, 30 * 10**6, 0, 222).run_code(
             amount = 10 * 10**6 + 3 * 10**5,
@@ -140,7 +134,7 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
         )
         new_storage = deepcopy(result.storage)
 
-        self.assertEqual(len(result.operations), 12)
+        self.assertEqual(len(result.operations), 11)
 
         self_address = self.lending_contract.context.get_self_address()
 
@@ -196,12 +190,12 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
 
         # with zero upfront commission
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['dex_contract_address'] = dex_contract_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
-        initial_storage['upfront_commission'] = 0
+        initial_storage['settings']['upfront_commission'] = 0
 
         # leverage = 4
         with self.assertNotRaises(Exception):
@@ -223,13 +217,13 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
 
         # changing max leverage with storage to 5
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['dex_contract_address'] = dex_contract_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
-        initial_storage['upfront_commission'] = 0
-        initial_storage['max_leverage'] = 50
+        initial_storage['settings']['upfront_commission'] = 0
+        initial_storage['settings']['max_leverage'] = 50
 
         # leverage = 5
         with self.assertNotRaises(Exception):
@@ -251,12 +245,12 @@ class InvestLBEntryUnitTest(LendingContractBaseTestCase):
 
         # with non-zero upfront commission
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['dex_contract_address'] = dex_contract_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
 
-        initial_storage['upfront_commission'] = 2000
+        initial_storage['settings']['upfront_commission'] = 2000
 
         # leverage = 4
         with self.assertNotRaises(Exception):
@@ -5,40 +5,44 @@ from pytezos.rpc.errors import MichelsonError
 
 
 from ..base import LendingContractBaseTestCase, run_code_patched
-from ..constants import ALICE_ADDRESS, BOB_ADDRESS, DEFAULT_STORAGE, INFINITY_NAT, CONST_RATE_PARAMS
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS, CONTRACT_ADDRESS, DEFAULT_STORAGE, INFINITY_NAT, CONST_RATE_PARAMS
+
+
+def get_invest_storage(address, initial_balance):
+    storage = deepcopy(DEFAULT_STORAGE)
+    storage['settings']['fa_lb_address'] = CONTRACT_ADDRESS
+    storage['local_params']['fa_lb_callback_status'] = True
+    storage['local_params']['invest_address'] = address
+    storage['local_params']['invest_initial_balance'] = initial_balance
+    return storage
 
 
 class InvestLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
     
     def test_basic(self):
-        self_address = self.lending_contract.context.get_self_address()
-
         # case normal
-        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage = get_invest_storage(BOB_ADDRESS, 4 * 10 ** 6)
 
         initial_storage['totalSupply'] = 10_000_000_000_000
         initial_storage['total_net_credit'] = 0
         initial_storage['total_gross_credit'] = 0
-        initial_storage['lb_shares'] = 300
+        initial_storage['lb_shares'] = 0
 
         initial_storage['gross_credit_index'] = 5_000_000_000_000
         initial_storage['net_credit_index'] = 4_000_000_000_000
         initial_storage['deposit_index'] = 2_000_000_000_000
 
-        result = self.lending_contract.investLBFinalize(
-            address = BOB_ADDRESS,
-            initial_balance = 4 * 10 ** 6,
-            initial_lb_shares = 0,
-        ).run_code(
+        result = self.lending_contract.investLBFinalize(300).run_code(
             amount = 0,
             balance = 10 ** 6,
             storage = initial_storage,
-            sender = self_address,
+            sender = CONTRACT_ADDRESS,
         )
         new_storage = deepcopy(result.storage)
 
         self.assertEqual(len(result.operations), 0)
 
+        self.assertFalse(new_storage['local_params']['fa_lb_callback_status'])
         self.assertEqual(new_storage['total_net_credit'], 750_000_000_000)
         self.assertEqual(new_storage['total_gross_credit'], 600_000_000_000)
         self.assertEqual(new_storage['lb_shares'], 300)
@@ -51,12 +55,12 @@ class InvestLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
             }})
 
         # case non empty initial data
-        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage = get_invest_storage(BOB_ADDRESS, 2 * 10 ** 6)
 
         initial_storage['totalSupply'] = 10_000_000_000_000
         initial_storage['total_net_credit'] = 250_000_000_000
         initial_storage['total_gross_credit'] = 200_000_000_000
-        initial_storage['lb_shares'] = 800
+        initial_storage['lb_shares'] = 200
 
         initial_storage['gross_credit_index'] = 5_000_000_000_000
         initial_storage['net_credit_index'] = 4_000_000_000_000
@@ -69,15 +73,11 @@ class InvestLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
             }
         }
 
-        result = self.lending_contract.investLBFinalize(
-            address = BOB_ADDRESS,
-            initial_balance = 2 * 10 ** 6,
-            initial_lb_shares = 200,
-        ).run_code(
+        result = self.lending_contract.investLBFinalize(800).run_code(
             amount = 0,
             balance = 10 ** 6,
             storage = initial_storage,
-            sender = self_address,
+            sender = CONTRACT_ADDRESS,
         )
         new_storage = deepcopy(result.storage)
 
@@ -94,37 +94,89 @@ class InvestLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
                 'lb_shares': 700,
             }})
 
-    def test_impossible_cases(self):
-        self_address = self.lending_contract.context.get_self_address()
+    def test_tzbtc_dust_credit(self):
+        # 3 tez bought 300 LB shares of a pool with 100 tzBTC shares for an LB share, 100 mutez for a tzBTC share
+        initial_storage = get_invest_storage(BOB_ADDRESS, 4 * 10 ** 6)
+        initial_storage['totalSupply'] = 10_000_000_000_000
+        initial_storage['local_params']['tzbtc_pool'] = 1_000_000
+        initial_storage['local_params']['lqt_total'] = 10_000
+        initial_storage['local_params']['invest_amount2Lqt'] = 3 * 10 ** 6
+
+        # the kept tzBTC residual worth 1 tez less the tokenToXtz fee and burn is credited against the spent 3 tez
+        initial_storage['local_params']['tzBTC_dust_delta'] = 10_000
+        result = self.lending_contract.investLBFinalize(300).run_code(
+            balance = 10 ** 6,
+            storage = initial_storage,
+            sender = CONTRACT_ADDRESS,
+        )
+        self.assertEqual(len(result.operations), 0)
+        self.assertEqual(result.storage['local_params']['tzBTC_dust_delta'], 0)
+        self.assertDictEqual(result.storage['liquidity_book'], {BOB_ADDRESS: {
+            'net_credit': 2_001_999_000_000,
+            'gross_credit': 2_001_999_000_000,
+            'lb_shares': 300,
+        }})
+
+        # the used dust is charged at the full rate
+        initial_storage['local_params']['tzBTC_dust_delta'] = -10_000
+        result = self.lending_contract.investLBFinalize(300).run_code(
+            balance = 10 ** 6,
+            storage = initial_storage,
+            sender = CONTRACT_ADDRESS,
+        )
+        self.assertEqual(result.storage['liquidity_book'][BOB_ADDRESS]['net_credit'], 4_000_000_000_000)
 
+        # the residual above the spent xtz is sent to the farmer
+        initial_storage['local_params']['tzBTC_dust_delta'] = 40_000
+        result = self.lending_contract.investLBFinalize(300).run_code(
+            balance = 10 ** 6,
+            storage = initial_storage,
+            sender = CONTRACT_ADDRESS,
+        )
+        self.assertEqual(len(result.operations), 1)
+        self.assertEqual(result.operations[0]['destination'], BOB_ADDRESS)
+        self.assertEqual(int(result.operations[0]['amount']), 992_004)
+        self.assertEqual(result.storage['local_params']['tzBTC_dust_delta'], 0)
+        self.assertEqual(result.storage['total_net_credit'], 0)
+        self.assertEqual(result.storage['liquidity_book'][BOB_ADDRESS]['lb_shares'], 300)
+
+    def test_impossible_cases(self):
         # balance delta error
-        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage = get_invest_storage(ALICE_ADDRESS, 5 * 10**5)
         with self.assertRaises(MichelsonError) as context:
-            self.lending_contract.investLBFinalize(ALICE_ADDRESS, 5 * 10**5, 0).run_code(storage=initial_storage, balance=10**6, sender=self_address)
+            self.lending_contract.investLBFinalize(0).run_code(storage=initial_storage, balance=10**6, sender=CONTRACT_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'negative balance delta error')
 
         # lb delta error
-        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage = get_invest_storage(ALICE_ADDRESS, 2 * 10 ** 6)
+        initial_storage['lb_shares'] = 200
         with self.assertRaises(MichelsonError) as context:
-            self.lending_contract.investLBFinalize(ALICE_ADDRESS, 2 * 10 ** 6, 200).run_code(storage=initial_storage, balance=10**6, sender=self_address)
+            self.lending_contract.investLBFinalize(0).run_code(storage=initial_storage, balance=10**6, sender=CONTRACT_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'negative lb delta error')
 
     def test_forbidden_cases(self):
-        # admin tries
+        self_address = self.lending_contract.context.get_self_address()
+        initial_storage = get_invest_storage(BOB_ADDRESS, 0)
+
+        # true flag status - wrong senders
+        for sender in [self_address, ALICE_ADDRESS, CLARE_ADDRESS]:
+            with self.assertRaises(MichelsonError) as context:
+                self.lending_contract.investLBFinalize(0).run_code(storage=initial_storage, sender=sender)
+            self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
+
+        # false flag status
+        initial_storage['local_params']['fa_lb_callback_status'] = False
         with self.assertRaises(MichelsonError) as context:
-            self.lending_contract.investLBFinalize(ALICE_ADDRESS, 0, 0).run_code(sender=ALICE_ADDRESS)
-        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
+            self.lending_contract.investLBFinalize(0).run_code(storage=initial_storage, sender=CONTRACT_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Bad status.')
 
-        # not admin tries
         with self.assertRaises(MichelsonError) as context:
-            self.lending_contract.investLBFinalize(ALICE_ADDRESS, 0, 0).run_code(sender=BOB_ADDRESS)
+            self.lending_contract.investLBFinalize(0).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
 
     def test_totalSupply_net_credit_inequation(self):
-        self_address = self.lending_contract.context.get_self_address()
-
         # ok case
-        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage = get_invest_storage(BOB_ADDRESS, 4 * 10 ** 6)
 
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['totalSupply'] = 1_500_000_000_000
@@ -133,19 +185,15 @@ class InvestLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         initial_storage['net_credit_index'] = 4_000_000_000_000
 
         with self.assertNotRaises(Exception):
-            self.lending_contract.investLBFinalize(
-                address = BOB_ADDRESS,
-                initial_balance = 4 * 10 ** 6,
-                initial_lb_shares = 0,
-            ).run_code(
+            self.lending_contract.investLBFinalize(0).run_code(
                 amount = 0,
                 balance = 10 ** 6,
                 storage = initial_storage,
-                sender = self_address,
+                sender = CONTRACT_ADDRESS,
             )
 
         # fail case
-        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage = get_invest_storage(BOB_ADDRESS, 4 * 10 ** 6)
 
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['totalSupply'] = 1_500_000_000_000 - 1
@@ -154,14 +202,10 @@ class InvestLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         initial_storage['net_credit_index'] = 4_000_000_000_000
 
         with self.assertRaises(MichelsonError) as context:
-            self.lending_contract.investLBFinalize(
-                address = BOB_ADDRESS,
-                initial_balance = 4 * 10 ** 6,
-                initial_lb_shares = 0,
-            ).run_code(
+            self.lending_contract.investLBFinalize(0).run_code(
                 amount = 0,
                 balance = 10 ** 6,
                 storage = initial_storage,
-                sender = self_address,
+                sender = CONTRACT_ADDRESS,
             )
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'total deposit and net credit inequation error')
@@ -0,0 +1,129 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import LendingContractBaseTestCase
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS, DEFAULT_STORAGE
+
+
+class LiquidateOnchainLBBatchFinalizeEntryUnitTest(LendingContractBaseTestCase):
+
+    def test_basic(self):
+        self_address = self.lending_contract.context.get_self_address()
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+
+        initial_storage['totalSupply'] = 13_700_000_000_000
+        initial_storage['deposit_index'] = 1_000_000_000_000
+
+        initial_storage['total_net_credit'] = 20_000_000_000_000
+        initial_storage['net_credit_index'] = 2_000_000_000_000
+
+        initial_storage['total_gross_credit'] = 27_000_000_000_000
+        initial_storage['gross_credit_index'] = 3_000_000_000_000
+
+        initial_storage['lb_shares'] = 100
+
+        initial_storage['liquidity_book'] = {
+            BOB_ADDRESS: {
+                'lb_shares': 10,
+                'net_credit': 4_500_000_000_000,
+                'gross_credit': 6_000_000_000_000,
+            },
+            CLARE_ADDRESS: {
+                'lb_shares': 30,
+                'net_credit': 15_000_000_000_000,
+                'gross_credit': 20_000_000_000_000,
+            },
+        }
+
+        # Bob gets 19 tez for 18 tez of debt, Clare gets 57 tez for 60 tez of debt
+        result = self.lending_contract.liquidateOnchainLBBatchFinalize(
+            addresses = [BOB_ADDRESS, CLARE_ADDRESS],
+            lb_shares = 40,
+            initial_balance = 10 ** 6,
+        ).run_code(
+            balance = 77 * 10 ** 6,
+            storage = initial_storage,
+            sender = self_address,
+        )
+        new_storage = deepcopy(result.storage)
+
+        self.assertEqual(new_storage['total_net_credit'], 500_000_000_000)
+        self.assertEqual(new_storage['total_gross_credit'], 1_000_000_000_000)
+        self.assertEqual(new_storage['lb_shares'], 100)
+
+        for address in (BOB_ADDRESS, CLARE_ADDRESS):
+            self.assertEqual(new_storage['liquidity_book'][address]['lb_shares'], 0)
+            self.assertEqual(new_storage['liquidity_book'][address]['net_credit'], 0)
+            self.assertEqual(new_storage['liquidity_book'][address]['gross_credit'], 0)
+
+        # one commission transfer for the batch
+        self.assertEqual(len(result.operations), 1)
+        operation = result.operations[0]
+        self.assertEqual(operation['kind'], 'transaction')
+        self.assertEqual(int(operation['amount']), 500_000)
+        self.assertEqual(operation['destination'], ALICE_ADDRESS)
+
+        # 1 tez gain of Bob with 50 % commission and 3 tez loss of Clare
+        self.assertEqual(new_storage['deposit_index'], 817_518_248_174)
+        self.assertEqual(new_storage['totalSupply'], 13_700_000_000_000)
+
+    def test_liquidation_is_not_allowed(self):
+        self_address = self.lending_contract.context.get_self_address()
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+
+        initial_storage['totalSupply'] = 13_700_000_000_000
+        initial_storage['deposit_index'] = 1_000_000_000_000
+
+        initial_storage['total_net_credit'] = 20_000_000_000_000
+        initial_storage['net_credit_index'] = 2_000_000_000_000
+
+        initial_storage['total_gross_credit'] = 27_000_000_000_000
+        initial_storage['gross_credit_index'] = 3_000_000_000_000
+
+        initial_storage['lb_shares'] = 100
+
+        initial_storage['liquidity_book'] = {
+            BOB_ADDRESS: {
+                'lb_shares': 10,
+                'net_credit': 4_500_000_000_000,
+                'gross_credit': 6_000_000_000_000,
+            },
+            CLARE_ADDRESS: {
+                'lb_shares': 30,
+                'net_credit': 15_000_000_000_000,
+                'gross_credit': 20_000_000_000_000,
+            },
+        }
+
+        # Bob gets 21 tez for 18 tez of debt, Clare gets 63 tez for 60 tez of debt, both are below 120 %
+        with self.assertNotRaises(Exception):
+            self.lending_contract.liquidateOnchainLBBatchFinalize(
+                addresses = [BOB_ADDRESS, CLARE_ADDRESS],
+                lb_shares = 40,
+                initial_balance = 10 ** 6,
+            ).run_code(
+                balance = 85 * 10 ** 6,
+                storage = initial_storage,
+                sender = self_address,
+            )
+        # Bob gets 22 tez for 18 tez of debt, the whole batch fails
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.liquidateOnchainLBBatchFinalize(
+                addresses = [BOB_ADDRESS, CLARE_ADDRESS],
+                lb_shares = 40,
+                initial_balance = 10 ** 6,
+            ).run_code(
+                balance = 89 * 10 ** 6,
+                storage = initial_storage,
+                sender = self_address,
+            )
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'liquidation is not allowed')
+
+    def test_forbidden(self):
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.liquidateOnchainLBBatchFinalize([BOB_ADDRESS], 0, 0).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
@@ -90,7 +90,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         }
 
         # admin_liquidation_comm 30 %
-        initial_storage['onchain_liquidation_comm'] = 30
+        initial_storage['parameters'][0]['onchain_liquidation_comm'] = 30
 
         result = self.lending_contract.liquidateOnchainLBFinalize(
             address = BOB_ADDRESS,
@@ -112,7 +112,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(operation['destination'], ALICE_ADDRESS)
 
         # admin_liquidation_comm 70 %
-        initial_storage['onchain_liquidation_comm'] = 70
+        initial_storage['parameters'][0]['onchain_liquidation_comm'] = 70
 
         result = self.lending_contract.liquidateOnchainLBFinalize(
             address = BOB_ADDRESS,
@@ -197,7 +197,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         }
 
         # 120 %
-        initial_storage['onchain_liquidation_percent'] = 120
+        initial_storage['parameters'][0]['onchain_liquidation_percent'] = 120
         with self.assertNotRaises(Exception):
             self.lending_contract.liquidateOnchainLBFinalize(
                 address = BOB_ADDRESS,
@@ -219,7 +219,7 @@ class LiquidateOnchainLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'liquidation is not allowed')
 
         # 140 %
-        initial_storage['onchain_liquidation_percent'] = 140
+        initial_storage['parameters'][0]['onchain_liquidation_percent'] = 140
         with self.assertNotRaises(Exception):
             self.lending_contract.liquidateOnchainLBFinalize(
                 address = BOB_ADDRESS,
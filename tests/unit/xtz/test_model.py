@@ -0,0 +1,117 @@
+import random
+
+from ..base import LendingContractBaseTestCase
+from ..constants import BOB_ADDRESS, CLARE_ADDRESS
+from ...test_model import random_storages
+
+
+class ModelUnitTest(LendingContractBaseTestCase):
+    """
+        Differential tests of kordfi.model with the compiled contract.
+    """
+    def test_update_indexes(self):
+        rnd = random.Random(1)
+        for storage in random_storages(20, seed=1):
+            now = storage['index_update_dttm'] + rnd.randint(1, 10 ** 6)
+            # callbacks and calculateLbPrice are called after the entry point
+            self.assertModelTransition(
+                self.lending_contract.updateIndexes(),
+                storage,
+                lambda model: model.update_rates_lambda(now),
+                now=now,
+            )
+
+    def test_calculate_lb_price(self):
+        self_address = self.lending_contract.context.get_self_address()
+        rnd = random.Random(2)
+        for storage in random_storages(20, seed=2):
+            now = storage['index_update_dttm'] + rnd.randint(0, 10 ** 5)
+            self.assertModelTransition(
+                self.lending_contract.calculateLbPrice(),
+                storage,
+                lambda model: model.calculate_lb_price(now),
+                now=now,
+                sender=self_address,
+            )
+
+    def test_deposit_lending(self):
+        rnd = random.Random(3)
+        for storage in random_storages(20, seed=3):
+            now = storage['index_update_dttm']
+            amount = rnd.randint(1, 10 ** 10)
+            self.assertModelTransition(
+                self.lending_contract.depositLending().with_amount(amount),
+                storage,
+                lambda model: model.deposit_lending(BOB_ADDRESS, amount, now, 0, 0),
+                now=now,
+                sender=BOB_ADDRESS,
+            )
+
+    def test_invest_lb_finalize(self):
+        rnd = random.Random(4)
+        for storage in random_storages(20, seed=4):
+            balance = rnd.randint(0, 10 ** 10)
+            lb_shares = max(storage['lb_shares'] + rnd.randint(-10, 10 ** 6), 0)
+            storage['local_params'].update(
+                fa_lb_callback_status=True,
+                invest_address=BOB_ADDRESS,
+                invest_initial_balance=max(balance + rnd.randint(-10, 10 ** 9), 0),
+                invest_amount2Lqt=rnd.randint(0, 10 ** 9),
+                tzBTC_dust_delta=rnd.randint(-1_000, 1_000),
+            )
+            self.assertModelTransition(
+                self.lending_contract.investLBFinalize(lb_shares),
+                storage,
+                lambda model: model.invest_lb_finalize(lb_shares, balance),
+                balance=balance,
+                sender=storage['settings']['fa_lb_address'],
+            )
+
+    def test_redeem_lb_finalize(self):
+        self_address = self.lending_contract.context.get_self_address()
+        rnd = random.Random(5)
+        for storage in random_storages(20, seed=5):
+            lqt_burned = rnd.randint(0, storage['liquidity_book'][BOB_ADDRESS]['lb_shares'])
+            initial_balance = rnd.randint(0, 10 ** 10)
+            balance = initial_balance + rnd.randint(0, 10 ** 11)
+            storage['local_params']['tzBTC_dust_delta'] = rnd.randint(0, 1_000)
+            result = self.assertModelTransition(
+                self.lending_contract.redeemLBFinalize(BOB_ADDRESS, lqt_burned, initial_balance),
+                storage,
+                lambda model: model.redeem_lb_finalize(BOB_ADDRESS, lqt_burned, initial_balance, balance),
+                balance=balance,
+                sender=self_address,
+            )
+            if result is not None:
+                result, payout = result
+                self.assertEqual(int(result.operations[0]['amount']), payout)
+
+    def test_liquidate_onchain_lb_finalize(self):
+        self_address = self.lending_contract.context.get_self_address()
+        rnd = random.Random(6)
+        for storage in random_storages(20, seed=6):
+            initial_balance = rnd.randint(0, 10 ** 10)
+            balance = initial_balance + rnd.randint(0, 10 ** 11)
+            self.assertModelTransition(
+                self.lending_contract.liquidateOnchainLBFinalize(BOB_ADDRESS, initial_balance),
+                storage,
+                lambda model: model.liquidate_onchain_lb_finalize(BOB_ADDRESS, initial_balance, balance),
+                balance=balance,
+                sender=self_address,
+            )
+
+    def test_liquidate_onchain_lb_batch_finalize(self):
+        self_address = self.lending_contract.context.get_self_address()
+        rnd = random.Random(7)
+        addresses = [BOB_ADDRESS, CLARE_ADDRESS]
+        for storage in random_storages(20, seed=7):
+            lb_shares = sum(storage['liquidity_book'][address]['lb_shares'] for address in addresses)
+            initial_balance = rnd.randint(0, 10 ** 10)
+            balance = initial_balance + rnd.randint(0, 10 ** 11)
+            self.assertModelTransition(
+                self.lending_contract.liquidateOnchainLBBatchFinalize(addresses, lb_shares, initial_balance),
+                storage,
+                lambda model: model.liquidate_onchain_lb_batch_finalize(addresses, lb_shares, initial_balance, balance),
+                balance=balance,
+                sender=self_address,
+            )
@@ -16,9 +16,9 @@ class RedeemLBEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['lb_shares'] = 400
         initial_storage['liquidity_book'] = {
             BOB_ADDRESS: {
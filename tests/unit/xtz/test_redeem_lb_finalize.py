@@ -55,6 +55,35 @@ class RedeemLBFinalizeEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(int(operation['amount']), 2_000_000)
         self.assertEqual(operation['destination'], BOB_ADDRESS)
 
+    def test_tzbtc_dust_credit(self):
+        self_address = self.lending_contract.context.get_self_address()
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['lb_shares'] = 10
+        initial_storage['total_net_credit'] = 4_500_000_000_000
+        initial_storage['total_gross_credit'] = 6_000_000_000_000
+        initial_storage['liquidity_book'] = {
+            BOB_ADDRESS: {
+                'lb_shares': 10,
+                'net_credit': 4_500_000_000_000,
+                'gross_credit': 6_000_000_000_000,
+            }
+        }
+        # sellTzBTC kept 2 tzBTC shares of the removed 10 LB shares, 7 tez and 1_000 tzBTC shares,
+        # 7_000 mutez for a tzBTC share with 100 tzBTC shares for an LB share in the pool
+        initial_storage['local_params']['tzBTC_dust_delta'] = 2
+        initial_storage['local_params']['tzbtc_pool'] = 1_000_000
+        initial_storage['local_params']['lqt_total'] = 10_000
+
+        result = self.lending_contract.redeemLBFinalize(BOB_ADDRESS, 10, 10 ** 6).run_code(
+            balance = 8 * 10 ** 6,
+            storage = initial_storage,
+            sender = self_address,
+        )
+        self.assertEqual(result.storage['local_params']['tzBTC_dust_delta'], 0)
+        self.assertEqual(len(result.operations), 1)
+        self.assertEqual(int(result.operations[0]['amount']), 1_013_972)  # 14_000 less the tokenToXtz fee and burn
+        self.assertEqual(result.operations[0]['destination'], BOB_ADDRESS)
+
     def test_balance_delta_error(self):
         self_address = self.lending_contract.context.get_self_address()
         initial_storage = deepcopy(DEFAULT_STORAGE)
@@ -18,9 +18,9 @@ class RedeemLendingEntryUnitTest(LendingContractBaseTestCase):
 
         # case - normal
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['ledger'] = {BOB_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}}
         initial_storage['totalSupply'] = 5_561_728_000_000
@@ -74,9 +74,9 @@ class RedeemLendingEntryUnitTest(LendingContractBaseTestCase):
 
         # case - max amount
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['deposit_index'] = 4_000_000_000_000
         initial_storage['ledger'] = {BOB_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}}
         initial_storage['totalSupply'] = 5_561_728_000_000
@@ -102,9 +102,9 @@ class RedeemLendingEntryUnitTest(LendingContractBaseTestCase):
 
         # case - too much amount
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['deposit_index'] = 4_000_000_000_000
         initial_storage['ledger'] = {BOB_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}}
         with self.assertRaises(MichelsonError) as context:
@@ -117,9 +117,9 @@ class RedeemLendingEntryUnitTest(LendingContractBaseTestCase):
 
         # case - not enough balance
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['ledger'] = {BOB_ADDRESS: {'balance': 4_000_000_000_000, 'approvals': {}}}
         with self.assertRaises(MichelsonError) as context:
             result = self.lending_contract.redeemLending(1_000_000).run_code(
@@ -130,9 +130,9 @@ class RedeemLendingEntryUnitTest(LendingContractBaseTestCase):
 
         # case - missing storage info
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         with self.assertRaises(MichelsonError) as context:
             result = self.lending_contract.redeemLending(18_246_913).run_code(
                 storage = initial_storage,
@@ -142,9 +142,9 @@ class RedeemLendingEntryUnitTest(LendingContractBaseTestCase):
 
         # case - admin
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['ledger'] = {ALICE_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}}
         initial_storage['totalSupply'] = 5_561_728_000_000
@@ -171,9 +171,9 @@ class RedeemLendingEntryUnitTest(LendingContractBaseTestCase):
 
         # case - wrong total deposit value
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['ledger'] = {BOB_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}}
 
@@ -196,9 +196,9 @@ class RedeemLendingEntryUnitTest(LendingContractBaseTestCase):
 
         # ok case
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['ledger'] = {BOB_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}}
         initial_storage['totalSupply'] = 5_000_000_000_000
@@ -214,9 +214,9 @@ class RedeemLendingEntryUnitTest(LendingContractBaseTestCase):
 
         # fail case
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['deposit_index'] = 2_000_000_000_000
         initial_storage['ledger'] = {BOB_ADDRESS: {'balance': 4_561_728_000_000, 'approvals': {}}}
         initial_storage['totalSupply'] = 5_000_000_000_000
@@ -17,10 +17,10 @@ class SellTzBTCEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['dex_contract_address'] = dex_contract_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['local_params']['fa_tzBTC_callback_status'] = True
 
         result = run_code_patched(
@@ -33,7 +33,7 @@ class SellTzBTCEntryUnitTest(LendingContractBaseTestCase):
         )
         new_storage = deepcopy(result.storage)
 
-        self.assertEqual(len(result.operations), 3)
+        self.assertEqual(len(result.operations), 2)
         self.assertFalse(new_storage['local_params']['fa_tzBTC_callback_status'])
 
         self_address = self.lending_contract.context.get_self_address()
@@ -46,7 +46,7 @@ class SellTzBTCEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(operation['parameters']['entrypoint'], 'approve')
 
         self.assertAddressFromBytesEquals(operation['parameters']['value']['args'][0]['bytes'], dex_contract_address)  # spender
-        self.assertEqual(int(operation['parameters']['value']['args'][1]['int']), INFINITY_NAT)  # value
+        self.assertEqual(int(operation['parameters']['value']['args'][1]['int']), 300)  # value
 
         # tokenToXtz
         operation = result.operations[1]
@@ -61,15 +61,52 @@ class SellTzBTCEntryUnitTest(LendingContractBaseTestCase):
         self.assertEqual(int(params[2]['int']), 0)  # minXtzBought
         self.assertEqual(int(params[3]['int']), 108) # deadline
 
-        # approve tzBTC
-        operation = result.operations[2]
-        self.assertEqual(operation['kind'], 'transaction')
-        self.assertEqual(int(operation['amount']), 0)
-        self.assertEqual(operation['destination'], fa_tzBTC_address)
-        self.assertEqual(operation['parameters']['entrypoint'], 'approve') 
+    def test_dust(self):
+        dex_contract_address = self.another_dex_contract.context.address
+        fa_tzBTC_address = self.tzbtc_token.context.address
 
-        self.assertAddressFromBytesEquals(operation['parameters']['value']['args'][0]['bytes'], dex_contract_address)  # spender
-        self.assertEqual(int(operation['parameters']['value']['args'][1]['int']), 0)  # value
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['tzBTC_dust_threshold'] = 100
+        initial_storage['tzBTC_dust'] = 50
+        initial_storage['local_params']['fa_tzBTC_callback_status'] = True
+
+        # the residual 100 is kept, the finalize credits its value to the farmer
+        result = run_code_patched(
+            self.lending_contract.sellTzBTC(150),
+            storage = initial_storage,
+            sender = fa_tzBTC_address,
+            now = 107,
+        )
+        self.assertEqual(len(result.operations), 0)
+        self.assertEqual(result.storage['tzBTC_dust'], 150)
+        self.assertEqual(result.storage['local_params']['tzBTC_dust_delta'], 100)
+        self.assertFalse(result.storage['local_params']['fa_tzBTC_callback_status'])
+
+        # the residual 101 is sold without the kept dust
+        result = run_code_patched(
+            self.lending_contract.sellTzBTC(151),
+            storage = initial_storage,
+            sender = fa_tzBTC_address,
+            now = 107,
+        )
+        self.assertEqual(len(result.operations), 2)
+        self.assertEqual(result.storage['tzBTC_dust'], 50)
+        self.assertEqual(result.storage['local_params']['tzBTC_dust_delta'], 0)
+        self.assertEqual(int(result.operations[0]['parameters']['value']['args'][1]['int']), 101)  # approve value
+        self.assertEqual(int(result.operations[1]['parameters']['value'][1]['int']), 101)  # tokensSold
+
+        # addLiquidity used a part of the dust, the farmer pays for it
+        result = run_code_patched(
+            self.lending_contract.sellTzBTC(30),
+            storage = initial_storage,
+            sender = fa_tzBTC_address,
+            now = 107,
+        )
+        self.assertEqual(len(result.operations), 0)
+        self.assertEqual(result.storage['tzBTC_dust'], 30)
+        self.assertEqual(result.storage['local_params']['tzBTC_dust_delta'], -20)
 
     def test_forbidden(self):
         liquidity_baking_address = self.dex_contract.context.address
@@ -78,10 +115,10 @@ class SellTzBTCEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
 
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['dex_contract_address'] = dex_contract_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['local_params']['fa_tzBTC_callback_status'] = True
 
         # admin tries flag true
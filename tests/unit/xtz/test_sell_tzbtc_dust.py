@@ -0,0 +1,71 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import LendingContractBaseTestCase, run_code_patched
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, DEFAULT_STORAGE
+
+
+class SellTzBTCDustEntryUnitTest(LendingContractBaseTestCase):
+
+    def test_basic(self):
+        dex_contract_address = self.another_dex_contract.context.address
+        fa_tzBTC_address = self.tzbtc_token.context.address
+
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['tzBTC_dust'] = 700
+
+        result = run_code_patched(
+            self.lending_contract.sellTzBTCDust(2_000),
+            balance = 500,
+            storage = initial_storage,
+            sender = ALICE_ADDRESS,
+            now = 107,
+        )
+        new_storage = deepcopy(result.storage)
+
+        self.assertEqual(new_storage['tzBTC_dust'], 0)
+        self.assertEqual(len(result.operations), 2)
+
+        self_address = self.lending_contract.context.get_self_address()
+
+        # approve tzBTC
+        operation = result.operations[0]
+        self.assertEqual(operation['destination'], fa_tzBTC_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'approve')
+        self.assertAddressFromBytesEquals(operation['parameters']['value']['args'][0]['bytes'], dex_contract_address)  # spender
+        self.assertEqual(int(operation['parameters']['value']['args'][1]['int']), 700)  # value
+
+        # tokenToXtz
+        operation = result.operations[1]
+        self.assertEqual(operation['destination'], dex_contract_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'tokenToXtz')
+
+        params = operation['parameters']['value']
+        self.assertAddressFromBytesEquals(params[0]['bytes'], self_address)  # to
+        self.assertEqual(int(params[1]['int']), 700)  # tokensSold
+        self.assertEqual(int(params[2]['int']), 2_000)  # minXtzBought
+
+        # the depositors paid for the dust in sellTzBTC, the xtz stays on the balance
+        del new_storage['tzBTC_dust']
+        del initial_storage['tzBTC_dust']
+        self.assertDictEqual(new_storage, initial_storage)
+
+    def test_fail_cases(self):
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['tzBTC_dust'] = 700
+
+        # not admin
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.sellTzBTCDust(0).run_code(storage=initial_storage, sender=BOB_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
+
+        # nothing to sell
+        initial_storage['tzBTC_dust'] = 0
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.sellTzBTCDust(0).run_code(storage=initial_storage, sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'no tzBTC dust')
@@ -19,13 +19,56 @@ class SetDexContractEntryUnitTest(LendingContractBaseTestCase):
             sender = ALICE_ADDRESS,
         )
 
-        self.assertEqual(result.storage['dex_contract_address'], CONTRACT_ADDRESS)
-        del initial_storage['dex_contract_address']
-        del result.storage['dex_contract_address']
+        self.assertEqual(result.storage['settings']['dex_contract_address'], CONTRACT_ADDRESS)
+        del initial_storage['settings']['dex_contract_address']
+        del result.storage['settings']['dex_contract_address']
 
         self.assertDictEqual(result.storage, initial_storage)
         self.assertEqual(len(result.operations), 0)
 
+    def test_persistent_approval(self):
+        liquidity_baking_address = self.dex_contract.context.address
+        dex_contract_address = self.another_dex_contract.context.address
+        fa_tzBTC_address = self.tzbtc_token.context.address
+
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['dex_contract_address'] = dex_contract_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['persistent_approval'] = True
+        initial_storage['settings']['dex_contract_approved'] = True
+
+        # the standing allowance of the previous DEX is revoked, the new DEX isn't approved in the same call
+        for address in (CONTRACT_ADDRESS, liquidity_baking_address):
+            result = self.lending_contract.setDexContract(address).run_code(
+                storage = initial_storage,
+                sender = ALICE_ADDRESS,
+            )
+            self.assertEqual(result.storage['settings']['dex_contract_address'], address)
+            self.assertFalse(result.storage['settings']['dex_contract_approved'])
+            self.assertEqual(len(result.operations), 1)
+            operation = result.operations[0]
+            self.assertEqual(operation['destination'], fa_tzBTC_address)
+            self.assertEqual(operation['parameters']['entrypoint'], 'approve')
+            self.assertAddressFromBytesEquals(operation['parameters']['value']['args'][0]['bytes'], dex_contract_address)  # spender
+            self.assertEqual(int(operation['parameters']['value']['args'][1]['int']), 0)  # value
+
+        # the same DEX keeps its allowance
+        result = self.lending_contract.setDexContract(dex_contract_address).run_code(
+            storage = initial_storage,
+            sender = ALICE_ADDRESS,
+        )
+        self.assertEqual(len(result.operations), 0)
+        self.assertTrue(result.storage['settings']['dex_contract_approved'])
+
+        # without approveDexContract there is nothing to revoke
+        initial_storage['settings']['dex_contract_approved'] = False
+        result = self.lending_contract.setDexContract(CONTRACT_ADDRESS).run_code(
+            storage = initial_storage,
+            sender = ALICE_ADDRESS,
+        )
+        self.assertEqual(len(result.operations), 0)
+
     def test_forbidden_case(self):
         with self.assertRaises(MichelsonError) as context:
             storage = deepcopy(DEFAULT_STORAGE)
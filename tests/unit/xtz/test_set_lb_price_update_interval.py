@@ -0,0 +1,97 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import LendingContractBaseTestCase, run_code_patched
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, DEFAULT_STORAGE
+
+
+class SetLbPriceUpdateIntervalEntryUnitTest(LendingContractBaseTestCase):
+
+    def test_basic(self):
+        # case normal
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+
+        result = self.lending_contract.setLbPriceUpdateInterval(300).run_code(
+            storage = initial_storage,
+            sender = ALICE_ADDRESS,
+        )
+        new_storage = deepcopy(result.storage)
+
+        self.assertEqual(len(result.operations), 0)
+        self.assertEqual(new_storage['settings']['lb_price_update_interval'], 300)
+
+        del new_storage['settings']['lb_price_update_interval']
+        del initial_storage['settings']['lb_price_update_interval']
+        self.assertDictEqual(new_storage, initial_storage)
+
+    def test_forbidden(self):
+        # forbidden case
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.setLbPriceUpdateInterval(0).run_code(sender=BOB_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
+
+        # max value error case
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.setLbPriceUpdateInterval(301).run_code(sender=ALICE_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'lb price update interval max value error')
+
+    def test_throttled_refresh(self):
+        initial_storage = deepcopy(DEFAULT_STORAGE)
+        initial_storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        initial_storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        initial_storage['settings']['fa_lb_address'] = self.lqt_token.context.address
+        initial_storage['settings']['lb_price_update_interval'] = 300
+
+        # entry points skip the refresh in the interval and move index_update_dttm only
+        result = run_code_patched(
+            self.lending_contract.depositLending(),
+            amount = 1_000,
+            storage = initial_storage,
+            now = 299,
+            sender = BOB_ADDRESS,
+        )
+        self.assertEqual(len(result.operations), 0)
+        self.assertEqual(result.storage['index_update_dttm'], 299)
+        self.assertEqual(result.storage['lb_price_update_dttm'], 0)
+
+        # the refresh after the interval
+        result = run_code_patched(
+            self.lending_contract.depositLending(),
+            amount = 1_000,
+            storage = result.storage,
+            now = 300,
+            sender = BOB_ADDRESS,
+        )
+        self.assertEqual(len(result.operations), 3)
+        self.assertEqual(result.operations[2]['parameters']['entrypoint'], 'calculateLbPrice')
+
+        # updateIndexes refreshes in the interval
+        result = run_code_patched(
+            self.lending_contract.updateIndexes(),
+            storage = initial_storage,
+            now = 60,
+            sender = BOB_ADDRESS,
+        )
+        self.assertEqual(len(result.operations), 3)
+
+    def test_clamp_since_last_refresh(self):
+        self_address = self.lending_contract.context.get_self_address()
+
+        # the change is bounded by the time since lb_price_update_dttm, not since index_update_dttm
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['index_update_dttm'] = 86_000
+        storage['lb_price'] = 1_000_000_000_000
+        storage['local_params']['lqt_total'] = 3_000_000
+        storage['local_params']['tzbtc_pool'] = 2_000
+        result = run_code_patched(
+            self.lending_contract.calculateLbPrice(),
+            storage = storage,
+            now = 86400,
+            sender = self_address,
+        )
+        self.assertEqual(result.storage['lb_price'], 500_003_200_000)
+        self.assertEqual(result.storage['index_update_dttm'], 86400)
+        self.assertEqual(result.storage['lb_price_update_dttm'], 86400)
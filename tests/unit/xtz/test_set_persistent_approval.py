@@ -0,0 +1,99 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import LendingContractBaseTestCase, run_code_patched
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, DEFAULT_STORAGE, INFINITY_NAT
+
+
+class SetPersistentApprovalEntryUnitTest(LendingContractBaseTestCase):
+
+    def get_storage(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        storage['settings']['dex_contract_address'] = self.another_dex_contract.context.address
+        storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        storage['settings']['fa_lb_address'] = self.lqt_token.context.address
+        return storage
+
+    def assertApprove(self, operation, token_address, spender, value):
+        self.assertEqual(operation['destination'], token_address)
+        self.assertEqual(operation['parameters']['entrypoint'], 'approve')
+        self.assertAddressFromBytesEquals(operation['parameters']['value']['args'][0]['bytes'], spender)  # spender
+        self.assertEqual(int(operation['parameters']['value']['args'][1]['int']), value)  # value
+
+    def test_basic(self):
+        liquidity_baking_address = self.dex_contract.context.address
+        dex_contract_address = self.another_dex_contract.context.address
+        fa_tzBTC_address = self.tzbtc_token.context.address
+        fa_lb_address = self.lqt_token.context.address
+        initial_storage = self.get_storage()
+
+        # standing allowances are approved once
+        result = self.lending_contract.setPersistentApproval(True).run_code(
+            storage = initial_storage,
+            sender = ALICE_ADDRESS,
+        )
+        new_storage = deepcopy(result.storage)
+        self.assertTrue(new_storage['settings']['persistent_approval'])
+        # dex_contract_address is approved by a separate approveDexContract call
+        self.assertEqual(len(result.operations), 2)
+        self.assertApprove(result.operations[0], fa_lb_address, liquidity_baking_address, INFINITY_NAT)
+        self.assertApprove(result.operations[1], fa_tzBTC_address, liquidity_baking_address, INFINITY_NAT)
+
+        del new_storage['settings']['persistent_approval']
+        del initial_storage['settings']['persistent_approval']
+        self.assertDictEqual(new_storage, initial_storage)
+
+        # the same mode doesn't approve again
+        result = self.lending_contract.setPersistentApproval(True).run_code(
+            storage = deepcopy(result.storage),
+            sender = ALICE_ADDRESS,
+        )
+        self.assertEqual(len(result.operations), 0)
+
+        # allowances are reset when the mode is disabled
+        storage = deepcopy(result.storage)
+        result = self.lending_contract.setPersistentApproval(False).run_code(
+            storage = storage,
+            sender = ALICE_ADDRESS,
+        )
+        self.assertFalse(result.storage['settings']['persistent_approval'])
+        self.assertEqual(len(result.operations), 2)
+        self.assertApprove(result.operations[0], fa_lb_address, liquidity_baking_address, 0)
+        self.assertApprove(result.operations[1], fa_tzBTC_address, liquidity_baking_address, 0)
+
+        # including the allowance of approveDexContract
+        storage['settings']['dex_contract_approved'] = True
+        result = self.lending_contract.setPersistentApproval(False).run_code(
+            storage = storage,
+            sender = ALICE_ADDRESS,
+        )
+        self.assertFalse(result.storage['settings']['dex_contract_approved'])
+        self.assertEqual(len(result.operations), 3)
+        self.assertApprove(result.operations[2], fa_tzBTC_address, dex_contract_address, 0)
+
+    def test_dex_calls(self):
+        # investLB and redeemLB skip the approve and reset pairs
+        for call, kwargs, storage in (
+            (self.lending_contract.investLB(10, 25, 30, 40, 0), dict(amount = 15, balance = 300), self.get_storage()),
+            (self.lending_contract.redeemLB(250, 777), dict(balance = 500), self.get_storage()),
+        ):
+            storage['lb_shares'] = 400
+            storage['liquidity_book'] = {BOB_ADDRESS: {'net_credit': 100, 'gross_credit': 200, 'lb_shares': 300}}
+            result = run_code_patched(call, storage = deepcopy(storage), now = 107, sender = BOB_ADDRESS, **kwargs)
+
+            storage['settings']['persistent_approval'] = True
+            storage['settings']['dex_contract_approved'] = True
+            persistent_result = run_code_patched(call, storage = deepcopy(storage), now = 107, sender = BOB_ADDRESS, **kwargs)
+
+            self.assertEqual(len(persistent_result.operations), len(result.operations) - 2)
+            for operation in persistent_result.operations:
+                self.assertNotEqual(operation['parameters']['entrypoint'], 'approve')
+
+    def test_forbidden(self):
+        with self.assertRaises(MichelsonError) as context:
+            self.lending_contract.setPersistentApproval(True).run_code(storage=deepcopy(DEFAULT_STORAGE), sender=BOB_ADDRESS)
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
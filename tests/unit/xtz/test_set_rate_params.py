@@ -17,9 +17,9 @@ class SetRateParamsEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
         # case normal: 10 20 30 40
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         result = run_code_patched(
             self.lending_contract.setRateParams(10, 20, 30, 40),
             amount = 0,
@@ -73,9 +73,9 @@ class SetRateParamsEntryUnitTest(LendingContractBaseTestCase):
 
         # case 2: 50 60 70 80
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         result = run_code_patched(
             self.lending_contract.setRateParams(50, 60, 70, 80),
             amount = 0,
@@ -103,9 +103,9 @@ class SetRateParamsEntryUnitTest(LendingContractBaseTestCase):
 
         # max available values 12857 0 100 100
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         result = run_code_patched(
             self.lending_contract.setRateParams(12857, 0, 100, 100),
             amount = 0,
@@ -137,25 +137,25 @@ class SetRateParamsEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
         with self.assertRaises(MichelsonError) as context:
             storage = deepcopy(DEFAULT_STORAGE)
-            storage['liquidity_baking_address'] = liquidity_baking_address
-            storage['fa_tzBTC_address'] = fa_tzBTC_address
-            storage['fa_lb_address'] = fa_lb_address
+            storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+            storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+            storage['settings']['fa_lb_address'] = fa_lb_address
             self.lending_contract.setRateParams(12857, 1, 10, 20).run_code(storage=storage, sender=ALICE_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'rate2 max value error')
 
         with self.assertRaises(MichelsonError) as context:
             storage = deepcopy(DEFAULT_STORAGE)
-            storage['liquidity_baking_address'] = liquidity_baking_address
-            storage['fa_tzBTC_address'] = fa_tzBTC_address
-            storage['fa_lb_address'] = fa_lb_address
+            storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+            storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+            storage['settings']['fa_lb_address'] = fa_lb_address
             self.lending_contract.setRateParams(10, 20, 10, 101).run_code(storage=storage, sender=ALICE_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'wrong threshold percent')
 
         with self.assertRaises(MichelsonError) as context:
             storage = deepcopy(DEFAULT_STORAGE)
-            storage['liquidity_baking_address'] = liquidity_baking_address
-            storage['fa_tzBTC_address'] = fa_tzBTC_address
-            storage['fa_lb_address'] = fa_lb_address
+            storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+            storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+            storage['settings']['fa_lb_address'] = fa_lb_address
             self.lending_contract.setRateParams(10, 20, 30, 20).run_code(storage=storage, sender=ALICE_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'wrong threshold percent')
 
@@ -42,9 +42,9 @@ class UpdateIndexesEntryUnitTest(LendingContractBaseTestCase):
             for is_working in (True, False):
                 with self.subTest(f'percent = {percent} is_working = {is_working}'):
                     storage = deepcopy(DEFAULT_STORAGE)
-                    storage['liquidity_baking_address'] = liquidity_baking_address
-                    storage['fa_tzBTC_address'] = fa_tzBTC_address
-                    storage['fa_lb_address'] = fa_lb_address
+                    storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+                    storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+                    storage['settings']['fa_lb_address'] = fa_lb_address
                     storage['is_working'] = is_working
 
                     storage['totalSupply'] = 100
@@ -75,9 +75,9 @@ class UpdateIndexesEntryUnitTest(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
         fa_lb_address = self.lqt_token.context.address
         storage = deepcopy(DEFAULT_STORAGE)
-        storage['liquidity_baking_address'] = liquidity_baking_address
-        storage['fa_tzBTC_address'] = fa_tzBTC_address
-        storage['fa_lb_address'] = fa_lb_address
+        storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        storage['settings']['fa_lb_address'] = fa_lb_address
         storage['rate_params'] = CONST_RATE_PARAMS
 
         storage['totalSupply'] = 25
@@ -105,9 +105,9 @@ class UpdateIndexesEntryUnitTest(LendingContractBaseTestCase):
 
         with self.subTest('1 approx year'):
             storage = deepcopy(DEFAULT_STORAGE)
-            storage['liquidity_baking_address'] = liquidity_baking_address
-            storage['fa_tzBTC_address'] = fa_tzBTC_address
-            storage['fa_lb_address'] = fa_lb_address
+            storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+            storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+            storage['settings']['fa_lb_address'] = fa_lb_address
             storage['rate_params'] = CONST_RATE_PARAMS
             dttm_delta = 7 * 24 * 60 * 60
             now = dttm_delta
@@ -135,9 +135,9 @@ class UpdateIndexesEntryUnitTest(LendingContractBaseTestCase):
         for percent in (0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100):
             with self.subTest(percent):
                 storage = deepcopy(DEFAULT_STORAGE)
-                storage['liquidity_baking_address'] = liquidity_baking_address
-                storage['fa_tzBTC_address'] = fa_tzBTC_address
-                storage['fa_lb_address'] = fa_lb_address
+                storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+                storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+                storage['settings']['fa_lb_address'] = fa_lb_address
                 storage['rate_params'] = LINEAR_RATE_PARAMS
 
                 storage['deposit_index'] = 3 * INITIAL_INDEX_VALUE
@@ -162,9 +162,9 @@ class UpdateIndexesEntryUnitTest(LendingContractBaseTestCase):
         for percent in (100, 110, 120):
             with self.subTest(percent):
                 storage = deepcopy(DEFAULT_STORAGE)
-                storage['liquidity_baking_address'] = liquidity_baking_address
-                storage['fa_tzBTC_address'] = fa_tzBTC_address
-                storage['fa_lb_address'] = fa_lb_address
+                storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+                storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+                storage['settings']['fa_lb_address'] = fa_lb_address
                 storage['rate_params'] = LINEAR_RATE_PARAMS
 
                 storage['deposit_index'] = 3 * INITIAL_INDEX_VALUE
@@ -195,9 +195,9 @@ class UpdateIndexesEntryUnitTest(LendingContractBaseTestCase):
         for percent in (0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100):
             with self.subTest(percent):
                 storage = deepcopy(DEFAULT_STORAGE)
-                storage['liquidity_baking_address'] = liquidity_baking_address
-                storage['fa_tzBTC_address'] = fa_tzBTC_address
-                storage['fa_lb_address'] = fa_lb_address
+                storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+                storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+                storage['settings']['fa_lb_address'] = fa_lb_address
                 storage['rate_params'] = deepcopy(CONST_RATE_PARAMS)
                 storage['rate_params']['rate_1'] = 1_000_000_000_000
 
@@ -226,9 +226,9 @@ class UpdateIndexesEntryUnitTest(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
         fa_lb_address = self.lqt_token.context.address
         storage = deepcopy(DEFAULT_STORAGE)
-        storage['liquidity_baking_address'] = liquidity_baking_address
-        storage['fa_tzBTC_address'] = fa_tzBTC_address
-        storage['fa_lb_address'] = fa_lb_address
+        storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        storage['settings']['fa_lb_address'] = fa_lb_address
         result = run_code_patched(
             self.lending_contract.updateIndexes(),
             amount = 0,
@@ -272,9 +272,9 @@ class UpdateIndexesEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
         initial_now = int(time.time())
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['index_update_dttm'] = initial_now
 
         initial_storage['deposit_index'] = 1_500_000_000_000
@@ -0,0 +1,81 @@
+from copy import deepcopy
+
+
+from pytezos.rpc.errors import MichelsonError
+
+
+from ..base import LendingContractBaseTestCase, run_code_patched
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, CONTRACT_ADDRESS, DEFAULT_STORAGE
+
+
+class UpdateLbPriceEntryUnitTest(LendingContractBaseTestCase):
+    def test_basic(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        storage['settings']['fa_lb_address'] = self.lqt_token.context.address
+        storage['settings']['router_address'] = CONTRACT_ADDRESS
+        storage['lb_price'] = 1_000_000_000
+
+        # pool values of the router replace the farm requests, the price is clamped as in calculateLbPrice
+        result = run_code_patched(
+            self.lending_contract.updateLbPrice(tzbtc_pool=2_000, lqt_total=3_000_000),
+            storage = storage,
+            now = 86400,
+            sender = CONTRACT_ADDRESS,
+            source = BOB_ADDRESS,
+        )
+        new_storage = deepcopy(result.storage)
+
+        self.assertEqual(len(result.operations), 0)
+        self.assertEqual(new_storage['lb_price'], 666_666_666)
+        self.assertEqual(new_storage['local_params']['tzbtc_pool'], 2_000)
+        self.assertEqual(new_storage['local_params']['lqt_total'], 3_000_000)
+        self.assertEqual(new_storage['index_update_dttm'], 86400)
+        self.assertEqual(new_storage['lb_price_update_dttm'], 86400)
+
+        # the price is calculated once per block
+        result = run_code_patched(
+            self.lending_contract.updateLbPrice(tzbtc_pool=1_000, lqt_total=3_000_000),
+            storage = new_storage,
+            now = 86400,
+            sender = CONTRACT_ADDRESS,
+            source = BOB_ADDRESS,
+        )
+        self.assertDictEqual(result.storage, new_storage)
+
+        # routed calls in the same block don't refresh the price
+        new_storage['ledger'] = {BOB_ADDRESS: {'balance': 1_000, 'approvals': {}}}
+        new_storage['totalSupply'] = 1_000
+        result = run_code_patched(
+            self.lending_contract.redeemLending(0),
+            storage = new_storage,
+            balance = 100,
+            now = 86400,
+            sender = CONTRACT_ADDRESS,
+            source = BOB_ADDRESS,
+        )
+        self.assertTrue(all(
+            operation['parameters']['entrypoint'] not in ('getTotalSupply', 'getBalance')
+            for operation in result.operations if 'parameters' in operation
+        ))
+
+    def test_forbidden(self):
+        # no router
+        with self.assertRaises(MichelsonError) as context:
+            run_code_patched(
+                self.lending_contract.updateLbPrice(tzbtc_pool=2_000, lqt_total=3_000_000),
+                storage = deepcopy(DEFAULT_STORAGE),
+                sender = CONTRACT_ADDRESS,
+            )
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
+
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['settings']['router_address'] = CONTRACT_ADDRESS
+        with self.assertRaises(MichelsonError) as context:
+            run_code_patched(
+                self.lending_contract.updateLbPrice(tzbtc_pool=2_000, lqt_total=3_000_000),
+                storage = storage,
+                sender = BOB_ADDRESS,
+            )
+        self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
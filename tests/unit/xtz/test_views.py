@@ -0,0 +1,109 @@
+from copy import deepcopy
+
+from kordfi.farm import project_indexes
+from ..base import LendingContractBaseTestCase, run_code_patched, run_view_patched
+from ..constants import ALICE_ADDRESS, BOB_ADDRESS, CLARE_ADDRESS, DEFAULT_STORAGE, CONST_RATE_PARAMS
+
+
+class ViewsUnitTest(LendingContractBaseTestCase):
+    def get_storage(self):
+        storage = deepcopy(DEFAULT_STORAGE)
+        storage['settings']['liquidity_baking_address'] = self.dex_contract.context.address
+        storage['settings']['fa_tzBTC_address'] = self.tzbtc_token.context.address
+        storage['settings']['fa_lb_address'] = self.lqt_token.context.address
+        storage['settings']['oracle_address'] = self.oracle.context.address
+        storage['totalSupply'] = 25_000_000_000_000
+        storage['total_net_credit'] = 17_000_000_000_000
+        storage['total_gross_credit'] = 18_000_000_000_000
+        storage['ledger'] = {BOB_ADDRESS: {'balance': 10_000_000_000_000, 'approvals': {}}}
+        storage['liquidity_book'] = {ALICE_ADDRESS: {
+            'net_credit': 17_000_000_000_000,
+            'gross_credit': 18_000_000_000_000,
+            'lb_shares': 9,
+        }}
+        return storage
+
+    def get_price_results(self, price):
+        return {f'{self.oracle.context.address}%get_price': price}
+
+    def test_indexes_equal_update_indexes(self):
+        storage = self.get_storage()
+        for rate_params in (DEFAULT_STORAGE['rate_params'], CONST_RATE_PARAMS):
+            for now in (0, 1, 86400, 365 * 86400):
+                with self.subTest(f'now = {now}'):
+                    storage['rate_params'] = rate_params
+                    indexes = run_view_patched(self.lending_contract.getIndexes(), storage=storage, now=now)
+                    result = run_code_patched(
+                        self.lending_contract.updateIndexes(),
+                        storage = storage,
+                        now = now,
+                        sender = BOB_ADDRESS,
+                    )
+                    self.assertEqual(indexes, {
+                        'gross_credit_index': result.storage['gross_credit_index'],
+                        'net_credit_index': result.storage['net_credit_index'],
+                        'deposit_index': result.storage['deposit_index'],
+                    })
+                    self.assertEqual(indexes, project_indexes(storage, now))
+
+    def test_position(self):
+        storage = self.get_storage()
+        # debt is 18 xtz, 9 LB shares cost 18 * price
+        position = run_view_patched(
+            self.lending_contract.getPosition(ALICE_ADDRESS),
+            storage = storage,
+            view_results = self.get_price_results(100),
+        )
+        self.assertEqual(position, {
+            'lb_shares': 9,
+            'debt': 18_000_000,
+            'lb_shares_value': 1_800,
+            'debt_value': 180_000_000_000,
+            'liquidation_allowed': True,
+        })
+
+        storage['lb_price'] = 120_000_000_000_000_000_000
+        position = run_view_patched(
+            self.lending_contract.getPosition(ALICE_ADDRESS),
+            storage = storage,
+            view_results = self.get_price_results(100),
+        )
+        self.assertEqual(position['lb_shares_value'], 216_000_000_000)
+        self.assertFalse(position['liquidation_allowed'])
+
+        position = run_view_patched(
+            self.lending_contract.getPosition(ALICE_ADDRESS),
+            storage = storage,
+            view_results = self.get_price_results(100),
+            now = 86400,
+        )
+        self.assertEqual(position['debt'], 18_004_229)
+
+        position = run_view_patched(
+            self.lending_contract.getPosition(CLARE_ADDRESS),
+            storage = storage,
+            view_results = self.get_price_results(100),
+        )
+        self.assertEqual(position['debt'], 0)
+        self.assertFalse(position['liquidation_allowed'])
+
+    def test_max_redeemable(self):
+        storage = self.get_storage()
+        # 25 xtz supplied, 17 xtz loaned
+        self.assertEqual(
+            run_view_patched(self.lending_contract.getMaxRedeemable(BOB_ADDRESS), storage=storage, balance=100_000_000),
+            8_000_000,
+        )
+        self.assertEqual(
+            run_view_patched(self.lending_contract.getMaxRedeemable(BOB_ADDRESS), storage=storage, balance=5_000_000),
+            5_000_000,
+        )
+        storage['total_net_credit'] = 0
+        self.assertEqual(
+            run_view_patched(self.lending_contract.getMaxRedeemable(BOB_ADDRESS), storage=storage, balance=100_000_000),
+            10_000_000,
+        )
+        self.assertEqual(
+            run_view_patched(self.lending_contract.getMaxRedeemable(CLARE_ADDRESS), storage=storage, balance=100_000_000),
+            0,
+        )
@@ -17,9 +17,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # case normal
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['gross_credit_index'] = 1_500_000_000_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000
         initial_storage['deposit_index'] = 500_000_000_000
@@ -44,9 +44,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # another normal case
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['gross_credit_index'] = 1_500_000_000_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000
         initial_storage['deposit_index'] = 500_000_000_000
@@ -71,9 +71,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # case small amount
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['gross_credit_index'] = 1_500_000_500_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000
         initial_storage['deposit_index'] = 2_000_000_000_000
@@ -103,9 +103,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # case zero
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['gross_credit_index'] = 1_500_000_000_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000
         initial_storage['deposit_index'] = 1_000_000_000_000
@@ -125,9 +125,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # case negative
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['gross_credit_index'] = 1_500_000_000_000
         initial_storage['total_gross_credit'] = 2_000_000_000_000
         initial_storage['deposit_index'] = 2_000_000_000_000
@@ -147,9 +147,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
 
         # case positive but mutez amount zero
         initial_storage = deepcopy(DEFAULT_STORAGE)
-        initial_storage['liquidity_baking_address'] = liquidity_baking_address
-        initial_storage['fa_tzBTC_address'] = fa_tzBTC_address
-        initial_storage['fa_lb_address'] = fa_lb_address
+        initial_storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        initial_storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        initial_storage['settings']['fa_lb_address'] = fa_lb_address
         initial_storage['gross_credit_index'] = 1_500_000_499_999
         initial_storage['total_gross_credit'] = 2_000_000_000_000
         initial_storage['deposit_index'] = 2_000_000_000_000
@@ -173,9 +173,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
         fa_lb_address = self.lqt_token.context.address
         with self.assertRaises(MichelsonError) as context:
             storage = deepcopy(DEFAULT_STORAGE)
-            storage['liquidity_baking_address'] = liquidity_baking_address
-            storage['fa_tzBTC_address'] = fa_tzBTC_address
-            storage['fa_lb_address'] = fa_lb_address
+            storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+            storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+            storage['settings']['fa_lb_address'] = fa_lb_address
             self.lending_contract.withdrawCommission().run_code(storage=storage, sender=BOB_ADDRESS)
         self.assertEqual(str(context.exception.args[0]['with']['string']), 'Forbidden.')
 
@@ -185,9 +185,9 @@ class WithdrawCommissionEntryUnitTest(LendingContractBaseTestCase):
         fa_tzBTC_address = self.tzbtc_token.context.address
         fa_lb_address = self.lqt_token.context.address
         storage = deepcopy(DEFAULT_STORAGE)
-        storage['liquidity_baking_address'] = liquidity_baking_address
-        storage['fa_tzBTC_address'] = fa_tzBTC_address
-        storage['fa_lb_address'] = fa_lb_address
+        storage['settings']['liquidity_baking_address'] = liquidity_baking_address
+        storage['settings']['fa_tzBTC_address'] = fa_tzBTC_address
+        storage['settings']['fa_lb_address'] = fa_lb_address
         result = run_code_patched(
             self.lending_contract.withdrawCommission(),
             amount = 0,